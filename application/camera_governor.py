@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class CameraLevel:
+    resolution: str
+    fps: int
+    depth_mode: str
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "CameraLevel":
+        return cls(resolution=config["resolution"], fps=config["fps"], depth_mode=config["depth_mode"])
+
+    def describe(self) -> str:
+        return f"{self.resolution}@{self.fps} {self.depth_mode}"
+
+class CameraGovernor:
+    """Выбирает режим камеры, чтобы удержать частоту цикла ZED.
+
+    Уровень 0 — режим из конфига, дальше — zed.governor.levels по убыванию
+    нагрузки. Раз в interval секунд сравнивается фактическая частота кадров
+    с ожидаемой (min(target_rate, fps уровня)), загрузка CPU и температура
+    с порогами. Перегрузка дольше down_hold — шаг вниз, запас дольше
+    up_hold — шаг вверх. После смены уровня таймеры сбрасываются, чтобы
+    переоткрытие камеры не засчитывалось как перегрузка.
+    """
+
+    def __init__(self, base: CameraLevel, config: Dict, cpu_load: Callable[[], float],
+                 temperature: Callable[[], Optional[float]]):
+        self.base = base
+        self.cpu_load = cpu_load
+        self.temperature = temperature
+        self.level = 0
+        self.levels: List[CameraLevel] = [base]
+        self.window_start: Optional[float] = None
+        self.frames = 0
+        self.busy = 0.0
+        self.overloaded_since: Optional[float] = None
+        self.relaxed_since: Optional[float] = None
+        self.apply_config(config)
+
+    def apply_config(self, config: Dict) -> None:
+        self.enabled = config["enabled"]
+        self.target_rate = config["target_rate"]
+        self.tolerance = config["tolerance"]
+        self.cpu_high = config["cpu_high"]
+        self.cpu_low = config["cpu_low"]
+        self.thermal_high = config["thermal_high"]
+        self.thermal_low = config["thermal_low"]
+        self.down_hold = config["down_hold"]
+        self.up_hold = config["up_hold"]
+        self.interval = config["interval"]
+        current = self.levels[self.level]
+        self.levels = [self.base] + [level for level in map(CameraLevel.from_config, config["levels"])
+                                     if level != self.base]
+        self.level = self.levels.index(current) if current in self.levels else 0
+        logger.info(f"CameraGovernor {'enabled' if self.enabled else 'disabled'}: target {self.target_rate} Hz, "
+                    f"levels {', '.join(level.describe() for level in self.levels)}")
+
+    @property
+    def current(self) -> CameraLevel:
+        return self.levels[self.level]
+
+    def _reset(self, now: float) -> None:
+        self.window_start = now
+        self.frames = 0
+        self.busy = 0.0
+        self.overloaded_since = None
+        self.relaxed_since = None
+
+    def hold(self, level: CameraLevel) -> None:
+        # Камера не открылась в новом режиме и осталась в прежнем
+        if level in self.levels:
+            self.level = self.levels.index(level)
+        self._reset(0.0)
+        self.window_start = None
+
+    def update(self, now: float, loop_seconds: float) -> Optional[CameraLevel]:
+        """Учитывает кадр; возвращает новый уровень, если его нужно применить."""
+        if not self.enabled:
+            # При выключении возвращаемся к режиму из конфига
+            if self.level:
+                self.level = 0
+                logger.info(f"Camera governor disabled, restoring {self.current.describe()}")
+                return self.current
+            return None
+        if self.window_start is None:
+            self._reset(now)
+        self.frames += 1
+        self.busy += loop_seconds
+        elapsed = now - self.window_start
+        if elapsed < self.interval:
+            return None
+
+        rate = self.frames / elapsed
+        busy_ms = self.busy / self.frames * 1000
+        cpu = self.cpu_load()
+        temperature = self.temperature()
+        self.window_start, self.frames, self.busy = now, 0, 0.0
+        expected = min(self.target_rate, self.current.fps)
+        reasons = []
+        if rate < expected * (1 - self.tolerance):
+            reasons.append(f"rate {rate:.1f}/{expected:g} Hz")
+        if cpu > self.cpu_high:
+            reasons.append(f"cpu {cpu:.0%}")
+        if temperature is not None and temperature > self.thermal_high:
+            reasons.append(f"temperature {temperature:.0f} C")
+        relaxed = not reasons and cpu < self.cpu_low and (temperature is None or temperature < self.thermal_low)
+
+        self.overloaded_since = (self.overloaded_since or now) if reasons else None
+        self.relaxed_since = (self.relaxed_since or now) if relaxed else None
+        step = 0
+        if reasons and now - self.overloaded_since >= self.down_hold and self.level < len(self.levels) - 1:
+            step = 1
+        elif relaxed and now - self.relaxed_since >= self.up_hold and self.level > 0:
+            step = -1
+        if not step:
+            return None
+        previous = self.current
+        self.level += step
+        # Окно начнётся с первого кадра после переоткрытия камеры
+        self._reset(now)
+        self.window_start = None
+        logger.warning(f"Camera {'down' if step > 0 else 'up'}: {previous.describe()} -> {self.current.describe()} "
+                       f"({', '.join(reasons) or f'cpu {cpu:.0%}'}; grab+process {busy_ms:.1f} ms, {rate:.1f} Hz)")
+        return self.current
@@ -3,10 +3,18 @@ from core.entities.gear import Gear, GearDirection
 from core.entities.command import CarCommand
 from core.interfaces.arduino_interface import ArduinoInterface
 from .state_manager import StateManager
+from .shared_slot import SharedSlot
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+NEUTRAL_MOTOR_VALUE = 90
+
+# Последняя отправленная в Arduino команда: время отправки, время снимка устройства, команда и значения сервоприводов.
+# Обе метки — настенное время, как у кадров камеры в датасете
+APPLIED_FIELDS = ("timestamp", "input_timestamp", "speed", "brake", "steering", "motor_value", "steering_value")
+
 class CarController:
     def __init__(self, arduino: ArduinoInterface, state_manager: StateManager):
         self.arduino = arduino
@@ -18,7 +26,9 @@ class CarController:
             "fast": Gear(max_speed=100, direction=GearDirection.FORWARD),
             "reverse": Gear(max_speed=30, direction=GearDirection.REVERSE)
         }
-        self.neutral_motor_value = 90
+        self.neutral_motor_value = NEUTRAL_MOTOR_VALUE
+        # Слот создаётся до fork: его читает логгер датасета в процессе камеры
+        self.applied = SharedSlot(APPLIED_FIELDS)
         logger.info("CarController initialized")
 
     def increase_gear(self) -> None:
@@ -43,6 +53,9 @@ class CarController:
         else:
             logger.debug("Already at minimum gear")
 
+    def gear_direction(self) -> GearDirection:
+        return self.gears[self.state_manager.get_state().get("gear", "turtle")].direction
+
     def process_command(self, command: CarCommand) -> None:
         try:
             if command.gear:
@@ -62,8 +75,13 @@ class CarController:
 
             steering_value = int(90 - (command.steering * 90))
             steering_value = max(0, min(180, steering_value))
-            self.state_manager.update_state(motor_value=motor_value, steering_value=steering_value)
             self.arduino.send_command(motor_value, steering_value)
+            now = time.time()
+            # Снимок устройства помечен монотонными часами, в слот кладём его настенное время
+            input_timestamp = now - (time.monotonic() - command.timestamp) if command.timestamp else 0.0
+            self.applied.write(now, input_timestamp, command.speed, command.brake, command.steering,
+                               motor_value, steering_value)
+            self.state_manager.update_state(motor_value=motor_value, steering_value=steering_value)
             logger.debug(f"Processed command: speed={command.speed:.2f}, brake={command.brake:.2f}, steering={command.steering:.2f}, motor={motor_value}, steering_val={steering_value}")
         except Exception as e:
             logger.error(f"Error processing command: {e}")
@@ -1,29 +1,76 @@
 from multiprocessing import Queue
+from typing import Dict, Optional
 from core.entities.command import CarCommand
 from .car_controller import CarController
 from .input_manager import InputManager
+from .safety_override import ObstacleBrakeOverride
+from .metrics import MetricSection, optional_histogram
 import logging
 import queue
+import time
 
 logger = logging.getLogger(__name__)
 
 class CommandProcessor:
-    def __init__(self, input_manager: InputManager, car_controller: CarController, command_queue: Queue):
+    def __init__(self, input_manager: InputManager, car_controller: CarController, command_queue: Queue,
+                 safety: Optional[ObstacleBrakeOverride] = None, tick: float = 0.02,
+                 metrics: Optional[MetricSection] = None):
         self.input_manager = input_manager
         self.car_controller = car_controller
         self.command_queue = command_queue
+        self.safety = safety
+        # Тик задаёт худший случай реакции на препятствие, если ввод перестал присылать команды
+        self.tick = tick
+        self.last_command: Optional[CarCommand] = None
+        self.input_to_output = optional_histogram(metrics, "input_to_output_seconds")
         logger.info("CommandProcessor initialized")
 
-    def process(self) -> None:
-        logger.info("CommandProcessor started")
-        while True:
-            try:
-                command = self.command_queue.get(timeout=0.1)
-                logger.debug(f"Processing command: speed={command.speed:.2f}, brake={command.brake:.2f}, steering={command.steering:.2f}")
-                self.car_controller.process_command(command)
-            except queue.Empty:
-                continue
-            except Exception as e:
-                logger.error(f"Error processing command: {e}")
-                self.input_manager.state_manager.update_state(last_error=f"Command process error: {e}")
-                break
\ No newline at end of file
+    def _latest_command(self) -> Optional[CarCommand]:
+        # Берём самую свежую команду, устаревшие из очереди отбрасываем
+        try:
+            command = self.command_queue.get(timeout=self.tick)
+        except queue.Empty:
+            return None
+        try:
+            while True:
+                command = self.command_queue.get_nowait()
+        except queue.Empty:
+            return command
+
+    def process(self) -> bool:
+        try:
+            command = self._latest_command()
+            if command is None:
+                if self.safety is None or self.last_command is None or not self.safety.obstacle_detected():
+                    if self.safety:
+                        self.safety.flush_state()
+                    return False
+                # Ввода нет, но есть препятствие или расстояние устарело: тормозим, не дожидаясь следующей команды
+                command = self.last_command
+            self.last_command = command
+            if self.safety:
+                command = self.safety.apply(command, self.car_controller.gear_direction)
+            logger.debug(f"Processing command: speed={command.speed:.2f}, brake={command.brake:.2f}, steering={command.steering:.2f}")
+            self.car_controller.process_command(command)
+            if self.input_to_output:
+                # Задержка от снимка устройства до отправки в ArduinoProcess; метка снимка монотонная
+                self.input_to_output.observe(time.monotonic() - command.timestamp if command.timestamp else 0.0)
+            if self.safety:
+                self.safety.flush_state()
+            return True
+        except Exception as e:
+            logger.error(f"Error processing command: {e}")
+            self.input_manager.state_manager.update_state(last_error=f"Command process error: {e}")
+            return False
+
+    def apply_config(self, config: Dict) -> None:
+        self.tick = config.get("safety", {}).get("tick", self.tick)
+        if self.safety:
+            self.safety.apply_config(config)
+
+    def drain(self) -> None:
+        try:
+            while True:
+                self.command_queue.get_nowait()
+        except queue.Empty:
+            pass
@@ -0,0 +1,145 @@
+import time
+import logging
+from typing import Dict, Iterator, Set, Tuple
+from core.interfaces.config_manager import ConfigManager
+from .runtime_config import RuntimeConfig
+from .state_manager import StateManager
+
+logger = logging.getLogger(__name__)
+
+# Настройки, которые процессы применяют на следующем тике
+HOT_SETTINGS = {
+    ("zed", "depth_threshold"),
+    ("zed", "governor", "enabled"),
+    ("zed", "governor", "target_rate"),
+    ("zed", "governor", "tolerance"),
+    ("zed", "governor", "interval"),
+    ("zed", "governor", "down_hold"),
+    ("zed", "governor", "up_hold"),
+    ("zed", "governor", "cpu_high"),
+    ("zed", "governor", "cpu_low"),
+    ("zed", "governor", "thermal_high"),
+    ("zed", "governor", "thermal_low"),
+    ("zed", "governor", "levels"),
+    ("gamepad", "deadzone"),
+    ("gamepad", "steering_expo"),
+    ("remote", "timeout"),
+    ("remote", "max_age"),
+    ("remote", "allowed_senders"),
+    ("control", "input_rate"),
+    ("input", "stale_timeout"),
+    ("safety", "enabled"),
+    ("safety", "tick"),
+    ("safety", "brake_duration"),
+    ("safety", "brake_strength"),
+    ("safety", "stale_timeout"),
+    ("stream", "max_fps"),
+    ("stream", "min_fps"),
+    ("stream", "quality"),
+    ("stream", "min_quality"),
+    ("stream", "min_scale"),
+    ("stream", "workers"),
+    ("stream", "full_rate_clients"),
+    ("stream", "client_timeout"),
+    ("stream", "depth_range"),
+    ("dataset", "rate"),
+    ("dataset", "quality"),
+    ("ui", "max_refresh_rate"),
+    ("ui", "stats_interval"),
+    ("logging", "level"),
+}
+
+# Настройки, требующие перезапуска одного процесса
+RESTART_SETTINGS = {
+    ("arduino", "backend"): "arduino",
+    ("arduino", "port"): "arduino",
+    ("arduino", "baud_rate"): "arduino",
+    ("arduino", "serial_number"): "arduino",
+    ("arduino", "write_timeout"): "arduino",
+    ("arduino", "reconnect_initial"): "arduino",
+    ("arduino", "reconnect_max"): "arduino",
+    ("gamepad", "joystick_index"): "gamepad",
+    ("remote", "host"): "remote",
+    ("remote", "port"): "remote",
+    ("remote", "key_file"): "remote",
+    ("zed", "camera_id"): "zed",
+    ("zed", "resolution"): "zed",
+    ("zed", "fps"): "zed",
+    ("zed", "depth_mode"): "zed",
+    ("zed", "depth_min"): "zed",
+    ("zed", "depth_max"): "zed",
+    ("zed", "output_dir"): "zed",
+    ("zed", "recording", "format"): "zed",
+    ("zed", "recording", "quality"): "zed",
+    ("zed", "recording", "workers"): "zed",
+    ("zed", "recording", "pool"): "zed",
+    ("zed", "recording", "chunk_frames"): "zed",
+    ("zed", "recording", "max_pending"): "zed",
+    ("dataset", "enabled"): "zed",
+    ("dataset", "output_dir"): "zed",
+    ("dataset", "depth_step"): "zed",
+    ("dataset", "chunk_bytes"): "zed",
+    ("dataset", "batch_bytes"): "zed",
+    ("dataset", "sync_interval"): "zed",
+    ("dataset", "max_pending"): "zed",
+    ("stream", "host"): "stream",
+    ("stream", "port"): "stream",
+    ("metrics", "host"): "metrics",
+    ("metrics", "port"): "metrics",
+}
+
+def _flatten(config: Dict, prefix: Tuple = ()) -> Iterator[Tuple[Tuple, object]]:
+    for key, value in config.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, prefix + (key,))
+        else:
+            yield prefix + (key,), value
+
+class ConfigWatcher:
+    def __init__(self, config_manager: ConfigManager, runtime_config: RuntimeConfig,
+                 state_manager: StateManager, process_manager, poll_interval: float = 1.0):
+        self.config_manager = config_manager
+        self.runtime_config = runtime_config
+        self.state_manager = state_manager
+        self.process_manager = process_manager
+        self.poll_interval = poll_interval
+        self.next_poll = time.monotonic() + poll_interval
+        logger.info(f"ConfigWatcher initialized with poll_interval: {poll_interval}")
+
+    def poll(self) -> None:
+        now = time.monotonic()
+        if now < self.next_poll:
+            return
+        self.next_poll = now + self.poll_interval
+        old_config = self.config_manager.get_config()
+        new_config = self.config_manager.reload()
+        if new_config is None:
+            return
+        self.apply(old_config, new_config)
+
+    def apply(self, old_config: Dict, new_config: Dict) -> None:
+        old_values = dict(_flatten(old_config))
+        changed = {key for key, value in _flatten(new_config) if old_values.get(key) != value}
+        if not changed:
+            logger.debug("Config file touched without changes")
+            return
+        logger.info(f"Config changed: {', '.join('.'.join(key) for key in sorted(changed))}")
+
+        if ("zed", "depth_threshold") in changed:
+            self.state_manager.update_state(depth_threshold=new_config["zed"]["depth_threshold"])
+        self.runtime_config.publish(new_config)
+
+        scheduling_changed = {key for key in changed if key[0] == "scheduling"}
+        # Частоты устройств input.rates.<device> и параметры автопилота zed.free_space.*
+        hot_changed = {key for key in changed if key[:2] in (("input", "rates"), ("zed", "free_space"))}
+        if scheduling_changed:
+            self.process_manager.configure_scheduling(new_config["scheduling"])
+            self.state_manager.update_state(scheduling=dict(self.process_manager.effective_scheduling))
+
+        restarts: Set[str] = {RESTART_SETTINGS[key] for key in changed if key in RESTART_SETTINGS}
+        unsupported = changed - HOT_SETTINGS - set(RESTART_SETTINGS) - scheduling_changed - hot_changed
+        for key in sorted(unsupported):
+            logger.warning(f"Config change {'.'.join(key)} takes effect after a full restart")
+        for name in sorted(restarts):
+            logger.info(f"Restarting {name} process to apply config")
+            self.process_manager.restart(name)
@@ -0,0 +1,75 @@
+from multiprocessing import Value
+from multiprocessing.sharedctypes import RawArray
+from typing import Optional, Tuple
+import time
+from .shared_slot import READ_ATTEMPTS
+
+class SharedFrameBuffer:
+    """Последний кадр камеры (RGB и глубина) в разделяемой памяти, один писатель.
+
+    Буфер рассчитан на max_width x max_height, писатель кладёт кадр уже
+    уменьшенным. Как и SharedSlot, запись защищена seqlock-счётчиком:
+    читатель копирует кадр и повторяет, если писатель успел начать новую
+    запись. Писатель не ждёт читателей; пока зрителей нет (viewers == 0),
+    камера кадры не копирует вовсе. numpy подключается при первом
+    обращении — уже в процессе камеры или стрима.
+    """
+
+    def __init__(self, max_width: int, max_height: int, max_fps: float = 15.0):
+        self.max_width = max_width
+        self.max_height = max_height
+        # Минимальный интервал между кадрами задаёт процесс стрима под текущую частоту
+        self.min_interval = Value('d', 1.0 / max_fps if max_fps > 0 else 0.0, lock=False)
+        self.rgb_data = RawArray('B', max_width * max_height * 3)
+        self.depth_data = RawArray('f', max_width * max_height)
+        # seq, ширина, высота, время кадра
+        self.header = RawArray('d', 4)
+        self.viewers = Value('i', 0, lock=False)
+        self.last_write = 0.0
+        self.views = None
+
+    def _views(self):
+        if self.views is None:
+            import numpy as np
+            self.views = (np.frombuffer(self.rgb_data, dtype=np.uint8), np.frombuffer(self.depth_data, dtype=np.float32))
+        return self.views
+
+    def wanted(self, now: Optional[float] = None) -> bool:
+        """Нужен ли кадр: есть зрители и прошло не меньше min_interval с прошлой записи."""
+        if not self.viewers.value:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self.last_write >= self.min_interval.value
+
+    def write(self, rgb, depth, timestamp: float) -> None:
+        height, width = depth.shape
+        rgb_view, depth_view = self._views()
+        header = self.header
+        seq = header[0]
+        # Предыдущий писатель мог умереть посередине записи
+        seq += seq % 2
+        header[0] = seq + 1
+        rgb_view[:height * width * 3] = rgb.reshape(-1)
+        depth_view[:height * width] = depth.reshape(-1)
+        header[1], header[2], header[3] = width, height, timestamp
+        header[0] = seq + 2
+        self.last_write = time.monotonic()
+
+    def read(self, last_sequence: int = 0) -> Optional[Tuple[int, float, object, object]]:
+        """(sequence, timestamp, rgb, depth) нового кадра или None, если кадр не новее last_sequence
+        или писатель не закончил запись за READ_ATTEMPTS попыток."""
+        rgb_view, depth_view = self._views()
+        header = self.header
+        for _ in range(READ_ATTEMPTS):
+            seq = header[0]
+            if seq == 0 or seq // 2 <= last_sequence:
+                return None
+            if seq % 2:
+                time.sleep(0)
+                continue
+            width, height, timestamp = int(header[1]), int(header[2]), header[3]
+            rgb = rgb_view[:height * width * 3].copy().reshape(height, width, 3)
+            depth = depth_view[:height * width].copy().reshape(height, width)
+            if header[0] == seq:
+                return int(seq) // 2, timestamp, rgb, depth
+        return None
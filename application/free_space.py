@@ -0,0 +1,90 @@
+from typing import Dict, Tuple
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class FreeSpaceSteering:
+    """Руль и скорость автопилота по свободному пространству на карте глубины.
+
+    Берётся горизонтальная полоса кадра около горизонта (band_top..band_bottom
+    от высоты), прорежённая через row_step строк и col_step столбцов, чтобы
+    пол перед машиной не считался препятствием. Для каждого столбца
+    свободная дальность — ignore_pixels+1-е наименьшее значение (одиночные
+    выбросы стерео не останавливают машину), столбцы с долей валидных
+    пикселей меньше min_valid считаются занятыми. Полоса делится на sectors
+    секторов руля, дальность сектора — минимум его столбцов. Выбирается
+    сектор с наибольшей дальностью за вычетом штрафа center_bias за уход от
+    центра; руль — положение сектора (-1 слева, 1 справа), скорость растёт
+    от min_speed до max_speed вместе с дальностью выбранного сектора и
+    падает на поворотах. Только векторные операции NumPy, без циклов по
+    пикселям.
+    """
+
+    def __init__(self, config: Dict):
+        self.steering = 0.0
+        self.sector_clearance = np.zeros(0)
+        self.apply_config(config)
+
+    def apply_config(self, config: Dict) -> None:
+        self.band_top = config["band_top"]
+        self.band_bottom = config["band_bottom"]
+        self.row_step = config["row_step"]
+        self.col_step = config["col_step"]
+        self.sectors = config["sectors"]
+        self.ignore_pixels = config["ignore_pixels"]
+        self.min_valid = config["min_valid"]
+        self.max_range = config["max_range"]
+        self.max_speed = config["max_speed"]
+        self.min_speed = config["min_speed"]
+        self.center_bias = config["center_bias"]
+        self.steering_gain = config["steering_gain"]
+        self.turn_slowdown = config["turn_slowdown"]
+        self.smoothing = config["smoothing"]
+        # Положение центра каждого сектора: -1 (левый край) .. 1 (правый край)
+        self.offsets = (np.arange(self.sectors) + 0.5) / self.sectors * 2 - 1
+        self.penalty = self.center_bias * self.max_range * np.abs(self.offsets)
+        logger.info(f"FreeSpaceSteering configured: band {self.band_top:.2f}-{self.band_bottom:.2f}, "
+                    f"step {self.row_step}x{self.col_step}, {self.sectors} sectors, range {self.max_range} m")
+
+    def column_clearance(self, depth: np.ndarray) -> np.ndarray:
+        height = depth.shape[0]
+        band = depth[int(height * self.band_top):int(height * self.band_bottom):self.row_step, ::self.col_step]
+        if band.shape[0] == 0:
+            # Кадр ниже полосы: строк нет — данных нет, столбцы заняты
+            return np.zeros(band.shape[1])
+        # ZED: +inf — дальше depth_max, -inf — ближе depth_min, NaN — нет данных
+        valid = np.isfinite(band) | np.isposinf(band)
+        band = np.nan_to_num(band, nan=self.max_range, posinf=self.max_range, neginf=0.0)
+        np.clip(band, 0.0, self.max_range, out=band)
+        rank = min(self.ignore_pixels, band.shape[0] - 1)
+        clearance = np.partition(band, rank, axis=0)[rank]
+        clearance[valid.mean(axis=0) < self.min_valid] = 0.0
+        return clearance
+
+    def sector_clearances(self, depth: np.ndarray) -> np.ndarray:
+        columns = self.column_clearance(depth)
+        if columns.size == 0:
+            return np.zeros(self.sectors)
+        if columns.size < self.sectors:
+            # Столбцов меньше, чем секторов: сектор берёт столбец, в который попадает
+            return columns[np.arange(self.sectors) * columns.size // self.sectors]
+        # Лишние столбцы справа отбрасываются, чтобы сектора были одной ширины
+        width = columns.size // self.sectors * self.sectors
+        return columns[:width].reshape(self.sectors, -1).min(axis=1)
+
+    def steer(self, depth: np.ndarray, depth_threshold: float) -> Tuple[float, float]:
+        """Возвращает (speed, steering) для кадра глубины в метрах."""
+        clearance = self.sector_clearances(depth)
+        self.sector_clearance = clearance
+        best = int(np.argmax(clearance - self.penalty))
+        target = float(np.clip(self.offsets[best] * self.steering_gain, -1.0, 1.0))
+        self.steering += (target - self.steering) * (1.0 - self.smoothing)
+        free = float(clearance[best])
+        if free < depth_threshold:
+            # Проезда нет: стоим, руль держим на самом свободном секторе
+            return 0.0, self.steering
+        span = max(self.max_range - depth_threshold, 1e-6)
+        speed = self.min_speed + (self.max_speed - self.min_speed) * min((free - depth_threshold) / span, 1.0)
+        speed *= 1.0 - self.turn_slowdown * abs(self.steering)
+        return speed, self.steering
@@ -1,63 +1,93 @@
-from typing import Dict
+from multiprocessing import Value
+from typing import Callable, Dict, List, Set
 from core.interfaces.input_device import InputDevice
 from core.entities.command import CarCommand
 from .state_manager import StateManager
+from .shared_slot import SharedSlot
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+COMMAND_FIELDS = ("timestamp", "speed", "brake", "steering")
+
 class InputManager:
-    def __init__(self, state_manager: StateManager):
+    """Выбирает команду из последних значений, которые публикуют процессы устройств.
+
+    Каждое устройство работает в своём DeviceProcess со своей частотой и пишет
+    последнюю команду в SharedSlot. Переключение режима — это смена индекса
+    в разделяемой памяти, поэтому оно мгновенное и видно из любого процесса.
+    """
+
+    def __init__(self, state_manager: StateManager, stale_timeout: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic):
         self.devices: Dict[str, InputDevice] = {}
-        self.current_mode = "gamepad"  # По умолчанию режим геймпада
+        self.sources: Dict[str, SharedSlot] = {}
+        self.modes: List[str] = []
         self.state_manager = state_manager
-        logger.info(f"InputManager initialized with mode: {self.current_mode}")
+        self.stale_timeout = stale_timeout
+        self.stale_modes: Set[str] = set()
+        # Свежесть — по монотонным часам: шаг NTP при загрузке Jetson не делает ввод свежим или устаревшим.
+        # Симулятор подставляет свои часы, чтобы гонять логику быстрее реального времени
+        self.clock = clock
+        # После перезапуска процесса продолжаем в режиме из общего состояния
+        self.initial_mode = state_manager.get_state().get("mode", "gamepad")
+        self.mode_index = Value('i', 0, lock=False)
+        logger.info(f"InputManager initialized with mode: {self.initial_mode}")
+
+    @property
+    def current_mode(self) -> str:
+        return self.modes[self.mode_index.value] if self.modes else self.initial_mode
 
     def register_device(self, mode: str, device: InputDevice) -> None:
         self.devices[mode] = device
+        if mode not in self.sources:
+            # Слот создаётся до fork и переживает перезапуски процесса устройства
+            self.sources[mode] = SharedSlot(COMMAND_FIELDS)
+            self.modes.append(mode)
+            if mode == self.initial_mode:
+                self.mode_index.value = len(self.modes) - 1
         logger.info(f"Device registered: {mode}")
 
+    def publish(self, mode: str, command: CarCommand) -> None:
+        self.sources[mode].write(self.clock(), command.speed, command.brake, command.steering)
+        if command.gear or command.mode or command.record is not None \
+                or command.trim is not None or command.depth_threshold is not None:
+            self.state_manager.update_state(
+                gear=command.gear,
+                mode=command.mode,
+                trim=command.trim,
+                depth_threshold=command.depth_threshold,
+                recording=command.record
+            )
+
     def get_command(self) -> CarCommand:
-        logger.debug(f"Getting command for mode: {self.current_mode}")
-        device = self.devices.get(self.current_mode)
-        if device:
-            try:
-                command = device.get_input()
-                self.state_manager.update_state(
-                    gear=command.gear,
-                    mode=command.mode,
-                    trim=command.trim,
-                    depth_threshold=command.depth_threshold,
-                    recording=command.record
-                )
-                logger.debug(f"Command received: speed={command.speed:.2f}, brake={command.brake:.2f}, steering={command.steering:.2f}")
-                return command
-            except Exception as e:
-                logger.error(f"Error getting input from {self.current_mode}: {e}")
-                self.state_manager.update_state(last_error=f"Input error: {e}")
-                return CarCommand(speed=0.0, brake=0.0, steering=0.0)
-        logger.warning(f"No device for mode: {self.current_mode}")
-        self.state_manager.update_state(last_error=f"No device for mode: {self.current_mode}")
-        return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+        mode = self.current_mode
+        source = self.sources.get(mode)
+        if source is None:
+            logger.warning(f"No device for mode: {mode}")
+            self.state_manager.update_state(last_error=f"No device for mode: {mode}")
+            return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+        latest = source.read()
+        if latest is None or self.clock() - latest[0] > self.stale_timeout:
+            if mode not in self.stale_modes:
+                self.stale_modes.add(mode)
+                logger.warning(f"No fresh input from {mode}, holding neutral")
+                self.state_manager.update_state(last_error=f"No fresh input from {mode}")
+            return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+        if mode in self.stale_modes:
+            self.stale_modes.discard(mode)
+            logger.info(f"Input from {mode} resumed")
+        timestamp, speed, brake, steering = latest
+        logger.debug(f"Command received from {mode}: speed={speed:.2f}, brake={brake:.2f}, steering={steering:.2f}")
+        return CarCommand(speed=speed, brake=brake, steering=steering, timestamp=timestamp)
 
     def toggle_mode(self) -> None:
-        self.current_mode = "zed" if self.current_mode == "gamepad" else "gamepad"
+        if not self.modes:
+            return
+        self.mode_index.value = (self.mode_index.value + 1) % len(self.modes)
         self.state_manager.update_state(mode=self.current_mode)
         logger.info(f"Mode switched to: {self.current_mode}")
 
-    def initialize(self) -> None:
-        for mode, device in self.devices.items():
-            try:
-                device.initialize()
-                logger.info(f"Device initialized: {mode}")
-            except Exception as e:
-                logger.error(f"Failed to initialize device {mode}: {e}")
-                self.state_manager.update_state(last_error=f"Failed to initialize {mode}: {e}")
-
-    def close(self) -> None:
-        for mode, device in self.devices.items():
-            try:
-                device.close()
-                logger.info(f"Device closed: {mode}")
-            except Exception as e:
-                logger.error(f"Failed to close device {mode}: {e}")
\ No newline at end of file
+    def apply_config(self, config: Dict) -> None:
+        self.stale_timeout = config.get("input", {}).get("stale_timeout", self.stale_timeout)
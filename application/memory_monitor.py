@@ -0,0 +1,191 @@
+import linecache
+import os
+import threading
+import time
+import tracemalloc
+import logging
+from collections import deque
+from multiprocessing import current_process
+from typing import Deque, Dict, List, Optional, Tuple
+from infrastructure.atomic_file import atomic_write_text
+from .state_manager import StateManager
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+# Выделения самого tracemalloc, монитора и импорта не интересны
+IGNORED_FILES = (tracemalloc.__file__, linecache.__file__, __file__, "<frozen importlib._bootstrap>",
+                 "<frozen importlib._bootstrap_external>", "<unknown>")
+HISTORY = 240
+
+def read_rss() -> int:
+    """RSS этого процесса в байтах из /proc/self/statm."""
+    with open("/proc/self/statm", "rb") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+class MemoryMonitor:
+    """Рост памяти процесса по расписанию: tracemalloc и RSS, включается в конфиге.
+
+    Родитель до fork вызывает configure(). Процесс в run() вызывает
+    begin(name, state_manager), затем poll() на каждом тике: это одно
+    сравнение времени. Через warmup секунд после старта (импорты, буферы,
+    кэши уже на месте) снимаются базовый снимок tracemalloc и RSS, затем
+    раз в interval секунд — новый снимок. Цикл процесса платит только за
+    take_snapshot(); группировка по местам выделения и сравнение с базовым
+    идут в фоновом потоке. Отчёт <output_dir>/<process>.txt переписывается
+    целиком: рост RSS и памяти, которую видит tracemalloc (остальное —
+    нативные выделения: буферы SDK камеры, OpenCV), история RSS и top мест
+    с наибольшим ростом. Когда RSS вырос на очередные alert_mb, в state
+    пишется memory_alert.
+
+    tracemalloc замедляет каждое выделение памяти Python, а сравнение
+    снимков в фоне делит GIL с циклом процесса — это инструмент для поиска
+    утечки, не для поездки; паузы цикла и длительность анализа пишутся в отчёт.
+    """
+
+    def __init__(self):
+        self.config: Dict = {"enabled": False}
+        self.process_name = "main"
+        self.state_manager: Optional[StateManager] = None
+        self.active = False
+        self.started = 0.0
+        self.next_check = 0.0
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.baseline_rss = 0
+        self.baseline_traced = 0
+        self.alert_level = 0
+        self.history: Deque[Tuple[float, int]] = deque(maxlen=HISTORY)
+        self.analysis: Optional[threading.Thread] = None
+
+    def configure(self, config: Dict) -> None:
+        self.config = dict(config)
+        if self.config["enabled"]:
+            logger.info(f"Memory monitor enabled: every {self.config['interval']} s after {self.config['warmup']} s "
+                        f"warmup, alert at +{self.config['alert_mb']} MB, reports in {self.config['output_dir']}")
+
+    def begin(self, process_name: str, state_manager: Optional[StateManager] = None) -> None:
+        # ProcessManager машины из парка называет процессы "car1/zed"
+        scope = current_process().name.rpartition("/")[0]
+        self.process_name = f"{scope}/{process_name}" if scope else process_name
+        self.state_manager = state_manager
+        self.baseline = None
+        self.alert_level = 0
+        self.history.clear()
+        self.analysis = None
+        self.active = self.config["enabled"]
+        if not self.active:
+            return
+        # Процесс, перезапущенный из отслеживаемого main, наследует его трассы — начинаем заново
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(self.config["frames"])
+        self.started = time.monotonic()
+        self.next_check = self.started + self.config["warmup"]
+        logger.info(f"Memory monitor started in {self.process_name} (pid {os.getpid()})")
+
+    def poll(self) -> None:
+        if not self.active or time.monotonic() < self.next_check:
+            return
+        self.next_check = time.monotonic() + self.config["interval"]
+        if self.analysis and self.analysis.is_alive():
+            # Прошлое сравнение ещё идёт: следующий снимок через interval
+            return
+        try:
+            self._sample(background=True)
+        except Exception as e:
+            logger.error(f"Memory monitor error in {self.process_name}: {e}")
+
+    def _sample(self, background: bool) -> None:
+        started = time.monotonic()
+        rss = read_rss()
+        traced, _ = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        self.history.append((started - self.started, rss))
+        if self.baseline is None:
+            self.baseline, self.baseline_rss, self.baseline_traced = snapshot, rss, traced
+            logger.info(f"Memory baseline of {self.process_name}: RSS {rss / 2 ** 20:.1f} MB, "
+                        f"traced {traced / 2 ** 20:.1f} MB")
+            return
+        pause = time.monotonic() - started
+        if background:
+            self.analysis = threading.Thread(target=self._analyse, args=(snapshot, rss, traced, pause),
+                                             name="memory-monitor", daemon=True)
+            self.analysis.start()
+        else:
+            self._analyse(snapshot, rss, traced, pause)
+
+    def _analyse(self, snapshot: tracemalloc.Snapshot, rss: int, traced: int, pause: float) -> None:
+        try:
+            started = time.monotonic()
+            # С frames > 1 места различаются всем стеком: один и тот же np.empty из разных вызывающих
+            key = "traceback" if self.config["frames"] > 1 else "lineno"
+            growth = [stat for stat in snapshot.compare_to(self.baseline, key)
+                      if stat.size_diff > 0 and stat.traceback[-1].filename not in IGNORED_FILES]
+            growth = growth[:self.config["top"]]
+            self._write_report(rss, traced, growth, pause, time.monotonic() - started)
+            rss_growth_mb = (rss - self.baseline_rss) / 2 ** 20
+            level = int(rss_growth_mb // self.config["alert_mb"]) if self.config["alert_mb"] > 0 else 0
+            if level > self.alert_level:
+                self.alert_level = level
+                site = growth[0].traceback[-1] if growth else None
+                top = f"; top site {site.filename}:{site.lineno}" if site else ""
+                message = f"{self.process_name}: RSS +{rss_growth_mb:.0f} MB since baseline{top}"
+                logger.warning(f"Memory growth in {message}")
+                if self.state_manager:
+                    self.state_manager.update_state(memory_alert=message, last_error=f"Memory growth in {message}")
+        except Exception as e:
+            logger.error(f"Memory monitor error in {self.process_name}: {e}")
+
+    def report_path(self) -> str:
+        return os.path.join(self.config["output_dir"], f"{self.process_name}.txt")
+
+    def _write_report(self, rss: int, traced: int, growth: List[tracemalloc.StatisticDiff], pause: float,
+                      analysis: float) -> None:
+        uptime = time.monotonic() - self.started
+        rss_growth = rss - self.baseline_rss
+        traced_growth = traced - self.baseline_traced
+        lines = [
+            f"{self.process_name} (pid {os.getpid()}), {time.strftime('%Y-%m-%d %H:%M:%S')}, "
+            f"uptime {uptime / 60:.1f} min, loop paused {pause * 1000:.0f} ms, analysis {analysis * 1000:.0f} ms",
+            f"RSS {self.baseline_rss / 2 ** 20:.1f} -> {rss / 2 ** 20:.1f} MB ({rss_growth / 2 ** 20:+.1f} MB)",
+            f"traced {self.baseline_traced / 2 ** 20:.1f} -> {traced / 2 ** 20:.1f} MB "
+            f"({traced_growth / 2 ** 20:+.1f} MB), not traced {(rss_growth - traced_growth) / 2 ** 20:+.1f} MB",
+            "",
+            f"Top {len(growth)} growing allocation sites since baseline:",
+        ]
+        for stat in growth:
+            # Кадры стека идут от самого старого, место выделения — последний
+            frames = list(stat.traceback)
+            site = frames[-1]
+            lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+                         f"{site.filename}:{site.lineno}")
+            source = linecache.getline(site.filename, site.lineno).strip()
+            if source:
+                lines.append(f"      {source}")
+            for caller in reversed(frames[:-1]):
+                lines.append(f"      from {caller.filename}:{caller.lineno}")
+        lines += ["", "RSS history (uptime s, MB):"]
+        lines += [f"  {moment:9.0f} {value / 2 ** 20:9.1f}" for moment, value in self.history]
+        path = self.report_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Читатель не увидит отчёт наполовину
+            atomic_write_text(path, "\n".join(lines) + "\n")
+        except OSError as e:
+            logger.error(f"Cannot write memory report {path}: {e}")
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self.active = False
+        if self.analysis:
+            self.analysis.join()
+        # Последний замер при штатной остановке: отчёт отражает всю сессию
+        if self.baseline is not None:
+            try:
+                self._sample(background=False)
+            except Exception as e:
+                logger.error(f"Memory monitor error in {self.process_name}: {e}")
+        tracemalloc.stop()
+
+memory_monitor = MemoryMonitor()
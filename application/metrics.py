@@ -0,0 +1,228 @@
+from bisect import bisect_left
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import struct
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин задержки, секунды; последняя корзина — +Inf
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Гистограмма, чей счётчик — это число итераций цикла секции (частота для UI и экспортёра)
+LOOP_HISTOGRAMS = {
+    "input": "command_age_seconds",
+    "command": "input_to_output_seconds",
+    "arduino": "write_seconds",
+}
+DEVICE_LOOP_HISTOGRAM = "read_seconds"
+
+HEADER = struct.Struct("<Q")
+# Сегменты, созданные этим процессом или родителем до fork: их регистрацию в трекере не трогаем
+_created_segments = set()
+DATA_ALIGN = 64
+
+class Counter:
+    __slots__ = ("values", "index")
+
+    def __init__(self, values: memoryview, index: int):
+        self.values = values
+        self.index = index
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.values[self.index] += amount
+
+class Gauge:
+    __slots__ = ("values", "index")
+
+    def __init__(self, values: memoryview, index: int):
+        self.values = values
+        self.index = index
+
+    def set(self, value: float) -> None:
+        self.values[self.index] = value
+
+class Histogram:
+    __slots__ = ("values", "bounds", "base", "sum_index")
+
+    def __init__(self, values: memoryview, bounds: Sequence[float], base: int):
+        self.values = values
+        self.bounds = tuple(bounds)
+        self.base = base
+        self.sum_index = base + len(self.bounds) + 1
+
+    def observe(self, value: float) -> None:
+        values = self.values
+        values[self.base + bisect_left(self.bounds, value)] += 1
+        values[self.sum_index] += value
+
+def _layout(schema: Dict) -> Tuple[Dict[Tuple[str, str], Tuple[str, int, Tuple[float, ...]]], int]:
+    layout = {}
+    size = 0
+    for section, metrics in schema.items():
+        for name in metrics.get("counters", ()):
+            layout[section, name] = ("counter", size, ())
+            size += 1
+        for name in metrics.get("gauges", ()):
+            layout[section, name] = ("gauge", size, ())
+            size += 1
+        for name, bounds in metrics.get("histograms", {}).items():
+            layout[section, name] = ("histogram", size, tuple(bounds))
+            # Корзины, +Inf и сумма
+            size += len(bounds) + 2
+    return layout, size
+
+class MetricSection:
+    """Метрики одного писателя. Значения секции меняет только процесс-владелец."""
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+
+    def _entry(self, metric: str, kind: str) -> Tuple[str, int, Tuple[float, ...]]:
+        entry = self.registry.layout.get((self.name, metric))
+        if entry is None or entry[0] != kind:
+            raise KeyError(f"No {kind} {self.name}.{metric} in metrics schema")
+        return entry
+
+    def has(self, metric: str) -> bool:
+        return (self.name, metric) in self.registry.layout
+
+    def counter(self, metric: str) -> Counter:
+        return Counter(self.registry.values, self._entry(metric, "counter")[1])
+
+    def gauge(self, metric: str) -> Gauge:
+        return Gauge(self.registry.values, self._entry(metric, "gauge")[1])
+
+    def histogram(self, metric: str) -> Histogram:
+        _, offset, bounds = self._entry(metric, "histogram")
+        return Histogram(self.registry.values, bounds, offset)
+
+class MetricsRegistry:
+    """Счётчики, показатели и гистограммы в именованном сегменте shared memory.
+
+    Схема (секции-писатели и их метрики) задаётся в родителе и пишется в
+    заголовок сегмента JSON-ом, поэтому любой читатель может подключиться
+    по имени. Каждая секция принадлежит одному процессу, запись — это
+    прибавление к double в сегменте без блокировок; читатели копируют
+    массив целиком и агрегируют у себя.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, schema: Dict, owner: bool):
+        self.shm = shm
+        self.schema = schema
+        self.owner = owner
+        self.layout, size = _layout(schema)
+        header_size = HEADER.unpack_from(shm.buf)[0]
+        self.data_offset = -(-(HEADER.size + header_size) // DATA_ALIGN) * DATA_ALIGN
+        self.values = shm.buf[self.data_offset:self.data_offset + size * 8].cast('d')
+
+    @classmethod
+    def create(cls, name: str, schema: Dict) -> "MetricsRegistry":
+        header = json.dumps(schema).encode()
+        _, size = _layout(schema)
+        data_offset = -(-(HEADER.size + len(header)) // DATA_ALIGN) * DATA_ALIGN
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=data_offset + size * 8)
+        except FileExistsError:
+            # Сегмент остался после аварийного завершения
+            logger.warning(f"Removing stale metrics segment: {name}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=data_offset + size * 8)
+        _created_segments.add(name)
+        HEADER.pack_into(shm.buf, 0, len(header))
+        shm.buf[HEADER.size:HEADER.size + len(header)] = header
+        logger.info(f"Metrics segment {name} created: {size} values")
+        return cls(shm, schema, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "MetricsRegistry":
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # До Python 3.13 подключение тоже регистрируется в resource_tracker,
+            # и он удалил бы чужой сегмент при выходе читателя
+            shm = shared_memory.SharedMemory(name=name)
+            if name not in _created_segments:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        header_size = HEADER.unpack_from(shm.buf)[0]
+        schema = json.loads(bytes(shm.buf[HEADER.size:HEADER.size + header_size]))
+        return cls(shm, schema, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def section(self, name: str) -> MetricSection:
+        if name not in self.schema:
+            raise KeyError(f"No metrics section {name}")
+        return MetricSection(self, name)
+
+    def sections(self) -> Iterable[str]:
+        return self.schema.keys()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        """Все значения: число для счётчиков и показателей, (границы, корзины, сумма) для гистограмм."""
+        values = self.values.tolist()
+        result: Dict[str, Dict[str, object]] = {section: {} for section in self.schema}
+        for (section, metric), (kind, offset, bounds) in self.layout.items():
+            if kind == "histogram":
+                buckets = values[offset:offset + len(bounds) + 1]
+                result[section][metric] = (bounds, buckets, values[offset + len(bounds) + 1])
+            else:
+                result[section][metric] = values[offset]
+        return result
+
+    def histogram_totals(self, section: str, metric: str) -> Tuple[float, float]:
+        """Число наблюдений и их сумма."""
+        _, offset, bounds = self.layout[section, metric]
+        values = self.values[offset:offset + len(bounds) + 2].tolist()
+        return sum(values[:-1]), values[-1]
+
+    def kind(self, section: str, metric: str) -> str:
+        return self.layout[section, metric][0]
+
+    def close(self) -> None:
+        self.values.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def build_schema(devices: Sequence[str], processes: Sequence[str]) -> Dict:
+    schema: Dict[str, Dict] = {}
+    for device in devices:
+        schema[device] = {"histograms": {DEVICE_LOOP_HISTOGRAM: LATENCY_BUCKETS}}
+    if "zed" in schema:
+        schema["zed"]["counters"] = ["grab_failures_total"]
+        schema["zed"]["histograms"].update(grab_seconds=LATENCY_BUCKETS, process_seconds=LATENCY_BUCKETS)
+        schema["recorder"] = {
+            "counters": ["frames_written_total", "frames_dropped_total", "dataset_records_total",
+                         "dataset_dropped_total", "dataset_bytes_total"],
+            "histograms": {"dataset_sync_seconds": LATENCY_BUCKETS},
+        }
+    if "remote" in schema:
+        schema["remote"]["counters"] = ["packets_total", "lost_total", "late_total", "reordered_total"]
+        schema["remote"]["histograms"].update(latency_seconds=LATENCY_BUCKETS)
+    if "stream" in processes:
+        schema["stream"] = {
+            "counters": ["frames_encoded_total", "frames_sent_total", "frames_skipped_total", "bytes_sent_total"],
+            "gauges": ["clients", "fps", "quality", "scale"],
+            "histograms": {"encode_seconds": LATENCY_BUCKETS},
+        }
+    for section, histogram in LOOP_HISTOGRAMS.items():
+        schema[section] = {"histograms": {histogram: LATENCY_BUCKETS}}
+    # PID процессов пишет ProcessManager в родителе
+    schema["processes"] = {"gauges": list(processes)}
+    return schema
+
+def loop_histogram(section: str) -> str:
+    return LOOP_HISTOGRAMS.get(section, DEVICE_LOOP_HISTOGRAM)
+
+def loop_sections(registry: MetricsRegistry) -> List[str]:
+    return [section for section in registry.sections() if registry.layout.get((section, loop_histogram(section)))]
+
+def optional_histogram(section: Optional[MetricSection], metric: str) -> Optional[Histogram]:
+    return section.histogram(metric) if section and section.has(metric) else None
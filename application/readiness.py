@@ -0,0 +1,101 @@
+from multiprocessing import Event, Lock, Value
+from typing import Callable, Dict, Optional
+import threading
+import logging
+from .state_manager import StateManager
+from .startup_profiler import startup_profiler
+
+logger = logging.getLogger(__name__)
+
+PENDING, READY, FAILED, TIMEOUT = 0, 1, 2, 3
+STATUS_NAMES = {PENDING: "pending", READY: "ready", FAILED: "failed", TIMEOUT: "timeout"}
+
+def run_with_timeout(name: str, action: Callable[[], None], timeout: float) -> None:
+    # Поток-демон: зависший драйвер не держит процесс при завершении
+    errors = []
+
+    def target():
+        try:
+            action()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, name=f"init-{name}", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise TimeoutError(f"{name} initialization timed out after {timeout} s")
+    if errors:
+        raise errors[0]
+
+def report_connection(readiness: Optional["ReadinessBarrier"], name: str, device, reported: Optional[bool]) -> bool:
+    """Устройство с переподключением готово, пока открыт его порт; барьер узнаёт только о смене состояния."""
+    connected = device.is_connected()
+    if readiness and connected != reported:
+        readiness.report(name, READY if connected else FAILED, "" if connected else f"{name} port not connected")
+    return connected
+
+class ReadinessBarrier:
+    """Общий для всех процессов барьер готовности устройств.
+
+    Каждый процесс сообщает статус своих устройств; событие ready
+    выставляется, когда готовы все обязательные устройства. Необязательные
+    устройства могут подняться позже — до этого система работает в
+    деградированном режиме. Если обязательное устройство потом упало или
+    перезапускается, событие снимается: управление снова ждёт, пока все
+    обязательные устройства не станут ready.
+    """
+
+    def __init__(self, devices: Dict[str, bool], state_manager: StateManager):
+        self.required = dict(devices)
+        self.state_manager = state_manager
+        self.statuses = {name: Value('i', PENDING, lock=False) for name in devices}
+        self.lock = Lock()
+        self.ready_event = Event()
+        self.time_to_ready = Value('d', 0.0, lock=False)
+        logger.info(f"ReadinessBarrier initialized: required={[n for n, r in devices.items() if r]}, "
+                    f"optional={[n for n, r in devices.items() if not r]}")
+
+    def snapshot(self) -> Dict[str, str]:
+        return {name: STATUS_NAMES[status.value] for name, status in self.statuses.items()}
+
+    def report(self, name: str, status: int, error: str = "") -> None:
+        if name not in self.statuses:
+            logger.warning(f"Readiness reported for unknown device: {name}")
+            return
+        with self.lock:
+            self.statuses[name].value = status
+            snapshot = self.snapshot()
+            self.state_manager.update_state(devices=snapshot)
+            all_ready = all(self.statuses[n].value == READY for n, required in self.required.items() if required)
+            degraded = [n for n, s in snapshot.items() if s != "ready"]
+            if self.ready_event.is_set() and not all_ready:
+                self.ready_event.clear()
+                self.state_manager.update_state(degraded_devices=degraded)
+                logger.error(f"System not ready: required device {name} is {STATUS_NAMES[status]}")
+            elif not self.ready_event.is_set() and all_ready:
+                self.state_manager.update_state(degraded_devices=degraded)
+                self.ready_event.set()
+                if self.time_to_ready.value:
+                    logger.warning(f"System ready again, not ready: {degraded}" if degraded else "System ready again")
+                else:
+                    elapsed = startup_profiler.elapsed()
+                    self.time_to_ready.value = elapsed
+                    self.state_manager.update_state(time_to_ready=round(elapsed, 3))
+                    if degraded:
+                        logger.warning(f"System ready in degraded mode after {elapsed:.3f} s, not ready: {degraded}")
+                    else:
+                        logger.info(f"System ready after {elapsed:.3f} s")
+        if status == READY:
+            logger.info(f"Device ready: {name}")
+        elif status in (FAILED, TIMEOUT):
+            level = logging.ERROR if self.required[name] else logging.WARNING
+            logger.log(level, f"Device {name} {STATUS_NAMES[status]}: {error}")
+            if self.required[name]:
+                self.state_manager.update_state(last_error=f"Required device {name} {STATUS_NAMES[status]}: {error}")
+
+    def is_ready(self) -> bool:
+        return self.ready_event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.ready_event.wait(timeout)
@@ -0,0 +1,55 @@
+from multiprocessing import Value
+from typing import Callable, Dict, List
+from .state_manager import StateManager
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RuntimeConfig:
+    """Раздаёт актуальный конфиг работающим процессам через сервер Manager.
+
+    Конфиг лежит в отдельном словаре, а не в state: get_state() копирует
+    state на каждом тике горячих путей и в каждую запись датасета, конфиг
+    (~3 КБ) там не нужен. Родитель публикует конфиг и увеличивает счётчик
+    поколений (разделяемая память, чтение без IPC). Процессы вызывают
+    poll() на каждом тике и читают конфиг только когда поколение изменилось.
+    """
+
+    def __init__(self, state_manager: StateManager):
+        self.state_manager = state_manager
+        # Однопроцессный режим (LocalStateManager) обходится обычным словарём
+        self.shared = state_manager.manager.dict() if state_manager.manager else {}
+        self.generation = Value('L', 0)
+        self.seen_generation = 0
+        self.listeners: List[Callable[[Dict], None]] = []
+        logger.info("RuntimeConfig initialized")
+
+    def subscribe(self, listener: Callable[[Dict], None]) -> None:
+        self.listeners.append(listener)
+
+    def publish(self, config: Dict) -> None:
+        self.shared["config"] = config
+        with self.generation.get_lock():
+            self.generation.value += 1
+        logger.info(f"Config generation {self.generation.value} published")
+
+    def current(self) -> Dict:
+        return self.shared.get("config", {})
+
+    def poll(self) -> bool:
+        generation = self.generation.value
+        if generation == self.seen_generation:
+            return False
+        self.seen_generation = generation
+        config = self.current()
+        level = config.get("logging", {}).get("level")
+        if level:
+            logging.getLogger().setLevel(str(level).upper())
+        for listener in self.listeners:
+            try:
+                listener(config)
+            except Exception as e:
+                logger.error(f"Error applying config: {e}")
+                self.state_manager.update_state(last_error=f"Error applying config: {e}")
+        logger.debug(f"Config generation {generation} applied")
+        return True
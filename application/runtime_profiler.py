@@ -0,0 +1,118 @@
+import cProfile
+import os
+import signal
+import time
+import logging
+from multiprocessing import Array, current_process
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class RuntimeProfiler:
+    """cProfile по запросу в работающем процессе, без перезапуска.
+
+    Родитель до fork вызывает configure() и получает общий массив счётчиков
+    запросов, по одному на процесс. Процесс в run() вызывает begin(name) и
+    затем poll() на каждом тике: профилирование переключается, когда вырос
+    его счётчик (клавиша P в UI, файл управления) или пришёл SIGUSR1, и
+    само останавливается через window секунд. Результат пишется в
+    <output_dir>/<process>_<timestamp>.pstats. Профилируется главный поток.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.requests = None
+        self.raw_requests = None
+        self.output_dir = "logs/profiles"
+        self.window = 10.0
+        self.control_file: Optional[str] = None
+        self.process_name = "main"
+        self.index: Optional[int] = None
+        self.seen = 0
+        self.signal_pending = False
+        self.profile: Optional[cProfile.Profile] = None
+        self.started = 0.0
+
+    def configure(self, names: Iterable[str], output_dir: str, window: float, control_file: Optional[str]) -> None:
+        self.names = list(names)
+        self.requests = Array('L', len(self.names))
+        self.raw_requests = self.requests.get_obj()
+        self.output_dir = output_dir
+        self.window = window
+        self.control_file = control_file
+        logger.info(f"Runtime profiling available for: {', '.join(self.names)}; window {window} s, output {output_dir}")
+
+    def begin(self, process_name: str) -> None:
+        # ProcessManager машины из парка называет процессы "car1/zed"
+        scope = current_process().name.rpartition("/")[0]
+        self.process_name = f"{scope}/{process_name}" if scope else process_name
+        self.profile = None
+        self.index = self.names.index(self.process_name) if self.process_name in self.names else None
+        self.seen = self.raw_requests[self.index] if self.index is not None else 0
+        signal.signal(signal.SIGUSR1, self._on_signal)
+
+    def _on_signal(self, signum, frame) -> None:
+        # Только флаг: профилировщик переключается в poll(), вне обработчика сигнала
+        self.signal_pending = True
+
+    def request(self, names: Optional[Iterable[str]] = None) -> None:
+        if self.requests is None:
+            return
+        with self.requests.get_lock():
+            for name in names or self.names:
+                if name in self.names:
+                    self.raw_requests[self.names.index(name)] += 1
+                else:
+                    logger.warning(f"Profiling requested for unknown process: {name}")
+
+    def poll_control_file(self) -> None:
+        if not self.control_file or not os.path.exists(self.control_file):
+            return
+        try:
+            with open(self.control_file) as f:
+                names = f.read().split()
+            os.remove(self.control_file)
+        except OSError as e:
+            logger.error(f"Cannot read profiling control file {self.control_file}: {e}")
+            return
+        logger.info(f"Profiling toggled by {self.control_file} for: {', '.join(names) or 'all processes'}")
+        self.request(names)
+
+    def poll(self) -> None:
+        toggle = self.signal_pending
+        self.signal_pending = False
+        if self.index is not None and self.raw_requests[self.index] != self.seen:
+            self.seen = self.raw_requests[self.index]
+            toggle = True
+        if toggle:
+            if self.profile:
+                self.stop()
+            else:
+                self.start()
+        elif self.profile and self.window and time.monotonic() - self.started >= self.window:
+            self.stop()
+
+    def start(self) -> None:
+        self.profile = cProfile.Profile()
+        self.started = time.monotonic()
+        self.profile.enable()
+        logger.info(f"Profiling {self.process_name} (pid {os.getpid()}) for {self.window or 'until toggled'} s")
+
+    def stop(self) -> Optional[str]:
+        if not self.profile:
+            return None
+        self.profile.disable()
+        profile, self.profile = self.profile, None
+        now = time.time()
+        timestamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        path = os.path.join(self.output_dir, f"{self.process_name}_{timestamp}.pstats")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            logger.error(f"Cannot write profile {path}: {e}")
+            return None
+        logger.info(f"Profile of {self.process_name} over {time.monotonic() - self.started:.1f} s written to {path}")
+        return path
+
+runtime_profiler = RuntimeProfiler()
@@ -0,0 +1,114 @@
+from typing import Callable, Dict, Optional
+from core.entities.command import CarCommand
+from core.entities.gear import GearDirection
+from .shared_slot import SharedSlot
+from .state_manager import StateManager
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# published — монотонное время публикации, frame_age — возраст кадра в этот момент по настенным часам
+OBSTACLE_FIELDS = ("published", "frame_age", "min_distance", "depth_threshold")
+
+def safety_enabled(config: Dict) -> bool:
+    """Включён ли защитный этап: без камеры расстояния не будет, и удержание нейтрали обездвижило бы машину."""
+    return config.get("safety", {}).get("enabled", True) and "zed" in config.get("input", {}).get("devices", ["zed"])
+
+class ObstacleBrakeOverride:
+    """Защитный этап между любым источником команд и CarController.
+
+    Процесс камеры пишет расстояние до препятствия в SharedSlot, процесс
+    команд читает его без IPC на каждом тике. Если расстояние меньше порога,
+    на brake_duration секунд выдаётся активное торможение, затем удерживается
+    нейтраль, пока препятствие не уйдёт. Тормоз водителя (движение назад)
+    пропускается, чтобы можно было отъехать. Активное торможение — это
+    тормоз передней передачи; на задней тормоз крутит мотор вперёд, к
+    препятствию, поэтому там выдаётся только нейтраль. Пока расстояние
+    устарело (камера перезапускается или отстала), тоже держится нейтраль.
+    """
+
+    def __init__(self, state_manager: StateManager, brake_duration: float = 0.5,
+                 brake_strength: float = 1.0, stale_timeout: float = 0.5, enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic, wall_clock: Callable[[], float] = time.time):
+        self.state_manager = state_manager
+        # Свежесть расстояния — по монотонным часам; метка кадра камеры настенная и нужна только для задержки
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.obstacle = SharedSlot(OBSTACLE_FIELDS)
+        self.enabled = enabled
+        self.brake_duration = brake_duration
+        self.brake_strength = brake_strength
+        self.stale_timeout = stale_timeout
+        self.braking = False
+        self.brake_start_time = 0.0
+        self.stale = True
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        # Обновления state копятся и отправляются после команды, чтобы IPC не задерживал торможение
+        self.pending_state: Dict = {}
+        logger.info(f"ObstacleBrakeOverride initialized: enabled={enabled}, brake_duration={brake_duration}, "
+                    f"brake_strength={brake_strength}, stale_timeout={stale_timeout}")
+
+    def apply_config(self, config: Dict) -> None:
+        safety = config.get("safety", {})
+        self.enabled = safety_enabled(config)
+        self.brake_duration = safety.get("brake_duration", self.brake_duration)
+        self.brake_strength = safety.get("brake_strength", self.brake_strength)
+        self.stale_timeout = safety.get("stale_timeout", self.stale_timeout)
+
+    def publish_obstacle(self, frame_timestamp: float, min_distance: float, depth_threshold: float) -> None:
+        self.obstacle.write(self.clock(), self.wall_clock() - frame_timestamp, min_distance, depth_threshold)
+
+    def obstacle_detected(self, now: Optional[float] = None) -> bool:
+        """Нужно ли вмешаться: препятствие ближе порога или расстояния нет либо оно устарело."""
+        if not self.enabled:
+            if self.braking:
+                self.braking = False
+                self.pending_state["braking"] = False
+            return False
+        reading = self.obstacle.read()
+        now = self.clock() if now is None else now
+        if reading is None or now - reading[0] > self.stale_timeout:
+            if not self.stale:
+                self.stale = True
+                logger.warning("Obstacle distance is stale, holding neutral")
+                self.pending_state["last_error"] = "Obstacle distance is stale, holding neutral"
+            return True
+        if self.stale:
+            self.stale = False
+            logger.info("Obstacle distance available, releasing neutral hold")
+        published, frame_age, min_distance, depth_threshold = reading
+        if min_distance < depth_threshold and not self.braking:
+            self.braking = True
+            self.brake_start_time = now
+            self.last_latency = now - published + frame_age
+            self.max_latency = max(self.max_latency, self.last_latency)
+            logger.warning(f"Obstacle at {min_distance:.2f} m (threshold {depth_threshold:.2f} m), braking; "
+                           f"frame-to-brake latency {self.last_latency * 1000:.1f} ms")
+            self.pending_state.update(braking=True, brake_latency_ms=round(self.last_latency * 1000, 1),
+                                      brake_latency_max_ms=round(self.max_latency * 1000, 1))
+        elif min_distance >= depth_threshold and self.braking:
+            self.braking = False
+            logger.info(f"Obstacle cleared at {min_distance:.2f} m")
+            self.pending_state["braking"] = False
+        return self.braking
+
+    def apply(self, command: CarCommand,
+              gear_direction: Optional[Callable[[], GearDirection]] = None) -> CarCommand:
+        """gear_direction спрашивается, только когда этап вмешивается; без него передача считается передней."""
+        now = self.clock()
+        if not self.obstacle_detected(now):
+            return command
+        direction = gear_direction() if gear_direction else GearDirection.FORWARD
+        if self.stale or direction != GearDirection.FORWARD:
+            return CarCommand(speed=0.0, brake=0.0, steering=command.steering, timestamp=command.timestamp)
+        if now - self.brake_start_time < self.brake_duration:
+            return CarCommand(speed=0.0, brake=max(self.brake_strength, command.brake), steering=command.steering,
+                              timestamp=command.timestamp)
+        return CarCommand(speed=0.0, brake=command.brake, steering=command.steering, timestamp=command.timestamp)
+
+    def flush_state(self) -> None:
+        if self.pending_state:
+            self.state_manager.update_state(**self.pending_state)
+            self.pending_state = {}
@@ -0,0 +1,50 @@
+from multiprocessing.sharedctypes import RawArray
+from typing import Optional, Sequence, Tuple
+import time
+
+# Сколько раз читатель ждёт писателя, прежде чем считать значение недоступным
+READ_ATTEMPTS = 100
+
+class SharedSlot:
+    """Последнее значение набора чисел в разделяемой памяти, один писатель.
+
+    Запись защищена счётчиком-seqlock: нечётное значение означает, что
+    писатель посередине записи, и читатель повторяет попытку. Блокировок
+    нет, поэтому медленный читатель никогда не задерживает писателя.
+    Писатель, убитый посередине записи, оставляет счётчик нечётным: читатель
+    сдаётся после READ_ATTEMPTS попыток и получает None, как от пустого
+    слота, а следующий писатель округляет счётчик до чётного.
+    """
+
+    def __init__(self, fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self.data = RawArray('d', len(self.fields) + 1)
+
+    def write(self, *values: float) -> None:
+        data = self.data
+        seq = data[0]
+        # Предыдущий писатель мог умереть посередине записи
+        seq += seq % 2
+        data[0] = seq + 1
+        for index, value in enumerate(values, 1):
+            data[index] = value
+        data[0] = seq + 2
+
+    def read(self) -> Optional[Tuple[float, ...]]:
+        data = self.data
+        for _ in range(READ_ATTEMPTS):
+            seq = data[0]
+            if seq == 0:
+                return None
+            if seq % 2:
+                # Уступаем процессор писателю, если он вытеснен посередине записи
+                time.sleep(0)
+                continue
+            values = tuple(data[1:])
+            if data[0] == seq:
+                return values
+        return None
+
+    @property
+    def sequence(self) -> int:
+        return int(self.data[0]) // 2
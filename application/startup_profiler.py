@@ -0,0 +1,58 @@
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class StartupProfiler:
+    """Замеряет импорт и инициализацию модулей и устройств до первой команды.
+
+    Экземпляр создаётся при импорте в родителе, поэтому origin общий для всех
+    дочерних процессов: время отсчитывается от старта main.py.
+    """
+
+    def __init__(self):
+        self.origin = time.time()
+        self.process_name = "main"
+        self.records: List[Tuple[str, str, float]] = []
+        self.reported = False
+
+    def begin(self, process_name: str) -> None:
+        # Записи родителя, унаследованные при fork, к этому процессу не относятся
+        self.process_name = process_name
+        self.records = []
+        self.reported = False
+
+    def record(self, category: str, name: str, seconds: float) -> None:
+        self.records.append((category, name, seconds))
+        logger.debug(f"Startup {category} {name}: {seconds * 1000:.1f} ms")
+
+    @contextmanager
+    def measure(self, category: str, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        return time.time() - self.origin
+
+    def report(self, milestone: str = "ready") -> Optional[Dict]:
+        if self.reported:
+            return None
+        self.reported = True
+        elapsed = self.elapsed()
+        lines = [f"{category:<7} {name:<40} {seconds * 1000:8.1f} ms"
+                 for category, name, seconds in sorted(self.records, key=lambda r: -r[2])]
+        logger.info(f"Startup profile [{self.process_name}, pid {os.getpid()}]: {milestone} after {elapsed:.3f} s\n" + "\n".join(lines))
+        return {
+            "process": self.process_name,
+            "milestone": milestone,
+            "elapsed": elapsed,
+            "records": [{"category": c, "name": n, "seconds": s} for c, n, s in self.records]
+        }
+
+startup_profiler = StartupProfiler()
@@ -1,31 +1,69 @@
-from multiprocessing import Manager
-from typing import Dict
+from multiprocessing import Manager, Value
+from multiprocessing.managers import SyncManager
+from typing import Dict, Optional
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+INITIAL_STATE = {
+    "gear": "turtle",
+    "mode": "gamepad",
+    "trim": 0.0,
+    "depth_threshold": 0.6,
+    "recording": False,
+    "min_distance": float('inf'),
+    "braking": False,
+    "last_error": "",
+    "motor_value": 90,
+    "steering_value": 90
+}
+
 class StateManager:
-    def __init__(self):
-        self.manager = Manager()
-        self.state = self.manager.dict({
-            "gear": "turtle",
-            "mode": "gamepad",
-            "trim": 0.0,
-            "depth_threshold": 0.6,
-            "recording": False,
-            "min_distance": float('inf'),
-            "braking": False,
-            "last_error": "",
-            "motor_value": 90,
-            "steering_value": 90
-        })
+    def __init__(self, manager: Optional[SyncManager] = None):
+        # Несколько машин в одном супервизоре делят один сервер Manager
+        self.manager = manager or Manager()
+        self.state = self.manager.dict(INITIAL_STATE)
+        # Счётчик изменений в разделяемой памяти: читатели узнают об обновлении без IPC
+        self.version = Value('L', 0)
+        self.error_count = Value('L', 0)
         logger.info("StateManager initialized")
 
     def update_state(self, **kwargs) -> None:
+        updated = False
         for key, value in kwargs.items():
             if value is not None:
                 self.state[key] = value
+                updated = True
                 logger.debug(f"State updated: {key} = {value}")
+        if updated:
+            with self.version.get_lock():
+                self.version.value += 1
+        if kwargs.get("last_error"):
+            with self.error_count.get_lock():
+                self.error_count.value += 1
 
     def get_state(self) -> Dict:
-        return dict(self.state)
\ No newline at end of file
+        # copy() — один запрос к менеджеру вместо запроса на каждый ключ
+        return self.state.copy()
+
+    @property
+    def server_pid(self) -> int:
+        return self.manager._process.pid
+
+class LocalStateManager(StateManager):
+    """Состояние в обычном словаре для однопроцессного режима: без сервера Manager и IPC на каждый вызов."""
+
+    def __init__(self):
+        self.manager = None
+        self.state = dict(INITIAL_STATE)
+        self.version = Value('L', 0)
+        self.error_count = Value('L', 0)
+        logger.info("LocalStateManager initialized")
+
+    def get_state(self) -> Dict:
+        return dict(self.state)
+
+    @property
+    def server_pid(self) -> int:
+        return os.getpid()
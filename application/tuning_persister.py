@@ -0,0 +1,108 @@
+import threading
+import time
+import logging
+from typing import Dict, Optional, Tuple
+from core.interfaces.tuning_store import TuningStore
+from .state_manager import StateManager
+
+logger = logging.getLogger(__name__)
+
+TUNED_KEYS = ("trim", "depth_threshold")
+# Под этим ключом в файле подстройки лежат значения config.yaml на момент сохранения
+CONFIG_KEY = "config"
+
+class TuningPersister:
+    """Сохраняет подстроенные с D-pad параметры в фоне, вне цикла ввода.
+
+    Серия изменений схлопывается: запись происходит, когда значения не менялись
+    debounce секунд, но не позже max_delay от первого несохранённого изменения.
+
+    config_values — значения тех же параметров из config.yaml; они
+    сохраняются рядом с подстроенными. Если при запуске config.yaml
+    отличается от сохранённого, его правили после подстройки: побеждает
+    config.yaml, подстроенное значение отбрасывается с предупреждением.
+    Подстройка поверх значения из config.yaml тоже пишется в лог.
+    """
+
+    def __init__(self, store: TuningStore, state_manager: StateManager, keys: Tuple[str, ...] = TUNED_KEYS,
+                 debounce: float = 1.0, max_delay: float = 5.0, poll_interval: float = 0.25,
+                 config_values: Optional[Dict] = None):
+        self.store = store
+        self.state_manager = state_manager
+        self.keys = keys
+        self.config_values = {key: value for key, value in (config_values or {}).items() if key in keys}
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.saved: Dict = {}
+        self.pending: Optional[Dict] = None
+        self.first_change = 0.0
+        self.last_change = 0.0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        logger.info(f"TuningPersister initialized with keys: {keys}, debounce: {debounce}")
+
+    def restore(self) -> Dict:
+        stored = self.store.load()
+        saved_config = stored.get(CONFIG_KEY) or {}
+        values = {}
+        for key, value in stored.items():
+            if key not in self.keys:
+                continue
+            if key not in self.config_values:
+                values[key] = value
+            elif key in saved_config and saved_config[key] != self.config_values[key]:
+                logger.warning(f"{key} changed in config.yaml since it was tuned "
+                               f"({saved_config[key]} -> {self.config_values[key]}): tuned value {value} discarded")
+            else:
+                if value != self.config_values[key]:
+                    logger.warning(f"{key} from config.yaml ({self.config_values[key]}) overridden by tuned value "
+                                   f"{value}, reset it on the gamepad or delete the tuning file")
+                values[key] = value
+        if values:
+            self.state_manager.update_state(**values)
+            logger.info(f"Tuned parameters restored: {values}")
+        self.saved = dict(values)
+        return values
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name="TuningPersister", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        self._poll(flush=True)
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.poll_interval):
+            self._poll()
+
+    def _poll(self, flush: bool = False) -> None:
+        try:
+            state = self.state_manager.get_state()
+            values = {key: state[key] for key in self.keys if key in state}
+        except Exception as e:
+            logger.error(f"TuningPersister state read error: {e}")
+            return
+        now = time.monotonic()
+        if values != (self.pending if self.pending is not None else self.saved):
+            if self.pending is None:
+                self.first_change = now
+            self.pending = values
+            self.last_change = now
+        if self.pending is None:
+            return
+        if self.pending == self.saved:
+            self.pending = None
+            return
+        if flush or now - self.last_change >= self.debounce or now - self.first_change >= self.max_delay:
+            try:
+                self.store.save({**self.pending, CONFIG_KEY: self.config_values} if self.config_values
+                                else self.pending)
+                self.saved = self.pending
+                self.pending = None
+            except Exception as e:
+                logger.error(f"Failed to persist tuned parameters: {e}")
+                self.state_manager.update_state(last_error=f"Failed to persist tuned parameters: {e}")
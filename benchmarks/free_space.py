@@ -0,0 +1,106 @@
+"""Время и поведение FreeSpaceSteering на синтетических и записанных кадрах глубины.
+
+Синтетические кадры: пол, уходящий к горизонту, стена на max_range,
+коробка-препятствие в случайном месте, шум, NaN, +inf и ближние выбросы как у ZED.
+Проверяется, что руль уводит от препятствия, а время на кадр укладывается
+в бюджет. Записанные кадры — .npy/.npz в метрах или 16-битные PNG в мм
+(по одному кадру на файл).
+
+Запуск из корня репозитория:
+    python -m benchmarks.free_space --frames 300 --budget-ms 33
+    python -m benchmarks.free_space --recorded 'logs/dataset/*/depth/*.png'
+"""
+import argparse
+import glob
+import time
+import numpy as np
+from application.free_space import FreeSpaceSteering
+from infrastructure.config_manager import FREE_SPACE_DEFAULTS
+
+RESOLUTIONS = {"HD2K": (1242, 2208), "HD1080": (1080, 1920), "HD720": (720, 1280), "VGA": (376, 672)}
+
+def synthetic_frame(rng: np.random.Generator, height: int, width: int, obstacle_x: float) -> np.ndarray:
+    rows = np.arange(height, dtype=np.float32)[:, None]
+    horizon = height * 0.45
+    # Ниже горизонта — пол, ближе к камере книзу кадра; выше — стена вдали
+    depth = np.where(rows > horizon, 0.6 * height / np.maximum(rows - horizon, 1.0), 6.0)
+    depth = np.broadcast_to(depth, (height, width)).astype(np.float32)
+    left, right = int(width * (obstacle_x - 0.12)), int(width * (obstacle_x + 0.12))
+    depth[int(height * 0.25):int(height * 0.8), max(left, 0):max(right, 0)] = 1.0
+    depth += rng.normal(0.0, 0.02, depth.shape).astype(np.float32)
+    noise = rng.random(depth.shape)
+    depth[noise < 0.05] = np.nan
+    depth[noise > 0.995] = np.inf
+    depth[(noise > 0.05) & (noise < 0.052)] = 0.1
+    return depth
+
+def load_recorded(pattern: str) -> list:
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        if path.endswith(".npy"):
+            frames.append(np.load(path).astype(np.float32))
+        elif path.endswith(".npz"):
+            with np.load(path) as archive:
+                frames.extend(archive[key].astype(np.float32) for key in archive.files)
+        else:
+            import cv2
+            raw = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if raw is None:
+                continue
+            # 0 мм — нет данных
+            depth = raw.astype(np.float32) / 1000
+            depth[raw == 0] = np.nan
+            frames.append(depth)
+    return frames
+
+def time_frames(steering: FreeSpaceSteering, frames: list, threshold: float) -> np.ndarray:
+    timings = []
+    for depth in frames:
+        start = time.perf_counter()
+        steering.steer(depth, threshold)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+def report(label: str, timings: np.ndarray, budget: float) -> bool:
+    p50, p99, worst = np.percentile(timings, 50), np.percentile(timings, 99), timings.max()
+    print(f"{label:<24}{timings.size:6d} frames  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  max {worst:6.2f} ms")
+    return p99 <= budget
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300, help="synthetic frames per resolution")
+    parser.add_argument("--recorded", help="glob of recorded depth frames (.npy, .npz, 16-bit .png)")
+    parser.add_argument("--threshold", type=float, default=0.6, help="depth threshold, m")
+    parser.add_argument("--budget-ms", type=float, default=33.0, help="fail if p99 per frame exceeds this")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    ok = True
+    for name, (height, width) in RESOLUTIONS.items():
+        positions = rng.uniform(0.1, 0.9, args.frames)
+        frames = [synthetic_frame(rng, height, width, x) for x in positions]
+        timings = time_frames(FreeSpaceSteering({**FREE_SPACE_DEFAULTS, "smoothing": 0.0}), frames, args.threshold)
+        ok &= report(f"synthetic {name}", timings, args.budget_ms)
+
+    # Препятствие впереди левее — руль вправо, правее — влево, впереди пусто — прямо
+    steering = FreeSpaceSteering({**FREE_SPACE_DEFAULTS, "smoothing": 0.0})
+    checks = {"left": (0.42, 1), "right": (0.58, -1), "none": (-1.0, 0)}
+    for label, (position, sign) in checks.items():
+        speed, steer = steering.steer(synthetic_frame(rng, 720, 1280, position), args.threshold)
+        passed = np.sign(round(steer, 3)) == sign and speed > 0
+        print(f"obstacle {label:<6} speed {speed:.2f} steering {steer:+.2f} {'ok' if passed else 'WRONG'}")
+        ok &= passed
+
+    if args.recorded:
+        frames = load_recorded(args.recorded)
+        if not frames:
+            print(f"FAIL: no frames match {args.recorded}")
+            return 1
+        steering = FreeSpaceSteering(FREE_SPACE_DEFAULTS)
+        ok &= report("recorded", time_frames(steering, frames, args.threshold), args.budget_ms)
+
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""Стоимость записи метрик на горячем пути и проверка чтения из другого процесса.
+
+Меряет Counter.inc, Gauge.set и Histogram.observe в реестре shared memory,
+затем дочерний процесс пишет известное число наблюдений, а родитель
+подключается к сегменту по имени и сверяет агрегаты.
+
+Запуск из корня репозитория:
+    python -m benchmarks.metrics_overhead --iterations 1000000 --bound-ns 1000
+"""
+import argparse
+import os
+import random
+import timeit
+from multiprocessing import Process
+from application.metrics import LATENCY_BUCKETS, MetricsRegistry
+
+SCHEMA = {
+    "bench": {"counters": ["events_total"], "gauges": ["level"], "histograms": {"latency_seconds": LATENCY_BUCKETS}},
+    "writer": {"counters": ["events_total"], "histograms": {"latency_seconds": LATENCY_BUCKETS}},
+}
+
+def write_observations(registry: MetricsRegistry, count: int) -> None:
+    section = registry.section("writer")
+    events = section.counter("events_total")
+    latency = section.histogram("latency_seconds")
+    for index in range(count):
+        events.inc()
+        latency.observe((index % 100) / 1000)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--bound-ns", type=float, default=1000.0, help="fail if any operation is slower than this")
+    args = parser.parse_args()
+
+    registry = MetricsRegistry.create(f"car_metrics_bench_{os.getpid()}", SCHEMA)
+    try:
+        section = registry.section("bench")
+        counter = section.counter("events_total")
+        gauge = section.gauge("level")
+        histogram = section.histogram("latency_seconds")
+        samples = [random.random() * 0.05 for _ in range(1024)]
+        value = samples[0]
+        operations = {
+            "Counter.inc": lambda: counter.inc(),
+            "Gauge.set": lambda: gauge.set(value),
+            "Histogram.observe": lambda: histogram.observe(value),
+        }
+        baseline = min(timeit.repeat(lambda: None, number=args.iterations, repeat=3)) / args.iterations
+        failed = False
+        for name, operation in operations.items():
+            per_call = min(timeit.repeat(operation, number=args.iterations, repeat=3)) / args.iterations
+            cost_ns = (per_call - baseline) * 1e9
+            print(f"{name:<20}{cost_ns:8.1f} ns/op (call overhead {baseline * 1e9:.1f} ns excluded)")
+            failed |= cost_ns > args.bound_ns
+
+        expected = 100_000
+        writer = Process(target=write_observations, args=(registry, expected))
+        writer.start()
+        writer.join()
+        reader = MetricsRegistry.attach(registry.name)
+        snapshot = reader.snapshot()["writer"]
+        count, total = reader.histogram_totals("writer", "latency_seconds")
+        reader.close()
+        print(f"reader: events_total={snapshot['events_total']:.0f}, latency count={count:.0f}, sum={total:.3f}")
+        if snapshot["events_total"] != expected or count != expected:
+            print("FAIL: reader aggregates do not match what the writer recorded")
+            return 1
+        if failed:
+            print(f"FAIL: an operation exceeds {args.bound_ns:g} ns")
+            return 1
+        print(f"OK: all operations within {args.bound_ns:g} ns")
+        return 0
+    finally:
+        registry.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
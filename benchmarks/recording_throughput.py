@@ -0,0 +1,88 @@
+"""Пропускная способность записи: MJPG через cv2.VideoWriter против JpegSequenceRecorder.
+
+Подаёт синтетические кадры так быстро, как принимает рекордер, и
+печатает кадры в секунду и число отброшенных кадров для VideoWriter и
+для пула из 1..N потоков/процессов. Записанная сессия проверяется по
+index.bin: кадры по порядку, JPEG целые.
+
+Запуск из корня репозитория (нужен OpenCV):
+    python -m benchmarks.recording_throughput --resolution HD720 --frames 300
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import cv2
+from application.state_manager import StateManager
+from infrastructure.jpeg_recorder import CHUNK_NAME, INDEX_FILE, INDEX_RECORD, JpegSequenceRecorder
+from infrastructure.config_manager import RECORDING_DEFAULTS
+from infrastructure.video_recorder import ZEDVideoRecorder
+
+RESOLUTIONS = {"HD2K": (1242, 2208), "HD1080": (1080, 1920), "HD720": (720, 1280), "VGA": (376, 672)}
+
+def synthetic_frames(height: int, width: int, count: int = 16) -> list:
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 5)
+    return [np.roll(base, shift * 8, axis=1) for shift in range(count)]
+
+def run(recorder, frames: list, count: int) -> float:
+    recorder.initialize()
+    recorder.sync_recording(True)
+    started = time.perf_counter()
+    for index in range(count):
+        recorder.record_frame(frames[index % len(frames)], time.time())
+    recorder.sync_recording(False)
+    # Остановка не ждёт кодировщиков: дописывает поток записи, close() его дожидается
+    recorder.close()
+    return count / (time.perf_counter() - started)
+
+def verify(session_dir: str) -> int:
+    with open(os.path.join(session_dir, INDEX_FILE), "rb") as f:
+        data = f.read()
+    previous = -1
+    for number, _, chunk, offset, length in INDEX_RECORD.iter_unpack(data):
+        with open(os.path.join(session_dir, CHUNK_NAME.format(chunk)), "rb") as f:
+            f.seek(offset)
+            jpeg = f.read(length)
+        if number <= previous or jpeg[:2] != b"\xff\xd8" or jpeg[-2:] != b"\xff\xd9":
+            raise AssertionError(f"frame {number} out of order or corrupted")
+        previous = number
+    return len(data) // INDEX_RECORD.size
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", choices=RESOLUTIONS, default="HD720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    height, width = RESOLUTIONS[args.resolution]
+    frames = synthetic_frames(height, width)
+    state_manager = StateManager()
+    output_dir = tempfile.mkdtemp(prefix="recording_bench_")
+    try:
+        writer = ZEDVideoRecorder(output_dir, state_manager)
+        writer.width, writer.height = width, height
+        print(f"{'VideoWriter MJPG':<24}{run(writer, frames, args.frames):8.1f} fps")
+        workers = 1
+        while workers <= args.max_workers:
+            for pool in ("thread", "process"):
+                # Очередь с запасом: меряется скорость кодирования, а не отбрасывание
+                config = {**RECORDING_DEFAULTS, "format": "jpeg", "workers": workers, "pool": pool,
+                          "max_pending": args.frames}
+                recorder = JpegSequenceRecorder(output_dir, state_manager, config)
+                session_dir = recorder.output_path
+                fps = run(recorder, frames, args.frames)
+                written = verify(session_dir)
+                print(f"{f'jpeg {pool} x{workers}':<24}{fps:8.1f} fps  {written} frames verified")
+                shutil.rmtree(session_dir)
+                time.sleep(1.0)
+            workers *= 2
+        return 0
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
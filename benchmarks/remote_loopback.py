@@ -0,0 +1,109 @@
+"""UDPRemoteInput по loopback: задержка, учёт потерь и переход в нейтраль.
+
+Дочерний процесс шлёт пакеты с заданными искажениями: пропуски,
+перестановки соседних пакетов, дубликаты и пакеты со старой меткой
+времени. Родитель читает их через UDPRemoteInput так же, как процесс
+устройства, сверяет счётчики с тем, что было испорчено, и меряет, через
+сколько после последнего пакета машина переходит в нейтраль.
+
+Запуск из корня репозитория:
+    python -m benchmarks.remote_loopback --packets 2000 --rate 200
+"""
+import argparse
+import os
+import socket
+import time
+from multiprocessing import Process
+from application.metrics import MetricsRegistry, build_schema
+from application.state_manager import StateManager
+from infrastructure.remote_protocol import encode
+from infrastructure.udp_remote import UDPRemoteInput
+
+DROP_EVERY = 50
+SWAP_EVERY = 40
+DUPLICATE_EVERY = 30
+LATE_EVERY = 70
+
+def impaired_stream(count: int):
+    """Номера пакетов в порядке отправки и признак старой метки времени."""
+    order = []
+    seq = 1
+    while seq < count:
+        if seq % DROP_EVERY == 0:
+            seq += 1
+            continue
+        if seq % SWAP_EVERY == 0 and (seq + 1) % DROP_EVERY and seq + 1 < count:
+            order += [(seq + 1, False), (seq, False)]
+            seq += 2
+            continue
+        order.append((seq, seq % LATE_EVERY == 0))
+        if seq % DUPLICATE_EVERY == 0:
+            order.append((seq, False))
+        seq += 1
+    return order
+
+def send(port: int, count: int, rate: float, max_age: float) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    period = 1.0 / rate
+    next_tick = time.monotonic()
+    sock.sendto(encode(7, 0, 0.5, 0.0, 0.0), ("127.0.0.1", port))
+    for seq, late in impaired_stream(count):
+        timestamp = time.time_ns() - int(max_age * 2e9) if late else None
+        sock.sendto(encode(7, seq, 0.5, 0.0, 0.1, timestamp_ns=timestamp), ("127.0.0.1", port))
+        next_tick += period
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+    sock.close()
+
+def expected_counts(count: int):
+    order = impaired_stream(count)
+    sent = {seq for seq, _ in order}
+    lost = sum(1 for seq in range(1, count) if seq not in sent)
+    swaps = sum(1 for (a, _), (b, _) in zip(order, order[1:]) if b < a)
+    duplicates = len(order) - len(sent)
+    late = sum(1 for _, late in order if late)
+    # Переставленный пакет сначала засчитывается потерянным, потом отбрасывается как опоздавший по номеру
+    return lost + swaps, swaps + duplicates, late
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packets", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200.0, help="packets per second")
+    parser.add_argument("--timeout", type=float, default=0.25)
+    parser.add_argument("--max-age", type=float, default=0.05)
+    args = parser.parse_args()
+
+    state_manager = StateManager()
+    metrics = MetricsRegistry.create(f"car_metrics_remote_{os.getpid()}", build_schema(["remote"], []))
+    remote = UDPRemoteInput("127.0.0.1", 0, state_manager, args.timeout, args.max_age)
+    remote.set_metrics(metrics.section("remote"))
+    remote.initialize()
+    sender = Process(target=send, args=(remote.port, args.packets, args.rate, args.max_age))
+    try:
+        sender.start()
+        moving_seen = False
+        while True:
+            command = remote.get_input()
+            if command.speed > 0:
+                moving_seen = True
+            elif moving_seen:
+                # Отсчёт от последнего принятого пакета
+                neutral_after = time.monotonic() - remote.latest_time
+                break
+        sender.join()
+
+        count, total = metrics.histogram_totals("remote", "latency_seconds")
+        lost, reordered, late = expected_counts(args.packets)
+        print(f"received {remote.received}, lost {remote.lost} (expected {lost}), "
+              f"out of order {remote.reordered} (expected {reordered}), late {remote.late} (expected {late})")
+        print(f"mean one-way latency {total / count * 1e6:.0f} us over {count:.0f} packets")
+        print(f"neutral {neutral_after * 1000:.0f} ms after the last packet (timeout {args.timeout * 1000:.0f} ms)")
+        ok = (remote.lost, remote.reordered, remote.late) == (lost, reordered, late) \
+            and args.timeout <= neutral_after <= args.timeout + 0.05
+        print("OK" if ok else "FAIL")
+        return 0 if ok else 1
+    finally:
+        remote.close()
+        metrics.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
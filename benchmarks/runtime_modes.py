@@ -0,0 +1,245 @@
+"""Процессный и asyncio-режим работы бок о бок: память, CPU и задержка.
+
+Для каждого режима main.py запускается с временным конфигом: ввод —
+пульт по UDP (remote), Arduino — SketchSimulator на pty в этом процессе,
+без экрана. Пульт шлёт команды с частотой --rate и каждые --flip секунд
+перекладывает руль; задержка «от пакета до импульса серво» — время от
+перекладки до первого изменившегося значения руля, которое применил
+скетч. Печатаются:
+  - PSS и RSS всех процессов машины (включая сервер Manager), число
+    процессов и потоков — в установившемся режиме;
+  - доля CPU за окно замера;
+  - медиана, p99 и максимум задержки до скетча;
+  - средние input_to_output и write_seconds из реестра метрик.
+
+Запуск из корня репозитория (нужен pyserial):
+    python -m benchmarks.runtime_modes --duration 20 --rate 100
+"""
+import argparse
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import yaml
+from application.metrics import MetricsRegistry
+from infrastructure.remote_protocol import encode
+from tools.arduino_simulator import AppliedCommand, SketchSimulator
+
+MODES = ("processes", "async")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+def free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def process_tree(root: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Имя процесса в скобках может содержать пробелы: поля считаем после ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+def memory_kb(pid: int) -> Tuple[int, int]:
+    """PSS и RSS процесса в килобайтах."""
+    pss = rss = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+                elif line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+    except OSError:
+        pass
+    return pss, rss
+
+def cpu_seconds(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+def thread_count(pid: int) -> int:
+    try:
+        return len(os.listdir(f"/proc/{pid}/task"))
+    except OSError:
+        return 0
+
+def write_config(directory: str, mode: str, remote_port: int, arduino_port: str, baud: int, rate: float,
+                 segment: str) -> str:
+    with open("config/config.yaml") as f:
+        config = yaml.safe_load(f)
+    config["runtime"] = {"mode": mode}
+    config["input"].update(devices=["remote"], rates={"remote": 0})
+    config["remote"].update(host="127.0.0.1", port=remote_port, max_age=0)
+    config["arduino"].update(backend="serial", port=arduino_port, baud_rate=baud, serial_number=None)
+    config["control"]["input_rate"] = rate
+    config["startup"]["required_devices"] = ["arduino"]
+    config["ui"]["enabled"] = False
+    config["stream"]["enabled"] = False
+    config["dataset"]["enabled"] = False
+    config["metrics"].update(enabled=False, segment=segment)
+    # Политики ядер из конфига Jetson исказили бы сравнение на другой машине
+    config["scheduling"] = {}
+    config["profiling"]["control_file"] = os.path.join(directory, "profile.request")
+    config["tuning"]["file"] = os.path.join(directory, "tuned.yaml")
+    config["logging"]["level"] = "WARNING"
+    path = os.path.join(directory, f"{mode}.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+class SteeringFlips:
+    """Пульт, перекладывающий руль каждые flip секунд, и учёт, когда перекладка дошла до скетча."""
+
+    def __init__(self, port: int, rate: float, flip: float):
+        self.port = port
+        self.rate = rate
+        self.flip = flip
+        self.flips: List[float] = []
+        self.applied: List[Tuple[float, int]] = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._send, name="remote-sender", daemon=True)
+
+    def on_apply(self, command: AppliedCommand) -> None:
+        if not self.applied or self.applied[-1][1] != command.steering:
+            self.applied.append((command.timestamp, command.steering))
+
+    def _send(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        session = random.getrandbits(32)
+        period = 1.0 / self.rate
+        next_tick = next_flip = time.monotonic()
+        steering, seq = -0.5, 0
+        while not self.stop_event.is_set():
+            if time.monotonic() >= next_flip:
+                steering = -steering
+                next_flip += self.flip
+                self.flips.append(time.time())
+            sock.sendto(encode(session, seq, 0.0, 0.0, steering), ("127.0.0.1", self.port))
+            seq += 1
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+        sock.close()
+
+    def latencies(self, since: float) -> List[float]:
+        result = []
+        for flip in self.flips:
+            if flip < since:
+                continue
+            applied = next((timestamp for timestamp, _ in self.applied if timestamp >= flip), None)
+            if applied is not None:
+                result.append(applied - flip)
+        return result
+
+def histogram_mean(registry: MetricsRegistry, section: str, metric: str, base: Tuple[float, float]) -> float:
+    count, total = registry.histogram_totals(section, metric)
+    observed = count - base[0]
+    return (total - base[1]) / observed if observed else float("nan")
+
+def run(mode: str, baud: int, rate: float, flip: float, warmup: float, duration: float) -> Optional[Dict]:
+    segment = f"bench_runtime_{os.getpid()}_{mode}"
+    remote_port = free_udp_port()
+    flips = SteeringFlips(remote_port, rate, flip)
+    simulator = SketchSimulator(baud, on_apply=flips.on_apply)
+    simulator.start()
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = write_config(directory, mode, remote_port, simulator.port, baud, rate, segment)
+        car = subprocess.Popen([sys.executable, "main.py", "--config", config_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        registry = None
+        try:
+            flips.thread.start()
+            deadline = time.monotonic() + warmup
+            while time.monotonic() < deadline and car.poll() is None:
+                time.sleep(0.1)
+            if car.poll() is not None:
+                print(f"{mode}: main.py exited with code {car.returncode} during warmup, see logs/car_control.log")
+                return None
+            registry = MetricsRegistry.attach(segment)
+            tree = process_tree(car.pid)
+            cpu_before = sum(cpu_seconds(pid) for pid in tree)
+            command_base = registry.histogram_totals("command", "input_to_output_seconds")
+            write_base = registry.histogram_totals("arduino", "write_seconds")
+            started_wall, started = time.time(), time.monotonic()
+            time.sleep(duration)
+            elapsed = time.monotonic() - started
+            tree = process_tree(car.pid)
+            cpu = (sum(cpu_seconds(pid) for pid in tree) - cpu_before) / elapsed
+            memory = [memory_kb(pid) for pid in tree]
+            command_mean = histogram_mean(registry, "command", "input_to_output_seconds", command_base)
+            write_mean = histogram_mean(registry, "arduino", "write_seconds", write_base)
+            threads = sum(thread_count(pid) for pid in tree)
+        finally:
+            flips.stop_event.set()
+            if registry:
+                registry.close()
+            if car.poll() is None:
+                car.send_signal(signal.SIGINT)
+                try:
+                    car.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    car.kill()
+                    car.wait()
+            simulator.stop()
+    latencies = flips.latencies(started_wall)
+    return {
+        "processes": len(tree),
+        "threads": threads,
+        "pss_mb": sum(pss for pss, _ in memory) / 1024,
+        "rss_mb": sum(rss for _, rss in memory) / 1024,
+        "cpu": cpu,
+        "flips": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p99_ms": sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        if latencies else float("nan"),
+        "max_ms": max(latencies) * 1000 if latencies else float("nan"),
+        "command_ms": command_mean * 1000,
+        "write_ms": write_mean * 1000,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--rate", type=float, default=100.0, help="remote packets and control ticks per second")
+    parser.add_argument("--flip", type=float, default=0.25, help="seconds between steering reversals")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'procs':>5} {'threads':>7} {'PSS MB':>8} {'RSS MB':>8} {'CPU %':>6} {'flips':>6} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'cmd ms':>7} {'write ms':>8}")
+    for mode in args.modes:
+        result = run(mode, args.baud, args.rate, args.flip, args.warmup, args.duration)
+        if result is None:
+            continue
+        print(f"{mode:<10} {result['processes']:5d} {result['threads']:7d} {result['pss_mb']:8.1f} "
+              f"{result['rss_mb']:8.1f} {result['cpu'] * 100:6.1f} {result['flips']:6d} {result['p50_ms']:7.2f} "
+              f"{result['p99_ms']:7.2f} {result['max_ms']:7.2f} {result['command_ms']:7.3f} {result['write_ms']:8.3f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Задержка от кадра глубины до команды торможения.
+
+Процесс-камера выдаёт синтетические карты глубины ZED-разрешения с заданной
+частотой и периодически ставит препятствие ближе порога. Кадр проходит через
+ZEDCameraInput.process_frame и публикуется в ObstacleBrakeOverride, процесс
+ввода шлёт команды «газ», а CommandProcessor + CarController работают как в
+CommandProcess. Измеряется время от метки кадра до send_command с тормозом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.safety_latency --trials 50 --input-rate 100 --bound-ms 60
+"""
+import argparse
+import time
+from multiprocessing import Event, Process, Queue
+import numpy as np
+from application.car_controller import CarController
+from application.command_processor import CommandProcessor
+from application.input_manager import InputManager
+from application.safety_override import ObstacleBrakeOverride
+from application.state_manager import StateManager
+from core.entities.command import CarCommand
+from core.interfaces.arduino_interface import ArduinoInterface
+from infrastructure.zed_camera import ZEDCameraInput
+
+class BrakeRecorder(ArduinoInterface):
+    def __init__(self):
+        self.brake_times = []
+        self.braking = False
+
+    def initialize(self) -> None:
+        pass
+
+    def send_command(self, motor_value: int, steering_value: int) -> None:
+        braking = motor_value < 90
+        if braking and not self.braking:
+            self.brake_times.append(time.time())
+        self.braking = braking
+
+    def close(self) -> None:
+        pass
+
+def camera_loop(safety: ObstacleBrakeOverride, state_manager: StateManager, onsets: Queue, stop: Event,
+                fps: float, trials: int, width: int, height: int, threshold: float) -> None:
+    zed = ZEDCameraInput(None, state_manager)
+    clear = np.full((height, width), 5.0, dtype=np.float32)
+    blocked = clear.copy()
+    blocked[height // 3:2 * height // 3, width // 3:2 * width // 3] = threshold / 2
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    period = 1.0 / fps
+    frames_per_phase = int(fps)  # секунда препятствия, секунда свободной дороги
+    for trial in range(trials):
+        for obstacle in (True, False):
+            for index in range(frames_per_phase):
+                if stop.is_set():
+                    return
+                frame_timestamp = time.time()
+                zed.process_frame(frame, blocked if obstacle else clear, threshold)
+                safety.publish_obstacle(frame_timestamp, zed.min_distance, threshold)
+                if obstacle and index == 0:
+                    onsets.put(frame_timestamp)
+                time.sleep(max(0.0, period - (time.time() - frame_timestamp)))
+    stop.set()
+
+def input_loop(command_queue: Queue, stop: Event, rate: float) -> None:
+    period = 1.0 / rate
+    while not stop.is_set():
+        command_queue.put(CarCommand(speed=0.5, brake=0.0, steering=0.0))
+        time.sleep(period)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--input-rate", type=float, default=100.0)
+    parser.add_argument("--tick", type=float, default=0.02)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--bound-ms", type=float, default=60.0, help="fail if the worst case exceeds this")
+    args = parser.parse_args()
+
+    state_manager = StateManager()
+    safety = ObstacleBrakeOverride(state_manager, brake_duration=0.5)
+    recorder = BrakeRecorder()
+    command_queue, onsets, stop = Queue(), Queue(), Event()
+    processor = CommandProcessor(InputManager(state_manager), CarController(recorder, state_manager),
+                                 command_queue, safety, args.tick)
+
+    camera = Process(target=camera_loop, args=(safety, state_manager, onsets, stop, args.fps, args.trials,
+                                                args.width, args.height, args.threshold))
+    feeder = Process(target=input_loop, args=(command_queue, stop, args.input_rate))
+    camera.start()
+    feeder.start()
+    while not stop.is_set():
+        processor.process()
+    camera.join()
+    feeder.join()
+
+    frame_times = []
+    while not onsets.empty():
+        frame_times.append(onsets.get())
+    count = min(len(frame_times), len(recorder.brake_times))
+    latencies = np.array([recorder.brake_times[i] - frame_times[i] for i in range(count)]) * 1000
+    if not count:
+        print("No brake events recorded")
+        return 1
+    print(f"frames {args.width}x{args.height}@{args.fps:g}, input {args.input_rate:g} Hz, tick {args.tick * 1000:g} ms, "
+          f"{count} brake events")
+    print(f"frame-to-brake latency ms: min {latencies.min():.2f}  p50 {np.percentile(latencies, 50):.2f}  "
+          f"p99 {np.percentile(latencies, 99):.2f}  max {latencies.max():.2f}")
+    if latencies.max() > args.bound_ms:
+        print(f"FAIL: worst case {latencies.max():.2f} ms exceeds bound {args.bound_ms:g} ms")
+        return 1
+    print(f"OK: worst case within {args.bound_ms:g} ms")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
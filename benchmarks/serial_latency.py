@@ -0,0 +1,88 @@
+"""Задержка и пропускная способность последовательного протокола на симуляторе скетча.
+
+ArduinoAdapter шлёт команды с частотой --rate в SketchSimulator через pty.
+Каждая пара (мотор, руль) уникальна в пределах прогона, поэтому по
+применённому значению находится момент отправки. Печатаются
+медиана/p99/максимум задержки от send_command до motorESC.write и до
+следующего импульса серво, потерянные команды, зависания readStringUntil,
+переполнения приёмного буфера и самый долгий вызов send_command
+(цикл управления не должен ждать порт).
+
+Запуск из корня репозитория (нужен pyserial):
+    python -m benchmarks.serial_latency --baud 9600 --rates 50 100 150 200
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List, Tuple
+from infrastructure.arduino import ArduinoAdapter
+from tools.arduino_simulator import AppliedCommand, SketchSimulator
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float("nan")
+
+def run(baud: int, rate: float, duration: float) -> Dict:
+    sent: Dict[Tuple[int, int], float] = {}
+    applied: List[Tuple[float, float, float]] = []
+
+    def on_apply(command: AppliedCommand) -> None:
+        sent_at = sent.pop((command.motor, command.steering), None)
+        if sent_at is not None:
+            applied.append((command.timestamp - sent_at, command.effective - sent_at, command.first_byte - sent_at))
+
+    simulator = SketchSimulator(baud, on_apply=on_apply)
+    simulator.start()
+    adapter = ArduinoAdapter(simulator.port, baud)
+    adapter.initialize()
+    slowest_send = 0.0
+    count = int(rate * duration)
+    started = time.monotonic()
+    try:
+        for seq in range(count):
+            # Пара значений кодирует номер команды: 181 * 181 уникальных сочетаний
+            motor, steering = seq % 181, (seq // 181) % 181
+            deadline = started + seq / rate
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            sent[(motor, steering)] = time.time()
+            call = time.monotonic()
+            adapter.send_command(motor, steering)
+            slowest_send = max(slowest_send, time.monotonic() - call)
+        # Даём линии договорить очередь и отработать таймаут последней строки
+        time.sleep(1.5)
+    finally:
+        adapter.connection.close()
+        simulator.stop()
+    latencies = [item[0] for item in applied]
+    return {
+        "sent": count,
+        "applied": len(applied),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else float("nan"),
+        "servo_p50_ms": statistics.median(item[1] for item in applied) * 1000 if applied else float("nan"),
+        "stalls": simulator.stalls,
+        "overflow_bytes": simulator.overflows,
+        "slowest_send_ms": slowest_send * 1000,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--rates", type=float, nargs="+", default=[50.0, 100.0, 150.0, 200.0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    line_capacity = args.baud / 10 / len("180,180;\n")
+    print(f"{args.baud} baud: about {line_capacity:.0f} full-width lines/s")
+    print(f"{'rate':>6} {'sent':>6} {'applied':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'servo ms':>9} "
+          f"{'stalls':>7} {'overflow':>9} {'send max ms':>12}")
+    for rate in args.rates:
+        result = run(args.baud, rate, args.duration)
+        print(f"{rate:6.0f} {result['sent']:6d} {result['applied']:8d} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+              f"{result['max_ms']:8.2f} {result['servo_p50_ms']:9.2f} {result['stalls']:7d} "
+              f"{result['overflow_bytes']:9d} {result['slowest_send_ms']:12.2f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
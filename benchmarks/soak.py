@@ -0,0 +1,348 @@
+"""Длительный и нагрузочный прогон всего дерева процессов с отчётом и вердиктом.
+
+main.py запускается с временным конфигом на заменителях устройств: пульт
+по UDP с частотой --rate (до кГц), Arduino — SketchSimulator на pty в этом
+процессе, с --camera — синтетическая камера (zed.backend: synthetic),
+с --record — запись с первого кадра, с --preview — MJPEG-поток и клиент,
+читающий его. Раз в --interval секунд снимается /metrics экспортёра:
+  - частоты циклов (прирост _count гистограмм циклов);
+  - глубина очередей command и arduino;
+  - CPU и RSS каждого процесса (по таблице PID, переживает перезапуски);
+  - p50/p99 гистограмм задержки input_to_output и задержки пульта.
+Сквозная задержка «от пакета до применения скетчем» меряется точно:
+пульт перекладывает руль каждые --flip секунд.
+
+Прогон проваливается (код возврата 1), если после --warmup:
+  - медиана сквозной задержки в последней трети выросла больше чем в
+    --max-latency-growth раз (и больше чем на --latency-slack мс) от первой;
+  - RSS процесса растёт по наклону МНК быстрее --max-rss-growth МБ в час
+    (и вырос за прогон больше чем на --rss-slack МБ);
+  - очередь в последнем замере глубже --max-queue;
+  - процесс машины завершился раньше времени.
+Отчёт — JSON с рядами замеров и сводкой в --report.
+
+Запуск из корня репозитория (нужен pyserial; для --record и --preview — cv2):
+    python -m benchmarks.soak --duration 3600 --rate 1000 --camera --record --preview
+"""
+import argparse
+import bisect
+import json
+import os
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+import yaml
+from application.metrics import LOOP_HISTOGRAMS, DEVICE_LOOP_HISTOGRAM
+from benchmarks.runtime_modes import SteeringFlips, free_udp_port
+from tools.arduino_simulator import SketchSimulator
+
+SAMPLE = re.compile(r'^([A-Za-z_:][A-Za-z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+LATENCY_HISTOGRAMS = (("command", "input_to_output_seconds"), ("remote", "latency_seconds"))
+
+def free_tcp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def scrape(url: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Сэмплы Prometheus: (имя, метки) -> значение."""
+    with urllib.request.urlopen(url, timeout=5) as response:
+        text = response.read().decode()
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        samples[name, tuple(sorted(LABEL.findall(labels or "")))] = float(value)
+    return samples
+
+def labelled(samples: Dict, name: str, label: str) -> Dict[str, float]:
+    return {dict(labels)[label]: value for (sample, labels), value in samples.items()
+            if sample == name and label in dict(labels)}
+
+def buckets(samples: Dict, metric: str) -> List[Tuple[float, float]]:
+    """Накопленные корзины гистограммы: (верхняя граница, число)."""
+    result = [(float(dict(labels)["le"]), value) for (sample, labels), value in samples.items()
+              if sample == f"{metric}_bucket"]
+    return sorted(result)
+
+def histogram_quantile(before: List[Tuple[float, float]], after: List[Tuple[float, float]],
+                       quantile: float) -> float:
+    """Квантиль по приросту корзин с линейной интерполяцией внутри корзины, как в Prometheus."""
+    counts = [(bound, count - (before[i][1] if before else 0.0)) for i, (bound, count) in enumerate(after)]
+    if not counts or counts[-1][1] <= 0:
+        return float("nan")
+    rank = quantile * counts[-1][1]
+    lower, below = 0.0, 0.0
+    for bound, count in counts:
+        if count >= rank:
+            if bound == float("inf"):
+                return lower
+            return lower + (bound - lower) * (rank - below) / (count - below) if count > below else bound
+        lower, below = bound, count
+    return lower
+
+def slope(points: List[Tuple[float, float]]) -> float:
+    """Наклон прямой МНК по точкам (t, y)."""
+    if len(points) < 2:
+        return 0.0
+    mean_t = statistics.fmean(t for t, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    spread = sum((t - mean_t) ** 2 for t, _ in points)
+    return sum((t - mean_t) * (y - mean_y) for t, y in points) / spread if spread else 0.0
+
+def end_to_end(flips: SteeringFlips) -> List[Tuple[float, float]]:
+    """(время перекладки, задержка до скетча) для каждой перекладки, дошедшей до скетча."""
+    applied = [timestamp for timestamp, _ in flips.applied]
+    result = []
+    for flip in list(flips.flips):
+        index = bisect.bisect_left(applied, flip)
+        if index < len(applied):
+            result.append((flip, applied[index] - flip))
+    return result
+
+class PreviewClient:
+    """Читает MJPEG-поток, как браузер на ноутбуке; считает байты."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.bytes = 0
+        self.errors = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._read, name="preview-client", daemon=True)
+
+    def _read(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                with urllib.request.urlopen(self.url, timeout=5) as response:
+                    while not self.stop_event.is_set():
+                        chunk = response.read(65536)
+                        if not chunk:
+                            break
+                        self.bytes += len(chunk)
+            except OSError:
+                self.errors += 1
+                self.stop_event.wait(1.0)
+
+def write_config(directory: str, args: argparse.Namespace, remote_port: int, arduino_port: str, metrics_port: int,
+                 stream_port: int) -> str:
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    devices = ["remote", "zed"] if args.camera else ["remote"]
+    config["runtime"] = {"mode": args.mode}
+    config["input"].update(devices=devices, rates={"remote": 0, "zed": 0})
+    config["remote"].update(host="127.0.0.1", port=remote_port, max_age=0)
+    config["arduino"].update(backend="serial", port=arduino_port, baud_rate=args.baud, serial_number=None)
+    config["control"]["input_rate"] = args.control_rate or args.rate
+    config["startup"]["required_devices"] = ["arduino"]
+    config["zed"].update(backend="synthetic", output_dir=os.path.join(directory, "recordings"))
+    # Стена дальше порога: торможение не должно перехватывать команды пульта
+    config["zed"]["synthetic"] = {"obstacle_distance": 5.0, "record": args.record}
+    config["zed"].get("governor", {})["enabled"] = False
+    config["ui"]["enabled"] = False
+    config["stream"].update(enabled=args.preview, host="127.0.0.1", port=stream_port)
+    config["dataset"].update(enabled=False, output_dir=os.path.join(directory, "datasets"))
+    config["metrics"].update(enabled=True, host="127.0.0.1", port=metrics_port,
+                             segment=f"soak_metrics_{os.getpid()}")
+    # Политики ядер из конфига Jetson исказили бы прогон на другой машине
+    config["scheduling"] = {}
+    config["profiling"]["control_file"] = os.path.join(directory, "profile.request")
+    config["tuning"]["file"] = os.path.join(directory, "tuned.yaml")
+    config["logging"]["level"] = "WARNING"
+    path = os.path.join(directory, "soak.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+def take_sample(url: str, devices: List[str], started: float, previous: Optional[Dict]) -> Dict:
+    samples = scrape(url)
+    now = time.monotonic()
+    sample = {"t": now - started,
+              "queues": labelled(samples, "car_queue_depth", "queue"),
+              "rss_mb": {name: value / 2 ** 20 for name, value in
+                         labelled(samples, "car_process_resident_memory_bytes", "process").items()},
+              "cpu_seconds": labelled(samples, "car_process_cpu_seconds_total", "process"),
+              "errors": samples.get(("car_errors_total", ()), 0.0)}
+    # Частота цикла — прирост числа наблюдений гистограммы, которую цикл пишет на каждой итерации
+    loops = {section: samples.get((f"car_{section}_{histogram}_count", ())) for section, histogram in
+             [*LOOP_HISTOGRAMS.items(), *((device, DEVICE_LOOP_HISTOGRAM) for device in devices)]}
+    sample["loop_counts"] = {section: count for section, count in loops.items() if count is not None}
+    sample["histograms"] = {f"{section}.{metric}": buckets(samples, f"car_{section}_{metric}")
+                            for section, metric in LATENCY_HISTOGRAMS}
+    if previous:
+        elapsed = now - started - previous["t"]
+        sample["loop_rates"] = {section: (count - previous["loop_counts"].get(section, 0.0)) / elapsed
+                                for section, count in loops.items()}
+        sample["cpu"] = {name: (seconds - previous["cpu_seconds"].get(name, seconds)) / elapsed
+                         for name, seconds in sample["cpu_seconds"].items()}
+        sample["latency_ms"] = {
+            name: {"p50": histogram_quantile(previous["histograms"].get(name), after, 0.5) * 1000,
+                   "p99": histogram_quantile(previous["histograms"].get(name), after, 0.99) * 1000}
+            for name, after in sample["histograms"].items() if after}
+    return sample
+
+def verdict(args: argparse.Namespace, series: List[Dict], latencies: List[Tuple[float, float]],
+            started_wall: float, exit_code: Optional[int]) -> Tuple[List[str], Dict]:
+    failures = []
+    summary: Dict = {}
+    if exit_code is not None:
+        failures.append(f"main.py exited early with code {exit_code}")
+    steady = [sample for sample in series if sample["t"] >= args.warmup]
+    measured = [(flip - started_wall, latency) for flip, latency in latencies if flip - started_wall >= args.warmup]
+    if len(measured) >= 6:
+        third = len(measured) // 3
+        first = statistics.median(latency for _, latency in measured[:third]) * 1000
+        last = statistics.median(latency for _, latency in measured[-third:]) * 1000
+        ordered = sorted(latency for _, latency in measured)
+        summary["end_to_end_ms"] = {"p50": statistics.median(ordered) * 1000,
+                                    "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+                                    "max": ordered[-1] * 1000, "first_third_p50": first, "last_third_p50": last,
+                                    "flips": len(measured)}
+        if last > first * args.max_latency_growth and last - first > args.latency_slack:
+            failures.append(f"end-to-end latency grew from {first:.1f} ms to {last:.1f} ms")
+    else:
+        failures.append(f"only {len(measured)} steering flips reached the sketch")
+    if len(steady) >= 2:
+        hours = (steady[-1]["t"] - steady[0]["t"]) / 3600
+        growth = {}
+        for process in steady[-1]["rss_mb"]:
+            points = [(sample["t"] / 3600, sample["rss_mb"][process]) for sample in steady
+                      if process in sample["rss_mb"]]
+            rate = slope(points)
+            total = points[-1][1] - points[0][1]
+            growth[process] = {"start_mb": points[0][1], "end_mb": points[-1][1], "mb_per_hour": rate}
+            if rate > args.max_rss_growth and total > args.rss_slack:
+                failures.append(f"{process} RSS grows {rate:.1f} MB/h ({points[0][1]:.1f} -> {points[-1][1]:.1f} MB "
+                                f"in {hours * 60:.0f} min)")
+        summary["rss"] = growth
+        for queue, depth in steady[-1]["queues"].items():
+            if depth > args.max_queue:
+                failures.append(f"{queue} queue holds {depth:.0f} messages at the end")
+        rates = [sample["loop_rates"] for sample in steady if "loop_rates" in sample]
+        summary["loop_rates"] = {section: statistics.median(rate[section] for rate in rates if section in rate)
+                                 for section in (rates[-1] if rates else {})}
+        summary["max_queue"] = {queue: max(sample["queues"].get(queue, 0.0) for sample in steady)
+                                for queue in steady[-1]["queues"]}
+        summary["errors"] = steady[-1]["errors"] - steady[0]["errors"]
+    return failures, summary
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--mode", choices=("processes", "async"), default="processes")
+    parser.add_argument("--duration", type=float, default=600.0, help="seconds after warmup")
+    parser.add_argument("--warmup", type=float, default=30.0)
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between /metrics samples")
+    parser.add_argument("--rate", type=float, default=100.0, help="remote packets per second")
+    parser.add_argument("--control-rate", type=float, help="control.input_rate, default: --rate")
+    parser.add_argument("--flip", type=float, default=0.25, help="seconds between steering reversals")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--camera", action="store_true", help="add the synthetic ZED camera")
+    parser.add_argument("--record", action="store_true", help="record camera frames from the first frame")
+    parser.add_argument("--preview", action="store_true", help="enable the MJPEG stream and read it")
+    parser.add_argument("--max-latency-growth", type=float, default=1.5)
+    parser.add_argument("--latency-slack", type=float, default=5.0, help="ms")
+    parser.add_argument("--max-rss-growth", type=float, default=10.0, help="MB per hour per process")
+    parser.add_argument("--rss-slack", type=float, default=4.0, help="MB")
+    parser.add_argument("--max-queue", type=float, default=10.0)
+    parser.add_argument("--report", default=f"logs/soak_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    args = parser.parse_args()
+    if (args.record or args.preview) and not args.camera:
+        parser.error("--record and --preview need --camera")
+    return run(args)
+
+def run(args: argparse.Namespace) -> int:
+    remote_port, metrics_port, stream_port = free_udp_port(), free_tcp_port(), free_tcp_port()
+    flips = SteeringFlips(remote_port, args.rate, args.flip)
+    simulator = SketchSimulator(args.baud, on_apply=flips.on_apply)
+    simulator.start()
+    devices = ["remote", "zed"] if args.camera else ["remote"]
+    url = f"http://127.0.0.1:{metrics_port}/metrics"
+    preview = PreviewClient(f"http://127.0.0.1:{stream_port}/stream/rgb") if args.preview else None
+    series: List[Dict] = []
+    exit_code = None
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = write_config(directory, args, remote_port, simulator.port, metrics_port, stream_port)
+        car = subprocess.Popen([sys.executable, "main.py", "--config", config_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        started, started_wall = time.monotonic(), time.time()
+        try:
+            flips.thread.start()
+            if preview:
+                preview.thread.start()
+            previous = None
+            deadline = started + args.warmup + args.duration
+            next_sample = started + args.interval
+            while time.monotonic() < deadline:
+                time.sleep(max(0.0, min(next_sample, deadline) - time.monotonic()))
+                if car.poll() is not None:
+                    exit_code = car.returncode
+                    break
+                if time.monotonic() < next_sample:
+                    continue
+                next_sample += args.interval
+                try:
+                    sample = take_sample(url, devices, started, previous)
+                except OSError as e:
+                    print(f"{time.monotonic() - started:7.0f} s  /metrics unavailable: {e}")
+                    continue
+                series.append(sample)
+                previous = sample
+                if "loop_rates" in sample:
+                    e2e = [latency for flip, latency in end_to_end(flips)[-int(args.interval / args.flip):]]
+                    rates = " ".join(f"{section} {rate:.0f}/s" for section, rate in sorted(sample["loop_rates"].items()))
+                    print(f"{sample['t']:7.0f} s  {rates} | queues {sample['queues']} | "
+                          f"RSS {sum(sample['rss_mb'].values()):.1f} MB, CPU {sum(sample['cpu'].values()) * 100:.0f}% | "
+                          f"e2e p50 {statistics.median(e2e) * 1000 if e2e else float('nan'):.1f} ms")
+        finally:
+            flips.stop_event.set()
+            if preview:
+                preview.stop_event.set()
+            if car.poll() is None:
+                car.send_signal(signal.SIGINT)
+                try:
+                    car.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    car.kill()
+                    car.wait()
+            simulator.stop()
+
+    latencies = end_to_end(flips)
+    failures, summary = verdict(args, series, latencies, started_wall, exit_code)
+    summary.update(stalls=simulator.stalls, overflow_bytes=simulator.overflows)
+    if preview:
+        summary["preview_bytes"] = preview.bytes
+    for sample in series:
+        sample.pop("histograms", None)
+    os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+    with open(args.report, "w") as f:
+        json.dump({"args": vars(args), "summary": summary, "failures": failures, "samples": series,
+                   "end_to_end": [[flip - started_wall, latency] for flip, latency in latencies]}, f, indent=1)
+
+    e2e = summary.get("end_to_end_ms")
+    if e2e:
+        print(f"end-to-end: p50 {e2e['p50']:.1f} ms, p99 {e2e['p99']:.1f} ms, max {e2e['max']:.1f} ms over "
+              f"{e2e['flips']} flips; median {e2e['first_third_p50']:.1f} -> {e2e['last_third_p50']:.1f} ms")
+    for process, growth in sorted(summary.get("rss", {}).items()):
+        print(f"  {process:<10} RSS {growth['start_mb']:7.1f} -> {growth['end_mb']:7.1f} MB "
+              f"({growth['mb_per_hour']:+.1f} MB/h)")
+    print(f"report: {args.report}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("PASS")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,4 +10,5 @@ class CarCommand:
     record: Optional[bool] = None
     mode: Optional[str] = None
     trim: Optional[float] = None
-    depth_threshold: Optional[float] = None
\ No newline at end of file
+    depth_threshold: Optional[float] = None
+    timestamp: Optional[float] = None
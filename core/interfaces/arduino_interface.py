@@ -11,4 +11,8 @@ class ArduinoInterface(ABC):
 
     @abstractmethod
     def close(self) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    def is_connected(self) -> bool:
+        # Адаптеры с переподключением сообщают, открыт ли порт сейчас
+        return True
\ No newline at end of file
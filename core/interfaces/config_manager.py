@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
 
 class ConfigManager(ABC):
     @abstractmethod
     def get_config(self) -> Dict:
         pass
 
+    @abstractmethod
+    def reload(self) -> Optional[Dict]:
+        pass
+
     @abstractmethod
     def update_config(self, key: str, value) -> None:
-        pass
\ No newline at end of file
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Dict, Tuple
 from core.entities.command import CarCommand
 
 class InputDevice(ABC):
@@ -13,4 +13,7 @@ class InputDevice(ABC):
 
     @abstractmethod
     def close(self) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    def apply_config(self, config: Dict) -> None:
+        pass
@@ -0,0 +1,11 @@
+from abc import ABC, abstractmethod
+from typing import Dict
+
+class TuningStore(ABC):
+    @abstractmethod
+    def load(self) -> Dict:
+        pass
+
+    @abstractmethod
+    def save(self, values: Dict) -> None:
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
 
 class VideoRecorder(ABC):
     @abstractmethod
@@ -7,7 +7,11 @@ class VideoRecorder(ABC):
         pass
 
     @abstractmethod
-    def record_frame(self, frame: Any) -> None:
+    def sync_recording(self, requested: bool) -> None:
+        pass
+
+    @abstractmethod
+    def record_frame(self, frame: Any, timestamp: Optional[float] = None) -> None:
         pass
 
     @abstractmethod
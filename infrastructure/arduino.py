@@ -1,37 +1,84 @@
-import serial
 import logging
+import queue
+from multiprocessing import Queue
+from typing import Dict, Optional
 from core.interfaces.arduino_interface import ArduinoInterface
+from application.state_manager import StateManager
+from .serial_connection import SerialConnection
+
+# Несколько тиков управления: дальше команды уже устарели
+ARDUINO_QUEUE_SIZE = 8
 
 logger = logging.getLogger(__name__)
 
 class ArduinoAdapter(ArduinoInterface):
-    def __init__(self, port: str = '/dev/ttyUSB0', baud_rate: int = 9600):
+    def __init__(self, port: str = '/dev/ttyUSB0', baud_rate: int = 9600, state_manager: Optional[StateManager] = None,
+                 serial_config: Optional[Dict] = None):
         self.port = port
         self.baud_rate = baud_rate
-        self.arduino = None
+        serial_config = serial_config or {}
+        self.connection = SerialConnection(port, baud_rate, state_manager, serial_config.get("serial_number"),
+                                           serial_config.get("write_timeout", 0.05),
+                                           serial_config.get("reconnect_initial", 0.1),
+                                           serial_config.get("reconnect_max", 5.0))
         logger.info(f"ArduinoAdapter initialized with port: {port}, baud_rate: {baud_rate}")
 
     def initialize(self) -> None:
-        try:
-            self.arduino = serial.Serial(self.port, self.baud_rate, timeout=1)
-            logger.info(f"Arduino connected on {self.port}")
-        except serial.SerialException as e:
-            logger.error(f"Arduino initialization error: {e}")
-            raise
+        if self.connection.open():
+            logger.info(f"Arduino connected on {self.connection.port}")
+        else:
+            logger.warning("Arduino not connected yet, waiting for the serial port")
+
+    def is_connected(self) -> bool:
+        return self.connection.connected
 
     def send_command(self, motor_value: int, steering_value: int) -> None:
         if not (0 <= motor_value <= 180 and 0 <= steering_value <= 180):
             logger.error(f"Invalid command values: motor={motor_value}, steering={steering_value}")
             return
-        command = f"{motor_value},{steering_value}\n"
-        try:
-            self.arduino.write(command.encode())
+        # ';' — конец команды: строку, оборванную тайм-аутом записи, скетч отбрасывает
+        command = f"{motor_value},{steering_value};\n"
+        # Без порта команда теряется сразу: переподключение идёт в фоне, цикл не ждёт
+        if self.connection.write(command.encode()):
             logger.debug(f"Sent command: motor={motor_value}, steering={steering_value}")
-        except serial.SerialException as e:
-            logger.error(f"Error sending command: {e}")
 
     def close(self) -> None:
-        if self.arduino:
+        if self.connection.connected:
             self.send_command(90, 90)  # Stop
-            self.arduino.close()
-        logger.info("Arduino disconnected")
\ No newline at end of file
+        self.connection.close()
+        logger.info("Arduino disconnected")
+
+class QueuedArduinoAdapter(ArduinoInterface):
+    """Передаёт команды в ArduinoProcess, который владеет последовательным портом.
+
+    Очередь ограничена (ARDUINO_QUEUE_SIZE): если ArduinoProcess не забирает
+    команды — порт не открылся или процесс перезапускается, — самая старая
+    команда вытесняется новой, память не растёт, а после восстановления
+    на порт уходят только последние команды.
+    """
+
+    def __init__(self, command_queue: Queue):
+        self.command_queue = command_queue
+        logger.info("QueuedArduinoAdapter initialized")
+
+    def initialize(self) -> None:
+        pass
+
+    def send_command(self, motor_value: int, steering_value: int) -> None:
+        if not (0 <= motor_value <= 180 and 0 <= steering_value <= 180):
+            logger.error(f"Invalid command values: motor={motor_value}, steering={steering_value}")
+            return
+        try:
+            self.command_queue.put_nowait((motor_value, steering_value))
+        except queue.Full:
+            try:
+                self.command_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.command_queue.put_nowait((motor_value, steering_value))
+            except queue.Full:
+                logger.debug("Arduino queue full, command dropped")
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+from typing import Callable, IO
+import yaml
+
+def _atomic_write(path: str, dump: Callable[[IO], None], mode: str = 'w') -> None:
+    # Пишем во временный файл рядом и переименовываем: читатель видит либо старый, либо новый файл целиком
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            dump(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def atomic_write_yaml(path: str, data) -> None:
+    _atomic_write(path, lambda f: yaml.safe_dump(data, f))
+
+def atomic_write_json(path: str, data) -> None:
+    _atomic_write(path, lambda f: json.dump(data, f, indent=2))
+
+def atomic_write_text(path: str, text: str) -> None:
+    _atomic_write(path, lambda f: f.write(text))
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    _atomic_write(path, lambda f: f.write(data), 'wb')
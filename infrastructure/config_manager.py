@@ -1,41 +1,441 @@
 import yaml
 import os
 import logging
+from typing import Dict, List, Optional
+import re
 from core.interfaces.config_manager import ConfigManager
+from .atomic_file import atomic_write_yaml
 
 logger = logging.getLogger(__name__)
 
+ZED_RESOLUTIONS = ("HD2K", "HD1080", "HD720", "VGA")
+ZED_DEPTH_MODES = ("PERFORMANCE", "QUALITY", "ULTRA", "NEURAL")
+ZED_BACKENDS = ("sdk", "synthetic")
+SYNTHETIC_DEFAULTS = {"obstacle_distance": 5.0, "record": False}
+RECORDING_FORMATS = ("avi", "jpeg")
+RECORDING_POOLS = ("thread", "process")
+RECORDING_DEFAULTS = {"format": "avi", "quality": 90, "workers": 4, "pool": "thread", "chunk_frames": 300,
+                      "max_pending": 8}
+FREE_SPACE_DEFAULTS = {
+    "band_top": 0.35, "band_bottom": 0.55, "row_step": 4, "col_step": 4, "sectors": 9, "ignore_pixels": 2,
+    "min_valid": 0.3, "max_range": 4.0, "max_speed": 0.7, "min_speed": 0.3, "center_bias": 0.1,
+    "steering_gain": 1.0, "turn_slowdown": 0.3, "smoothing": 0.5,
+}
+GOVERNOR_DEFAULTS = {
+    "enabled": False, "target_rate": 15.0, "tolerance": 0.1, "interval": 1.0, "down_hold": 2.0, "up_hold": 10.0,
+    "cpu_high": 0.9, "cpu_low": 0.6, "thermal_high": 80.0, "thermal_low": 65.0,
+    "levels": [
+        {"resolution": "HD720", "fps": 15, "depth_mode": "PERFORMANCE"},
+        {"resolution": "VGA", "fps": 30, "depth_mode": "PERFORMANCE"},
+        {"resolution": "VGA", "fps": 15, "depth_mode": "PERFORMANCE"},
+    ],
+}
+SCHEDULING_POLICIES = ("other", "batch", "idle", "fifo", "rr")
+RUNTIME_MODES = ("processes", "async")
+LOG_LEVELS = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG")
+MEMORY_DEFAULTS = {"enabled": False, "interval": 60.0, "warmup": 30.0, "frames": 1, "top": 15, "alert_mb": 50.0,
+                   "output_dir": "logs/memory"}
+FLEET_DEFAULTS = {
+    "cars": [],
+    "scheduling": {},
+    "metrics": {"enabled": True, "host": "127.0.0.1", "port": 9108, "segment": "fleet_metrics"},
+    "profiling": {"output_dir": "logs/profiles", "window": 10.0, "control_file": "logs/profile.request"},
+    "memory": MEMORY_DEFAULTS,
+}
+CAR_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+# Ресурсы, которые у машин одного хоста не должны совпадать
+EXCLUSIVE_SETTINGS = (("arduino", "port"), ("arduino", "serial_number"), ("gamepad", "joystick_index"), ("zed", "camera_id"), ("remote", "port"),
+                      ("stream", "port"),
+                      ("zed", "output_dir"), ("dataset", "output_dir"), ("tuning", "file"))
+
+def _validate_scheduling(scheduling, prefix: str, errors: List[str]) -> None:
+    if not isinstance(scheduling, dict):
+        errors.append(f"{prefix} must map process names to policies")
+        return
+    for name, policy in scheduling.items():
+        if not isinstance(policy, dict):
+            errors.append(f"{prefix}.{name} must be a mapping")
+            continue
+        cpus = policy.get("cpus")
+        if cpus is not None and (not isinstance(cpus, list) or not all(isinstance(c, int) and c >= 0 for c in cpus)):
+            errors.append(f"{prefix}.{name}.cpus must be a list of CPU indices")
+        if policy.get("nice") is not None and not (isinstance(policy["nice"], int) and -20 <= policy["nice"] <= 19):
+            errors.append(f"{prefix}.{name}.nice must be an integer in [-20, 19]")
+        if policy.get("policy", "other") not in SCHEDULING_POLICIES:
+            errors.append(f"{prefix}.{name}.policy must be one of {SCHEDULING_POLICIES}")
+        elif policy.get("policy") in ("fifo", "rr") and not (isinstance(policy.get("priority"), int) and 1 <= policy["priority"] <= 99):
+            errors.append(f"{prefix}.{name}.priority must be an integer in [1, 99] for real-time policies")
+
+def _validate_memory(memory, errors: List[str]) -> None:
+    if not isinstance(memory, dict):
+        errors.append("memory must be a mapping")
+        return
+    if not isinstance(memory["enabled"], bool):
+        errors.append("memory.enabled must be true or false")
+    if not isinstance(memory["interval"], (int, float)) or memory["interval"] <= 0:
+        errors.append("memory.interval must be a positive number of seconds")
+    for key in ("warmup", "alert_mb"):
+        if not isinstance(memory[key], (int, float)) or memory[key] < 0:
+            errors.append(f"memory.{key} must be a non-negative number")
+    for key in ("frames", "top"):
+        if not isinstance(memory[key], int) or memory[key] <= 0:
+            errors.append(f"memory.{key} must be a positive integer")
+    if not isinstance(memory["output_dir"], str):
+        errors.append("memory.output_dir must be a string")
+
 class FileConfigManager(ConfigManager):
     def __init__(self, config_path: str):
         self.config_path = config_path
+        self.mtime = None
         self.config = self._load_config()
+        self._validate_config(self.config)
         logger.info(f"FileConfigManager initialized with config_path: {config_path}")
 
     def _load_config(self) -> dict:
         default_config = {
-            "arduino": {"port": "/dev/ttyUSB0", "baud_rate": 9600},
-            "zed": {"resolution": "HD720", "fps": 30, "depth_threshold": 0.6, "output_dir": "logs"},
-            "gamepad": {"joystick_index": 0},
+            "arduino": {"backend": "serial", "port": "/dev/ttyUSB0", "baud_rate": 9600, "serial_number": None,
+                        "write_timeout": 0.05, "reconnect_initial": 0.1, "reconnect_max": 5.0},
+            "zed": {"camera_id": 0, "resolution": "HD720", "fps": 30, "depth_mode": "PERFORMANCE", "depth_min": 0.3, "depth_max": 10.0,
+                    "depth_threshold": 0.6, "output_dir": "logs", "governor": GOVERNOR_DEFAULTS,
+                    "free_space": FREE_SPACE_DEFAULTS, "recording": RECORDING_DEFAULTS, "backend": "sdk",
+                    "synthetic": SYNTHETIC_DEFAULTS},
+            "gamepad": {"joystick_index": 0, "deadzone": 0.0, "steering_expo": 0.0},
+            "remote": {"host": "127.0.0.1", "port": 5005, "timeout": 0.25, "max_age": 0.0, "key_file": "",
+                       "allowed_senders": []},
+            "input": {"devices": ["gamepad", "zed"], "rates": {"gamepad": 100.0}, "stale_timeout": 0.5},
+            "control": {"input_rate": 100.0},
+            "safety": {"enabled": True, "brake_duration": 0.5, "brake_strength": 1.0, "stale_timeout": 0.5, "tick": 0.02},
+            "startup": {"required_devices": ["gamepad", "arduino"], "init_timeouts": {}, "default_init_timeout": 10.0},
+            "scheduling": {},
+            "runtime": {"mode": "processes"},
+            "ui": {"enabled": True, "max_refresh_rate": 20.0, "stats_interval": 1.0},
+            "stream": {"enabled": False, "host": "0.0.0.0", "port": 8080, "max_width": 640, "max_height": 360,
+                       "max_fps": 15.0, "min_fps": 2.0, "quality": 80, "min_quality": 40, "min_scale": 0.5,
+                       "workers": 2, "full_rate_clients": 2, "client_timeout": 2.0, "depth_range": 10.0},
+            "dataset": {"enabled": False, "output_dir": "datasets", "rate": 10.0, "quality": 90, "depth_step": 2,
+                        "chunk_bytes": 268435456, "batch_bytes": 4194304, "sync_interval": 1.0, "max_pending": 16},
+            "metrics": {"enabled": False, "host": "127.0.0.1", "port": 9108, "segment": "car_metrics"},
+            "profiling": {"output_dir": "logs/profiles", "window": 10.0, "control_file": "logs/profile.request"},
+            "memory": MEMORY_DEFAULTS,
+            "tuning": {"file": "config/tuned.yaml", "debounce": 1.0, "max_delay": 5.0},
             "logging": {"level": "DEBUG", "file": "logs/car_control.log"}
         }
         if not os.path.exists(self.config_path):
             logger.warning(f"Config file {self.config_path} not found, using defaults")
             return default_config
+        self.mtime = os.stat(self.config_path).st_mtime_ns
         with open(self.config_path, 'r') as f:
-            config = yaml.safe_load(f)
+            config = yaml.safe_load(f) or {}
             # Объединяем с дефолтными значениями, чтобы избежать отсутствия ключей
             for key in default_config:
                 if key not in config:
                     config[key] = default_config[key]
                 elif isinstance(config[key], dict):
                     config[key] = {**default_config[key], **config[key]}
+            if isinstance(config["zed"].get("governor"), dict):
+                config["zed"]["governor"] = {**GOVERNOR_DEFAULTS, **config["zed"]["governor"]}
+            if isinstance(config["zed"].get("recording"), dict):
+                config["zed"]["recording"] = {**RECORDING_DEFAULTS, **config["zed"]["recording"]}
+            if isinstance(config["zed"].get("free_space"), dict):
+                config["zed"]["free_space"] = {**FREE_SPACE_DEFAULTS, **config["zed"]["free_space"]}
+            if isinstance(config["zed"].get("synthetic"), dict):
+                config["zed"]["synthetic"] = {**SYNTHETIC_DEFAULTS, **config["zed"]["synthetic"]}
             return config
 
+    def _validate_config(self, config: dict) -> None:
+        errors = []
+        if not isinstance(config["arduino"]["backend"], str):
+            errors.append("arduino.backend must be a string")
+        if not isinstance(config["arduino"]["port"], str):
+            errors.append("arduino.port must be a string")
+        if not isinstance(config["arduino"]["baud_rate"], int) or config["arduino"]["baud_rate"] <= 0:
+            errors.append("arduino.baud_rate must be a positive integer")
+        if config["arduino"]["serial_number"] is not None and not isinstance(config["arduino"]["serial_number"], str):
+            errors.append("arduino.serial_number must be a string or null")
+        for key in ("write_timeout", "reconnect_initial", "reconnect_max"):
+            if not isinstance(config["arduino"][key], (int, float)) or config["arduino"][key] <= 0:
+                errors.append(f"arduino.{key} must be a positive number")
+        if isinstance(config["arduino"]["reconnect_initial"], (int, float)) \
+                and isinstance(config["arduino"]["reconnect_max"], (int, float)) \
+                and config["arduino"]["reconnect_initial"] > config["arduino"]["reconnect_max"]:
+            errors.append("arduino.reconnect_initial must not exceed arduino.reconnect_max")
+        if not isinstance(config["zed"]["camera_id"], int) or config["zed"]["camera_id"] < 0:
+            errors.append("zed.camera_id must be a non-negative integer")
+        if config["zed"]["resolution"] not in ZED_RESOLUTIONS:
+            errors.append(f"zed.resolution must be one of {ZED_RESOLUTIONS}")
+        if not isinstance(config["zed"]["fps"], int) or config["zed"]["fps"] <= 0:
+            errors.append("zed.fps must be a positive integer")
+        if not isinstance(config["zed"]["depth_threshold"], (int, float)) or config["zed"]["depth_threshold"] <= 0:
+            errors.append("zed.depth_threshold must be a positive number")
+        if config["zed"]["depth_mode"] not in ZED_DEPTH_MODES:
+            errors.append(f"zed.depth_mode must be one of {ZED_DEPTH_MODES}")
+        if config["zed"]["backend"] not in ZED_BACKENDS:
+            errors.append(f"zed.backend must be one of {ZED_BACKENDS}")
+        synthetic = config["zed"]["synthetic"]
+        if not isinstance(synthetic, dict):
+            errors.append("zed.synthetic must be a mapping")
+        else:
+            if not isinstance(synthetic["obstacle_distance"], (int, float)) or synthetic["obstacle_distance"] <= 0:
+                errors.append("zed.synthetic.obstacle_distance must be a positive number")
+            if not isinstance(synthetic["record"], bool):
+                errors.append("zed.synthetic.record must be true or false")
+        depth_min, depth_max = config["zed"]["depth_min"], config["zed"]["depth_max"]
+        if not isinstance(depth_min, (int, float)) or not isinstance(depth_max, (int, float)) or not 0 < depth_min < depth_max:
+            errors.append("zed.depth_min and zed.depth_max must be positive with depth_min < depth_max")
+        governor = config["zed"]["governor"]
+        if not isinstance(governor, dict):
+            errors.append("zed.governor must be a mapping")
+        else:
+            if not isinstance(governor["enabled"], bool):
+                errors.append("zed.governor.enabled must be true or false")
+            for key in ("target_rate", "interval", "thermal_high", "thermal_low"):
+                if not isinstance(governor[key], (int, float)) or governor[key] <= 0:
+                    errors.append(f"zed.governor.{key} must be a positive number")
+            for key in ("down_hold", "up_hold"):
+                if not isinstance(governor[key], (int, float)) or governor[key] < 0:
+                    errors.append(f"zed.governor.{key} must be a non-negative number")
+            for key in ("tolerance", "cpu_high", "cpu_low"):
+                if not isinstance(governor[key], (int, float)) or not 0 <= governor[key] <= 1:
+                    errors.append(f"zed.governor.{key} must be in [0, 1]")
+            levels = governor["levels"]
+            if not isinstance(levels, list) or not all(
+                    isinstance(level, dict) and level.get("resolution") in ZED_RESOLUTIONS
+                    and isinstance(level.get("fps"), int) and level["fps"] > 0
+                    and level.get("depth_mode") in ZED_DEPTH_MODES for level in levels):
+                errors.append("zed.governor.levels must list {resolution, fps, depth_mode} steps")
+        recording = config["zed"]["recording"]
+        if not isinstance(recording, dict):
+            errors.append("zed.recording must be a mapping")
+        else:
+            if recording["format"] not in RECORDING_FORMATS:
+                errors.append(f"zed.recording.format must be one of {RECORDING_FORMATS}")
+            if recording["pool"] not in RECORDING_POOLS:
+                errors.append(f"zed.recording.pool must be one of {RECORDING_POOLS}")
+            if not isinstance(recording["quality"], int) or not 1 <= recording["quality"] <= 100:
+                errors.append("zed.recording.quality must be an integer in [1, 100]")
+            for key in ("workers", "chunk_frames", "max_pending"):
+                if not isinstance(recording[key], int) or recording[key] <= 0:
+                    errors.append(f"zed.recording.{key} must be a positive integer")
+        free_space = config["zed"]["free_space"]
+        if not isinstance(free_space, dict):
+            errors.append("zed.free_space must be a mapping")
+        else:
+            for key in ("row_step", "col_step", "sectors"):
+                if not isinstance(free_space[key], int) or free_space[key] <= 0:
+                    errors.append(f"zed.free_space.{key} must be a positive integer")
+            if not isinstance(free_space["ignore_pixels"], int) or free_space["ignore_pixels"] < 0:
+                errors.append("zed.free_space.ignore_pixels must be a non-negative integer")
+            for key in ("max_range", "max_speed", "steering_gain"):
+                if not isinstance(free_space[key], (int, float)) or free_space[key] <= 0:
+                    errors.append(f"zed.free_space.{key} must be a positive number")
+            for key in ("min_valid", "center_bias", "turn_slowdown", "smoothing", "min_speed"):
+                if not isinstance(free_space[key], (int, float)) or not 0 <= free_space[key] <= 1:
+                    errors.append(f"zed.free_space.{key} must be in [0, 1]")
+            top, bottom = free_space["band_top"], free_space["band_bottom"]
+            if not isinstance(top, (int, float)) or not isinstance(bottom, (int, float)) or not 0 <= top < bottom <= 1:
+                errors.append("zed.free_space.band_top and band_bottom must satisfy 0 <= band_top < band_bottom <= 1")
+        if not isinstance(config["gamepad"]["joystick_index"], int) or config["gamepad"]["joystick_index"] < 0:
+            errors.append("gamepad.joystick_index must be a non-negative integer")
+        if not isinstance(config["gamepad"]["deadzone"], (int, float)) or not 0 <= config["gamepad"]["deadzone"] < 1:
+            errors.append("gamepad.deadzone must be in [0, 1)")
+        if not isinstance(config["gamepad"]["steering_expo"], (int, float)) or not 0 <= config["gamepad"]["steering_expo"] <= 1:
+            errors.append("gamepad.steering_expo must be in [0, 1]")
+        remote = config["remote"]
+        if not isinstance(remote["host"], str):
+            errors.append("remote.host must be a string")
+        if not isinstance(remote["port"], int) or not 0 <= remote["port"] < 65536:
+            errors.append("remote.port must be a UDP port number")
+        if not isinstance(remote["timeout"], (int, float)) or remote["timeout"] <= 0:
+            errors.append("remote.timeout must be a positive number")
+        if not isinstance(remote["max_age"], (int, float)) or remote["max_age"] < 0:
+            errors.append("remote.max_age must be a non-negative number")
+        if not isinstance(remote["key_file"], str):
+            errors.append("remote.key_file must be a path or an empty string")
+        if not isinstance(remote["allowed_senders"], list) or not all(isinstance(host, str) for host in remote["allowed_senders"]):
+            errors.append("remote.allowed_senders must be a list of IP addresses")
+        devices = config["input"]["devices"]
+        if not isinstance(devices, list) or not devices or not all(isinstance(d, str) for d in devices):
+            errors.append("input.devices must be a non-empty list of device names")
+        rates = config["input"]["rates"]
+        if not isinstance(rates, dict) or not all(isinstance(r, (int, float)) and r >= 0 for r in rates.values()):
+            errors.append("input.rates must map device names to non-negative rates")
+        if not isinstance(config["input"]["stale_timeout"], (int, float)) or config["input"]["stale_timeout"] <= 0:
+            errors.append("input.stale_timeout must be a positive number")
+        safety = config["safety"]
+        if not isinstance(safety["enabled"], bool):
+            errors.append("safety.enabled must be true or false")
+        for key in ("brake_duration", "stale_timeout", "tick"):
+            if not isinstance(safety[key], (int, float)) or safety[key] <= 0:
+                errors.append(f"safety.{key} must be a positive number")
+        if not isinstance(safety["brake_strength"], (int, float)) or not 0 <= safety["brake_strength"] <= 1:
+            errors.append("safety.brake_strength must be in [0, 1]")
+        startup = config["startup"]
+        if not isinstance(startup["required_devices"], list):
+            errors.append("startup.required_devices must be a list")
+        elif set(startup["required_devices"]) - set(devices or []) - {"arduino"}:
+            errors.append("startup.required_devices must name configured input devices or arduino")
+        if not isinstance(startup["init_timeouts"], dict) or not all(
+                isinstance(t, (int, float)) and t > 0 for t in startup["init_timeouts"].values()):
+            errors.append("startup.init_timeouts must map device names to positive seconds")
+        if not isinstance(startup["default_init_timeout"], (int, float)) or startup["default_init_timeout"] <= 0:
+            errors.append("startup.default_init_timeout must be a positive number")
+        if not isinstance(config["control"]["input_rate"], (int, float)) or config["control"]["input_rate"] < 0:
+            errors.append("control.input_rate must be a non-negative number")
+        _validate_scheduling(config["scheduling"], "scheduling", errors)
+        if config["runtime"]["mode"] not in RUNTIME_MODES:
+            errors.append(f"runtime.mode must be one of {RUNTIME_MODES}")
+        if not isinstance(config["ui"]["enabled"], bool):
+            errors.append("ui.enabled must be true or false")
+        for key in ("max_refresh_rate", "stats_interval"):
+            if not isinstance(config["ui"][key], (int, float)) or config["ui"][key] <= 0:
+                errors.append(f"ui.{key} must be a positive number")
+        stream = config["stream"]
+        if not isinstance(stream["enabled"], bool):
+            errors.append("stream.enabled must be true or false")
+        if not isinstance(stream["host"], str):
+            errors.append("stream.host must be a string")
+        if not isinstance(stream["port"], int) or not 0 < stream["port"] < 65536:
+            errors.append("stream.port must be a TCP port number")
+        for key in ("max_width", "max_height", "workers", "full_rate_clients"):
+            if not isinstance(stream[key], int) or stream[key] <= 0:
+                errors.append(f"stream.{key} must be a positive integer")
+        for key in ("max_fps", "min_fps", "client_timeout", "depth_range"):
+            if not isinstance(stream[key], (int, float)) or stream[key] <= 0:
+                errors.append(f"stream.{key} must be a positive number")
+        if isinstance(stream["max_fps"], (int, float)) and isinstance(stream["min_fps"], (int, float)) \
+                and stream["min_fps"] > stream["max_fps"]:
+            errors.append("stream.min_fps must not exceed stream.max_fps")
+        if not all(isinstance(stream[key], int) and 1 <= stream[key] <= 100 for key in ("quality", "min_quality")) \
+                or stream["min_quality"] > stream["quality"]:
+            errors.append("stream.quality and stream.min_quality must be in [1, 100] with min_quality <= quality")
+        if not isinstance(stream["min_scale"], (int, float)) or not 0 < stream["min_scale"] <= 1:
+            errors.append("stream.min_scale must be in (0, 1]")
+        dataset = config["dataset"]
+        if not isinstance(dataset["enabled"], bool):
+            errors.append("dataset.enabled must be true or false")
+        if not isinstance(dataset["output_dir"], str):
+            errors.append("dataset.output_dir must be a string")
+        if not isinstance(dataset["rate"], (int, float)) or dataset["rate"] < 0:
+            errors.append("dataset.rate must be a non-negative number")
+        if not isinstance(dataset["quality"], int) or not 1 <= dataset["quality"] <= 100:
+            errors.append("dataset.quality must be an integer in [1, 100]")
+        for key in ("depth_step", "chunk_bytes", "batch_bytes", "max_pending"):
+            if not isinstance(dataset[key], int) or dataset[key] <= 0:
+                errors.append(f"dataset.{key} must be a positive integer")
+        if not isinstance(dataset["sync_interval"], (int, float)) or dataset["sync_interval"] <= 0:
+            errors.append("dataset.sync_interval must be a positive number")
+        metrics = config["metrics"]
+        if not isinstance(metrics["enabled"], bool):
+            errors.append("metrics.enabled must be true or false")
+        if not isinstance(metrics["host"], str):
+            errors.append("metrics.host must be a string")
+        if not isinstance(metrics["segment"], str) or not metrics["segment"] or "/" in metrics["segment"]:
+            errors.append("metrics.segment must be a shared memory name without '/'")
+        if not isinstance(metrics["port"], int) or not 0 < metrics["port"] < 65536:
+            errors.append("metrics.port must be a TCP port number")
+        profiling = config["profiling"]
+        if not isinstance(profiling["output_dir"], str):
+            errors.append("profiling.output_dir must be a string")
+        if not isinstance(profiling["window"], (int, float)) or profiling["window"] < 0:
+            errors.append("profiling.window must be a non-negative number of seconds")
+        if profiling["control_file"] is not None and not isinstance(profiling["control_file"], str):
+            errors.append("profiling.control_file must be a path or null")
+        _validate_memory(config["memory"], errors)
+        if not isinstance(config["tuning"]["debounce"], (int, float)) or config["tuning"]["debounce"] < 0:
+            errors.append("tuning.debounce must be a non-negative number")
+        if not isinstance(config["tuning"]["max_delay"], (int, float)) or config["tuning"]["max_delay"] < config["tuning"]["debounce"]:
+            errors.append("tuning.max_delay must be a number not less than tuning.debounce")
+        if str(config["logging"]["level"]).upper() not in LOG_LEVELS:
+            errors.append(f"logging.level must be one of {LOG_LEVELS}")
+        if errors:
+            logger.error(f"Invalid config {self.config_path}: {'; '.join(errors)}")
+            raise ValueError(f"Invalid config: {'; '.join(errors)}")
+
     def get_config(self) -> dict:
         return self.config
 
+    def reload(self) -> Optional[dict]:
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
+            # Редактор может удалить файл на время атомарной записи
+            return None
+        if mtime == self.mtime:
+            return None
+        try:
+            config = self._load_config()
+            self._validate_config(config)
+        except Exception as e:
+            self.mtime = mtime
+            logger.error(f"Config reload rejected, keeping previous config: {e}")
+            return None
+        self.config = config
+        logger.info(f"Config reloaded from {self.config_path}")
+        return config
+
     def update_config(self, key: str, value) -> None:
         self.config[key] = value
-        with open(self.config_path, 'w') as f:
-            yaml.safe_dump(self.config, f)
-        logger.info(f"Config updated: {key} = {value}")
\ No newline at end of file
+        atomic_write_yaml(self.config_path, self.config)
+        self.mtime = os.stat(self.config_path).st_mtime_ns
+        logger.info(f"Config updated: {key} = {value}")
+
+def load_fleet_config(path: str) -> Dict:
+    """Файл парка: список машин (имя, путь к конфигу, свои политики) и общие настройки супервизора."""
+    with open(path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    for key, default in FLEET_DEFAULTS.items():
+        if key not in config:
+            config[key] = default
+        elif isinstance(default, dict) and isinstance(config[key], dict):
+            config[key] = {**default, **config[key]}
+    errors: List[str] = []
+    cars = config["cars"]
+    if not isinstance(cars, list) or not cars:
+        errors.append("cars must be a non-empty list")
+        cars = []
+    names = set()
+    for index, car in enumerate(cars):
+        if not isinstance(car, dict) or not isinstance(car.get("name"), str) or not CAR_NAME.match(car["name"]):
+            errors.append(f"cars[{index}].name must match {CAR_NAME.pattern}")
+            continue
+        if car["name"] in names:
+            errors.append(f"cars[{index}].name {car['name']} is duplicated")
+        names.add(car["name"])
+        if not isinstance(car.get("config"), str):
+            errors.append(f"cars[{index}].config must be a path to the car config")
+        _validate_scheduling(car.get("scheduling", {}), f"cars[{index}].scheduling", errors)
+    _validate_scheduling(config["scheduling"], "scheduling", errors)
+    _validate_memory(config["memory"], errors)
+    metrics = config["metrics"]
+    if not isinstance(metrics["enabled"], bool):
+        errors.append("metrics.enabled must be true or false")
+    if not isinstance(metrics["port"], int) or not 0 < metrics["port"] < 65536:
+        errors.append("metrics.port must be a TCP port number")
+    if not isinstance(metrics["segment"], str) or not metrics["segment"] or "/" in metrics["segment"]:
+        errors.append("metrics.segment must be a shared memory name without '/'")
+    if errors:
+        logger.error(f"Invalid fleet config {path}: {'; '.join(errors)}")
+        raise ValueError(f"Invalid fleet config: {'; '.join(errors)}")
+    logger.info(f"Fleet config loaded from {path}: {', '.join(sorted(names))}")
+    return config
+
+def fleet_conflicts(configs: Dict[str, Dict]) -> List[str]:
+    """Настройки, совпадающие у нескольких машин: порт Arduino, геймпад, камера, каталоги."""
+    conflicts = []
+    for section, key in EXCLUSIVE_SETTINGS:
+        owners: Dict = {}
+        for car, config in configs.items():
+            # Ресурс устройства, которое машина не использует, не занят
+            if section in ("gamepad", "zed", "remote") and section not in config["input"]["devices"]:
+                continue
+            if section == "arduino" and config["arduino"]["backend"] != "serial":
+                continue
+            # С серийным номером порт ищется по нему, общий шаблон /dev/ttyUSB* не конфликт
+            if section == "arduino" and (config["arduino"]["serial_number"] is None) == (key == "serial_number"):
+                continue
+            if section in ("stream", "dataset") and not config[section]["enabled"]:
+                continue
+            owners.setdefault(config[section][key], []).append(car)
+        conflicts.extend(f"{section}.{key}={value} is shared by {', '.join(cars)}"
+                         for value, cars in owners.items() if len(cars) > 1)
+    return conflicts
@@ -0,0 +1,338 @@
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+from application.state_manager import StateManager
+from application.shared_slot import SharedSlot
+from application.car_controller import APPLIED_FIELDS
+from application.metrics import Counter, Histogram, MetricSection
+from .atomic_file import atomic_write_json
+from .jpeg_recorder import INDEX_FILE, INDEX_RECORD, encode_jpeg
+from .lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Датасет: каталог сессии с manifest.json, кусками chunk_NNNNN.rec и index.bin (запись индекса
+# та же, что у JPEG-записи: номер, время кадра, кусок, смещение, длина). Запись в куске: заголовок,
+# JPEG кадра, глубина uint16 little-endian в мм построчно, JSON с командой и состоянием
+MANIFEST_FILE = "manifest.json"
+CHUNK_NAME = "chunk_{:05d}.rec"
+RECORD_MAGIC = b"DS"
+# magic, версия, номер, время кадра, длины JPEG, глубины и JSON, ширина и высота глубины
+RECORD_HEADER = struct.Struct("<2sHQdIIIHH")
+FORMAT_VERSION = 1
+# 0 — нет данных (перекрытие, ближе минимума), DEPTH_FAR — дальше диапазона камеры
+DEPTH_FAR = 65535
+_STOP = object()
+
+def depth_to_millimeters(depth):
+    millimeters = np.nan_to_num(depth * 1000.0, nan=0.0, posinf=DEPTH_FAR, neginf=0.0)
+    np.clip(millimeters, 0, DEPTH_FAR, out=millimeters)
+    return np.rint(millimeters).astype("<u2")
+
+class DatasetSession:
+    """Одна сессия датасета: очередь записей и счётчики для манифеста.
+
+    После остановки поток записи дописывает сессию и манифест сам, а камера
+    может уже начать следующую.
+    """
+
+    def __init__(self, session_dir: str, max_pending: int):
+        self.session_dir = session_dir
+        self.records: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.started = time.time()
+        self.last_logged = 0.0
+        self.record_number = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.chunks = 1
+        self.image_size: Optional[List[int]] = None
+        self.depth_size: Optional[List[int]] = None
+
+class _SessionFiles:
+    """Файлы сессии и ещё не записанный пакет; принадлежат потоку записи."""
+
+    def __init__(self, session_dir: str, chunk_bytes: int):
+        self.session_dir = session_dir
+        self.chunk_bytes = chunk_bytes
+        self.index = open(os.path.join(session_dir, INDEX_FILE), "ab", buffering=0)
+        self.chunk_id = 0
+        self.chunk = self._open_chunk()
+        self.chunk_size = 0
+        self.batch: List[bytes] = []
+        self.entries: List[bytes] = []
+        self.batch_size = 0
+
+    def _open_chunk(self):
+        chunk = open(os.path.join(self.session_dir, CHUNK_NAME.format(self.chunk_id)), "ab", buffering=0)
+        # Новый файл должен пережить сбой вместе с записью каталога
+        dir_fd = os.open(self.session_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return chunk
+
+    def add(self, number: int, timestamp: float, record: bytes) -> None:
+        if self.chunk_size + self.batch_size and self.chunk_size + self.batch_size + len(record) > self.chunk_bytes:
+            self.flush()
+            self.sync()
+            self.chunk.close()
+            self.chunk_id += 1
+            self.chunk = self._open_chunk()
+            self.chunk_size = 0
+        self.entries.append(INDEX_RECORD.pack(number, timestamp, self.chunk_id, self.chunk_size + self.batch_size,
+                                              len(record)))
+        self.batch.append(record)
+        self.batch_size += len(record)
+
+    def flush(self) -> int:
+        """Пишет пакет одним последовательным write в кусок, затем его записи индекса."""
+        if not self.batch:
+            return 0
+        written = self.batch_size
+        _write_all(self.chunk.fileno(), b"".join(self.batch))
+        _write_all(self.index.fileno(), b"".join(self.entries))
+        self.chunk_size += written
+        self.batch, self.entries, self.batch_size = [], [], 0
+        return written
+
+    def sync(self) -> None:
+        # Сначала данные, потом индекс: индекс не опережает записанные записи
+        os.fdatasync(self.chunk.fileno())
+        os.fdatasync(self.index.fileno())
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            self.sync()
+        finally:
+            self.chunk.close()
+            self.index.close()
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+class DatasetLogger:
+    """Синхронные записи для обучения: кадр, глубина, команда и состояние на момент кадра.
+
+    Пишет, пока включена запись (та же кнопка, что и видео), не чаще rate
+    записей в секунду. Процесс камеры только копирует кадр и глубину в
+    ограниченную очередь; JPEG, перевод глубины в миллиметры и диск — в
+    фоновом потоке. Поток копит записи в пакет до batch_bytes, пишет его
+    одним write и раз в sync_interval делает fdatasync, поэтому после сбоя
+    теряется не больше sync_interval. Команда берётся из слота CarController —
+    последняя фактически отправленная в Arduino. Если очередь полна, запись
+    отбрасывается: камера не ждёт диска. Остановка тоже не ждёт: очередь,
+    fdatasync и итоговый манифест дописывает поток записи.
+    """
+
+    def __init__(self, dataset_config: Dict, state_manager: StateManager, command_slot: SharedSlot,
+                 camera_config: Optional[Dict] = None):
+        self.output_dir = dataset_config["output_dir"]
+        self.depth_step = dataset_config["depth_step"]
+        self.chunk_bytes = dataset_config["chunk_bytes"]
+        self.batch_bytes = dataset_config["batch_bytes"]
+        self.sync_interval = dataset_config["sync_interval"]
+        self.max_pending = dataset_config["max_pending"]
+        self.apply_config(dataset_config)
+        self.state_manager = state_manager
+        self.command_slot = command_slot
+        camera_config = camera_config or {}
+        self.camera = {key: camera_config[key] for key in ("camera_id", "resolution", "fps", "depth_mode")
+                       if key in camera_config}
+        self.active = False
+        self.session: Optional[DatasetSession] = None
+        self.writers: List[threading.Thread] = []
+        self.records_written: Optional[Counter] = None
+        self.records_dropped: Optional[Counter] = None
+        self.bytes_written: Optional[Counter] = None
+        self.sync_seconds: Optional[Histogram] = None
+        logger.info(f"DatasetLogger initialized: {self.output_dir}, {self.rate} Hz, depth step {self.depth_step}")
+
+    def apply_config(self, dataset_config: Dict) -> None:
+        self.rate = dataset_config.get("rate", 10.0)
+        self.quality = dataset_config.get("quality", 90)
+        self.min_interval = 1.0 / self.rate if self.rate > 0 else 0.0
+
+    def set_metrics(self, metrics: MetricSection) -> None:
+        self.records_written = metrics.counter("dataset_records_total")
+        self.records_dropped = metrics.counter("dataset_dropped_total")
+        self.bytes_written = metrics.counter("dataset_bytes_total")
+        self.sync_seconds = metrics.histogram("dataset_sync_seconds")
+
+    def sync(self, requested: bool) -> None:
+        if requested == self.active:
+            return
+        try:
+            if requested:
+                self._start()
+            else:
+                self._stop()
+        except Exception as e:
+            self.active = False
+            logger.error(f"Error toggling dataset logging: {e}")
+            self.state_manager.update_state(last_error=f"Error toggling dataset logging: {e}")
+
+    def _session_dir(self) -> str:
+        path = os.path.join(self.output_dir, f"session_{int(time.time())}")
+        # Новая сессия в ту же секунду не должна дописывать каталог предыдущей, которую ещё дописывает поток
+        candidate, suffix = path, 1
+        while os.path.exists(candidate):
+            candidate, suffix = f"{path}_{suffix}", suffix + 1
+        return candidate
+
+    def _start(self) -> None:
+        session = DatasetSession(self._session_dir(), self.max_pending)
+        os.makedirs(session.session_dir, exist_ok=True)
+        atomic_write_json(os.path.join(session.session_dir, MANIFEST_FILE), self._manifest(session, False))
+        writer = threading.Thread(target=self._write_loop, args=(session,), name="dataset-writer", daemon=True)
+        self.writers = [thread for thread in self.writers if thread.is_alive()] + [writer]
+        writer.start()
+        self.session = session
+        self.active = True
+        logger.info(f"Dataset logging started: {session.session_dir}")
+
+    def _stop(self) -> None:
+        self.active = False
+        session, self.session = self.session, None
+        # Поток записи дописывает очередь, делает fdatasync, закрывает файлы и пишет манифест
+        session.records.put(_STOP)
+        logger.info(f"Dataset logging stopping: {session.session_dir}")
+
+    def log(self, frame, depth, timestamp: float, state: Dict) -> None:
+        session = self.session
+        if not self.active or session is None or timestamp - session.last_logged < self.min_interval:
+            return
+        session.last_logged = timestamp
+        if session.records.full():
+            session.dropped += 1
+            if self.records_dropped:
+                self.records_dropped.inc()
+            return
+        step = self.depth_step
+        # Буферы ZED переиспользуются следующим grab, поэтому копируем здесь, а кодируем в потоке записи
+        session.records.put_nowait((session.record_number, timestamp, np.array(frame[:, :, :3], order="C"),
+                                    np.array(depth[::step, ::step], order="C"), self.command_slot.read(), state))
+        session.record_number += 1
+
+    def _pack(self, session: DatasetSession, number: int, timestamp: float, frame, depth, applied,
+              state: Dict) -> bytes:
+        jpeg = encode_jpeg(frame, self.quality)
+        depth_mm = depth_to_millimeters(depth)
+        record = {"state": state}
+        if applied is not None:
+            values = dict(zip(APPLIED_FIELDS, applied))
+            record["command"] = {key: values[key] for key in ("timestamp", "input_timestamp", "speed", "brake",
+                                                               "steering")}
+            record["motor_value"] = int(values["motor_value"])
+            record["steering_value"] = int(values["steering_value"])
+            # Насколько команда старше кадра; отрицательное — команда отправлена после экспозиции
+            record["command_age"] = timestamp - values["timestamp"]
+        meta = json.dumps(record, default=str).encode()
+        height, width = depth_mm.shape
+        session.image_size = [frame.shape[1], frame.shape[0]]
+        session.depth_size = [width, height]
+        header = RECORD_HEADER.pack(RECORD_MAGIC, FORMAT_VERSION, number, timestamp, len(jpeg), depth_mm.nbytes,
+                                    len(meta), width, height)
+        return b"".join((header, jpeg, depth_mm.tobytes(), meta))
+
+    def _write_loop(self, session: DatasetSession) -> None:
+        files = None
+        try:
+            files = _SessionFiles(session.session_dir, self.chunk_bytes)
+            last_sync = time.monotonic()
+            while True:
+                try:
+                    item = session.records.get(timeout=self.sync_interval)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    try:
+                        record = self._pack(session, *item)
+                    except Exception as e:
+                        session.failed += 1
+                        logger.error(f"Dataset record {item[0]} encoding failed: {e}")
+                    else:
+                        files.add(item[0], item[1], record)
+                        session.written += 1
+                        if self.records_written:
+                            self.records_written.inc()
+                if files.batch_size >= self.batch_bytes:
+                    self._flush(files)
+                now = time.monotonic()
+                if now - last_sync >= self.sync_interval:
+                    self._flush(files)
+                    files.sync()
+                    if self.sync_seconds:
+                        self.sync_seconds.observe(time.monotonic() - now)
+                    last_sync = now
+        except Exception as e:
+            logger.error(f"Dataset writer error: {e}")
+            self.state_manager.update_state(last_error=f"Dataset writer error: {e}")
+        finally:
+            if files:
+                try:
+                    self._flush(files)
+                    files.close()
+                except Exception as e:
+                    logger.error(f"Error closing dataset session: {e}")
+                session.chunks = files.chunk_id + 1
+        try:
+            atomic_write_json(os.path.join(session.session_dir, MANIFEST_FILE), self._manifest(session, True))
+            logger.info(f"Dataset logging stopped: {session.written} records, {session.dropped} dropped "
+                        f"in {session.session_dir}")
+        except Exception as e:
+            logger.error(f"Cannot write dataset manifest: {e}")
+            self.state_manager.update_state(last_error=f"Cannot write dataset manifest: {e}")
+
+    def _flush(self, files: _SessionFiles) -> None:
+        written = files.flush()
+        if written and self.bytes_written:
+            self.bytes_written.inc(written)
+
+    def _manifest(self, session: DatasetSession, complete: bool) -> Dict:
+        return {
+            "version": FORMAT_VERSION,
+            "format": "dataset",
+            "complete": complete,
+            "started": session.started,
+            "stopped": time.time() if complete else None,
+            "host": socket.gethostname(),
+            "camera": self.camera,
+            "rate": self.rate,
+            "records": session.written,
+            "dropped": session.dropped,
+            "failed": session.failed,
+            "chunks": session.chunks,
+            "image": {"format": "jpeg", "color": "RGB", "quality": self.quality, "size": session.image_size},
+            "depth": {"dtype": "uint16", "byteorder": "little", "units": "mm", "step": self.depth_step,
+                      "size": session.depth_size, "missing": 0, "far": DEPTH_FAR},
+            "command_fields": list(APPLIED_FIELDS),
+            "files": {"index": INDEX_FILE, "index_record": INDEX_RECORD.format, "chunk": CHUNK_NAME,
+                      "record_header": RECORD_HEADER.format, "record_magic": RECORD_MAGIC.decode()},
+        }
+
+    def close(self) -> None:
+        try:
+            if self.active:
+                self._stop()
+            # Процесс камеры завершается: дописываем остановленные сессии
+            for writer in self.writers:
+                writer.join()
+            self.writers = []
+        except Exception as e:
+            logger.error(f"Error closing DatasetLogger: {e}")
+            self.state_manager.update_state(last_error=f"Error closing DatasetLogger: {e}")
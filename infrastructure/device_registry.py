@@ -0,0 +1,70 @@
+import logging
+from typing import Callable, Dict
+from core.interfaces.input_device import InputDevice
+from core.interfaces.arduino_interface import ArduinoInterface
+from application.state_manager import StateManager
+from application.startup_profiler import startup_profiler
+
+logger = logging.getLogger(__name__)
+
+# Модули устройств импортируются внутри фабрик: бэкенд, не выбранный в конфиге, не загружается вовсе
+
+def _create_gamepad(config: Dict, state_manager: StateManager) -> InputDevice:
+    from .gamepad import GamepadInput
+    return GamepadInput(config['gamepad']['joystick_index'], state_manager)
+
+def _create_zed(config: Dict, state_manager: StateManager) -> InputDevice:
+    if config['zed']['backend'] == "synthetic":
+        from .synthetic_camera import SyntheticZEDCamera as ZEDCameraInput
+    else:
+        from .zed_camera import ZEDCameraInput
+    if config['zed']['recording']['format'] == "jpeg":
+        from .jpeg_recorder import JpegSequenceRecorder
+        video_recorder = JpegSequenceRecorder(config['zed']['output_dir'], state_manager, config['zed']['recording'])
+    else:
+        from .video_recorder import ZEDVideoRecorder
+        video_recorder = ZEDVideoRecorder(config['zed']['output_dir'], state_manager)
+    return ZEDCameraInput(video_recorder, state_manager, config['zed'])
+
+def _create_remote(config: Dict, state_manager: StateManager) -> InputDevice:
+    from .udp_remote import UDPRemoteInput
+    from .remote_protocol import load_key
+    remote = config['remote']
+    return UDPRemoteInput(remote['host'], remote['port'], state_manager, remote['timeout'], remote['max_age'],
+                          load_key(remote['key_file']), remote['allowed_senders'])
+
+def _create_serial_arduino(config: Dict, state_manager: StateManager) -> ArduinoInterface:
+    from .arduino import ArduinoAdapter
+    return ArduinoAdapter(config['arduino']['port'], config['arduino']['baud_rate'], state_manager, config['arduino'])
+
+INPUT_DEVICES: Dict[str, Callable[[Dict, StateManager], InputDevice]] = {
+    "gamepad": _create_gamepad,
+    "zed": _create_zed,
+    "remote": _create_remote,
+}
+
+ARDUINO_BACKENDS: Dict[str, Callable[[Dict, StateManager], ArduinoInterface]] = {
+    "serial": _create_serial_arduino,
+}
+
+def create_input_device(name: str, config: Dict, state_manager: StateManager) -> InputDevice:
+    factory = INPUT_DEVICES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown input device: {name}")
+    with startup_profiler.measure("create", name):
+        device = factory(config, state_manager)
+    logger.info(f"Input device created: {name}")
+    return device
+
+def create_input_devices(config: Dict, state_manager: StateManager) -> Dict[str, InputDevice]:
+    return {name: create_input_device(name, config, state_manager) for name in config['input']['devices']}
+
+def create_arduino(config: Dict, state_manager: StateManager) -> ArduinoInterface:
+    backend = config['arduino']['backend']
+    factory = ARDUINO_BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"Unknown arduino backend: {backend}")
+    with startup_profiler.measure("create", f"arduino:{backend}"):
+        arduino = factory(config, state_manager)
+    logger.info(f"Arduino backend created: {backend}")
+    return arduino
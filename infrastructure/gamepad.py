@@ -1,9 +1,13 @@
-import pygame
+import math
 import logging
+from typing import Dict
 from core.interfaces.input_device import InputDevice
 from core.entities.command import CarCommand
 from .button_handler import GamepadButtonHandler
 from application.state_manager import StateManager
+from .lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +21,25 @@ class GamepadInput(InputDevice):
         self.trim_step = 2.0 / 90
         self.prev_dpad = (0, 0)
         self.rumble_supported = False
+        self.deadzone = 0.0
+        self.steering_expo = 0.0
         logger.info("GamepadInput initialized")
 
+    def apply_config(self, config: Dict) -> None:
+        gamepad_config = config.get("gamepad", {})
+        self.deadzone = gamepad_config.get("deadzone", self.deadzone)
+        self.steering_expo = gamepad_config.get("steering_expo", self.steering_expo)
+        logger.info(f"Gamepad curve: deadzone={self.deadzone:.2f}, steering_expo={self.steering_expo:.2f}")
+
+    def _apply_curve(self, value: float) -> float:
+        magnitude = abs(value)
+        if magnitude <= self.deadzone:
+            return 0.0
+        # Нормируем за мёртвой зоной и смешиваем линейную и кубическую кривые
+        magnitude = (magnitude - self.deadzone) / (1.0 - self.deadzone)
+        magnitude = (1.0 - self.steering_expo) * magnitude + self.steering_expo * magnitude ** 3
+        return math.copysign(magnitude, value)
+
     def initialize(self) -> None:
         pygame.init()
         pygame.joystick.init()
@@ -66,7 +87,7 @@ class GamepadInput(InputDevice):
 
             right_trigger = max(0.0, min(1.0, right_trigger))
             left_trigger = max(0.0, min(1.0, left_trigger))
-            stick_x = max(-1.0, min(1.0, stick_x))
+            stick_x = self._apply_curve(max(-1.0, min(1.0, stick_x)))
 
             dpad_x, dpad_y = dpad
             prev_dpad_x, prev_dpad_y = self.prev_dpad
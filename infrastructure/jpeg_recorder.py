@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple
+from application.state_manager import StateManager
+from .atomic_file import atomic_write_json
+from .video_recorder import ZEDVideoRecorder
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Формат записи: каталог сессии с meta.json, кусками chunk_NNNNN.mjpg (JPEG подряд)
+# и index.bin — по записи на кадр: номер, время кадра, номер куска, смещение, длина
+META_FILE = "meta.json"
+INDEX_FILE = "index.bin"
+CHUNK_NAME = "chunk_{:05d}.mjpg"
+INDEX_RECORD = struct.Struct("<QdIQI")
+FORMAT_VERSION = 1
+
+def encode_jpeg(frame, quality: int) -> bytes:
+    # Кадр камеры в RGB, как и в остальном коде; JPEG из OpenCV ждёт BGR
+    ok, jpeg = cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return jpeg.tobytes()
+
+class RecordingSession:
+    """Одна запись: каталог, пул и кадры в работе.
+
+    После остановки поток записи дописывает сессию сам, а камера может уже
+    начать следующую со своими пулом и очередью.
+    """
+
+    def __init__(self, session_dir: str, pool: Executor):
+        self.session_dir = session_dir
+        self.pool = pool
+        self.pending: Deque[Tuple[int, float, Future]] = deque()
+        self.pending_ready = threading.Condition()
+        self.stopped = False
+        self.frame_number = 0
+        self.frame_size: Optional[Tuple[int, int]] = None
+        # Кадры, которые не удалось закодировать; считает только поток записи
+        self.frames_failed = 0
+
+class JpegSequenceRecorder(ZEDVideoRecorder):
+    """Запись кусками JPEG-последовательности с индексом, кодирование в пуле.
+
+    Камера только копирует кадр и отдаёт его пулу (потоки: cv2.imencode
+    отпускает GIL; или процессы), поэтому пропускная способность растёт с
+    числом ядер. Поток записи забирает результаты строго в порядке подачи,
+    дописывает JPEG в текущий кусок и запись в index.bin. Если в работе уже
+    max_pending кадров, новый кадр отбрасывается: цикл камеры никогда не
+    ждёт диска и кодировщика. Остановка тоже не ждёт: оставшиеся кадры,
+    закрытие пула и итоговый meta.json достаются потоку записи.
+
+    meta.json пишется атомарно при старте (complete: false) и переписывается
+    в конце; index.bin сбрасывается на диск, как только очередь опустела,
+    поэтому оборванная запись читается до последней пачки кадров.
+    frames_dropped считает только поток камеры, ошибки кодирования поток
+    записи пишет в meta.json (frames_failed).
+
+    Процессы пула запускаются через spawn: fork копировал бы процесс
+    камеры вместе с контекстом CUDA ZED SDK.
+    """
+
+    def __init__(self, output_dir: str, state_manager: StateManager, recording_config: Dict):
+        super().__init__(output_dir, state_manager)
+        self.quality = recording_config["quality"]
+        self.workers = recording_config["workers"]
+        self.pool_kind = recording_config["pool"]
+        self.chunk_frames = recording_config["chunk_frames"]
+        self.max_pending = recording_config["max_pending"]
+        self.session: Optional[RecordingSession] = None
+        self.writers: List[threading.Thread] = []
+        logger.info(f"JpegSequenceRecorder: quality {self.quality}, {self.workers} {self.pool_kind} workers, "
+                    f"{self.chunk_frames} frames per chunk")
+
+    def _generate_output_path(self) -> str:
+        path = os.path.join(self.output_dir, f"output_{int(time.time())}")
+        # Новая запись в ту же секунду не должна дописывать каталог предыдущей, которую ещё дописывает поток
+        candidate, suffix = path, 1
+        while os.path.exists(candidate):
+            candidate, suffix = f"{path}_{suffix}", suffix + 1
+        return candidate
+
+    def _switch_recording(self) -> None:
+        try:
+            if not self.recording:
+                self._start()
+            else:
+                self._stop()
+        except Exception as e:
+            logger.error(f"Error toggling recording: {e}")
+            self.state_manager.update_state(last_error=f"Error toggling recording: {e}")
+
+    def _start(self) -> None:
+        session_dir = self.output_path
+        os.makedirs(session_dir, exist_ok=True)
+        if self.pool_kind == "process":
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.session = RecordingSession(session_dir, pool)
+        self._write_meta(self.session, complete=False)
+        writer = threading.Thread(target=self._write_loop, args=(self.session,), name="jpeg-writer", daemon=True)
+        self.writers = [thread for thread in self.writers if thread.is_alive()] + [writer]
+        self.recording = True
+        writer.start()
+        self.state_manager.update_state(recording=True)
+        logger.info(f"Recording started: {session_dir}")
+
+    def _stop(self) -> None:
+        session = self.session
+        self.session = None
+        self.recording = False
+        with session.pending_ready:
+            session.stopped = True
+            session.pending_ready.notify()
+        self.state_manager.update_state(recording=False)
+        logger.info(f"Recording stopping: {session.frame_number} frames in {session.session_dir}")
+        self.output_path = self._generate_output_path()
+
+    def _write_meta(self, session: RecordingSession, complete: bool) -> None:
+        width, height = session.frame_size or (0, 0)
+        meta = {"version": FORMAT_VERSION, "format": "jpeg", "width": width, "height": height,
+                "quality": self.quality, "chunk_frames": self.chunk_frames, "frames": session.frame_number,
+                "frames_failed": session.frames_failed, "complete": complete}
+        atomic_write_json(os.path.join(session.session_dir, META_FILE), meta)
+
+    def record_frame(self, frame, timestamp: Optional[float] = None) -> None:
+        session = self.session
+        if not self.recording or session is None:
+            return
+        try:
+            with session.pending_ready:
+                if len(session.pending) >= self.max_pending:
+                    if self.frames_dropped:
+                        self.frames_dropped.inc()
+                    return
+            if frame.shape[2] == 4:
+                frame = frame[:, :, :3]
+            # Буфер кадра ZED переиспользуется при следующем grab, поэтому копия обязательна
+            frame = np.array(frame, order="C")
+            session.frame_size = (frame.shape[1], frame.shape[0])
+            future = session.pool.submit(encode_jpeg, frame, self.quality)
+            with session.pending_ready:
+                session.pending.append((session.frame_number, time.time() if timestamp is None else timestamp,
+                                        future))
+                session.pending_ready.notify()
+            session.frame_number += 1
+        except Exception as e:
+            if self.frames_dropped:
+                self.frames_dropped.inc()
+            logger.error(f"Error recording frame: {e}")
+            self.state_manager.update_state(last_error=f"Error recording frame: {e}")
+
+    def _write_loop(self, session: RecordingSession) -> None:
+        chunk_file = None
+        chunk_id = -1
+        try:
+            with open(os.path.join(session.session_dir, INDEX_FILE), "ab") as index:
+                try:
+                    while True:
+                        with session.pending_ready:
+                            while not session.pending and not session.stopped:
+                                session.pending_ready.wait(0.5)
+                            if not session.pending:
+                                break
+                            number, timestamp, future = session.pending[0]
+                        try:
+                            jpeg = future.result()
+                        except Exception as e:
+                            logger.error(f"Frame {number} encoding failed: {e}")
+                            session.frames_failed += 1
+                            jpeg = None
+                        with session.pending_ready:
+                            session.pending.popleft()
+                            drained = not session.pending
+                        if jpeg is None:
+                            continue
+                        if chunk_file is None or number // self.chunk_frames != chunk_id:
+                            if chunk_file:
+                                chunk_file.close()
+                                index.flush()
+                            chunk_id = number // self.chunk_frames
+                            chunk_file = open(os.path.join(session.session_dir, CHUNK_NAME.format(chunk_id)), "ab")
+                        offset = chunk_file.tell()
+                        chunk_file.write(jpeg)
+                        index.write(INDEX_RECORD.pack(number, timestamp, chunk_id, offset, len(jpeg)))
+                        if drained:
+                            # Пачка записана: сначала данные, потом индекс, который на них ссылается
+                            chunk_file.flush()
+                            index.flush()
+                        if self.frames_written:
+                            self.frames_written.inc()
+                finally:
+                    if chunk_file:
+                        chunk_file.close()
+            session.pool.shutdown()
+            self._write_meta(session, complete=True)
+            logger.info(f"Recording stopped: {session.frame_number} frames in {session.session_dir}")
+        except Exception as e:
+            logger.error(f"Recording writer error: {e}")
+            self.state_manager.update_state(last_error=f"Recording writer error: {e}")
+            session.pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        try:
+            if self.recording:
+                self._stop()
+            # Процесс камеры завершается: дописываем остановленные сессии
+            for writer in self.writers:
+                writer.join()
+            self.writers = []
+            logger.info("VideoRecorder closed")
+        except Exception as e:
+            logger.error(f"Error closing VideoRecorder: {e}")
+            self.state_manager.update_state(last_error=f"Error closing VideoRecorder: {e}")
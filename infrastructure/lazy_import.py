@@ -0,0 +1,30 @@
+import importlib
+import time
+import types
+from application.startup_profiler import startup_profiler
+
+class LazyModule(types.ModuleType):
+    """Модуль, который импортируется при первом обращении к атрибуту.
+
+    Тяжёлые библиотеки (cv2, pyzed, pygame, serial) загружаются только в том
+    процессе, где устройство реально используется, а не в родителе до fork.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            startup_profiler.record("import", self.__name__, time.perf_counter() - start)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
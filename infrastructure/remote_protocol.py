@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+import math
+import struct
+import time
+from typing import NamedTuple, Optional
+
+# Дейтаграмма команды: magic, версия, флаги, сессия отправителя, номер, время отправки (нс, time.time_ns),
+# газ, тормоз, руль. 32 байта, little-endian
+PACKET = struct.Struct("<2sBBIIQfff")
+MAGIC = b"RC"
+VERSION = 1
+# Отправитель просит нейтраль: геймпад потерян или нажата аварийная остановка
+FLAG_NEUTRAL = 0x01
+SEQ_MODULO = 1 << 32
+# Подпись общим ключом: первые 16 байт HMAC-SHA256 пакета дописываются в конец дейтаграммы
+TAG_SIZE = 16
+
+class RemotePacket(NamedTuple):
+    flags: int
+    session: int
+    seq: int
+    timestamp_ns: int
+    speed: float
+    brake: float
+    steering: float
+
+def load_key(path: str) -> Optional[bytes]:
+    """Общий ключ пульта и машины из файла; пустой путь — пакеты без подписи."""
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"Remote key file {path} is empty")
+    return key
+
+def _tag(packet: bytes, key: bytes) -> bytes:
+    return hmac.new(key, packet, hashlib.sha256).digest()[:TAG_SIZE]
+
+def encode(session: int, seq: int, speed: float, brake: float, steering: float, flags: int = 0,
+           timestamp_ns: Optional[int] = None, key: Optional[bytes] = None) -> bytes:
+    packet = PACKET.pack(MAGIC, VERSION, flags, session, seq % SEQ_MODULO,
+                         time.time_ns() if timestamp_ns is None else timestamp_ns, speed, brake, steering)
+    return packet + _tag(packet, key) if key else packet
+
+def decode(data: bytes, key: Optional[bytes] = None) -> Optional[RemotePacket]:
+    """Пакет или None, если это не дейтаграмма пульта этой версии или подпись не сходится с key."""
+    if key:
+        if len(data) != PACKET.size + TAG_SIZE:
+            return None
+        data, tag = data[:PACKET.size], data[PACKET.size:]
+        if not hmac.compare_digest(tag, _tag(data, key)):
+            return None
+    elif len(data) != PACKET.size:
+        return None
+    magic, version, flags, session, seq, timestamp_ns, speed, brake, steering = PACKET.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    # NaN прошёл бы через min/max ограничение как полный газ
+    if not all(math.isfinite(value) for value in (speed, brake, steering)):
+        return None
+    return RemotePacket(flags, session, seq, timestamp_ns, speed, brake, steering)
+
+def seq_after(seq: int, last: int) -> int:
+    """На сколько seq новее last с учётом переполнения; 0 и меньше — дубликат или опоздавший пакет."""
+    diff = (seq - last) % SEQ_MODULO
+    return diff if diff < SEQ_MODULO // 2 else diff - SEQ_MODULO
@@ -0,0 +1,186 @@
+import glob
+import threading
+import time
+import logging
+from typing import List, Optional
+from application.state_manager import StateManager
+from .lazy_import import lazy_import
+
+serial = lazy_import("serial")
+list_ports = lazy_import("serial.tools.list_ports")
+
+logger = logging.getLogger(__name__)
+
+class SerialConnection:
+    """Последовательный порт, который переподключается сам и никогда не блокирует пишущего.
+
+    write() только пишет в уже открытый порт (с write_timeout) и при ошибке
+    отдаёт порт фоновому потоку: тот закрывает его и заново ищет устройство —
+    по серийному номеру USB, если он задан, иначе по шаблону порта
+    (/dev/ttyUSB* переживает смену номера после переподключения кабеля) —
+    с экспоненциальной паузой от reconnect_initial до reconnect_max.
+    Пока порта нет, write() сразу возвращает False. Если порта нет уже
+    при open(), поток ищет его так же, а connected остаётся False, пока
+    порт не откроется. Тайм-аут записи —
+    не потеря порта: команда отбрасывается, устаревшие байты в буфере ОС
+    сбрасываются, а следующая запись начинается с перевода строки, чтобы
+    недописанная строка не склеилась с новой командой: без завершающей ';'
+    скетч её отбрасывает. Переоткрытие
+    дёрнуло бы DTR и перезагрузило Arduino (~2 с без управления).
+    В общее состояние пишется serial={connected, port, reconnects,
+    write_timeouts, outage_s, last_outage_s}: при каждом переходе и раз
+    в секунду, пока связи нет.
+    """
+
+    def __init__(self, port: str, baud_rate: int, state_manager: Optional[StateManager] = None,
+                 serial_number: Optional[str] = None, write_timeout: float = 0.05,
+                 reconnect_initial: float = 0.1, reconnect_max: float = 5.0):
+        self.port_pattern = port
+        self.baud_rate = baud_rate
+        self.state_manager = state_manager
+        self.serial_number = serial_number
+        self.write_timeout = write_timeout
+        self.reconnect_initial = reconnect_initial
+        self.reconnect_max = reconnect_max
+        self.handle = None
+        self.port: Optional[str] = None
+        self.failed_handle = None
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread: Optional[threading.Thread] = None
+        self.reconnects = 0
+        self.lost_at: Optional[float] = None
+        self.last_outage = 0.0
+        self.write_timeouts = 0
+        self.last_timeout_report = 0.0
+        self.resync = False
+
+    @property
+    def connected(self) -> bool:
+        return self.handle is not None
+
+    def candidates(self) -> List[str]:
+        if self.serial_number:
+            return sorted(info.device for info in list_ports.comports() if info.serial_number == self.serial_number)
+        return sorted(glob.glob(self.port_pattern)) or [self.port_pattern]
+
+    def _open(self) -> None:
+        errors = []
+        for port in self.candidates():
+            try:
+                self.handle = serial.Serial(port, self.baud_rate, timeout=1, write_timeout=self.write_timeout)
+                self.port = port
+                return
+            except (serial.SerialException, OSError) as e:
+                errors.append(f"{port}: {e}")
+        target = f"serial number {self.serial_number}" if self.serial_number else self.port_pattern
+        raise serial.SerialException(f"No port for {target}" + (f" ({'; '.join(errors)})" if errors else ""))
+
+    def open(self) -> bool:
+        """Первое подключение — синхронно; без порта его дальше ищет фоновый поток. Возвращает connected."""
+        try:
+            self._open()
+            logger.info(f"Serial port {self.port} opened at {self.baud_rate} baud")
+        except (serial.SerialException, OSError) as e:
+            self.lost_at = time.monotonic()
+            logger.error(f"Serial port not available, reconnecting in the background: {e}")
+            if self.state_manager:
+                self.state_manager.update_state(last_error=f"Serial port not available: {e}")
+        self._publish()
+        self.thread = threading.Thread(target=self._reconnect_loop, name="serial-reconnect", daemon=True)
+        self.thread.start()
+        return self.connected
+
+    def write(self, data: bytes) -> bool:
+        handle = self.handle
+        if handle is None:
+            return False
+        try:
+            handle.write(b"\n" + data if self.resync else data)
+            self.resync = False
+            return True
+        except serial.SerialTimeoutException as e:
+            # Порт жив, но не успевает: команда теряется, следующая придёт через тик
+            self.write_timeouts += 1
+            self.resync = True
+            try:
+                handle.reset_output_buffer()
+            except Exception:
+                pass
+            now = time.monotonic()
+            if now - self.last_timeout_report >= 1.0:
+                self.last_timeout_report = now
+                logger.warning(f"Serial write timeout on {self.port}, command dropped "
+                               f"({self.write_timeouts} total): {e}")
+                self._publish()
+            return False
+        except (serial.SerialException, OSError) as e:
+            if self.handle is handle:
+                # Закрытие и поиск порта — в фоновом потоке, цикл управления идёт дальше
+                self.handle = None
+                self.failed_handle = handle
+                self.lost_at = time.monotonic()
+                logger.error(f"Serial port {self.port} lost: {e}")
+                if self.state_manager:
+                    self.state_manager.update_state(last_error=f"Serial port {self.port} lost: {e}")
+                self.wakeup.set()
+            return False
+
+    def _reconnect_loop(self) -> None:
+        delay = self.reconnect_initial
+        last_report = 0.0
+        while not self.stopping:
+            if self.handle is not None:
+                self.wakeup.wait()
+                self.wakeup.clear()
+                delay = self.reconnect_initial
+                continue
+            if self.failed_handle is not None:
+                try:
+                    self.failed_handle.close()
+                except Exception:
+                    pass
+                self.failed_handle = None
+            try:
+                self._open()
+            except (serial.SerialException, OSError) as e:
+                now = time.monotonic()
+                if now - last_report >= 1.0:
+                    last_report = now
+                    logger.debug(f"Serial reconnect failed, retry in {delay:.2f} s: {e}")
+                    self._publish()
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+                delay = min(delay * 2, self.reconnect_max)
+                continue
+            self.reconnects += 1
+            self.last_outage = time.monotonic() - self.lost_at if self.lost_at else 0.0
+            self.lost_at = None
+            logger.info(f"Serial port {self.port} reopened after {self.last_outage:.2f} s "
+                        f"(reconnect {self.reconnects})")
+            self._publish()
+
+    def _publish(self) -> None:
+        if not self.state_manager:
+            return
+        self.state_manager.update_state(serial={
+            "connected": self.connected,
+            "port": self.port,
+            "reconnects": self.reconnects,
+            "write_timeouts": self.write_timeouts,
+            "outage_s": round(time.monotonic() - self.lost_at, 2) if self.lost_at else 0.0,
+            "last_outage_s": round(self.last_outage, 2),
+        })
+
+    def close(self) -> None:
+        self.stopping = True
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        for handle in (self.handle, self.failed_handle):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception:
+                    pass
+        self.handle = self.failed_handle = None
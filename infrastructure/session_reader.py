@@ -0,0 +1,322 @@
+import json
+import mmap
+import os
+import struct
+import logging
+from typing import Dict, Iterator, NamedTuple, Optional
+from .atomic_file import atomic_write_bytes
+from .dataset_logger import CHUNK_NAME as DATASET_CHUNK, DEPTH_FAR, MANIFEST_FILE, RECORD_HEADER, RECORD_MAGIC
+from .jpeg_recorder import CHUNK_NAME as JPEG_CHUNK, INDEX_FILE, INDEX_RECORD, META_FILE, encode_jpeg
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Индекс AVI строится один раз и лежит рядом с файлом; миниатюры — рядом с индексом сессии
+AVI_INDEX_SUFFIX = ".index"
+THUMBNAILS_SUFFIX = ".thumbs"
+THUMBNAILS_INDEX_SUFFIX = ".thumbs.index"
+AVI_FRAME_CHUNKS = (b"00dc", b"00db")
+RIFF_CHUNK = struct.Struct("<4sI")
+
+def _index_dtype():
+    # Та же раскладка, что INDEX_RECORD: индекс читается через mmap без разбора записей
+    return np.dtype([("frame", "<u8"), ("timestamp", "<f8"), ("chunk", "<u4"), ("offset", "<u8"), ("length", "<u4")])
+
+class SessionRecord(NamedTuple):
+    position: int
+    frame: int
+    timestamp: float
+    jpeg: memoryview
+    depth: Optional[object]
+    meta: Optional[Dict]
+
+def scan_avi(path: str):
+    """Смещения кадров MJPG в AVI (RIFF AVI и продолжения AVIX) и интервал кадра в секундах."""
+    frames = []
+    frame_interval = 0.0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        stack = [(0, len(data))]
+        while stack:
+            position, end = stack.pop()
+            while position + RIFF_CHUNK.size <= end:
+                fourcc, size = RIFF_CHUNK.unpack_from(data, position)
+                body = position + RIFF_CHUNK.size
+                if fourcc in (b"RIFF", b"LIST"):
+                    # Вложенные списки обходятся по порядку: остаток текущего уровня — после них.
+                    # Незакрытый файл (запись оборвалась) оставляет размер 0 — читаем до конца
+                    inner_end = end if size == 0 else min(body + size, end)
+                    stack.append((inner_end + (size & 1), end))
+                    stack.append((body + 4, inner_end))
+                    break
+                if fourcc == b"avih" and size >= 4:
+                    frame_interval = struct.unpack_from("<I", data, body)[0] / 1e6
+                elif fourcc in AVI_FRAME_CHUNKS and size and body + size <= end:
+                    frames.append((body, size))
+                position = body + size + (size & 1)
+    return frames, frame_interval
+
+class SessionReader:
+    """Произвольный доступ к записанной сессии: датасет, JPEG-последовательность или AVI.
+
+    Индекс (номер кадра, время, кусок, смещение, длина) и куски открываются
+    через mmap, поэтому доступ к любому кадру — O(1) по позиции и
+    двоичный поиск по времени, без чтения файла с начала. Глубина датасета
+    не сжата и возвращается видом numpy прямо на mmap, без копии. Для AVI
+    индекс строится один раз разбором RIFF и сохраняется рядом с файлом.
+    Записи, которые индекс упоминает, но которых нет на диске (сессия
+    оборвалась), отбрасываются при открытии.
+    """
+
+    def __init__(self, path: str):
+        self.path = path.rstrip("/")
+        self.chunks: Dict[int, mmap.mmap] = {}
+        self.manifest: Dict = {}
+        if os.path.isfile(os.path.join(self.path, MANIFEST_FILE)):
+            self.kind = "dataset"
+            self.chunk_name = DATASET_CHUNK
+            with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+                self.manifest = json.load(f)
+            index_path = os.path.join(self.path, INDEX_FILE)
+            self.thumbnails_path = os.path.join(self.path, "thumbnails")
+        elif os.path.isfile(os.path.join(self.path, META_FILE)) or self._has_jpeg_chunks():
+            self.kind = "jpeg"
+            self.chunk_name = JPEG_CHUNK
+            self.manifest = self._load_meta()
+            index_path = os.path.join(self.path, INDEX_FILE)
+            self.thumbnails_path = os.path.join(self.path, "thumbnails")
+        elif self.path.endswith(".avi"):
+            self.kind = "avi"
+            self.chunk_name = None
+            index_path = self.path + AVI_INDEX_SUFFIX
+            if not os.path.exists(index_path) or os.stat(index_path).st_mtime < os.stat(self.path).st_mtime:
+                self.build_avi_index(index_path)
+            self.thumbnails_path = self.path
+        else:
+            raise ValueError(f"Not a recorded session: {path}")
+        self.index = self._load_index(index_path)
+        self.thumbnail_index = None
+        self.thumbnail_data: Optional[mmap.mmap] = None
+        logger.info(f"SessionReader opened {self.kind} session {self.path}: {len(self)} frames")
+
+    def _has_jpeg_chunks(self) -> bool:
+        # Запись, оборванная до meta.json: index.bin и куски уже на диске
+        if not os.path.isdir(self.path) or not os.path.isfile(os.path.join(self.path, INDEX_FILE)):
+            return False
+        prefix, _, suffix = JPEG_CHUNK.partition("{:05d}")
+        return any(name.startswith(prefix) and name.endswith(suffix) for name in os.listdir(self.path))
+
+    def _load_meta(self) -> Dict:
+        path = os.path.join(self.path, META_FILE)
+        if not os.path.isfile(path):
+            logger.warning(f"{self.path}: no {META_FILE}, reading frames from the index")
+            return {}
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except ValueError as e:
+            logger.warning(f"{self.path}: unreadable {META_FILE} ({e}), reading frames from the index")
+            return {}
+
+    def _chunk_path(self, chunk: int) -> str:
+        return self.path if self.kind == "avi" else os.path.join(self.path, self.chunk_name.format(chunk))
+
+    def _load_index(self, index_path: str):
+        dtype = _index_dtype()
+        size = os.path.getsize(index_path) // dtype.itemsize * dtype.itemsize
+        if not size:
+            return np.zeros(0, dtype)
+        with open(index_path, "rb") as f:
+            index = np.frombuffer(mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ), dtype)
+        # Кусок мог не успеть дописаться до сбоя: оставляем только записи, целиком лежащие на диске
+        chunk_ids = np.unique(index["chunk"])
+        sizes = np.array([self._chunk_size(int(chunk)) for chunk in chunk_ids], dtype=np.uint64)
+        complete = index["offset"] + index["length"] <= sizes[np.searchsorted(chunk_ids, index["chunk"])]
+        if not complete.all():
+            logger.warning(f"{self.path}: {int((~complete).sum())} index records point past the end of data")
+            index = index[complete]
+        return index
+
+    def _chunk_size(self, chunk: int) -> int:
+        path = self._chunk_path(chunk)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def build_avi_index(self, index_path: str) -> None:
+        frames, frame_interval = scan_avi(self.path)
+        # Время записи AVI не хранит: считаем от конца файла назад с интервалом кадра
+        start = os.stat(self.path).st_mtime - len(frames) * frame_interval
+        records = b"".join(INDEX_RECORD.pack(number, start + number * frame_interval, 0, offset, length)
+                           for number, (offset, length) in enumerate(frames))
+        atomic_write_bytes(index_path, records)
+        logger.info(f"AVI index built: {len(frames)} frames in {self.path}")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __enter__(self) -> "SessionReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def timestamps(self):
+        return self.index["timestamp"]
+
+    @property
+    def frame_numbers(self):
+        return self.index["frame"]
+
+    def position_at(self, timestamp: float) -> int:
+        """Позиция последнего кадра не позже timestamp (первого, если timestamp раньше начала)."""
+        return max(int(np.searchsorted(self.index["timestamp"], timestamp, side="right")) - 1, 0)
+
+    def position_of(self, frame: int) -> Optional[int]:
+        position = int(np.searchsorted(self.index["frame"], frame))
+        return position if position < len(self.index) and self.index["frame"][position] == frame else None
+
+    def _chunk(self, chunk: int) -> mmap.mmap:
+        data = self.chunks.get(chunk)
+        if data is None:
+            with open(self._chunk_path(chunk), "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.chunks[chunk] = data
+        return data
+
+    def _parse(self, position: int, data: mmap.mmap) -> SessionRecord:
+        entry = self.index[position]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        view = memoryview(data)[offset:offset + length]
+        if self.kind != "dataset":
+            return SessionRecord(position, int(entry["frame"]), float(entry["timestamp"]), view, None, None)
+        magic, _, _, _, jpeg_size, depth_size, meta_size, width, height = RECORD_HEADER.unpack_from(view)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"Corrupted dataset record at position {position}")
+        start = RECORD_HEADER.size
+        depth = np.frombuffer(data, "<u2", depth_size // 2, offset + start + jpeg_size).reshape(height, width)
+        meta = json.loads(bytes(view[start + jpeg_size + depth_size:start + jpeg_size + depth_size + meta_size]))
+        return SessionRecord(position, int(entry["frame"]), float(entry["timestamp"]),
+                             view[start:start + jpeg_size], depth, meta)
+
+    def record(self, position: int) -> SessionRecord:
+        return self._parse(position, self._chunk(int(self.index[position]["chunk"])))
+
+    def record_at(self, timestamp: float) -> SessionRecord:
+        return self.record(self.position_at(timestamp))
+
+    def jpeg(self, position: int) -> memoryview:
+        return self.record(position).jpeg
+
+    def image(self, position: int):
+        return self.decode(self.record(position).jpeg)
+
+    def decode(self, jpeg: memoryview, reduced: bool = False):
+        """Кадр в том же порядке каналов, в каком его отдала камера."""
+        flag = cv2.IMREAD_REDUCED_COLOR_4 if reduced else cv2.IMREAD_COLOR
+        frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), flag)
+        # JPEG-запись и датасет кодируют через RGB->BGR, VideoWriter пишет кадр как есть
+        return frame if self.kind == "avi" else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def depth(self, position: int):
+        """Глубина в мм (uint16, вид на mmap без копии) или None, если в сессии её нет."""
+        return self.record(position).depth
+
+    def depth_meters(self, position: int):
+        depth = self.depth(position)
+        if depth is None:
+            return None
+        meters = depth.astype(np.float32) / 1000.0
+        meters[depth == 0] = np.nan
+        meters[depth == DEPTH_FAR] = np.inf
+        return meters
+
+    def command(self, position: int) -> Optional[Dict]:
+        meta = self.record(position).meta
+        return meta.get("command") if meta else None
+
+    def iter_records(self, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Iterator[SessionRecord]:
+        """Потоковый обход: куски открываются по очереди с MADV_SEQUENTIAL и закрываются после прохода.
+
+        Запись действительна до перехода к следующему куску; что нужно дольше — копировать.
+        """
+        current_chunk, data = -1, None
+        try:
+            for position in range(start, len(self.index) if stop is None else min(stop, len(self.index)), step):
+                chunk = int(self.index[position]["chunk"])
+                if chunk != current_chunk:
+                    if data is not None:
+                        # Вызывающий может ещё держать прошлую запись: страницы отдаём сразу,
+                        # а отображение снимется, когда уйдёт последний вид на него
+                        data.madvise(mmap.MADV_DONTNEED)
+                    with open(self._chunk_path(chunk), "rb") as f:
+                        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                    current_chunk = chunk
+                yield self._parse(position, data)
+        finally:
+            if data is not None:
+                try:
+                    data.close()
+                except BufferError:
+                    # Вызывающий держит вид на последнюю запись; mmap закроется вместе с ним
+                    pass
+
+    def __iter__(self) -> Iterator[SessionRecord]:
+        return self.iter_records()
+
+    def build_thumbnails(self, every: int = 30, width: int = 160, quality: int = 70) -> int:
+        """Миниатюры каждого every-го кадра в один файл с индексом той же раскладки; возвращает их число."""
+        records = []
+        entries = []
+        offset = 0
+        for record in self.iter_records(step=every):
+            frame = self.decode(record.jpeg, reduced=True)
+            height = max(1, frame.shape[0] * width // frame.shape[1])
+            jpeg = encode_jpeg(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA), quality)
+            entries.append(INDEX_RECORD.pack(record.position, record.timestamp, 0, offset, len(jpeg)))
+            records.append(jpeg)
+            offset += len(jpeg)
+        atomic_write_bytes(self.thumbnails_path + THUMBNAILS_SUFFIX, b"".join(records))
+        atomic_write_bytes(self.thumbnails_path + THUMBNAILS_INDEX_SUFFIX, b"".join(entries))
+        self._close_thumbnails()
+        logger.info(f"Thumbnails built: {len(entries)} for {self.path}")
+        return len(entries)
+
+    def thumbnail(self, position: int):
+        """Миниатюра ближайшего ключевого кадра не позже position (порядок каналов как у image) или None."""
+        if self.thumbnail_index is None:
+            if not os.path.exists(self.thumbnails_path + THUMBNAILS_INDEX_SUFFIX):
+                return None
+            dtype = _index_dtype()
+            with open(self.thumbnails_path + THUMBNAILS_INDEX_SUFFIX, "rb") as f:
+                self.thumbnail_index = np.frombuffer(f.read(), dtype)
+            with open(self.thumbnails_path + THUMBNAILS_SUFFIX, "rb") as f:
+                self.thumbnail_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if len(self.thumbnail_index) else None
+        if not len(self.thumbnail_index):
+            return None
+        # В поле frame миниатюр — позиция кадра в сессии
+        key = max(int(np.searchsorted(self.thumbnail_index["frame"], position, side="right")) - 1, 0)
+        entry = self.thumbnail_index[key]
+        offset, length = int(entry["offset"]), int(entry["length"])
+        frame = cv2.imdecode(np.frombuffer(self.thumbnail_data, np.uint8, length, offset), cv2.IMREAD_COLOR)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def _close_thumbnails(self) -> None:
+        if self.thumbnail_data is not None:
+            self.thumbnail_data.close()
+        self.thumbnail_index = None
+        self.thumbnail_data = None
+
+    def close(self) -> None:
+        self._close_thumbnails()
+        for data in self.chunks.values():
+            try:
+                data.close()
+            except BufferError:
+                pass
+        self.chunks.clear()
+
+def open_session(path: str) -> SessionReader:
+    return SessionReader(path)
@@ -0,0 +1,93 @@
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from core.interfaces.video_recorder import VideoRecorder
+from application.camera_governor import CameraLevel
+from application.state_manager import StateManager
+from .zed_camera import ZEDCameraInput
+from .lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+RESOLUTION_SIZES = {"HD2K": (2208, 1242), "HD1080": (1920, 1080), "HD720": (1280, 720), "VGA": (672, 376)}
+CAMERA_HEIGHT = 0.2
+HORIZONTAL_FOV = 90.0
+
+class SyntheticZEDCamera(ZEDCameraInput):
+    """Заменитель ZED для нагрузочных прогонов без камеры и SDK.
+
+    Кадры идут с частотой zed.fps, как grab() настоящей камеры: RGB — шум,
+    сдвигаемый на каждом кадре (запись и превью кодируют не один и тот же
+    кадр), глубина — пол и стена на obstacle_distance. Всё после захвата —
+    process_frame, автопилот, торможение, запись, превью и датасет — тот же
+    код, что с камерой.
+    """
+
+    def __init__(self, video_recorder: VideoRecorder, state_manager: StateManager, camera_config: Optional[Dict] = None):
+        super().__init__(video_recorder, state_manager, camera_config)
+        synthetic = (camera_config or {}).get("synthetic", {})
+        self.obstacle_distance = synthetic.get("obstacle_distance", 5.0)
+        self.record_on_start = synthetic.get("record", False)
+        self.opened = False
+        self.next_frame = 0.0
+        self.frame_number = 0
+        self.rgb = None
+        self.depth = None
+
+    def initialize(self) -> None:
+        self._open(self.camera_level)
+        self.video_recorder.initialize()
+        if self.free_space_config:
+            from application.free_space import FreeSpaceSteering
+            self.free_space = FreeSpaceSteering(self.free_space_config)
+        if self.record_on_start:
+            self.state_manager.update_state(record_requested=True)
+        logger.info("Synthetic ZED camera initialized")
+
+    def _open(self, level: CameraLevel) -> None:
+        width, height = RESOLUTION_SIZES[level.resolution]
+        self.rgb = np.random.default_rng(0).integers(0, 256, (height, width * 2, 3), dtype=np.uint8)
+        self.depth = self._depth_map(width, height)
+        self.camera_level = level
+        self.opened = True
+        self.next_frame = time.monotonic()
+        self.state_manager.update_state(camera_mode=level.describe())
+        logger.info(f"Synthetic ZED camera opened: {level.describe()}")
+
+    def _switch_level(self, level: CameraLevel) -> None:
+        self._open(level)
+
+    def _depth_map(self, width: int, height: int):
+        # Горизонтальная камера: ниже горизонта пол, пока он ближе стены, выше — стена
+        focal = width / 2 / np.tan(np.radians(HORIZONTAL_FOV) / 2)
+        below = np.arange(height, dtype=np.float32) - (height - 1) / 2
+        with np.errstate(divide="ignore"):
+            floor = np.where(below > 0, CAMERA_HEIGHT * focal / below, np.inf)
+        column = np.minimum(floor, self.obstacle_distance)
+        column = np.where(column > self.depth_max, np.inf, np.where(column < self.depth_min, -np.inf, column))
+        return np.repeat(column.astype(np.float32)[:, None], width, axis=1)
+
+    def _is_open(self) -> bool:
+        return self.opened
+
+    def _grab(self) -> Optional[Tuple[float, object, object]]:
+        self.next_frame = max(self.next_frame + 1.0 / self.camera_level.fps, time.monotonic() - 1.0)
+        delay = self.next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        frame_timestamp = time.time()
+        height, width = self.depth.shape
+        offset = self.frame_number % width
+        self.frame_number += 1
+        # Копия, как get_data() у SDK: кадр живёт отдельно от буфера камеры
+        return frame_timestamp, self.rgb[:, offset:offset + width].copy(), self.depth.copy()
+
+    def _frame_size(self) -> Tuple[int, int]:
+        height, width = self.depth.shape
+        return width, height
+
+    def close(self) -> None:
+        self.opened = False
+        super().close()
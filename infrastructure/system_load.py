@@ -0,0 +1,46 @@
+import glob
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+THERMAL_ZONES = "/sys/class/thermal/thermal_zone*/temp"
+
+class SystemLoad:
+    """Загрузка CPU по /proc/stat и максимальная температура термозон (Jetson, Linux)."""
+
+    def __init__(self):
+        self.last_cpu: Optional[Tuple[int, int]] = self._read_cpu()
+        self.zones = glob.glob(THERMAL_ZONES)
+        logger.info(f"SystemLoad initialized: {len(self.zones)} thermal zones")
+
+    @staticmethod
+    def _read_cpu() -> Optional[Tuple[int, int]]:
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # idle + iowait
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return sum(fields), idle
+
+    def cpu_utilisation(self) -> float:
+        """Доля занятого CPU по всем ядрам с прошлого вызова, 0..1."""
+        current = self._read_cpu()
+        previous, self.last_cpu = self.last_cpu, current
+        if not current or not previous or current[0] <= previous[0]:
+            return 0.0
+        total = current[0] - previous[0]
+        return 1.0 - (current[1] - previous[1]) / total
+
+    def temperature(self) -> Optional[float]:
+        """Максимальная температура среди термозон, °C; None, если датчиков нет."""
+        readings = []
+        for zone in self.zones:
+            try:
+                with open(zone) as f:
+                    readings.append(int(f.read()) / 1000)
+            except (OSError, ValueError):
+                continue
+        return max(readings) if readings else None
@@ -0,0 +1,30 @@
+import os
+import yaml
+import logging
+from typing import Dict
+from core.interfaces.tuning_store import TuningStore
+from .atomic_file import atomic_write_yaml
+
+logger = logging.getLogger(__name__)
+
+class FileTuningStore(TuningStore):
+    def __init__(self, path: str):
+        self.path = path
+        logger.info(f"FileTuningStore initialized with path: {path}")
+
+    def load(self) -> Dict:
+        if not os.path.exists(self.path):
+            logger.info(f"No tuned parameters at {self.path}")
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                values = yaml.safe_load(f) or {}
+            logger.info(f"Tuned parameters loaded: {values}")
+            return values
+        except Exception as e:
+            logger.error(f"Failed to load tuned parameters from {self.path}: {e}")
+            return {}
+
+    def save(self, values: Dict) -> None:
+        atomic_write_yaml(self.path, values)
+        logger.info(f"Tuned parameters saved: {values}")
@@ -0,0 +1,196 @@
+import select
+import socket
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set
+from core.interfaces.input_device import InputDevice
+from core.entities.command import CarCommand
+from application.state_manager import StateManager
+from application.metrics import Counter, Histogram, MetricSection
+from .remote_protocol import FLAG_NEUTRAL, RemotePacket, decode, seq_after
+
+logger = logging.getLogger(__name__)
+
+# Раз в столько секунд задержка и потери публикуются в общее состояние
+STATS_INTERVAL = 1.0
+# Сколько прошлых сессий помнить: записанные пакеты старой сессии не перехватят управление
+PAST_SESSIONS = 64
+
+class UDPRemoteInput(InputDevice):
+    """Пульт по сети: команды в UDP-дейтаграммах remote_protocol.
+
+    Каждый вызов get_input ждёт дейтаграмму не дольше короткого интервала и
+    вычитывает всё, что пришло. Пакет с номером не новее последнего
+    (дубликат, перестановка) отбрасывается, пропуски номеров считаются
+    потерями, пакет старше max_age по часам отправителя — опоздавшим
+    (нужны синхронизированные часы, max_age 0 отключает проверку). Если
+    годных пакетов нет дольше timeout, устройство выдаёт нейтраль.
+    Новый отправитель (другая сессия) принимается, только когда текущий
+    замолчал, и только если эта сессия ещё не встречалась.
+
+    Перехватить управление после паузы может любой, кто достаёт до порта,
+    поэтому пакеты принимаются только с адресов allowed_senders (пустой
+    список — с любых) и, если задан общий ключ, только с верной подписью
+    HMAC. Без ключа устройство слушает интерфейс host — по умолчанию
+    loopback.
+    """
+
+    def __init__(self, host: str, port: int, state_manager: StateManager, timeout: float = 0.25,
+                 max_age: float = 0.0, key: Optional[bytes] = None, allowed_senders: Iterable[str] = ()):
+        self.host = host
+        self.port = port
+        self.state_manager = state_manager
+        self.timeout = timeout
+        self.max_age = max_age
+        self.key = key
+        self.allowed_senders: Set[str] = set(allowed_senders)
+        self.rejected_senders: Set[str] = set()
+        self.past_sessions: Deque[int] = deque(maxlen=PAST_SESSIONS)
+        self.sock: Optional[socket.socket] = None
+        self.session: Optional[int] = None
+        self.last_seq = 0
+        self.latest: Optional[RemotePacket] = None
+        self.latest_time = 0.0
+        self.link_lost = True
+        self.received = 0
+        self.lost = 0
+        self.late = 0
+        self.reordered = 0
+        self.invalid = 0
+        self.latency_sum = 0.0
+        self.stats_time = 0.0
+        self.stats_base = (0, 0, 0, 0, 0.0)
+        self.packets: Optional[Counter] = None
+        self.lost_packets: Optional[Counter] = None
+        self.late_packets: Optional[Counter] = None
+        self.reordered_packets: Optional[Counter] = None
+        self.latency_seconds: Optional[Histogram] = None
+        logger.info(f"UDPRemoteInput initialized: {host}:{port}, timeout={timeout}, max_age={max_age}, "
+                    f"signed={key is not None}, allowed_senders={sorted(self.allowed_senders) or 'any'}")
+
+    def apply_config(self, config: Dict) -> None:
+        remote = config.get("remote", {})
+        self.timeout = remote.get("timeout", self.timeout)
+        self.max_age = remote.get("max_age", self.max_age)
+        self.allowed_senders = set(remote.get("allowed_senders", self.allowed_senders))
+
+    def set_metrics(self, metrics: MetricSection) -> None:
+        self.packets = metrics.counter("packets_total")
+        self.lost_packets = metrics.counter("lost_total")
+        self.late_packets = metrics.counter("late_total")
+        self.reordered_packets = metrics.counter("reordered_total")
+        self.latency_seconds = metrics.histogram("latency_seconds")
+
+    def initialize(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+        self.stats_time = time.monotonic()
+        logger.info(f"Listening for remote commands on udp://{self.host}:{self.port}")
+        if self.key is None and not self.allowed_senders and not self.sock.getsockname()[0].startswith("127."):
+            logger.warning("Remote input accepts unsigned commands from any host; set remote.key_file "
+                           "or remote.allowed_senders")
+
+    def _receive(self, data: bytes, sender: str, received_ns: int, now: float) -> None:
+        if self.allowed_senders and sender not in self.allowed_senders:
+            self.invalid += 1
+            if sender not in self.rejected_senders and len(self.rejected_senders) < PAST_SESSIONS:
+                self.rejected_senders.add(sender)
+                logger.warning(f"Ignoring remote commands from {sender}: not in remote.allowed_senders")
+            return
+        packet = decode(data, self.key)
+        if packet is None:
+            self.invalid += 1
+            return
+        if packet.session != self.session:
+            if self.session is not None and now - self.latest_time <= self.timeout:
+                # Второй пульт не перехватывает управление, пока первый на связи
+                self.invalid += 1
+                return
+            if packet.session in self.past_sessions:
+                # Повтор записанных пакетов прошлой сессии
+                self.invalid += 1
+                return
+            logger.info(f"Remote sender session {packet.session:08x} connected from {sender}")
+            if self.session is not None:
+                self.past_sessions.append(self.session)
+            self.session, self.last_seq = packet.session, packet.seq - 1
+        gap = seq_after(packet.seq, self.last_seq)
+        if gap <= 0:
+            self.reordered += 1
+            if self.reordered_packets:
+                self.reordered_packets.inc()
+            return
+        self.last_seq = packet.seq
+        if gap > 1:
+            self.lost += gap - 1
+            if self.lost_packets:
+                self.lost_packets.inc(gap - 1)
+        latency = (received_ns - packet.timestamp_ns) / 1e9
+        if self.max_age and latency > self.max_age:
+            self.late += 1
+            if self.late_packets:
+                self.late_packets.inc()
+            return
+        self.received += 1
+        self.latency_sum += latency
+        if self.packets:
+            self.packets.inc()
+            self.latency_seconds.observe(latency)
+        self.latest = packet
+        self.latest_time = now
+
+    def _publish_stats(self, now: float) -> None:
+        received, lost, late, reordered, latency_sum = self.stats_base
+        received = self.received - received
+        missed = self.lost - lost + self.late - late
+        self.stats_base = (self.received, self.lost, self.late, self.reordered, self.latency_sum)
+        self.stats_time = now
+        self.state_manager.update_state(remote={
+            "connected": not self.link_lost,
+            "latency_ms": (self.latency_sum - latency_sum) / received * 1000 if received else None,
+            "loss": missed / (received + missed) if received + missed else 0.0,
+            "reordered": self.reordered - reordered,
+        })
+
+    def get_input(self) -> CarCommand:
+        try:
+            # Ожидание дейтаграммы служит паузой цикла процесса устройства
+            select.select([self.sock], [], [], min(self.timeout / 4, 0.01))
+            while True:
+                try:
+                    data, (sender, _) = self.sock.recvfrom(512)
+                except BlockingIOError:
+                    break
+                self._receive(data, sender, time.time_ns(), time.monotonic())
+
+            now = time.monotonic()
+            fresh = self.latest is not None and now - self.latest_time <= self.timeout
+            if fresh == self.link_lost:
+                self.link_lost = not fresh
+                if self.link_lost:
+                    logger.warning(f"No remote commands for {self.timeout} s, holding neutral")
+                    self.state_manager.update_state(last_error="Remote link lost")
+                else:
+                    logger.info("Remote link restored")
+            if now - self.stats_time >= STATS_INTERVAL:
+                self._publish_stats(now)
+            if not fresh or self.latest.flags & FLAG_NEUTRAL:
+                return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+            packet = self.latest
+            return CarCommand(speed=max(0.0, min(1.0, packet.speed)), brake=max(0.0, min(1.0, packet.brake)),
+                              steering=max(-1.0, min(1.0, packet.steering)))
+        except Exception as e:
+            logger.error(f"Remote input error: {e}")
+            self.state_manager.update_state(last_error=f"Remote input error: {e}")
+            return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+
+    def close(self) -> None:
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        logger.info(f"Remote input closed: {self.received} packets, {self.lost} lost, {self.late} late, "
+                    f"{self.reordered} out of order")
@@ -1,9 +1,13 @@
-import cv2
 import os
 import time
 import logging
+from typing import Optional
 from core.interfaces.video_recorder import VideoRecorder
 from application.state_manager import StateManager
+from application.metrics import Counter, MetricSection
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,8 @@ class ZEDVideoRecorder(VideoRecorder):
         self.width = 1280
         self.height = 720
         self.fps = 30
+        self.frames_written: Optional[Counter] = None
+        self.frames_dropped: Optional[Counter] = None
         logger.info(f"ZEDVideoRecorder initialized with output_dir: {output_dir}")
 
     def _generate_output_path(self) -> str:
@@ -32,6 +38,17 @@ class ZEDVideoRecorder(VideoRecorder):
         logger.info("ZEDVideoRecorder initialized")
 
     def toggle_recording(self) -> None:
+        # Кнопка обрабатывается в процессе геймпада, а файл пишет процесс камеры:
+        # запрос передаётся через общее состояние и применяется в sync_recording
+        requested = self.state_manager.get_state().get("record_requested", False)
+        self.state_manager.update_state(record_requested=not requested)
+        logger.info(f"Recording {'stop' if requested else 'start'} requested")
+
+    def sync_recording(self, requested: bool) -> None:
+        if requested != self.recording:
+            self._switch_recording()
+
+    def _switch_recording(self) -> None:
         try:
             if not self.recording:
                 fourcc = cv2.VideoWriter_fourcc(*'MJPG')  # Используем MJPG
@@ -55,7 +72,7 @@ class ZEDVideoRecorder(VideoRecorder):
             logger.error(f"Error toggling recording: {e}")
             self.state_manager.update_state(last_error=f"Error toggling recording: {e}")
 
-    def record_frame(self, frame) -> None:
+    def record_frame(self, frame, timestamp: Optional[float] = None) -> None:
         try:
             if self.recording and self.out and self.out.isOpened():
                 logger.debug(f"Input frame shape: {frame.shape}")
@@ -67,15 +84,25 @@ class ZEDVideoRecorder(VideoRecorder):
                     frame = cv2.resize(frame, (self.width, self.height))
                     logger.debug(f"Resized frame to {self.width}x{self.height}")
                 self.out.write(frame)
+                if self.frames_written:
+                    self.frames_written.inc()
                 logger.debug(f"Frame recorded: {frame.shape}")
+            elif self.recording and self.frames_dropped:
+                self.frames_dropped.inc()
         except Exception as e:
+            if self.frames_dropped:
+                self.frames_dropped.inc()
             logger.error(f"Error recording frame: {e}")
             self.state_manager.update_state(last_error=f"Error recording frame: {e}")
 
+    def set_metrics(self, metrics: MetricSection) -> None:
+        self.frames_written = metrics.counter("frames_written_total")
+        self.frames_dropped = metrics.counter("frames_dropped_total")
+
     def close(self) -> None:
         try:
             if self.recording:
-                self.toggle_recording()
+                self._switch_recording()
             if self.out:
                 self.out.release()
                 self.out = None
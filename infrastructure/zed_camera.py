@@ -1,80 +1,204 @@
-import cv2
-import time
 import os
-import numpy as np
-import pyzed.sl as sl
 import logging
+import time
+from typing import Callable, Dict, Optional, Tuple
 from core.interfaces.input_device import InputDevice
 from core.interfaces.video_recorder import VideoRecorder
 from core.entities.command import CarCommand
 from application.state_manager import StateManager
+from application.car_controller import NEUTRAL_MOTOR_VALUE
+from application.metrics import Counter, Histogram, MetricSection
+from application.camera_governor import CameraGovernor, CameraLevel
+from application.frame_buffer import SharedFrameBuffer
+from .lazy_import import lazy_import
+from .system_load import SystemLoad
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+sl = lazy_import("pyzed.sl")
 
 logger = logging.getLogger(__name__)
 
+# Пауза между попытками открыть камеру, если она не открылась ни в новом, ни в прежнем режиме
+REOPEN_INTERVAL = 1.0
+
 class ZEDCameraInput(InputDevice):
-    def __init__(self, video_recorder: VideoRecorder, state_manager: StateManager):
+    def __init__(self, video_recorder: VideoRecorder, state_manager: StateManager, camera_config: Optional[Dict] = None):
         self.zed = None
         self.video_recorder = video_recorder
         self.state_manager = state_manager
         self.window_name = "ZED Camera Feed"
         self.show_window = False
         self.window_created = False
-        self.brake_duration = 0.5
-        self.braking = False
-        self.brake_start_time = None
         self.min_distance = float('inf')
-        logger.info("ZEDCameraInput initialized")
+        self.obstacle_sink: Optional[Callable[[float, float, float], None]] = None
+        self.frame_buffer: Optional[SharedFrameBuffer] = None
+        self.dataset_logger = None
+        self.runtime_params = None
+        self.image_zed = None
+        self.depth_zed = None
+        self.grab_failures: Optional[Counter] = None
+        self.grab_seconds: Optional[Histogram] = None
+        self.process_seconds: Optional[Histogram] = None
+        camera_config = camera_config or {}
+        self.depth_min = camera_config.get("depth_min", 0.3)
+        self.depth_max = camera_config.get("depth_max", 10.0)
+        self.camera_id = camera_config.get("camera_id", 0)
+        self.camera_level = CameraLevel(camera_config.get("resolution", "HD720"), camera_config.get("fps", 30),
+                                        camera_config.get("depth_mode", "PERFORMANCE"))
+        self.governor: Optional[CameraGovernor] = None
+        self.switch_pending = False
+        self.lost = False
+        self.next_reopen = 0.0
+        # Рулевой модуль тянет numpy, поэтому создаётся в initialize(), уже в процессе камеры
+        self.free_space_config = camera_config.get("free_space")
+        self.free_space = None
+        if "governor" in camera_config:
+            load = SystemLoad()
+            self.governor = CameraGovernor(self.camera_level, camera_config["governor"], load.cpu_utilisation,
+                                           load.temperature)
+        logger.info(f"ZEDCameraInput initialized: camera {self.camera_id}, {self.camera_level.describe()}, "
+                    f"depth {self.depth_min}-{self.depth_max} m")
 
     def initialize(self) -> None:
         try:
             self.zed = sl.Camera()
-            init_params = sl.InitParameters()
-            init_params.camera_resolution = sl.RESOLUTION.HD720
-            init_params.camera_fps = 30
-            init_params.depth_mode = sl.DEPTH_MODE.PERFORMANCE
-            init_params.coordinate_units = sl.UNIT.METER
-            init_params.sdk_verbose = 1
-            init_params.depth_minimum_distance = 0.3
-            init_params.depth_maximum_distance = 10.0
-            status = self.zed.open(init_params)
-            if status != sl.ERROR_CODE.SUCCESS:
-                logger.error(f"Failed to initialize ZED camera: {status}")
-                self.state_manager.update_state(last_error=f"ZED camera initialization failed: {status}")
-                raise RuntimeError(f"ZED camera initialization failed: {status}")
+            self._open(self.camera_level)
+            self.runtime_params = sl.RuntimeParameters()
+            self.image_zed = sl.Mat()
+            self.depth_zed = sl.Mat()
             self.video_recorder.initialize()
+            if self.free_space_config:
+                from application.free_space import FreeSpaceSteering
+                self.free_space = FreeSpaceSteering(self.free_space_config)
             logger.info("ZED camera initialized")
         except Exception as e:
             logger.error(f"ZED initialization error: {e}")
             self.state_manager.update_state(last_error=f"ZED initialization error: {e}")
             raise
 
+    def _open(self, level: CameraLevel) -> None:
+        init_params = sl.InitParameters()
+        init_params.set_from_camera_id(self.camera_id)
+        init_params.camera_resolution = getattr(sl.RESOLUTION, level.resolution)
+        init_params.camera_fps = level.fps
+        init_params.depth_mode = getattr(sl.DEPTH_MODE, level.depth_mode)
+        init_params.coordinate_units = sl.UNIT.METER
+        init_params.sdk_verbose = 1
+        init_params.depth_minimum_distance = self.depth_min
+        init_params.depth_maximum_distance = self.depth_max
+        status = self.zed.open(init_params)
+        if status != sl.ERROR_CODE.SUCCESS:
+            logger.error(f"Failed to open ZED camera in {level.describe()}: {status}")
+            self.state_manager.update_state(last_error=f"ZED camera initialization failed: {status}")
+            raise RuntimeError(f"ZED camera initialization failed: {status}")
+        self.camera_level = level
+        self.state_manager.update_state(camera_mode=level.describe())
+        logger.info(f"ZED camera opened: {level.describe()}")
+
+    def _switch_level(self, level: CameraLevel) -> None:
+        # Режим, разрешение и FPS меняются только переоткрытием камеры
+        previous = self.camera_level
+        self.zed.close()
+        try:
+            self._open(level)
+            return
+        except RuntimeError:
+            logger.warning(f"Falling back to {previous.describe()}")
+        if self.governor:
+            self.governor.hold(previous)
+        try:
+            self._open(previous)
+        except RuntimeError:
+            # Камера не открылась ни в одном режиме: get_input переоткрывает её с паузами
+            self.lost = True
+            self.next_reopen = time.monotonic() + REOPEN_INTERVAL
+
+    def _reopen(self) -> None:
+        now = time.monotonic()
+        if now < self.next_reopen:
+            # Без камеры цикл процесса иначе крутился бы вхолостую
+            time.sleep(min(self.next_reopen - now, 0.1))
+            return
+        try:
+            self._open(self.camera_level)
+            self.lost = False
+            logger.info(f"ZED camera reopened in {self.camera_level.describe()}")
+        except RuntimeError:
+            self.next_reopen = now + REOPEN_INTERVAL
+
+    def _update_governor(self, state: Dict, now: float, loop_seconds: float) -> bool:
+        """Ведёт регулятор режима; True, пока смена режима ждёт остановки машины."""
+        if self.governor.current == self.camera_level:
+            # Пока смена ждёт, окно не копится: кадры идут ещё в прежнем режиме
+            self.governor.update(now, loop_seconds)
+        if self.governor.current == self.camera_level:
+            self.switch_pending = False
+            return False
+        # Переоткрытие на ходу оставило бы защитный этап без расстояния на всё время переоткрытия
+        if state.get("motor_value", NEUTRAL_MOTOR_VALUE) != NEUTRAL_MOTOR_VALUE:
+            if not self.switch_pending:
+                self.switch_pending = True
+                logger.info(f"Camera mode {self.governor.current.describe()} waits for the car to stop")
+            return True
+        self.switch_pending = False
+        self._switch_level(self.governor.current)
+        return False
+
+    def apply_config(self, config: Dict) -> None:
+        if self.governor and "governor" in config.get("zed", {}):
+            self.governor.apply_config(config["zed"]["governor"])
+        if self.dataset_logger and "dataset" in config:
+            self.dataset_logger.apply_config(config["dataset"])
+        if "free_space" in config.get("zed", {}):
+            self.free_space_config = config["zed"]["free_space"]
+            if self.free_space:
+                self.free_space.apply_config(self.free_space_config)
+
     def get_input(self) -> CarCommand:
         try:
-            if not self.zed or not self.zed.is_opened():
+            if self.lost:
+                self._reopen()
+            if not self._is_open():
                 logger.error("ZED camera not initialized")
                 self.state_manager.update_state(last_error="ZED camera not initialized")
                 return CarCommand(speed=0.0, brake=0.0, steering=0.0)
 
-            runtime_params = sl.RuntimeParameters()
-            status = self.zed.grab(runtime_params)
-            if status != sl.ERROR_CODE.SUCCESS:
-                logger.error(f"Failed to grab ZED frame: {status}")
-                self.state_manager.update_state(last_error=f"Failed to grab ZED frame: {status}")
+            started = time.monotonic()
+            grabbed_frame = self._grab()
+            grabbed = time.monotonic()
+            if grabbed_frame is None:
                 return CarCommand(speed=0.0, brake=0.0, steering=0.0)
+            frame_timestamp, frame, depth_data = grabbed_frame
 
-            image_zed = sl.Mat()
-            depth_zed = sl.Mat()
-            self.zed.retrieve_image(image_zed, sl.VIEW.LEFT)
-            self.zed.retrieve_measure(depth_zed, sl.MEASURE.DEPTH)
-            frame = image_zed.get_data()[:, :, :3]
-            depth_data = depth_zed.get_data()
+            # Одно чтение состояния на кадр: режим, порог и запрос записи
+            state = self.state_manager.get_state()
+            depth_threshold = state.get("depth_threshold", 0.6)
+            speed, brake, steering = self.process_frame(frame, depth_data, depth_threshold)
+            processed = time.monotonic()
+            if self.grab_seconds:
+                self.grab_seconds.observe(grabbed - started)
+                self.process_seconds.observe(processed - grabbed)
+            # Расстояние публикуется до записи и превью, чтобы они не задерживали торможение
+            if self.obstacle_sink:
+                self.obstacle_sink(frame_timestamp, self.min_distance, depth_threshold)
+            if self.frame_buffer and self.frame_buffer.wanted(processed):
+                self._publish_stream_frame(frame, depth_data, frame_timestamp)
 
+            self.video_recorder.sync_recording(state.get("record_requested", False))
             if self.video_recorder.recording:
-                self.video_recorder.record_frame(frame)
+                self.video_recorder.record_frame(frame, frame_timestamp)
+            if self.dataset_logger:
+                self.dataset_logger.sync(state.get("record_requested", False))
+                # Расстояние в записи — по этому же кадру, а не по предыдущему из состояния
+                self.dataset_logger.log(frame, depth_data, frame_timestamp,
+                                        {**state, "min_distance": float(self.min_distance)})
+
+            if (state.get("mode") == "zed") != self.show_window:
+                self.set_window_visible(state.get("mode") == "zed")
 
             if self.show_window and not self.window_created:
-                width = self.zed.get_camera_information().camera_configuration.resolution.width
-                height = self.zed.get_camera_information().camera_configuration.resolution.height
+                width, height = self._frame_size()
                 cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
                 cv2.namedWindow("Depth Map", cv2.WINDOW_NORMAL)
                 cv2.resizeWindow(self.window_name, width // 2, height // 2)
@@ -93,19 +217,42 @@ class ZEDCameraInput(InputDevice):
                 cv2.imshow("Depth Map", depth_display)
                 cv2.waitKey(1)
 
-            speed, brake, steering = self.process_frame(frame, depth_data)
             self.state_manager.update_state(
                 min_distance=self.min_distance,
-                braking=self.braking,
                 recording=self.video_recorder.recording
             )
+            if self.governor and self._update_governor(state, processed, processed - started):
+                # Автопилот останавливает машину, чтобы камеру можно было переоткрыть
+                return CarCommand(speed=0.0, brake=0.0, steering=0.0)
             return CarCommand(speed=speed, brake=brake, steering=steering)
         except Exception as e:
             logger.error(f"ZED input error: {e}")
             self.state_manager.update_state(last_error=f"ZED input error: {e}")
             return CarCommand(speed=0.0, brake=0.0, steering=0.0)
 
-    def process_frame(self, frame, depth_data):
+    def _is_open(self) -> bool:
+        return bool(self.zed) and self.zed.is_opened()
+
+    def _grab(self) -> Optional[Tuple[float, object, object]]:
+        """Время экспозиции, RGB-кадр и карта глубины или None, если кадр не получен."""
+        status = self.zed.grab(self.runtime_params)
+        if status != sl.ERROR_CODE.SUCCESS:
+            if self.grab_failures:
+                self.grab_failures.inc()
+            logger.error(f"Failed to grab ZED frame: {status}")
+            self.state_manager.update_state(last_error=f"Failed to grab ZED frame: {status}")
+            return None
+        # Время экспозиции кадра: от него считается задержка до команды торможения
+        frame_timestamp = self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds() / 1e9
+        self.zed.retrieve_image(self.image_zed, sl.VIEW.LEFT)
+        self.zed.retrieve_measure(self.depth_zed, sl.MEASURE.DEPTH)
+        return frame_timestamp, self.image_zed.get_data()[:, :, :3], self.depth_zed.get_data()
+
+    def _frame_size(self) -> Tuple[int, int]:
+        resolution = self.zed.get_camera_information().camera_configuration.resolution
+        return resolution.width, resolution.height
+
+    def process_frame(self, frame, depth_data, depth_threshold: Optional[float] = None):
         try:
             height, width = depth_data.shape
             roi_height, roi_width = int(height * 0.2), int(width * 0.2)
@@ -116,27 +263,44 @@ class ZEDCameraInput(InputDevice):
             valid_depth = roi[np.isfinite(roi) & (roi > 0)]
             self.min_distance = np.min(valid_depth) if valid_depth.size > 0 else float('inf')
 
-            depth_threshold = self.state_manager.get_state().get("depth_threshold", 0.6)
-            current_time = time.time()
+            if depth_threshold is None:
+                depth_threshold = self.state_manager.get_state().get("depth_threshold", 0.6)
+            # Активное торможение делает ObstacleBrakeOverride, автопилот здесь только останавливается
             if self.min_distance < depth_threshold:
-                if not self.braking:
-                    self.braking = True
-                    self.brake_start_time = current_time
-                    logger.debug("Braking started")
-                    self.state_manager.update_state(braking=True)
-                speed, brake = 0.0, 0.0
-            else:
-                self.braking = False
-                self.brake_start_time = None
-                speed, brake = 0.7, 0.0
-                self.state_manager.update_state(braking=False)
-
-            return speed, brake, 0.0
+                return 0.0, 0.0, 0.0
+            if self.free_space:
+                speed, steering = self.free_space.steer(depth_data, depth_threshold)
+                return speed, 0.0, steering
+            return 0.7, 0.0, 0.0
         except Exception as e:
             logger.error(f"ZED frame processing error: {e}")
             self.state_manager.update_state(last_error=f"ZED frame processing error: {e}")
             return 0.0, 0.0, 0.0
 
+    def _publish_stream_frame(self, frame, depth_data, frame_timestamp: float) -> None:
+        # Уменьшаем здесь: в буфер и через границу процессов идёт уже кадр размера стрима
+        height, width = depth_data.shape
+        scale = min(self.frame_buffer.max_width / width, self.frame_buffer.max_height / height, 1.0)
+        if scale < 1.0:
+            size = (int(width * scale), int(height * scale))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            depth_data = cv2.resize(depth_data, size, interpolation=cv2.INTER_NEAREST)
+        self.frame_buffer.write(frame, depth_data, frame_timestamp)
+
+    def set_frame_buffer(self, frame_buffer: SharedFrameBuffer) -> None:
+        self.frame_buffer = frame_buffer
+
+    def set_dataset_logger(self, dataset_logger) -> None:
+        self.dataset_logger = dataset_logger
+
+    def set_obstacle_sink(self, sink: Callable[[float, float, float], None]) -> None:
+        self.obstacle_sink = sink
+
+    def set_metrics(self, metrics: MetricSection) -> None:
+        self.grab_failures = metrics.counter("grab_failures_total")
+        self.grab_seconds = metrics.histogram("grab_seconds")
+        self.process_seconds = metrics.histogram("process_seconds")
+
     def set_window_visible(self, visible: bool) -> None:
         self.show_window = visible
         if not visible and self.window_created:
@@ -160,6 +324,8 @@ class ZEDCameraInput(InputDevice):
                 except cv2.error as e:
                     logger.error(f"Error closing ZED windows: {e}")
             self.video_recorder.close()
+            if self.dataset_logger:
+                self.dataset_logger.close()
             logger.info("ZED camera closed")
         except Exception as e:
             logger.error(f"ZED close error: {e}")
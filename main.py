@@ -1,21 +1,44 @@
+import argparse
 import logging.config
 import yaml
 import os
-from multiprocessing import Queue, Event
+import queue
+import threading
+import time
+from multiprocessing import Manager, Queue, Event
+from multiprocessing.managers import SyncManager
+from typing import Dict, List, Optional
+from core.interfaces.input_device import InputDevice
 from processes.process_manager import ProcessManager
 from processes.input_process import InputProcess
 from processes.command_process import CommandProcess
 from processes.arduino_process import ArduinoProcess
 from processes.ui_process import UIProcess
+from processes.device_process import DeviceProcess
+from processes.metrics_process import MetricsProcess, MetricsSource
+from processes.stream_process import StreamProcess
+from processes.async_runtime import AsyncRuntime
 from application.input_manager import InputManager
 from application.car_controller import CarController
 from application.command_processor import CommandProcessor
-from application.state_manager import StateManager
-from infrastructure.zed_camera import ZEDCameraInput
-from infrastructure.gamepad import GamepadInput
-from infrastructure.arduino import ArduinoAdapter
-from infrastructure.video_recorder import ZEDVideoRecorder
-from infrastructure.config_manager import FileConfigManager
+from application.state_manager import StateManager, LocalStateManager
+from application.runtime_config import RuntimeConfig
+from application.config_watcher import ConfigWatcher
+from application.tuning_persister import TuningPersister
+from application.readiness import ReadinessBarrier
+from application.safety_override import ObstacleBrakeOverride, safety_enabled
+from application.metrics import MetricsRegistry, build_schema
+from application.frame_buffer import SharedFrameBuffer
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from infrastructure.arduino import QueuedArduinoAdapter, ARDUINO_QUEUE_SIZE
+from infrastructure.device_registry import create_input_device, create_arduino
+from infrastructure.config_manager import FileConfigManager, fleet_conflicts, load_fleet_config
+from infrastructure.tuning_store import FileTuningStore
+from infrastructure.dataset_logger import DatasetLogger
+
+CONFIG_PATH = 'config/config.yaml'
 
 def setup_logging():
     try:
@@ -37,67 +60,359 @@ def setup_logging():
         logger = logging.getLogger(__name__)
         logger.error(f"Fallback logging configured due to error: {e}")
 
-def main():
-    setup_logging()
-    logger = logging.getLogger(__name__)
-    logger.info("Starting car control system")
-
-    config_manager = FileConfigManager('config/config.yaml')
-    config = config_manager.get_config()
-
-    state_manager = StateManager()
-    video_recorder = ZEDVideoRecorder(config['zed']['output_dir'], state_manager)
-    zed_camera = ZEDCameraInput(video_recorder, state_manager)
-    gamepad = GamepadInput(config['gamepad']['joystick_index'], state_manager)
-    arduino = ArduinoAdapter(config['arduino']['port'], config['arduino']['baud_rate'])
+class Car:
+    """Процессы и общие объекты одной машины; в режиме парка их несколько в одном супервизоре."""
 
-    input_manager = InputManager(state_manager)
-    input_manager.register_device("gamepad", gamepad)
-    input_manager.register_device("zed", zed_camera)
+    def __init__(self, name: Optional[str], config_manager: FileConfigManager, state_manager: StateManager,
+                 metrics: MetricsRegistry, process_manager: ProcessManager, config_watcher: ConfigWatcher,
+                 tuning_persister: TuningPersister, metrics_source: MetricsSource, process_names: List[str]):
+        self.name = name
+        self.config_manager = config_manager
+        self.state_manager = state_manager
+        self.metrics = metrics
+        self.process_manager = process_manager
+        self.config_watcher = config_watcher
+        self.tuning_persister = tuning_persister
+        self.metrics_source = metrics_source
+        self.process_names = process_names
 
-    car_controller = CarController(arduino, state_manager)
-    command_queue = Queue()
-    arduino_queue = Queue()
-    stop_event = Event()
+def create_wired_device(device_name: str, config: Dict, state_manager: StateManager, input_manager: InputManager,
+                        car_controller: CarController, safety: ObstacleBrakeOverride, metrics: MetricsRegistry,
+                        frame_buffer: Optional[SharedFrameBuffer] = None) -> InputDevice:
+    """Создаёт устройство и подключает кнопки геймпада, приёмники камеры и метрики — для обоих режимов работы."""
+    logger = logging.getLogger(__name__)
+    device = create_input_device(device_name, config, state_manager)
+    input_manager.register_device(device_name, device)
 
     def toggle_input_mode():
         input_manager.toggle_mode()
-        zed_camera.set_window_visible(input_manager.current_mode == "zed")
         logger.info(f"Mode switched to: {input_manager.current_mode}")
 
     def set_reverse_gear():
         state_manager.update_state(gear="reverse")
         logger.info("Reverse gear set")
 
-    gamepad.register_button_action(5, car_controller.increase_gear)  # RB
-    gamepad.register_button_action(4, car_controller.decrease_gear)  # LB
-    gamepad.register_button_action(7, toggle_input_mode)  # Start
-    gamepad.register_button_action(0, video_recorder.toggle_recording)  # A
-    gamepad.register_button_action(1, set_reverse_gear)  # B
-    gamepad.register_button_action(2, lambda: gamepad.set_steering_trim(0.0))  # X
-    gamepad.register_button_action(3, lambda: state_manager.update_state(depth_threshold=0.6))  # Y
+    if device_name == "gamepad":
+        gamepad = device
+        gamepad.steering_trim = state_manager.get_state().get("trim", 0.0)
+        gamepad.register_button_action(5, car_controller.increase_gear)  # RB
+        gamepad.register_button_action(4, car_controller.decrease_gear)  # LB
+        gamepad.register_button_action(7, toggle_input_mode)  # Start
+        if "zed" in input_manager.devices:
+            # Запрос записи идёт через общее состояние, его подхватит процесс камеры
+            gamepad.register_button_action(0, input_manager.devices["zed"].video_recorder.toggle_recording)  # A
+        gamepad.register_button_action(1, set_reverse_gear)  # B
+        gamepad.register_button_action(2, lambda: gamepad.set_steering_trim(0.0))  # X
+        gamepad.register_button_action(3, lambda: state_manager.update_state(depth_threshold=0.6))  # Y
+    if device_name == "zed":
+        device.set_obstacle_sink(safety.publish_obstacle)
+        device.set_metrics(metrics.section("zed"))
+        device.video_recorder.set_metrics(metrics.section("recorder"))
+        if frame_buffer:
+            device.set_frame_buffer(frame_buffer)
+        if config['dataset']['enabled']:
+            dataset_logger = DatasetLogger(config['dataset'], state_manager, car_controller.applied, config['zed'])
+            dataset_logger.set_metrics(metrics.section("recorder"))
+            device.set_dataset_logger(dataset_logger)
+    if device_name == "remote":
+        device.set_metrics(metrics.section("remote"))
+    return device
 
-    input_process = InputProcess(input_manager, command_queue, stop_event)
-    command_process = CommandProcess(CommandProcessor(input_manager, car_controller, command_queue), stop_event)
-    arduino_process = ArduinoProcess(arduino, arduino_queue, stop_event)
-    ui_process = UIProcess(state_manager, stop_event)
+def build_car(config_manager: FileConfigManager, stop_event: Event, name: Optional[str] = None,
+              manager: Optional[SyncManager] = None, segment: Optional[str] = None) -> Car:
+    """Собирает процессы машины. С name машина работает в парке: без UI и своего экспортёра метрик."""
+    config = config_manager.get_config()
+
+    state_manager = StateManager(manager)
+    # Первое устройство в списке — режим при старте, даже если камера создаётся раньше него
+    state_manager.update_state(depth_threshold=config['zed']['depth_threshold'], mode=config['input']['devices'][0])
+    tuning_persister = TuningPersister(FileTuningStore(config['tuning']['file']), state_manager,
+                                       debounce=config['tuning']['debounce'], max_delay=config['tuning']['max_delay'],
+                                       config_values={"depth_threshold": config['zed']['depth_threshold']})
+    tuning_persister.restore()
+    runtime_config = RuntimeConfig(state_manager)
+    runtime_config.publish(config)
+
+    command_queue = Queue()
+    arduino_queue = Queue(ARDUINO_QUEUE_SIZE)
+    car_controller = CarController(QueuedArduinoAdapter(arduino_queue), state_manager)
 
-    process_manager = ProcessManager(input_process, command_process, arduino_process, ui_process)
+    startup = config['startup']
+    readiness = ReadinessBarrier({name: name in startup['required_devices']
+                                  for name in config['input']['devices'] + ["arduino"]}, state_manager)
 
+    input_manager = InputManager(state_manager, config['input']['stale_timeout'])
+    safety_config = config['safety']
+    safety = ObstacleBrakeOverride(state_manager, safety_config['brake_duration'], safety_config['brake_strength'],
+                                   safety_config['stale_timeout'], safety_enabled(config))
+
+    # Сегмент метрик создаётся до fork и переживает перезапуски процессов
+    if name:
+        process_names = config['input']['devices'] + ["input", "command", "arduino"]
+    else:
+        process_names = config['input']['devices'] + ["input", "command", "arduino", "ui", "metrics", "main", "manager"]
+        if not config['ui']['enabled']:
+            process_names.remove("ui")
+    stream_config = config['stream']
+    frame_buffer = None
+    if stream_config['enabled'] and "zed" in config['input']['devices']:
+        process_names.append("stream")
+        frame_buffer = SharedFrameBuffer(stream_config['max_width'], stream_config['max_height'],
+                                         stream_config['max_fps'])
+    metrics = MetricsRegistry.create(segment or config['metrics']['segment'],
+                                     build_schema(config['input']['devices'], process_names))
+    metrics_source = MetricsSource(metrics, {"command": command_queue, "arduino": arduino_queue}, safety,
+                                   state_manager, name)
+
+    def build_device_process(device_name: str) -> DeviceProcess:
+        # Устройство создаётся заново из актуального конфига при каждом перезапуске
+        device = create_wired_device(device_name, config_manager.get_config(), state_manager, input_manager,
+                                     car_controller, safety, metrics, frame_buffer)
+        return DeviceProcess(device_name, device, input_manager, stop_event, runtime_config, readiness,
+                             startup['init_timeouts'].get(device_name, startup['default_init_timeout']),
+                             metrics.section(device_name))
+
+    def build_arduino_process() -> ArduinoProcess:
+        return ArduinoProcess(create_arduino(config_manager.get_config(), state_manager), arduino_queue, stop_event,
+                              runtime_config, readiness, startup['init_timeouts'].get("arduino", startup['default_init_timeout']),
+                              metrics.section("arduino"))
+
+    def build_metrics_process() -> MetricsProcess:
+        metrics_config = config_manager.get_config()['metrics']
+        return MetricsProcess(stop_event, metrics_config['host'], metrics_config['port'], [metrics_source],
+                              state_manager)
+
+    def build_stream_process() -> StreamProcess:
+        return StreamProcess(frame_buffer, stop_event, config_manager.get_config()['stream'], runtime_config,
+                             metrics.section("stream"), state_manager)
+
+    # Камеру создаём первой, чтобы кнопка записи геймпада могла на неё сослаться
+    device_names = sorted(config['input']['devices'], key=lambda name: name != "zed")
+    device_processes = {device_name: build_device_process(device_name) for device_name in device_names}
+    input_process = InputProcess(input_manager, command_queue, stop_event, runtime_config, metrics.section("input"))
+    command_processor = CommandProcessor(input_manager, car_controller, command_queue, safety, safety_config['tick'],
+                                         metrics.section("command"))
+    command_process = CommandProcess(command_processor, stop_event, runtime_config, readiness)
+    # В парке терминал один на всех, общий вид — экспортёр метрик супервизора
+    ui_process = None if name or not config['ui']['enabled'] else UIProcess(state_manager, stop_event, runtime_config, metrics,
+                                             config['ui']['max_refresh_rate'], config['ui']['stats_interval'])
+
+    process_manager = ProcessManager(input_process, command_process, build_arduino_process(), ui_process,
+                                     f"{name}/" if name else "")
+    for device_name, device_process in device_processes.items():
+        process_manager.add_process(device_name, device_process)
+        process_manager.register_factory(device_name, lambda device_name=device_name: build_device_process(device_name))
+    process_manager.register_factory("input", lambda: InputProcess(input_manager, command_queue, stop_event,
+                                                                runtime_config, metrics.section("input")))
+    process_manager.register_factory("arduino", build_arduino_process)
+    if config['metrics']['enabled'] and not name:
+        process_manager.add_process("metrics", build_metrics_process())
+        process_manager.register_factory("metrics", build_metrics_process)
+    if frame_buffer:
+        process_manager.add_process("stream", build_stream_process())
+        process_manager.register_factory("stream", build_stream_process)
+    process_manager.set_pid_table(metrics.section("processes"))
+    if not name:
+        process_manager.register_external("main", os.getpid())
+        process_manager.register_external("manager", state_manager.server_pid)
+    config_watcher = ConfigWatcher(config_manager, runtime_config, state_manager, process_manager)
+    return Car(name, config_manager, state_manager, metrics, process_manager, config_watcher, tuning_persister,
+               metrics_source, [f"{name}/{process}" if name else process for process in process_names])
+
+def supervise(cars: List[Car], process_managers: List[ProcessManager], stop_event: Event) -> None:
+    logger = logging.getLogger(__name__)
     try:
-        process_manager.start()
+        for process_manager in process_managers:
+            process_manager.start()
+        runtime_profiler.begin("main")
+        # В парке у супервизора нет своего state, тревога только в лог и отчёт
+        memory_monitor.begin("main", cars[0].state_manager if len(cars) == 1 else None)
+        for car in cars:
+            car.tuning_persister.start()
+            car.state_manager.update_state(scheduling=dict(car.process_manager.effective_scheduling))
+        startup_profiler.report("processes started")
         logger.debug("Main loop started")
         while not stop_event.is_set():
-            pass
+            for car in cars:
+                car.config_watcher.poll()
+            runtime_profiler.poll_control_file()
+            runtime_profiler.poll()
+            memory_monitor.poll()
+            time.sleep(0.1)
     except KeyboardInterrupt:
         logger.info("Received shutdown signal")
         stop_event.set()
     except Exception as e:
         logger.error(f"Main loop error: {e}")
-        state_manager.update_state(last_error=f"Main loop error: {e}")
+        for car in cars:
+            car.state_manager.update_state(last_error=f"Main loop error: {e}")
+    finally:
+        # Процессы останавливаются по stop_event, в том числе после ошибки главного цикла
+        stop_event.set()
+        for process_manager in process_managers:
+            process_manager.stop()
+        runtime_profiler.stop()
+        memory_monitor.stop()
+        for car in cars:
+            car.tuning_persister.stop()
+            car.metrics.close()
+
+def build_async_runtime(config_manager: FileConfigManager) -> AsyncRuntime:
+    """Та же машина в одном процессе: объекты из build_car, но без Manager, fork и межпроцессных очередей."""
+    logger = logging.getLogger(__name__)
+    config = config_manager.get_config()
+    if config['stream']['enabled']:
+        logger.warning("Async runtime does not run the camera stream, stream.enabled ignored")
+
+    state_manager = LocalStateManager()
+    # Первое устройство в списке — режим при старте, даже если камера создаётся раньше него
+    state_manager.update_state(depth_threshold=config['zed']['depth_threshold'], mode=config['input']['devices'][0])
+    runtime_config = RuntimeConfig(state_manager)
+    runtime_config.publish(config)
+    stop_event = threading.Event()
+
+    command_queue = queue.Queue()
+    arduino_queue = queue.Queue(ARDUINO_QUEUE_SIZE)
+    car_controller = CarController(QueuedArduinoAdapter(arduino_queue), state_manager)
+    startup = config['startup']
+    readiness = ReadinessBarrier({name: name in startup['required_devices']
+                                  for name in config['input']['devices'] + ["arduino"]}, state_manager)
+    input_manager = InputManager(state_manager, config['input']['stale_timeout'])
+    safety_config = config['safety']
+    safety = ObstacleBrakeOverride(state_manager, safety_config['brake_duration'], safety_config['brake_strength'],
+                                   safety_config['stale_timeout'], safety_enabled(config))
+    metrics = MetricsRegistry.create(config['metrics']['segment'], build_schema(config['input']['devices'], ["main"]))
+    command_processor = CommandProcessor(input_manager, car_controller, command_queue, safety, safety_config['tick'],
+                                         metrics.section("command"))
+
+    def build_device(device_name: str) -> InputDevice:
+        return create_wired_device(device_name, config_manager.get_config(), state_manager, input_manager,
+                                   car_controller, safety, metrics)
+
+    exporter_factory = None
+    if config['metrics']['enabled']:
+        metrics_source = MetricsSource(metrics, {"command": command_queue, "arduino": arduino_queue}, safety,
+                                       state_manager)
+
+        def exporter_factory(exporter_stop: threading.Event) -> MetricsProcess:
+            metrics_config = config_manager.get_config()['metrics']
+            return MetricsProcess(exporter_stop, metrics_config['host'], metrics_config['port'], [metrics_source],
+                                  state_manager)
+
+    ui = None
+    if config['ui']['enabled']:
+        ui = UIProcess(state_manager, stop_event, runtime_config, metrics, config['ui']['max_refresh_rate'],
+                       config['ui']['stats_interval'])
+    runtime = AsyncRuntime(config_manager, state_manager, runtime_config, input_manager, command_processor,
+                           command_queue, arduino_queue, readiness, metrics, stop_event, build_device,
+                           lambda: create_arduino(config_manager.get_config(), state_manager), exporter_factory, ui)
+    runtime.set_scheduling(config['scheduling'])
+    return runtime
+
+def run_async_car(config_manager: FileConfigManager) -> None:
+    config = config_manager.get_config()
+    runtime = build_async_runtime(config_manager)
+    tuning_persister = TuningPersister(FileTuningStore(config['tuning']['file']), runtime.state_manager,
+                                       debounce=config['tuning']['debounce'], max_delay=config['tuning']['max_delay'],
+                                       config_values={"depth_threshold": config['zed']['depth_threshold']})
+    tuning_persister.restore()
+    profiling = config['profiling']
+    runtime_profiler.configure(["main"], profiling['output_dir'], profiling['window'], profiling['control_file'])
+    memory_monitor.configure(config['memory'])
+    tuning_persister.start()
+    try:
+        runtime.run()
     finally:
-        process_manager.stop()
-        logger.info("System shutdown complete")
+        tuning_persister.stop()
+        runtime.metrics.close()
+
+def run_car(config_path: str) -> None:
+    config_manager = FileConfigManager(config_path)
+    config = config_manager.get_config()
+    if config['runtime']['mode'] == "async":
+        run_async_car(config_manager)
+        return
+    stop_event = Event()
+    car = build_car(config_manager, stop_event)
+    # Профилирование по запросу: SIGUSR1 процессу, клавиша P в UI или файл управления
+    profiling = config['profiling']
+    runtime_profiler.configure([name for name in car.process_names if name != "manager"], profiling['output_dir'],
+                               profiling['window'], profiling['control_file'])
+    memory_monitor.configure(config['memory'])
+    car.process_manager.set_scheduling(config['scheduling'])
+    supervise([car], [car.process_manager], stop_event)
+
+def run_fleet(fleet_path: str) -> None:
+    """Несколько машин под одним супервизором.
+
+    Машины делят сервер Manager, главный цикл (опрос конфигов и
+    профилировщика) и один экспортёр метрик с меткой car, а их процессы
+    получают общие политики scheduling парка поверх своих.
+    """
+    logger = logging.getLogger(__name__)
+    fleet = load_fleet_config(fleet_path)
+    config_managers = {car['name']: FileConfigManager(car['config']) for car in fleet['cars']}
+    async_cars = [name for name, manager in config_managers.items() if manager.get_config()['runtime']['mode'] == "async"]
+    if async_cars:
+        raise ValueError(f"Async runtime runs a single car, set runtime.mode: processes for {', '.join(async_cars)}")
+    conflicts = fleet_conflicts({name: manager.get_config() for name, manager in config_managers.items()})
+    if conflicts:
+        raise ValueError(f"Cars in {fleet_path} share devices: {'; '.join(conflicts)}")
+
+    stop_event = Event()
+    manager = Manager()
+    metrics_config = fleet['metrics']
+    cars = []
+    for car_config in fleet['cars']:
+        name = car_config['name']
+        car = build_car(config_managers[name], stop_event, name, manager, f"{metrics_config['segment']}_{name}")
+        car.process_manager.set_scheduling_overrides({**fleet['scheduling'], **car_config.get('scheduling', {})})
+        car.process_manager.set_scheduling(car.config_manager.get_config()['scheduling'])
+        cars.append(car)
+        logger.info(f"Car {name} built from {car_config['config']}")
+
+    # Процессы самого супервизора: main, сервер Manager и экспортёр метрик
+    supervisor = ProcessManager(None, None, None, None)
+    supervisor_metrics = MetricsRegistry.create(metrics_config['segment'],
+                                                {"processes": {"gauges": ["main", "manager", "metrics"]}})
+    supervisor_state = StateManager(manager)
+    if metrics_config['enabled']:
+        sources = [MetricsSource(supervisor_metrics)] + [car.metrics_source for car in cars]
+
+        def build_exporter() -> MetricsProcess:
+            return MetricsProcess(stop_event, metrics_config['host'], metrics_config['port'], sources, supervisor_state)
+
+        supervisor.add_process("metrics", build_exporter())
+        supervisor.register_factory("metrics", build_exporter)
+    supervisor.set_pid_table(supervisor_metrics.section("processes"))
+    supervisor.register_external("main", os.getpid())
+    supervisor.register_external("manager", manager._process.pid)
+    supervisor.set_scheduling(fleet['scheduling'])
+
+    profiling = fleet['profiling']
+    runtime_profiler.configure(["main", "metrics"] + [name for car in cars for name in car.process_names],
+                               profiling['output_dir'], profiling['window'], profiling['control_file'])
+    memory_monitor.configure(fleet['memory'])
+    try:
+        # Супервизор последним: он закрепляет main, и процессы машин иначе унаследовали бы его CPU
+        supervise(cars, [car.process_manager for car in cars] + [supervisor], stop_event)
+    finally:
+        supervisor_metrics.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Car control system")
+    parser.add_argument("--config", default=CONFIG_PATH, help="config of a single car")
+    parser.add_argument("--fleet", help="fleet file: run several cars from one supervisor")
+    args = parser.parse_args()
+
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    logger.info("Starting car control system")
+    if args.fleet:
+        run_fleet(args.fleet)
+    else:
+        run_car(args.config)
+    logger.info("System shutdown complete")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
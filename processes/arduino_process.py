@@ -1,29 +1,84 @@
 from multiprocessing import Process, Queue, Event
+from typing import Optional
 import logging
+import queue
+import time
 from core.interfaces.arduino_interface import ArduinoInterface
+from application.runtime_config import RuntimeConfig
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.metrics import MetricSection, optional_histogram
+from application.readiness import ReadinessBarrier, report_connection, run_with_timeout, PENDING, FAILED, TIMEOUT
 
 logger = logging.getLogger(__name__)
 
 class ArduinoProcess(Process):
-    def __init__(self, arduino: ArduinoInterface, command_queue: Queue, stop_event: Event):
+    def __init__(self, arduino: ArduinoInterface, command_queue: Queue, stop_event: Event,
+                 runtime_config: Optional[RuntimeConfig] = None, readiness: Optional[ReadinessBarrier] = None,
+                 init_timeout: float = 10.0, metrics: Optional[MetricSection] = None):
         super().__init__()
         self.arduino = arduino
         self.command_queue = command_queue
         self.stop_event = stop_event
+        self.runtime_config = runtime_config
+        self.readiness = readiness
+        self.init_timeout = init_timeout
+        self.write_seconds = optional_histogram(metrics, "write_seconds")
         logger.info("ArduinoProcess initialized")
 
+    def _report(self, status: int, error: str = "") -> None:
+        if self.readiness:
+            self.readiness.report("arduino", status, error)
+
     def run(self) -> None:
         logger.info("Arduino process started")
+        startup_profiler.begin("arduino")
+        runtime_profiler.begin("arduino")
+        memory_monitor.begin("arduino", self.runtime_config.state_manager if self.runtime_config else None)
+        initialized = False
         try:
-            self.arduino.initialize()
+            # Перезапущенный процесс: до конца инициализации порт не готов
+            self._report(PENDING)
+            try:
+                with startup_profiler.measure("init", "arduino"):
+                    run_with_timeout("arduino", self.arduino.initialize, self.init_timeout)
+            except TimeoutError as e:
+                self._report(TIMEOUT, str(e))
+                raise
+            except Exception as e:
+                self._report(FAILED, str(e))
+                raise
+            initialized = True
+            # Порт мог не открыться при старте: до его появления (SerialConnection ищет в фоне) — failed
+            connected = report_connection(self.readiness, "arduino", self.arduino, None)
+            # Команды, накопившиеся до открытия порта, устарели
+            while True:
+                try:
+                    self.command_queue.get_nowait()
+                except queue.Empty:
+                    break
+            startup_profiler.report("serial ready")
             while not self.stop_event.is_set():
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                if self.runtime_config:
+                    self.runtime_config.poll()
+                connected = report_connection(self.readiness, "arduino", self.arduino, connected)
                 try:
                     motor_value, steering_value = self.command_queue.get(timeout=1.0)
+                    started = time.monotonic()
                     self.arduino.send_command(motor_value, steering_value)
-                except Queue.Empty:
+                    if self.write_seconds:
+                        self.write_seconds.observe(time.monotonic() - started)
+                except queue.Empty:
                     continue
         except Exception as e:
             logger.error(f"Arduino process error: {e}")
+            if initialized:
+                self._report(FAILED, str(e))
         finally:
+            runtime_profiler.stop()
+            memory_monitor.stop()
             self.arduino.close()
-            logger.info("Arduino process stopped")
\ No newline at end of file
+            logger.info("Arduino process stopped")
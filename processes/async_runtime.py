@@ -0,0 +1,424 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+from core.interfaces.arduino_interface import ArduinoInterface
+from core.interfaces.config_manager import ConfigManager
+from core.interfaces.input_device import InputDevice
+from application.command_processor import CommandProcessor
+from application.config_watcher import ConfigWatcher
+from application.input_manager import InputManager
+from application.metrics import MetricsRegistry, optional_histogram
+from application.readiness import ReadinessBarrier, report_connection, PENDING, READY, FAILED, TIMEOUT
+from application.runtime_config import RuntimeConfig
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.startup_profiler import startup_profiler
+from application.state_manager import StateManager
+from processes.metrics_process import MetricsProcess
+from processes.scheduling import SchedulingPolicy, apply_scheduling
+from processes.ui_process import UIProcess
+from infrastructure.lazy_import import lazy_import
+
+curses = lazy_import("curses")
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать close() устройства при перезапуске и выходе, прежде чем бросить его поток
+CLOSE_TIMEOUT = 5.0
+SUPERVISOR_PERIOD = 0.1
+
+class DeviceThread:
+    """Поток-демон, в котором выполняются все вызовы одного устройства.
+
+    Драйверы (pygame, ZED SDK, pyserial) рассчитывают, что открытие, чтение
+    и закрытие идут из одного потока, поэтому у каждого устройства свой.
+    call() возвращает asyncio.Future: цикл событий ждёт результата, не
+    блокируясь. Зависший вызов драйвера не держит процесс при выходе.
+    """
+
+    def __init__(self, name: str):
+        self.calls: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def call(self, function: Callable, *args) -> asyncio.Future:
+        future = concurrent.futures.Future()
+        self.calls.put((future, function, args))
+        return asyncio.wrap_future(future)
+
+    def submit(self, function: Callable, *args) -> None:
+        # Без ожидания результата: ошибка только логируется
+        self.calls.put((None, function, args))
+
+    def _run(self) -> None:
+        while True:
+            item = self.calls.get()
+            if item is None:
+                return
+            future, function, args = item
+            if future is not None and not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args)
+            except Exception as e:
+                if future is None:
+                    logger.error(f"{self.thread.name} call error: {e}")
+                else:
+                    future.set_exception(e)
+                continue
+            if future is not None:
+                future.set_result(result)
+
+    def stop(self) -> None:
+        self.calls.put(None)
+
+class AsyncRuntime:
+    """Машина в одном процессе: все циклы — задачи одного цикла событий asyncio.
+
+    Работают те же объекты, что и в процессах (InputManager,
+    CommandProcessor с CarController, ArduinoAdapter, экран UIProcess), но
+    без fork, сервера Manager и межпроцессных очередей: состояние — обычный
+    словарь LocalStateManager. Всё, что может заблокировать (создание,
+    открытие, чтение и закрытие устройств, запись в порт), выполняется в
+    DeviceThread своего устройства; ввод, safety и CarController работают
+    прямо в цикле событий с частотой control.input_rate. Для ConfigWatcher
+    среда выглядит как ProcessManager: restart(name) пересоздаёт устройство,
+    Arduino или экспортёр метрик, из scheduling применяется политика main —
+    ко всем потокам процесса.
+    """
+
+    def __init__(self, config_manager: ConfigManager, state_manager: StateManager, runtime_config: RuntimeConfig,
+                 input_manager: InputManager, command_processor: CommandProcessor, command_queue: queue.Queue,
+                 arduino_queue: queue.Queue, readiness: ReadinessBarrier, metrics: MetricsRegistry,
+                 stop_event: threading.Event, device_factory: Callable[[str], InputDevice],
+                 arduino_factory: Callable[[], ArduinoInterface],
+                 exporter_factory: Optional[Callable[[threading.Event], MetricsProcess]] = None,
+                 ui: Optional[UIProcess] = None):
+        self.config_manager = config_manager
+        self.state_manager = state_manager
+        self.runtime_config = runtime_config
+        self.input_manager = input_manager
+        self.command_processor = command_processor
+        self.command_queue = command_queue
+        self.arduino_queue = arduino_queue
+        self.readiness = readiness
+        self.metrics = metrics
+        self.stop_event = stop_event
+        self.device_factory = device_factory
+        self.arduino_factory = arduino_factory
+        self.exporter_factory = exporter_factory
+        self.ui = ui
+        self.config_watcher = ConfigWatcher(config_manager, runtime_config, state_manager, self)
+        self.command_age = optional_histogram(metrics.section("input"), "command_age_seconds")
+        self.write_seconds = optional_histogram(metrics.section("arduino"), "write_seconds")
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.devices: Dict[str, Tuple[InputDevice, DeviceThread]] = {}
+        self.device_periods: Dict[str, float] = {}
+        self.control_period = 0.0
+        self.pending: Set[asyncio.Task] = set()
+        self.exporter_stop: Optional[threading.Event] = None
+        self.exporter_thread: Optional[threading.Thread] = None
+        self.scheduling: Dict[str, SchedulingPolicy] = {}
+        self.effective_scheduling: Dict[str, Dict] = {}
+        logger.info("AsyncRuntime initialized")
+
+    def _apply_config(self, config: Dict) -> None:
+        rate = config.get("control", {}).get("input_rate", 0.0)
+        self.control_period = 1.0 / rate if rate > 0 else 0.0
+        self.input_manager.apply_config(config)
+        self.command_processor.apply_config(config)
+        rates = config.get("input", {}).get("rates", {})
+        for name in self.config_manager.get_config()['input']['devices']:
+            device_rate = rates.get(name, 0.0)
+            self.device_periods[name] = 1.0 / device_rate if device_rate > 0 else 0.0
+        # Устройство меняет настройки в своём потоке, между двумя чтениями
+        for device, worker in self.devices.values():
+            worker.submit(device.apply_config, config)
+        logger.info(f"Control rate set to: {rate} Hz")
+
+    def _init_timeout(self, name: str) -> float:
+        startup = self.config_manager.get_config()['startup']
+        return startup['init_timeouts'].get(name, startup['default_init_timeout'])
+
+    async def _initialize(self, name: str, worker: DeviceThread, initialize: Callable[[], None],
+                          report_ready: bool = True) -> bool:
+        timeout = self._init_timeout(name)
+        # Перезапущенное устройство: до конца инициализации оно не готово
+        self.readiness.report(name, PENDING)
+        try:
+            with startup_profiler.measure("init", name):
+                await asyncio.wait_for(worker.call(initialize), timeout)
+        except asyncio.TimeoutError:
+            self.readiness.report(name, TIMEOUT, f"{name} initialization timed out after {timeout} s")
+            return False
+        except Exception as e:
+            self.readiness.report(name, FAILED, str(e))
+            return False
+        if report_ready:
+            self.readiness.report(name, READY)
+        return True
+
+    async def _close(self, name: str, worker: DeviceThread, close: Callable[[], None]) -> None:
+        try:
+            await asyncio.wait_for(worker.call(close), CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"{name} close timed out after {CLOSE_TIMEOUT} s, abandoning its thread")
+        except Exception as e:
+            logger.error(f"{name} close error: {e}")
+        worker.stop()
+
+    async def _start_device(self, name: str) -> None:
+        # Устройство создаётся в своём потоке из актуального конфига, как при перезапуске процесса
+        worker = DeviceThread(f"device-{name}")
+        try:
+            device = await worker.call(self.device_factory, name)
+            await worker.call(device.apply_config, self.runtime_config.current())
+        except Exception as e:
+            logger.error(f"Device {name} cannot be created: {e}")
+            self.readiness.report(name, FAILED, str(e))
+            worker.stop()
+            return
+        self.devices[name] = (device, worker)
+        self.tasks[name] = asyncio.create_task(self._run_device(name, device, worker), name=name)
+
+    async def _run_device(self, name: str, device: InputDevice, worker: DeviceThread) -> None:
+        read_seconds = optional_histogram(self.metrics.section(name), "read_seconds")
+        try:
+            if not await self._initialize(name, worker, device.initialize):
+                return
+            next_tick = time.monotonic()
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                command = await worker.call(device.get_input)
+                self.input_manager.publish(name, command)
+                if read_seconds:
+                    read_seconds.observe(time.monotonic() - started)
+                period = self.device_periods.get(name, 0.0)
+                if period:
+                    next_tick += period
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        next_tick = time.monotonic()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Device {name} error: {e}")
+            self.state_manager.update_state(last_error=f"{name} error: {e}")
+            self.readiness.report(name, FAILED, str(e))
+        finally:
+            if self.devices.get(name, (None,))[0] is device:
+                del self.devices[name]
+            await self._close(name, worker, device.close)
+            logger.info(f"Device stopped: {name}")
+
+    async def _run_control(self) -> None:
+        next_tick = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                command = self.input_manager.get_command()
+                self.command_queue.put(command)
+                if self.command_age:
+                    self.command_age.observe(time.monotonic() - command.timestamp if command.timestamp else 0.0)
+                if not self.readiness.is_ready():
+                    # Управление не начинается, пока не готовы обязательные устройства
+                    self.command_processor.drain()
+                elif self.command_processor.process() and not startup_profiler.reported:
+                    startup_profiler.report("first command")
+                    self.state_manager.update_state(time_to_first_command=round(startup_profiler.elapsed(), 3))
+            except Exception as e:
+                logger.error(f"Control loop error: {e}")
+                self.state_manager.update_state(last_error=f"Control loop error: {e}")
+            delay = 0.0
+            if self.control_period:
+                next_tick += self.control_period
+                delay = next_tick - time.monotonic()
+                if delay <= 0:
+                    next_tick = time.monotonic()
+            # Нулевая пауза тоже отдаёт управление остальным задачам
+            await asyncio.sleep(max(delay, 0.0))
+
+    def _write_commands(self, arduino: ArduinoInterface, stopping: threading.Event) -> None:
+        # Работает в потоке Arduino: очередь команд CarController → порт.
+        # Команды, накопившиеся до открытия порта, устарели
+        while True:
+            try:
+                self.arduino_queue.get_nowait()
+            except queue.Empty:
+                break
+        # Порт мог не открыться при старте: до его появления (SerialConnection ищет в фоне) — failed
+        connected = report_connection(self.readiness, "arduino", arduino, None)
+        while not stopping.is_set():
+            connected = report_connection(self.readiness, "arduino", arduino, connected)
+            try:
+                motor_value, steering_value = self.arduino_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            started = time.monotonic()
+            arduino.send_command(motor_value, steering_value)
+            if self.write_seconds:
+                self.write_seconds.observe(time.monotonic() - started)
+
+    async def _run_arduino(self) -> None:
+        worker = DeviceThread("arduino")
+        stopping = threading.Event()
+        arduino = None
+        try:
+            arduino = await worker.call(self.arduino_factory)
+            # Готовность сообщает цикл записи: она следует за портом
+            if not await self._initialize("arduino", worker, arduino.initialize, report_ready=False):
+                return
+            await worker.call(self._write_commands, arduino, stopping)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Arduino error: {e}")
+            self.state_manager.update_state(last_error=f"Arduino error: {e}")
+            self.readiness.report("arduino", FAILED, str(e))
+        finally:
+            # close() встаёт в очередь потока за циклом записи, который выйдет по stopping
+            stopping.set()
+            if arduino is not None:
+                await self._close("arduino", worker, arduino.close)
+            else:
+                worker.stop()
+            logger.info("Arduino stopped")
+
+    async def _run_ui(self) -> None:
+        stdscr = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        stdscr.keypad(True)
+        try:
+            try:
+                curses.start_color()
+            except curses.error:
+                pass
+            self.ui.setup(stdscr)
+            # getch не ждёт: паузу между кадрами выдерживает цикл событий
+            stdscr.timeout(0)
+            while not self.stop_event.is_set() and self.ui.tick(stdscr):
+                await asyncio.sleep(max(self.ui.wait_time(), 0.005))
+        except Exception as e:
+            logger.error(f"UI error: {e}")
+            self.state_manager.update_state(last_error=f"UI error: {e}")
+        finally:
+            stdscr.keypad(False)
+            curses.nocbreak()
+            curses.echo()
+            curses.endwin()
+
+    def _start_exporter(self) -> None:
+        self.exporter_stop = threading.Event()
+        exporter = self.exporter_factory(self.exporter_stop)
+        self.exporter_thread = threading.Thread(target=exporter.serve, name="metrics", daemon=True)
+        self.exporter_thread.start()
+
+    def _stop_exporter(self) -> None:
+        if self.exporter_thread:
+            self.exporter_stop.set()
+            self.exporter_thread.join(timeout=1.0)
+            self.exporter_thread = None
+
+    def restart(self, name: str) -> None:
+        if name == "metrics" and self.exporter_factory:
+            self._stop_exporter()
+            self._start_exporter()
+            logger.info("Metrics exporter restarted")
+            return
+        if name != "arduino" and name not in self.config_manager.get_config()['input']['devices']:
+            logger.warning(f"Async runtime cannot restart {name}, takes effect after a full restart")
+            return
+        # ConfigWatcher вызывается из задачи супервизора, поэтому перезапуск — отдельная задача
+        task = asyncio.create_task(self._restart(name))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _restart(self, name: str) -> None:
+        task = self.tasks.pop(name, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if name == "arduino":
+            self.tasks[name] = asyncio.create_task(self._run_arduino(), name=name)
+        else:
+            await self._start_device(name)
+        logger.info(f"Restarted: {name}")
+
+    def set_scheduling(self, config: Dict[str, Dict]) -> None:
+        self.scheduling = {name: SchedulingPolicy.from_config(policy) for name, policy in (config or {}).items()}
+
+    def configure_scheduling(self, config: Dict[str, Dict]) -> None:
+        self.set_scheduling(config)
+        self._apply_scheduling()
+
+    def _apply_scheduling(self) -> None:
+        # Один процесс на всё: действует только политика main, она применяется ко всем потокам
+        ignored = sorted(set(self.scheduling) - {"main"})
+        if ignored:
+            logger.info(f"Async runtime applies only scheduling.main, ignored: {', '.join(ignored)}")
+        policy = self.scheduling.get("main")
+        if policy:
+            self.effective_scheduling["main"] = apply_scheduling("main", os.getpid(), policy)
+            effective = self.effective_scheduling["main"]
+            logger.info(f"Scheduling main: cpus={effective.get('cpus')}, policy={effective.get('policy')}, "
+                        f"priority={effective.get('priority')}, nice={effective.get('nice')}")
+
+    async def _main(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop_event.set)
+        self.runtime_config.subscribe(self._apply_config)
+        self.runtime_config.poll()
+        processes = self.metrics.section("processes")
+        if processes.has("main"):
+            processes.gauge("main").set(os.getpid())
+        self._apply_scheduling()
+        self.state_manager.update_state(scheduling=dict(self.effective_scheduling))
+        runtime_profiler.begin("main")
+        memory_monitor.begin("main", self.state_manager)
+        # Профиль отчёта о старте — один на процесс, до первой команды
+        startup_profiler.begin("main")
+        try:
+            # Камеру создаём первой, чтобы кнопка записи геймпада могла на неё сослаться
+            devices = sorted(self.config_manager.get_config()['input']['devices'], key=lambda name: name != "zed")
+            for name in devices:
+                await self._start_device(name)
+            self.tasks["arduino"] = asyncio.create_task(self._run_arduino(), name="arduino")
+            self.tasks["control"] = asyncio.create_task(self._run_control(), name="control")
+            if self.ui:
+                self.tasks["ui"] = asyncio.create_task(self._run_ui(), name="ui")
+            if self.exporter_factory:
+                self._start_exporter()
+            while not self.stop_event.is_set():
+                self.config_watcher.poll()
+                runtime_profiler.poll_control_file()
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                await asyncio.sleep(SUPERVISOR_PERIOD)
+            logger.info("Received shutdown signal")
+        finally:
+            self.stop_event.set()
+            tasks = list(self.pending) + list(self.tasks.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._stop_exporter()
+            runtime_profiler.stop()
+            memory_monitor.stop()
+
+    def run(self) -> None:
+        logger.info("Async runtime started")
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            logger.error(f"Async runtime error: {e}")
+            self.state_manager.update_state(last_error=f"Async runtime error: {e}")
+        logger.info("Async runtime stopped")
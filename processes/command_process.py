@@ -1,23 +1,50 @@
 from multiprocessing import Process, Event
+from typing import Optional
 import logging
 from application.command_processor import CommandProcessor
+from application.runtime_config import RuntimeConfig
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.readiness import ReadinessBarrier
 
 logger = logging.getLogger(__name__)
 
 class CommandProcess(Process):
-    def __init__(self, command_processor: CommandProcessor, stop_event: Event):
+    def __init__(self, command_processor: CommandProcessor, stop_event: Event,
+                 runtime_config: Optional[RuntimeConfig] = None, readiness: Optional[ReadinessBarrier] = None):
         super().__init__()
         self.command_processor = command_processor
         self.stop_event = stop_event
+        self.runtime_config = runtime_config
+        self.readiness = readiness
         logger.info("CommandProcess initialized")
 
     def run(self) -> None:
         logger.info("Command process started")
+        startup_profiler.begin("command")
+        runtime_profiler.begin("command")
+        memory_monitor.begin("command", self.command_processor.input_manager.state_manager)
         try:
+            if self.runtime_config:
+                self.runtime_config.subscribe(self.command_processor.apply_config)
             while not self.stop_event.is_set():
-                self.command_processor.process()
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                if self.runtime_config:
+                    self.runtime_config.poll()
+                if self.readiness and not self.readiness.wait(0.1):
+                    # Управление не начинается, пока не готовы обязательные устройства
+                    self.command_processor.drain()
+                    continue
+                if self.command_processor.process() and not startup_profiler.reported:
+                    startup_profiler.report("first command")
+                    self.command_processor.input_manager.state_manager.update_state(
+                        time_to_first_command=round(startup_profiler.elapsed(), 3))
         except Exception as e:
             logger.error(f"Command process error: {e}")
             self.command_processor.input_manager.state_manager.update_state(last_error=f"Command process error: {e}")
         finally:
-            logger.info("Command process stopped")
\ No newline at end of file
+            runtime_profiler.stop()
+            memory_monitor.stop()
+            logger.info("Command process stopped")
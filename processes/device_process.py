@@ -0,0 +1,94 @@
+from multiprocessing import Process, Event
+from typing import Dict, Optional
+import logging
+import time
+from core.interfaces.input_device import InputDevice
+from application.input_manager import InputManager
+from application.runtime_config import RuntimeConfig
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.metrics import MetricSection, optional_histogram
+from application.readiness import ReadinessBarrier, run_with_timeout, PENDING, READY, FAILED, TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+class DeviceProcess(Process):
+    def __init__(self, name: str, device: InputDevice, input_manager: InputManager, stop_event: Event,
+                 runtime_config: Optional[RuntimeConfig] = None, readiness: Optional[ReadinessBarrier] = None,
+                 init_timeout: float = 10.0, metrics: Optional[MetricSection] = None):
+        super().__init__(name=f"DeviceProcess-{name}")
+        self.device_name = name
+        self.device = device
+        self.input_manager = input_manager
+        self.stop_event = stop_event
+        self.runtime_config = runtime_config
+        self.readiness = readiness
+        self.init_timeout = init_timeout
+        self.read_seconds = optional_histogram(metrics, "read_seconds")
+        self.period = 0.0
+        logger.info(f"DeviceProcess initialized: {name}")
+
+    def _apply_config(self, config: Dict) -> None:
+        rate = config.get("input", {}).get("rates", {}).get(self.device_name, 0.0)
+        self.period = 1.0 / rate if rate > 0 else 0.0
+        self.device.apply_config(config)
+        logger.info(f"{self.device_name} rate set to: {rate or 'device-paced'} Hz")
+
+    def _report(self, status: int, error: str = "") -> None:
+        if self.readiness:
+            self.readiness.report(self.device_name, status, error)
+
+    def run(self) -> None:
+        logger.info(f"Device process started: {self.device_name}")
+        startup_profiler.begin(self.device_name)
+        runtime_profiler.begin(self.device_name)
+        memory_monitor.begin(self.device_name, self.input_manager.state_manager)
+        initialized = False
+        try:
+            if self.runtime_config:
+                self.runtime_config.subscribe(self._apply_config)
+                self.runtime_config.poll()
+            # Перезапущенный процесс: до конца инициализации устройство не готово
+            self._report(PENDING)
+            try:
+                with startup_profiler.measure("init", self.device_name):
+                    run_with_timeout(self.device_name, self.device.initialize, self.init_timeout)
+            except TimeoutError as e:
+                self._report(TIMEOUT, str(e))
+                raise
+            except Exception as e:
+                self._report(FAILED, str(e))
+                raise
+            self._report(READY)
+            initialized = True
+
+            next_tick = time.monotonic()
+            while not self.stop_event.is_set():
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                if self.runtime_config:
+                    self.runtime_config.poll()
+                started = time.monotonic()
+                command = self.device.get_input()
+                self.input_manager.publish(self.device_name, command)
+                if self.read_seconds:
+                    self.read_seconds.observe(time.monotonic() - started)
+                startup_profiler.report("first command")
+                if self.period:
+                    next_tick += self.period
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_tick = time.monotonic()
+        except Exception as e:
+            logger.error(f"Device process {self.device_name} error: {e}")
+            if initialized:
+                self._report(FAILED, str(e))
+            self.input_manager.state_manager.update_state(last_error=f"{self.device_name} process error: {e}")
+        finally:
+            runtime_profiler.stop()
+            memory_monitor.stop()
+            self.device.close()
+            logger.info(f"Device process stopped: {self.device_name}")
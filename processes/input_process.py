@@ -1,27 +1,64 @@
 from multiprocessing import Process, Queue, Event
+from typing import Dict, Optional
 import logging
+import time
 from application.input_manager import InputManager
+from application.runtime_config import RuntimeConfig
+from application.metrics import MetricSection, optional_histogram
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
 
 logger = logging.getLogger(__name__)
 
 class InputProcess(Process):
-    def __init__(self, input_manager: InputManager, command_queue: Queue, stop_event: Event):
+    def __init__(self, input_manager: InputManager, command_queue: Queue, stop_event: Event,
+                 runtime_config: Optional[RuntimeConfig] = None, metrics: Optional[MetricSection] = None):
         super().__init__()
         self.input_manager = input_manager
         self.command_queue = command_queue
         self.stop_event = stop_event
+        self.runtime_config = runtime_config
+        self.command_age = optional_histogram(metrics, "command_age_seconds")
+        self.period = 0.0
         logger.info("InputProcess initialized")
 
+    def _apply_config(self, config: Dict) -> None:
+        rate = config.get("control", {}).get("input_rate", 0.0)
+        self.period = 1.0 / rate if rate > 0 else 0.0
+        self.input_manager.apply_config(config)
+        logger.info(f"Input rate set to: {rate} Hz")
+
     def run(self) -> None:
         logger.info("Input process started")
+        startup_profiler.begin("input")
+        runtime_profiler.begin("input")
+        memory_monitor.begin("input", self.input_manager.state_manager)
         try:
-            self.input_manager.initialize()
+            if self.runtime_config:
+                self.runtime_config.subscribe(self._apply_config)
+            next_tick = time.monotonic()
             while not self.stop_event.is_set():
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                if self.runtime_config:
+                    self.runtime_config.poll()
                 command = self.input_manager.get_command()
                 self.command_queue.put(command)
+                if self.command_age:
+                    self.command_age.observe(time.monotonic() - command.timestamp if command.timestamp else 0.0)
+                startup_profiler.report("first input command")
+                if self.period:
+                    next_tick += self.period
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_tick = time.monotonic()
         except Exception as e:
             logger.error(f"Input process error: {e}")
             self.input_manager.state_manager.update_state(last_error=f"Input process error: {e}")
         finally:
-            self.input_manager.close()
-            logger.info("Input process stopped")
\ No newline at end of file
+            runtime_profiler.stop()
+            memory_monitor.stop()
+            logger.info("Input process stopped")
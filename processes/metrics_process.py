@@ -0,0 +1,177 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from multiprocessing import Process, Queue, Event
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import math
+import time
+from application.metrics import MetricsRegistry
+from application.safety_override import ObstacleBrakeOverride
+from application.state_manager import StateManager
+from processes.proc_stats import read_process_stats
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+class MetricsSource:
+    """Что экспортируется для одной машины: реестр и, если есть, очереди, слот препятствия и состояние."""
+
+    def __init__(self, metrics: MetricsRegistry, queues: Optional[Dict[str, Queue]] = None,
+                 safety: Optional[ObstacleBrakeOverride] = None, state_manager: Optional[StateManager] = None,
+                 car: Optional[str] = None):
+        self.metrics = metrics
+        self.queues = queues or {}
+        self.safety = safety
+        self.state_manager = state_manager
+        self.car = car
+
+class MetricsProcess(Process):
+    """HTTP-эндпоинт /metrics в текстовом формате Prometheus.
+
+    Работает в отдельном процессе и читает только разделяемую память
+    (реестр метрик, слот препятствия, счётчик ошибок), размер очередей и
+    /proc — словарь Manager не опрашивается, процессы управления скрейп
+    не замечают. Частоты циклов — это _count гистограмм их задержек.
+    Супервизор парка передаёт по источнику на машину, их метрики
+    различаются меткой car.
+    """
+
+    def __init__(self, stop_event: Event, host: str, port: int, sources: List[MetricsSource],
+                 state_manager: StateManager):
+        super().__init__()
+        self.stop_event = stop_event
+        self.host = host
+        self.port = port
+        self.sources = sources
+        self.state_manager = state_manager
+        logger.info(f"MetricsProcess initialized on {host}:{port}")
+
+    def render(self) -> str:
+        # Строки одного семейства в формате Prometheus идут подряд, поэтому собираем их по имени
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+        def sample(name: str, kind: str, help_text: str, labels: Dict[str, str], value, suffix: str = "") -> None:
+            lines = families.setdefault(name, (kind, help_text, []))[2]
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+        for source in self.sources:
+            car = {"car": source.car} if source.car else {}
+            for name, queue in source.queues.items():
+                try:
+                    sample("car_queue_depth", "gauge", "Messages waiting in an inter-process queue.",
+                           {**car, "queue": name}, queue.qsize())
+                except NotImplementedError:
+                    pass
+
+            snapshot = source.metrics.snapshot()
+            for section, values in snapshot.items():
+                if section == "processes":
+                    continue
+                for field, value in values.items():
+                    metric = f"car_{section}_{field}"
+                    kind = source.metrics.kind(section, field)
+                    help_text = f"{section} {field.replace('_', ' ')}."
+                    if kind != "histogram":
+                        sample(metric, kind, help_text, car, _value(value))
+                        continue
+                    bounds, buckets, total = value
+                    cumulative = 0.0
+                    for bound, count in zip(bounds + ("+Inf",), buckets):
+                        cumulative += count
+                        sample(metric, kind, help_text, {**car, "le": str(bound)}, cumulative, "_bucket")
+                    sample(metric, kind, help_text, car, _value(total), "_sum")
+                    sample(metric, kind, help_text, car, cumulative, "_count")
+
+            obstacle = source.safety.obstacle.read() if source.safety else None
+            if obstacle:
+                published, frame_age, min_distance, depth_threshold = obstacle
+                sample("car_min_distance_meters", "gauge", "Closest obstacle in the ZED region of interest.",
+                       car, _value(min_distance))
+                sample("car_depth_threshold_meters", "gauge", "Obstacle brake threshold.", car, depth_threshold)
+                sample("car_obstacle_age_seconds", "gauge", "Age of the latest obstacle reading.",
+                       car, time.monotonic() - published + frame_age)
+
+            for name, pid in snapshot.get("processes", {}).items():
+                stats = read_process_stats(int(pid)) if pid else None
+                if not stats:
+                    continue
+                cpu_seconds, rss_bytes = stats
+                sample("car_process_cpu_seconds_total", "counter", "User and system CPU time of a process.",
+                       {**car, "process": name}, cpu_seconds)
+                sample("car_process_resident_memory_bytes", "gauge", "Resident set size of a process.",
+                       {**car, "process": name}, rss_bytes)
+
+            if source.state_manager:
+                sample("car_errors_total", "counter", "Errors reported to the shared state.",
+                       car, source.state_manager.error_count.value)
+
+        lines: List[str] = []
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return MetricsHandler
+
+    def run(self) -> None:
+        logger.info("Metrics process started")
+        runtime_profiler.begin("metrics")
+        memory_monitor.begin("metrics", self.state_manager)
+        try:
+            self.serve(self._poll_profilers)
+        finally:
+            runtime_profiler.stop()
+            memory_monitor.stop()
+
+    def _poll_profilers(self) -> None:
+        runtime_profiler.poll()
+        memory_monitor.poll()
+
+    def serve(self, on_tick: Optional[Callable[[], None]] = None) -> None:
+        """Отвечает на запросы до stop_event; в однопроцессном режиме вызывается в потоке."""
+        try:
+            server = HTTPServer((self.host, self.port), self._handler())
+        except OSError as e:
+            logger.error(f"Metrics server cannot listen on {self.host}:{self.port}: {e}")
+            self.state_manager.update_state(last_error=f"Metrics server error: {e}")
+            return
+        server.timeout = 0.5
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        try:
+            while not self.stop_event.is_set():
+                if on_tick:
+                    on_tick()
+                server.handle_request()
+        except Exception as e:
+            logger.error(f"Metrics process error: {e}")
+            self.state_manager.update_state(last_error=f"Metrics process error: {e}")
+        finally:
+            server.server_close()
+            logger.info("Metrics process stopped")
@@ -0,0 +1,20 @@
+from typing import Optional, Tuple
+import os
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def read_process_stats(pid: int) -> Optional[Tuple[float, int]]:
+    """Процессорное время (с) и RSS (байт) процесса из /proc, None если процесса нет."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            statm = f.read()
+    except OSError:
+        return None
+    # Имя процесса в скобках может содержать пробелы, поля считаем после него
+    fields = stat[stat.rindex(b")") + 2:].split()
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss_bytes = int(statm.split()[1]) * PAGE_SIZE
+    return cpu_seconds, rss_bytes
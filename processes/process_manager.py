@@ -1,38 +1,137 @@
-from multiprocessing import Process, Queue, Event
+from dataclasses import replace
+from multiprocessing import Process
+from typing import Callable, Dict, Optional
 import logging
+import os
+import time
 from processes.input_process import InputProcess
 from processes.command_process import CommandProcess
 from processes.arduino_process import ArduinoProcess
 from processes.ui_process import UIProcess
+from processes.scheduling import SchedulingPolicy, apply_scheduling
+from application.metrics import MetricSection
 
 logger = logging.getLogger(__name__)
 
 class ProcessManager:
     def __init__(self, input_process: InputProcess, command_process: CommandProcess,
-                 arduino_process: ArduinoProcess, ui_process: UIProcess):
-        self.input_process = input_process
-        self.command_process = command_process
-        self.arduino_process = arduino_process
-        self.ui_process = ui_process
+                 arduino_process: ArduinoProcess, ui_process: UIProcess, prefix: str = ""):
+        self.processes: Dict[str, Process] = {
+            "input": input_process,
+            "command": command_process,
+            "arduino": arduino_process,
+            "ui": ui_process
+        }
+        self.factories: Dict[str, Callable[[], Process]] = {}
+        self.external_pids: Dict[str, int] = {}
+        # Префикс имени процесса ("car1/") — для логов и профилировщика, когда машин несколько
+        self.prefix = prefix
+        self.scheduling: Dict[str, SchedulingPolicy] = {}
+        self.scheduling_overrides: Dict[str, Dict] = {}
+        self.effective_scheduling: Dict[str, Dict] = {}
+        # Affinity при запуске: дочерние процессы без своих cpus получают её, а не CPU закреплённого main
+        self.default_cpus = sorted(os.sched_getaffinity(0))
+        self.pid_table: Optional[MetricSection] = None
+        self.join_timeout = 5.0
         logger.info("ProcessManager initialized")
 
+    def add_process(self, name: str, process: Process) -> None:
+        self.processes[name] = process
+        logger.debug(f"Process added: {name}")
+
+    def register_factory(self, name: str, factory: Callable[[], Process]) -> None:
+        self.factories[name] = factory
+        logger.debug(f"Factory registered for process: {name}")
+
+    def register_external(self, name: str, pid: int) -> None:
+        # Процессы, которые запускаются не менеджером (main, сервер Manager), но тоже получают политику
+        self.external_pids[name] = pid
+
+    def set_pid_table(self, pid_table: MetricSection) -> None:
+        # PID в разделяемой памяти: экспортёр метрик видит процессы и после перезапуска
+        self.pid_table = pid_table
+
+    def _publish_pid(self, name: str, pid: int) -> None:
+        if self.pid_table and self.pid_table.has(name):
+            self.pid_table.gauge(name).set(pid)
+
+    def set_scheduling_overrides(self, overrides: Dict[str, Dict]) -> None:
+        # Политики супервизора парка поверх scheduling из конфига машины, в том числе при горячей перезагрузке
+        self.scheduling_overrides = dict(overrides or {})
+
+    def set_scheduling(self, config: Dict[str, Dict]) -> None:
+        config = {**(config or {}), **self.scheduling_overrides}
+        self.scheduling = {name: SchedulingPolicy.from_config(policy) for name, policy in config.items()}
+
+    def configure_scheduling(self, config: Dict[str, Dict]) -> None:
+        self.set_scheduling(config)
+        pids = dict(self.external_pids)
+        pids.update({name: process.pid for name, process in self.processes.items()
+                     if process and process.pid is not None and process.is_alive()})
+        for name, pid in pids.items():
+            self._apply_scheduling(name, pid)
+        self.report_scheduling()
+
+    def _apply_scheduling(self, name: str, pid: int) -> None:
+        policy = self.scheduling.get(name)
+        if name not in self.external_pids and (policy is None or not policy.cpus) \
+                and set(self.default_cpus) != os.sched_getaffinity(0):
+            # Процесс, перезапущенный после закрепления main, унаследовал бы его CPU
+            policy = replace(policy or SchedulingPolicy(), cpus=self.default_cpus)
+        if policy is None:
+            return
+        self.effective_scheduling[name] = apply_scheduling(name, pid, policy)
+
+    def report_scheduling(self) -> Dict[str, Dict]:
+        for name, effective in sorted(self.effective_scheduling.items()):
+            logger.info(f"Scheduling {name}: cpus={effective.get('cpus')}, policy={effective.get('policy')}, "
+                        f"priority={effective.get('priority')}, nice={effective.get('nice')}")
+        return dict(self.effective_scheduling)
+
     def start(self) -> None:
         logger.info("Starting processes")
-        if self.input_process:
-            self.input_process.start()
-        self.command_process.start()
-        self.arduino_process.start()
-        self.ui_process.start()
+        for name, process in self.processes.items():
+            if process:
+                process.name = f"{self.prefix}{name}"
+                process.start()
+                self._apply_scheduling(name, process.pid)
+                self._publish_pid(name, process.pid)
+                logger.info(f"Process started: {name} (pid {process.pid})")
+        # Внешние процессы настраиваем после fork, чтобы дочерние не унаследовали их политику
+        for name, pid in self.external_pids.items():
+            self._apply_scheduling(name, pid)
+            self._publish_pid(name, pid)
+        self.report_scheduling()
+
+    def restart(self, name: str) -> None:
+        factory = self.factories.get(name)
+        if factory is None:
+            logger.error(f"No factory registered for process: {name}")
+            return
+        process = self.processes.get(name)
+        if process and process.is_alive():
+            process.terminate()
+            process.join(self.join_timeout)
+        process = factory()
+        self.processes[name] = process
+        process.name = f"{self.prefix}{name}"
+        process.start()
+        self._apply_scheduling(name, process.pid)
+        self._publish_pid(name, process.pid)
+        logger.info(f"Process restarted: {name} (pid {process.pid})")
 
     def stop(self) -> None:
+        # stop_event уже выставлен: процессы выходят из цикла сами и проходят finally
+        # (закрывают камеру, дописывают манифест датасета, пишут итоговый отчёт памяти).
+        # SIGTERM — только тем, кто не вышел за join_timeout
         logger.info("Stopping processes")
-        if self.input_process:
-            self.input_process.terminate()
-            self.input_process.join()
-        self.command_process.terminate()
-        self.arduino_process.terminate()
-        self.ui_process.terminate()
-        self.command_process.join()
-        self.arduino_process.join()
-        self.ui_process.join()
-        logger.info("All processes stopped")
\ No newline at end of file
+        deadline = time.monotonic() + self.join_timeout
+        for process in self.processes.values():
+            if process and process.pid is not None:
+                process.join(max(0.0, deadline - time.monotonic()))
+        for name, process in self.processes.items():
+            if process and process.is_alive():
+                logger.warning(f"Process {name} did not stop in {self.join_timeout} s, terminating")
+                process.terminate()
+                process.join()
+        logger.info("All processes stopped")
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+POLICIES = {
+    "other": os.SCHED_OTHER,
+    "batch": os.SCHED_BATCH,
+    "idle": os.SCHED_IDLE,
+    "fifo": os.SCHED_FIFO,
+    "rr": os.SCHED_RR,
+}
+POLICY_NAMES = {value: name for name, value in POLICIES.items()}
+REALTIME_POLICIES = ("fifo", "rr")
+
+@dataclass
+class SchedulingPolicy:
+    cpus: Optional[List[int]] = None
+    nice: Optional[int] = None
+    policy: str = "other"
+    priority: int = 0
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "SchedulingPolicy":
+        return cls(
+            cpus=config.get("cpus"),
+            nice=config.get("nice"),
+            policy=config.get("policy", "other"),
+            priority=config.get("priority", 0)
+        )
+
+def parse_cpu_list(ranges: str) -> Set[int]:
+    """Список CPU в формате sysfs: "0-3,5"."""
+    cpus: Set[int] = set()
+    for part in ranges.strip().split(","):
+        if part:
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+def online_cpus() -> Set[int]:
+    """CPU хоста в сети. Affinity вызывающего процесса не годится: main может быть уже закреплён своей политикой."""
+    try:
+        with open("/sys/devices/system/cpu/online") as f:
+            return parse_cpu_list(f.read())
+    except OSError:
+        return set(range(os.cpu_count() or 1))
+
+def _tasks(pid: int) -> List[int]:
+    # Affinity и политика в Linux задаются на поток; применяем ко всем уже созданным потокам,
+    # новые потоки наследуют настройки создавшего их потока
+    try:
+        return [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        return [pid]
+
+def apply_scheduling(name: str, pid: int, policy: SchedulingPolicy) -> Dict:
+    if policy.cpus:
+        available = online_cpus()
+        cpus = set(policy.cpus) & available
+        if not cpus:
+            logger.warning(f"{name}: none of cpus {policy.cpus} available (have {sorted(available)}), affinity unchanged")
+        else:
+            if cpus != set(policy.cpus):
+                logger.warning(f"{name}: cpus {sorted(set(policy.cpus) - cpus)} not available, using {sorted(cpus)}")
+            try:
+                for tid in _tasks(pid):
+                    os.sched_setaffinity(tid, cpus)
+            except OSError as e:
+                logger.warning(f"{name}: cannot set CPU affinity: {e}")
+
+    if policy.policy in REALTIME_POLICIES:
+        try:
+            param = os.sched_param(policy.priority)
+            for tid in _tasks(pid):
+                os.sched_setscheduler(tid, POLICIES[policy.policy], param)
+        except PermissionError:
+            logger.warning(f"{name}: no privileges for SCHED_{policy.policy.upper()} "
+                           f"(needs CAP_SYS_NICE or RLIMIT_RTPRIO), staying on default scheduler")
+        except OSError as e:
+            logger.warning(f"{name}: cannot set SCHED_{policy.policy.upper()}: {e}")
+    else:
+        try:
+            for tid in _tasks(pid):
+                if os.sched_getscheduler(tid) != POLICIES[policy.policy]:
+                    os.sched_setscheduler(tid, POLICIES[policy.policy], os.sched_param(0))
+        except OSError as e:
+            logger.warning(f"{name}: cannot set SCHED_{policy.policy.upper()}: {e}")
+
+    if policy.nice is not None:
+        try:
+            for tid in _tasks(pid):
+                os.setpriority(os.PRIO_PROCESS, tid, policy.nice)
+        except PermissionError:
+            logger.warning(f"{name}: no privileges for nice {policy.nice}, keeping current priority")
+        except OSError as e:
+            logger.warning(f"{name}: cannot set nice {policy.nice}: {e}")
+
+    return describe_scheduling(pid)
+
+def describe_scheduling(pid: int) -> Dict:
+    try:
+        return {
+            "cpus": sorted(os.sched_getaffinity(pid)),
+            "nice": os.getpriority(os.PRIO_PROCESS, pid),
+            "policy": POLICY_NAMES.get(os.sched_getscheduler(pid), "unknown"),
+            "priority": os.sched_getparam(pid).sched_priority
+        }
+    except OSError as e:
+        logger.warning(f"Cannot read scheduling of pid {pid}: {e}")
+        return {}
@@ -0,0 +1,323 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Process, Event
+from typing import Dict, Optional
+import logging
+import socket
+import threading
+import time
+from application.frame_buffer import SharedFrameBuffer
+from application.metrics import MetricSection
+from application.runtime_config import RuntimeConfig
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.state_manager import StateManager
+from infrastructure.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "frame"
+INDEX_PAGE = b"""<!doctype html>
+<html><head><title>Car camera</title></head>
+<body style="margin:0;background:#111">
+<img src="/stream/rgb" style="width:49%"> <img src="/stream/depth" style="width:49%">
+</body></html>
+"""
+# Ступени деградации: качество JPEG, затем масштаб, затем частота
+QUALITY_STEP = 10
+SCALE_STEP = 0.75
+FPS_STEP = 0.75
+# Доля пропущенных клиентами кадров, выше которой поток ухудшается, и ниже которой — улучшается
+DEGRADE_RATIO = 0.25
+UPGRADE_RATIO = 0.05
+UPGRADE_INTERVALS = 3
+SEND_BUFFER = 128 * 1024
+
+class StreamView:
+    """Последний закодированный JPEG одного вида (rgb или depth) и ожидающие его клиенты."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.condition = threading.Condition()
+        self.number = 0
+        self.jpeg = b""
+        self.clients = 0
+        self.in_flight = 0
+        # Номера кадров вида идут подряд, поэтому разрыв у клиента — это пропущенные им кадры
+        self.submitted = 0
+
+    def publish(self, number: int, jpeg: bytes) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            # Кадры из пула могут закончиться не по порядку — старый не перезаписывает новый
+            if number > self.number:
+                self.number, self.jpeg = number, jpeg
+                self.condition.notify_all()
+
+class StreamProcess(Process):
+    """MJPEG-поток камеры по HTTP: /stream/rgb, /stream/depth и страница с обоими.
+
+    Камера кладёт уменьшенный кадр в SharedFrameBuffer только пока есть
+    зрители. Поток-производитель забирает новые кадры с текущей частотой и
+    отдаёт кодирование JPEG пулу потоков (cv2.imencode отпускает GIL);
+    каждый кадр кодируется один раз на вид, сколько бы ни было клиентов.
+    У каждого клиента свой поток, который всегда отправляет самый свежий
+    JPEG: медленный клиент пропускает кадры, а не задерживает остальных,
+    зависший отключается по client_timeout. Раз в секунду по доле
+    пропущенных кадров меняются качество, масштаб и частота, а с ростом
+    числа клиентов частота снижается.
+    """
+
+    def __init__(self, frame_buffer: SharedFrameBuffer, stop_event: Event, stream_config: Dict,
+                 runtime_config: Optional[RuntimeConfig] = None, metrics: Optional[MetricSection] = None,
+                 state_manager: Optional[StateManager] = None):
+        super().__init__()
+        self.frame_buffer = frame_buffer
+        self.stop_event = stop_event
+        self.host = stream_config["host"]
+        self.port = stream_config["port"]
+        self.runtime_config = runtime_config
+        self.metrics = metrics
+        self.state_manager = state_manager
+        self.views = {"rgb": StreamView("rgb"), "depth": StreamView("depth")}
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.skipped = 0
+        self.bytes_sent = 0
+        self.quality = 0
+        self.scale = 1.0
+        self.fps_factor = 1.0
+        self.good_intervals = 0
+        self.apply_config({"stream": stream_config})
+        if metrics:
+            self.frames_encoded = metrics.counter("frames_encoded_total")
+            self.frames_sent = metrics.counter("frames_sent_total")
+            self.frames_skipped = metrics.counter("frames_skipped_total")
+            self.bytes_counter = metrics.counter("bytes_sent_total")
+            self.encode_seconds = metrics.histogram("encode_seconds")
+        logger.info(f"StreamProcess initialized on {self.host}:{self.port}")
+
+    def apply_config(self, config: Dict) -> None:
+        stream = config.get("stream", {})
+        self.max_fps = stream.get("max_fps", 15.0)
+        self.min_fps = stream.get("min_fps", 2.0)
+        self.max_quality = stream.get("quality", 80)
+        self.min_quality = stream.get("min_quality", 40)
+        self.min_scale = stream.get("min_scale", 0.5)
+        self.workers = stream.get("workers", 2)
+        self.full_rate_clients = stream.get("full_rate_clients", 2)
+        self.client_timeout = stream.get("client_timeout", 2.0)
+        self.depth_range = stream.get("depth_range", 10.0)
+        self.quality = max(self.min_quality, min(self.quality or self.max_quality, self.max_quality))
+        self.scale = max(self.min_scale, self.scale)
+
+    @property
+    def clients(self) -> int:
+        return sum(view.clients for view in self.views.values())
+
+    @property
+    def fps(self) -> float:
+        # При большом числе клиентов частота делится между ними, чтобы не забить канал
+        share = self.full_rate_clients / max(self.clients, self.full_rate_clients)
+        return max(self.min_fps, self.max_fps * share * self.fps_factor)
+
+    def _encode(self, view: StreamView, number: int, image, quality: int, scale: float) -> None:
+        try:
+            started = time.perf_counter()
+            if view.name == "depth":
+                depth = np.nan_to_num(image, nan=self.depth_range, posinf=self.depth_range, neginf=0.0)
+                image = cv2.applyColorMap((np.clip(depth, 0.0, self.depth_range) * (255 / self.depth_range))
+                                          .astype(np.uint8), cv2.COLORMAP_JET)
+            else:
+                image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            if scale < 1.0:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                raise RuntimeError("imencode failed")
+            view.publish(number, jpeg.tobytes())
+            if self.metrics:
+                with self.lock:
+                    self.frames_encoded.inc()
+                    self.encode_seconds.observe(time.perf_counter() - started)
+        except Exception as e:
+            view.publish(0, b"")
+            logger.error(f"Stream {view.name} encode error: {e}")
+
+    def _adapt(self, sent: int, skipped: int) -> None:
+        total = sent + skipped
+        ratio = skipped / total if total else 0.0
+        if ratio > DEGRADE_RATIO:
+            self.good_intervals = 0
+            if self.quality > self.min_quality:
+                self.quality = max(self.min_quality, self.quality - QUALITY_STEP)
+            elif self.scale > self.min_scale:
+                self.scale = max(self.min_scale, self.scale * SCALE_STEP)
+            elif self.max_fps * self.fps_factor > self.min_fps:
+                self.fps_factor *= FPS_STEP
+            else:
+                return
+            logger.info(f"Stream degraded: {ratio:.0%} frames skipped by clients, quality {self.quality}, "
+                        f"scale {self.scale:.2f}, {self.fps:.1f} fps")
+        elif ratio < UPGRADE_RATIO and total:
+            self.good_intervals += 1
+            if self.good_intervals < UPGRADE_INTERVALS:
+                return
+            self.good_intervals = 0
+            if self.fps_factor < 1.0:
+                self.fps_factor = min(1.0, self.fps_factor / FPS_STEP)
+            elif self.scale < 1.0:
+                self.scale = min(1.0, self.scale / SCALE_STEP)
+            elif self.quality < self.max_quality:
+                self.quality = min(self.max_quality, self.quality + QUALITY_STEP)
+            else:
+                return
+            logger.info(f"Stream improved: quality {self.quality}, scale {self.scale:.2f}, {self.fps:.1f} fps")
+
+    def _produce(self, pool: ThreadPoolExecutor) -> None:
+        last_sequence = 0
+        next_adapt = time.monotonic() + 1.0
+        last_sent = last_skipped = 0
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            if now >= next_adapt:
+                next_adapt = now + 1.0
+                with self.lock:
+                    sent, skipped = self.sent, self.skipped
+                self._adapt(sent - last_sent, skipped - last_skipped)
+                last_sent, last_skipped = sent, skipped
+                if self.metrics:
+                    with self.lock:
+                        self.metrics.gauge("clients").set(self.clients)
+                        self.metrics.gauge("fps").set(self.fps)
+                        self.metrics.gauge("quality").set(self.quality)
+                        self.metrics.gauge("scale").set(self.scale)
+            fps = self.fps
+            self.frame_buffer.min_interval.value = 1.0 / fps
+            if not self.clients:
+                time.sleep(0.1)
+                continue
+            frame = self.frame_buffer.read(last_sequence)
+            if frame is None:
+                time.sleep(min(0.01, 1.0 / fps))
+                continue
+            last_sequence, _, rgb, depth = frame
+            for view, image in ((self.views["rgb"], rgb), (self.views["depth"], depth)):
+                # Не больше workers кадров в работе на вид: пул не копит очередь устаревших кадров
+                with view.condition:
+                    if not view.clients or view.in_flight >= self.workers:
+                        continue
+                    view.in_flight += 1
+                    view.submitted += 1
+                    number = view.submitted
+                pool.submit(self._encode, view, number, image, self.quality, self.scale)
+            time.sleep(1.0 / fps)
+
+    def _serve_client(self, handler: BaseHTTPRequestHandler, view: StreamView) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache, private")
+        handler.end_headers()
+        with view.condition:
+            view.clients += 1
+        self.frame_buffer.viewers.value = self.clients
+        logger.info(f"Stream client {handler.address_string()} connected to {view.name} ({self.clients} total)")
+        last = 0
+        try:
+            while not self.stop_event.is_set():
+                with view.condition:
+                    view.condition.wait_for(lambda: view.number > last, timeout=1.0)
+                    number, jpeg = view.number, view.jpeg
+                if number <= last:
+                    continue
+                handler.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+                with self.lock:
+                    self.sent += 1
+                    self.bytes_sent += len(jpeg)
+                    # Кадры, вышедшие, пока клиент читал предыдущий, ему уже не достанутся
+                    self.skipped += number - last - 1 if last else 0
+                    if self.metrics:
+                        self.frames_sent.inc()
+                        self.frames_skipped.inc(number - last - 1 if last else 0)
+                        self.bytes_counter.inc(len(jpeg))
+                last = number
+        except OSError as e:
+            logger.info(f"Stream client {handler.address_string()} disconnected: {e}")
+        finally:
+            with view.condition:
+                view.clients -= 1
+            self.frame_buffer.viewers.value = self.clients
+
+    def _handler(self):
+        streamer = self
+
+        class StreamHandler(BaseHTTPRequestHandler):
+            # Таймаут сокета: зависший клиент отключается, а не держит поток вечно
+            timeout = streamer.client_timeout
+
+            def setup(self) -> None:
+                super().setup()
+                # Маленький буфер отправки: медленный клиент упирается в него и пропускает кадры,
+                # а не получает их с нарастающей задержкой из очереди ядра
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+
+            def do_GET(self) -> None:
+                path = self.path.split("?")[0]
+                if path == "/":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(INDEX_PAGE)))
+                    self.end_headers()
+                    self.wfile.write(INDEX_PAGE)
+                elif path.startswith("/stream/") and path[len("/stream/"):] in streamer.views:
+                    streamer._serve_client(self, streamer.views[path[len("/stream/"):]])
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format: str, *args) -> None:
+                logger.debug(f"{self.address_string()} {format % args}")
+
+        return StreamHandler
+
+    def run(self) -> None:
+        logger.info("Stream process started")
+        runtime_profiler.begin("stream")
+        memory_monitor.begin("stream", self.state_manager)
+        if self.runtime_config:
+            self.runtime_config.subscribe(self.apply_config)
+            self.runtime_config.poll()
+        try:
+            server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        except OSError as e:
+            logger.error(f"Stream server cannot listen on {self.host}:{self.port}: {e}")
+            if self.state_manager:
+                self.state_manager.update_state(last_error=f"Stream server error: {e}")
+            return
+        server.daemon_threads = True
+        server.timeout = 0.5
+        pool = ThreadPoolExecutor(max_workers=self.workers * len(self.views), thread_name_prefix="jpeg")
+        producer = threading.Thread(target=self._produce, args=(pool,), name="stream-producer", daemon=True)
+        producer.start()
+        logger.info(f"Serving camera stream on http://{self.host}:{self.port}/")
+        try:
+            while not self.stop_event.is_set():
+                runtime_profiler.poll()
+                memory_monitor.poll()
+                if self.runtime_config:
+                    self.runtime_config.poll()
+                server.handle_request()
+        except Exception as e:
+            logger.error(f"Stream process error: {e}")
+            if self.state_manager:
+                self.state_manager.update_state(last_error=f"Stream process error: {e}")
+        finally:
+            runtime_profiler.stop()
+            memory_monitor.stop()
+            self.frame_buffer.viewers.value = 0
+            server.server_close()
+            pool.shutdown(wait=False)
+            logger.info("Stream process stopped")
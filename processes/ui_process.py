@@ -1,53 +1,225 @@
 from multiprocessing import Process, Event
-import curses
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
+import time
 from application.state_manager import StateManager
+from application.runtime_config import RuntimeConfig
+from application.startup_profiler import startup_profiler
+from application.runtime_profiler import runtime_profiler
+from application.memory_monitor import memory_monitor
+from application.metrics import MetricsRegistry, loop_histogram, loop_sections
+from infrastructure.lazy_import import lazy_import
+
+curses = lazy_import("curses")
 
 logger = logging.getLogger(__name__)
 
+def _remote_line(state: Dict) -> str:
+    remote = state.get("remote")
+    if not remote:
+        return "Remote: n/a"
+    if not remote["connected"]:
+        return f"Remote: lost, loss {remote['loss']:.1%}"
+    latency = f"{remote['latency_ms']:.1f} ms" if remote["latency_ms"] is not None else "n/a"
+    return f"Remote: {latency}, loss {remote['loss']:.1%}, out of order {remote['reordered']}"
+
+def _serial_line(state: Dict) -> str:
+    link = state.get("serial")
+    if not link:
+        return "Serial: n/a"
+    if not link["connected"]:
+        return f"Serial: lost {link['outage_s']:.1f} s, reconnects {link['reconnects']}"
+    return f"Serial: {link['port']}, reconnects {link['reconnects']}, last outage {link['last_outage_s']:.1f} s"
+
+def _brake_line(state: Dict) -> str:
+    line = f"Braking: {'On' if state['braking'] else 'Off'}"
+    if 'brake_latency_ms' in state:
+        line += f" (latency {state['brake_latency_ms']} ms, max {state.get('brake_latency_max_ms', 0.0)} ms)"
+    return line
+
+STATE_LINES: List[Callable[[Dict], str]] = [
+    lambda state: f"Mode: {state['mode']}",
+    lambda state: f"Speed: {state.get('motor_value', 90)}",
+    lambda state: f"Gear: {state['gear']}",
+    lambda state: f"Steering: {state.get('steering_value', 90)}",
+    lambda state: f"Trim: {state['trim']:.3f}",
+    lambda state: f"Depth Threshold: {state['depth_threshold']:.2f} m",
+    lambda state: f"Min Distance: {state['min_distance']:.2f} m",
+    lambda state: f"Recording: {'On' if state.get('recording', False) else 'Off'}",
+    lambda state: f"Camera: {state.get('camera_mode', 'n/a')}",
+    _remote_line,
+    _serial_line,
+    _brake_line,
+    lambda state: f"Devices: {' '.join(f'{n}={s}' for n, s in state.get('devices', {}).items()) or 'n/a'}",
+    lambda state: f"Memory: {state.get('memory_alert') or 'OK'}",
+    lambda state: f"Last Error: {state['last_error'] or 'None'}",
+]
+
+HELP_LINES = [
+    "Left Stick: steering, Triggers: throttle/brake, Bumpers: gears",
+    "Start: mode, A: record, B: reverse, X: reset trim, Y: reset depth",
+    "D-Pad: trim (left/right: ±2), depth (up/down: ±0.05)",
+    "P: profile all processes, Q: exit",
+]
+
 class UIProcess(Process):
-    def __init__(self, state_manager: StateManager, stop_event: Event):
+    """Экран состояния, который перерисовывает только изменившиеся строки.
+
+    Раскладка строк строится один раз. Состояние запрашивается у менеджера
+    только когда вырос счётчик версий StateManager, не чаще max_refresh_rate;
+    частоты циклов и средние задержки считаются по гистограммам реестра
+    метрик в разделяемой памяти раз в stats_interval и не нагружают
+    процессы управления.
+    """
+
+    def __init__(self, state_manager: StateManager, stop_event: Event,
+                 runtime_config: Optional[RuntimeConfig] = None, metrics: Optional[MetricsRegistry] = None,
+                 max_refresh_rate: float = 20.0, stats_interval: float = 1.0):
         super().__init__()
         self.state_manager = state_manager
         self.stop_event = stop_event
+        self.runtime_config = runtime_config
+        self.metrics = metrics
+        self.loop_sections = loop_sections(metrics) if metrics else []
+        self.loop_totals: Dict[str, Tuple[float, float, float]] = {}
+        self.max_refresh_rate = max_refresh_rate
+        self.stats_interval = stats_interval
+        self.static_rows: Dict[int, Tuple[str, int]] = {}
+        self.state_top = 2
+        self.loop_top = self.state_top + len(STATE_LINES) + 1
+        self.lines: Dict[int, str] = {}
+        self.seen_version = -1
+        self.last_draw = 0.0
+        self.last_stats = 0.0
         logger.info("UIProcess initialized")
 
+    def _apply_config(self, config: Dict) -> None:
+        ui = config.get("ui", {})
+        self.max_refresh_rate = ui.get("max_refresh_rate", self.max_refresh_rate)
+        self.stats_interval = ui.get("stats_interval", self.stats_interval)
+        logger.info(f"UI refresh limited to {self.max_refresh_rate} Hz, loop stats every {self.stats_interval} s")
+
     def run(self) -> None:
         logger.info("UI process started")
+        startup_profiler.begin("ui")
+        runtime_profiler.begin("ui")
+        memory_monitor.begin("ui", self.state_manager)
         try:
             curses.wrapper(self._run_ui)
         except Exception as e:
             logger.error(f"UI process error: {e}")
             self.state_manager.update_state(last_error=f"UI process error: {e}")
+        finally:
+            runtime_profiler.stop()
+            memory_monitor.stop()
 
-    def _run_ui(self, stdscr) -> None:
+    def _build_layout(self) -> None:
+        self.static_rows = {0: ("Car Control", curses.A_BOLD)}
+        if self.loop_sections:
+            self.static_rows[self.loop_top] = ("Loops: rate, mean latency", curses.A_BOLD)
+        help_top = self.loop_top + (len(self.loop_sections) + 2 if self.loop_sections else 0)
+        for index, text in enumerate(HELP_LINES):
+            self.static_rows[help_top + index] = (text, curses.A_NORMAL)
+
+    def _draw_line(self, stdscr, row: int, text: str, attr: int = 0) -> bool:
+        height, width = stdscr.getmaxyx()
+        if row >= height:
+            return False
+        text = text[:width - 1]
+        if self.lines.get(row) == text:
+            return False
+        stdscr.move(row, 0)
+        stdscr.clrtoeol()
+        stdscr.addstr(row, 0, text, attr)
+        self.lines[row] = text
+        return True
+
+    def _draw_static(self, stdscr) -> None:
+        stdscr.erase()
+        self.lines.clear()
+        self.seen_version = -1
+        for row, (text, attr) in self.static_rows.items():
+            self._draw_line(stdscr, row, text, attr)
+
+    def _draw_state(self, stdscr) -> bool:
+        version = self.state_manager.version.value
+        if version == self.seen_version:
+            return False
+        self.seen_version = version
+        state = self.state_manager.get_state()
+        changed = False
+        for index, line in enumerate(STATE_LINES):
+            changed |= self._draw_line(stdscr, self.state_top + index, line(state))
+        return changed
+
+    def _draw_loops(self, stdscr) -> bool:
+        changed = False
+        now = time.monotonic()
+        for index, name in enumerate(self.loop_sections, 1):
+            count, total = self.metrics.histogram_totals(name, loop_histogram(name))
+            last_count, last_total, last_time = self.loop_totals.get(name, (count, total, now))
+            self.loop_totals[name] = (count, total, now)
+            iterations = count - last_count
+            rate = iterations / (now - last_time) if now > last_time else 0.0
+            latency = (total - last_total) / iterations if iterations else 0.0
+            changed |= self._draw_line(stdscr, self.loop_top + index,
+                                       f"{name:<10}{rate:8.1f} Hz{latency * 1000:9.2f} ms")
+        return changed
+
+    def setup(self, stdscr) -> None:
         curses.curs_set(0)
-        stdscr.timeout(50)
+        if self.runtime_config:
+            self.runtime_config.subscribe(self._apply_config)
+            self.runtime_config.poll()
+        self._build_layout()
+        self._draw_static(stdscr)
+        self.last_draw = 0.0
+        self.last_stats = 0.0
+
+    def wait_time(self) -> float:
+        """Сколько секунд до следующей перерисовки."""
+        return max(0.0, self.last_draw + 1.0 / self.max_refresh_rate - time.monotonic())
+
+    def tick(self, stdscr) -> bool:
+        """Обрабатывает клавишу и перерисовывает экран; False — пользователь вышел."""
+        try:
+            key = stdscr.getch()
+            if key == ord('q'):
+                self.stop_event.set()
+                return False
+            if key == ord('p'):
+                runtime_profiler.request()
+            if key == curses.KEY_RESIZE:
+                self._draw_static(stdscr)
+                self.last_stats = 0.0
+            now = time.monotonic()
+            if now - self.last_draw < 1.0 / self.max_refresh_rate:
+                return True
+            self.last_draw = now
+            changed = self._draw_state(stdscr)
+            if now - self.last_stats >= self.stats_interval:
+                self.last_stats = now
+                changed |= self._draw_loops(stdscr)
+            if changed or key == curses.KEY_RESIZE:
+                stdscr.noutrefresh()
+                curses.doupdate()
+                startup_profiler.report("first frame")
+        except curses.error as e:
+            logger.error(f"Curses refresh error: {e}")
+            self.state_manager.update_state(last_error=f"Curses refresh error: {e}")
+        except Exception as e:
+            logger.error(f"UI update error: {e}")
+            self.state_manager.update_state(last_error=f"UI update error: {e}")
+        return True
+
+    def _run_ui(self, stdscr) -> None:
+        self.setup(stdscr)
         while not self.stop_event.is_set():
-            try:
-                state = self.state_manager.get_state()
-                stdscr.clear()
-                stdscr.addstr(0, 0, "Car Control", curses.A_BOLD)
-                stdscr.addstr(2, 0, f"Mode: {state['mode']}")
-                stdscr.addstr(3, 0, f"Speed: {state.get('motor_value', 90)}")
-                stdscr.addstr(4, 0, f"Gear: {state['gear']}")
-                stdscr.addstr(5, 0, f"Steering: {state.get('steering_value', 90)}")
-                stdscr.addstr(6, 0, f"Trim: {state['trim']:.3f}")
-                stdscr.addstr(7, 0, f"Depth Threshold: {state['depth_threshold']:.2f} m")
-                stdscr.addstr(8, 0, f"Min Distance: {state['min_distance']:.2f} m")
-                stdscr.addstr(9, 0, f"Recording: {'On' if state.get('recording', False) else 'Off'}")
-                stdscr.addstr(10, 0, f"Braking: {'On' if state['braking'] else 'Off'}")
-                stdscr.addstr(12, 0, f"Last Error: {state['last_error'] or 'None'}")
-                stdscr.addstr(14, 0, "Left Stick: steering, Triggers: throttle/brake, Bumpers: gears")
-                stdscr.addstr(15, 0, "Start: mode, A: record, B: reverse, X: reset trim, Y: reset depth")
-                stdscr.addstr(16, 0, "D-Pad: trim (left/right: ±2), depth (up/down: ±0.05)")
-                stdscr.addstr(17, 0, "Q: exit")
-                stdscr.refresh()
-                if stdscr.getch() == ord('q'):
-                    self.stop_event.set()
-            except curses.error as e:
-                logger.error(f"Curses refresh error: {e}")
-                self.state_manager.update_state(last_error=f"Curses refresh error: {e}")
-            except Exception as e:
-                logger.error(f"UI update error: {e}")
-                self.state_manager.update_state(last_error=f"UI update error: {e}")
\ No newline at end of file
+            runtime_profiler.poll()
+            memory_monitor.poll()
+            if self.runtime_config:
+                self.runtime_config.poll()
+            # getch ждёт не дольше периода обновления и служит паузой цикла
+            stdscr.timeout(max(1, int(self.wait_time() * 1000)))
+            if not self.tick(stdscr):
+                break
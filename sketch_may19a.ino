@@ -17,6 +17,12 @@ void setup() {
 void loop() {
   if (Serial.available() > 0) {
     String data = Serial.readStringUntil('\n');  // Чтение всей строки до символа новой строки
+    // Команда заканчивается ';': оборванную строку (тайм-аут записи на стороне машины
+    // или таймаут чтения) не применяем, остаются прежние значения
+    data.trim();
+    if (!data.endsWith(";")) {
+      return;
+    }
     int motorValue = 90;
     int steeringValue = 90;
 
@@ -0,0 +1,25 @@
+import os
+import sys
+from typing import List
+import pytest
+
+# Тесты импортируют модули из корня репозитория, как main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application.state_manager import StateManager  # noqa: E402
+
+# Ручная проверка геймпада: нужен pygame и джойстик, это не тест pytest
+collect_ignore = ["gamepad_test.py"]
+
+@pytest.fixture
+def make_state_manager():
+    """Общее состояние на сервере Manager, как у процессов машины; серверы останавливаются после теста."""
+    created: List[StateManager] = []
+
+    def create() -> StateManager:
+        created.append(StateManager())
+        return created[-1]
+
+    yield create
+    for state_manager in created:
+        state_manager.manager.shutdown()
@@ -0,0 +1,96 @@
+import os
+from typing import List
+import pytest
+from infrastructure.serial_connection import SerialConnection
+from tools.arduino_simulator import BITS_PER_BYTE, STREAM_TIMEOUT, AppliedCommand, SketchSimulator, parse_line
+
+@pytest.mark.parametrize("line, expected", [
+    (b"120,60;", (120, 60)),
+    (b" 95 , 85;\r", (95, 85)),
+    (b"+100,-5;", (100, 0)),
+    (b"200,181;", (180, 180)),
+    # Без запятой скетч оставляет нейтраль
+    (b";", (90, 90)),
+    (b"120;", (90, 90)),
+    # toInt читает ведущее число и 0 для мусора
+    (b"12x,abc;", (12, 0)),
+    (b",;", (0, 0)),
+    # int AVR 16-битный: 65636 переполняется в 100
+    (b"65636,90;", (100, 90)),
+    (b"32768,90;", (0, 90)),
+    # Строка без ';' — оборванная команда, скетч её отбрасывает
+    (b"", None),
+    (b"120,6", None),
+    (b"120,60", None),
+])
+def test_parse_line_matches_sketch(line, expected):
+    assert parse_line(line) == expected
+
+@pytest.fixture
+def simulator():
+    applied: List[AppliedCommand] = []
+    simulator = SketchSimulator(9600, on_apply=applied.append)
+    simulator.applied = applied
+    yield simulator
+    simulator.stop()
+
+def run_until(simulator: SketchSimulator, start: float, end: float, tick: float = 0.0005) -> None:
+    # Часы симуляции вместо time.monotonic(): step() двигает линию и loop() скетча до now
+    now = start
+    while now < end:
+        simulator.step(now)
+        now += tick
+
+def applied_at(simulator: SketchSimulator, command: AppliedCommand) -> float:
+    return command.timestamp - simulator.clock_offset
+
+def test_line_without_newline_waits_for_stream_timeout(simulator):
+    os.write(simulator.slave, b"120,60;")
+    run_until(simulator, 100.0, 100.0 + STREAM_TIMEOUT + 0.1)
+    [command] = simulator.applied
+    assert (command.motor, command.steering, command.timed_out) == (120, 60, True)
+    last_byte = 100.0 + len(b"120,60;") * simulator.byte_time
+    assert applied_at(simulator, command) == pytest.approx(last_byte + STREAM_TIMEOUT, abs=0.002)
+    assert simulator.stalls == 1
+
+def test_line_rate_limited_by_baud(simulator):
+    lines = [f"{motor},90;\n".encode() for motor in range(100, 110)]
+    os.write(simulator.slave, b"".join(lines))
+    run_until(simulator, 100.0, 100.2)
+    assert [command.motor for command in simulator.applied] == list(range(100, 110))
+    sent = 0
+    for line, command in zip(lines, simulator.applied):
+        sent += len(line)
+        # Байт — 10 бит на линии: строка применяется, когда дошёл её перевод строки
+        assert applied_at(simulator, command) == pytest.approx(100.0 + sent * BITS_PER_BYTE / 9600, abs=0.002)
+    assert not any(command.timed_out for command in simulator.applied)
+
+class CutHandle:
+    """Порт, который на тайм-ауте записи успел отправить только начало команды."""
+
+    def __init__(self, fd: int, sent_on_timeout: int, timeout: Exception):
+        self.fd = fd
+        self.sent_on_timeout = sent_on_timeout
+        self.timeout = timeout
+
+    def write(self, data: bytes) -> int:
+        if self.sent_on_timeout is not None:
+            os.write(self.fd, data[:self.sent_on_timeout])
+            self.sent_on_timeout = None
+            raise self.timeout
+        return os.write(self.fd, data)
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+@pytest.mark.parametrize("sent_on_timeout", range(len(b"120,60;\n") - 1))
+def test_resync_discards_half_written_command(simulator, sent_on_timeout):
+    serial = pytest.importorskip("serial")
+    connection = SerialConnection("/dev/ttyFAKE", 9600)
+    connection.handle = CutHandle(simulator.slave, sent_on_timeout, serial.SerialTimeoutException("Write timeout"))
+    assert not connection.write(b"120,60;\n")
+    assert connection.write(b"90,90;\n")
+    run_until(simulator, 100.0, 100.1)
+    # Ни обрывок "120,6", ни склейка с новой командой не доходят до серво
+    assert [(command.motor, command.steering) for command in simulator.applied] == [(90, 90)]
+    assert simulator.rejected == 1
@@ -0,0 +1,103 @@
+import os
+import signal
+import threading
+import time
+import pytest
+import main
+from core.entities.command import CarCommand
+from core.interfaces.arduino_interface import ArduinoInterface
+from core.interfaces.input_device import InputDevice
+from infrastructure.config_manager import FileConfigManager
+
+class FakeRemote(InputDevice):
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def set_metrics(self, metrics) -> None:
+        pass
+
+    def initialize(self) -> None:
+        pass
+
+    def get_input(self) -> CarCommand:
+        time.sleep(0.005)
+        return CarCommand(speed=0.5, brake=0.0, steering=0.0, timestamp=time.monotonic())
+
+    def close(self) -> None:
+        self.closed.set()
+
+class FakeArduino(ArduinoInterface):
+    def __init__(self):
+        self.commands = []
+        self.closed = threading.Event()
+
+    def initialize(self) -> None:
+        pass
+
+    def send_command(self, motor_value: int, steering_value: int) -> None:
+        self.commands.append((motor_value, steering_value))
+
+    def close(self) -> None:
+        self.closed.set()
+
+@pytest.fixture
+def car(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(f"""
+input: {{devices: [remote]}}
+startup: {{required_devices: [remote, arduino]}}
+runtime: {{mode: async}}
+ui: {{enabled: false}}
+metrics: {{enabled: false, segment: test_async_{os.getpid()}}}
+profiling: {{output_dir: {tmp_path}/profiles, control_file: {tmp_path}/profile.request}}
+""")
+    devices, arduinos = [], []
+
+    def create_input_device(name, config, state_manager) -> FakeRemote:
+        devices.append(FakeRemote())
+        return devices[-1]
+
+    def create_arduino(config, state_manager) -> FakeArduino:
+        arduinos.append(FakeArduino())
+        return arduinos[-1]
+
+    monkeypatch.setattr(main, "create_input_device", create_input_device)
+    monkeypatch.setattr(main, "create_arduino", create_arduino)
+    previous = {signum: signal.getsignal(signum) for signum in (signal.SIGUSR1, signal.SIGTERM)}
+    runtime = main.build_async_runtime(FileConfigManager(str(config_path)))
+    yield runtime, devices, arduinos
+    runtime.metrics.close()
+    for signum, handler in previous.items():
+        signal.signal(signum, handler)
+
+def run_until(runtime, arduinos, stop) -> float:
+    """Запускает среду в главном потоке; stop() вызывается, когда команды дошли до Arduino."""
+    def trigger():
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline and not (arduinos and arduinos[0].commands):
+            time.sleep(0.01)
+        stop()
+
+    thread = threading.Thread(target=trigger, daemon=True)
+    thread.start()
+    started = time.monotonic()
+    runtime.run()
+    thread.join(1.0)
+    return time.monotonic() - started
+
+def test_stop_event_closes_devices_and_arduino(car):
+    runtime, devices, arduinos = car
+    elapsed = run_until(runtime, arduinos, runtime.stop_event.set)
+    assert elapsed < 5.0
+    assert runtime.readiness.is_ready()
+    assert arduinos[0].commands
+    assert devices[0].closed.is_set()
+    assert arduinos[0].closed.is_set()
+    assert runtime.tasks and all(task.done() for task in runtime.tasks.values())
+
+def test_sigterm_stops_runtime(car):
+    runtime, devices, arduinos = car
+    run_until(runtime, arduinos, lambda: os.kill(os.getpid(), signal.SIGTERM))
+    assert runtime.stop_event.is_set()
+    assert devices[0].closed.is_set()
+    assert arduinos[0].closed.is_set()
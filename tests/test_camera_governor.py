@@ -0,0 +1,99 @@
+import copy
+from typing import List
+import pytest
+from application.camera_governor import CameraGovernor, CameraLevel
+from infrastructure.config_manager import GOVERNOR_DEFAULTS
+from infrastructure.zed_camera import ZEDCameraInput
+
+BASE = CameraLevel("HD1080", 30, "ULTRA")
+
+class Load:
+    def __init__(self):
+        self.cpu = 0.5
+        self.temperature = None
+
+def make_governor(load: Load, **overrides) -> CameraGovernor:
+    config = dict(copy.deepcopy(GOVERNOR_DEFAULTS), enabled=True, **overrides)
+    return CameraGovernor(BASE, config, lambda: load.cpu, lambda: load.temperature)
+
+def run(governor: CameraGovernor, start: float, seconds: float, rate: float) -> List[CameraLevel]:
+    """Кадры с частотой rate в течение seconds; возвращает уровни, которые велено применить."""
+    switches, frames = [], int(seconds * rate)
+    for frame in range(1, frames + 1):
+        level = governor.update(start + frame / rate, 0.01)
+        if level:
+            switches.append(level)
+    return switches
+
+def test_steady_rate_keeps_level():
+    governor = make_governor(Load())
+    assert run(governor, 0.0, 20.0, 30.0) == []
+    assert governor.level == 0
+
+def test_low_rate_steps_down_after_down_hold():
+    governor = make_governor(Load())
+    # Одно плохое окно меньше down_hold не переключает
+    assert run(governor, 0.0, 1.5, 5.0) == []
+    switches = run(governor, 1.5, 3.0, 5.0)
+    assert switches == [CameraLevel.from_config(GOVERNOR_DEFAULTS["levels"][0])]
+    assert governor.level == 1
+
+def test_cpu_overload_steps_down():
+    load = Load()
+    load.cpu = 0.95
+    governor = make_governor(load)
+    assert len(run(governor, 0.0, 5.0, 30.0)) == 1
+
+def test_temperature_overload_steps_down():
+    load = Load()
+    load.temperature = 85.0
+    governor = make_governor(load)
+    assert len(run(governor, 0.0, 5.0, 30.0)) == 1
+
+def test_relaxed_steps_back_up_after_up_hold():
+    load = Load()
+    governor = make_governor(load)
+    run(governor, 0.0, 5.0, 5.0)
+    assert governor.level == 1
+    load.cpu = 0.1
+    assert run(governor, 5.0, 5.0, 15.0) == []
+    assert run(governor, 10.0, 10.0, 15.0) == [BASE]
+    assert governor.level == 0
+
+def test_disabling_restores_base_level():
+    governor = make_governor(Load())
+    run(governor, 0.0, 5.0, 5.0)
+    governor.apply_config(dict(copy.deepcopy(GOVERNOR_DEFAULTS), enabled=False))
+    assert governor.update(10.0, 0.01) == BASE
+    assert governor.update(10.1, 0.01) is None
+
+def test_hold_keeps_previous_level_after_failed_switch():
+    governor = make_governor(Load())
+    run(governor, 0.0, 5.0, 5.0)
+    governor.hold(BASE)
+    assert governor.current == BASE
+    assert governor.window_start is None
+
+@pytest.fixture
+def camera(monkeypatch, make_state_manager):
+    state_manager = make_state_manager()
+    governor_config = dict(copy.deepcopy(GOVERNOR_DEFAULTS), enabled=True)
+    camera = ZEDCameraInput(None, state_manager, {"resolution": BASE.resolution, "fps": BASE.fps,
+                                                  "depth_mode": BASE.depth_mode, "governor": governor_config})
+    camera.governor.cpu_load = lambda: 0.5
+    camera.governor.temperature = lambda: None
+    camera.switched = []
+    monkeypatch.setattr(camera, "_switch_level", camera.switched.append)
+    return camera
+
+def test_camera_switch_waits_for_neutral_motor(camera):
+    moving = {"motor_value": 120}
+    now, pending = 0.0, False
+    for _ in range(30):
+        now += 0.2
+        pending = camera._update_governor(moving, now, 0.01)
+    assert pending and camera.switch_pending
+    assert camera.switched == []
+    assert not camera._update_governor({"motor_value": 90}, now + 0.2, 0.01)
+    assert camera.switched == [CameraLevel.from_config(GOVERNOR_DEFAULTS["levels"][0])]
+    assert not camera.switch_pending
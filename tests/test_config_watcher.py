@@ -0,0 +1,76 @@
+import copy
+import os
+from typing import Dict, List
+import pytest
+from application.config_watcher import ConfigWatcher
+from application.runtime_config import RuntimeConfig
+from infrastructure.config_manager import FileConfigManager
+
+class FakeProcessManager:
+    def __init__(self):
+        self.restarted: List[str] = []
+        self.scheduling: List[Dict] = []
+        self.effective_scheduling: Dict = {}
+
+    def restart(self, name: str) -> None:
+        self.restarted.append(name)
+
+    def configure_scheduling(self, config: Dict) -> None:
+        self.scheduling.append(config)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "config.yaml")
+
+@pytest.fixture
+def config():
+    return FileConfigManager(CONFIG_PATH).get_config()
+
+@pytest.fixture
+def watcher(make_state_manager):
+    state_manager = make_state_manager()
+    return ConfigWatcher(None, RuntimeConfig(state_manager), state_manager, FakeProcessManager())
+
+def changed(config: Dict, path: tuple, value) -> Dict:
+    new_config = copy.deepcopy(config)
+    section = new_config
+    for key in path[:-1]:
+        section = section[key]
+    section[path[-1]] = value
+    return new_config
+
+def test_unchanged_config_publishes_nothing(watcher, config):
+    generation = watcher.runtime_config.generation.value
+    watcher.apply(config, copy.deepcopy(config))
+    assert watcher.runtime_config.generation.value == generation
+    assert watcher.process_manager.restarted == []
+
+def test_hot_setting_published_without_restart(watcher, config):
+    new_config = changed(config, ("gamepad", "deadzone"), 0.1)
+    watcher.apply(config, new_config)
+    assert watcher.runtime_config.current()["gamepad"]["deadzone"] == 0.1
+    assert "config" not in watcher.state_manager.get_state()
+    assert watcher.process_manager.restarted == []
+
+def test_depth_threshold_goes_to_state(watcher, config):
+    watcher.apply(config, changed(config, ("zed", "depth_threshold"), 1.25))
+    assert watcher.state_manager.get_state()["depth_threshold"] == 1.25
+
+def test_restart_setting_restarts_its_process(watcher, config):
+    new_config = changed(config, ("arduino", "baud_rate"), 115200)
+    watcher.apply(config, new_config)
+    assert watcher.process_manager.restarted == ["arduino"]
+
+def test_remote_key_file_restarts_remote(watcher, config):
+    watcher.apply(config, changed(config, ("remote", "key_file"), "config/remote.key"))
+    assert watcher.process_manager.restarted == ["remote"]
+
+def test_scheduling_change_reconfigures(watcher, config):
+    new_config = changed(config, ("scheduling",), {"zed": {"cpus": [1], "nice": -5}})
+    watcher.apply(config, new_config)
+    assert watcher.process_manager.scheduling == [new_config["scheduling"]]
+    assert watcher.process_manager.restarted == []
+
+def test_unsupported_change_only_warns(watcher, config, caplog):
+    new_config = changed(config, ("logging", "file"), "logs/other.log")
+    watcher.apply(config, new_config)
+    assert watcher.process_manager.restarted == []
+    assert "logging.file takes effect after a full restart" in caplog.text
@@ -0,0 +1,99 @@
+import json
+import os
+import numpy as np
+import pytest
+from application.car_controller import APPLIED_FIELDS
+from application.shared_slot import SharedSlot
+from infrastructure import dataset_logger
+from infrastructure.dataset_logger import DEPTH_FAR, MANIFEST_FILE, DatasetLogger
+from infrastructure.session_reader import SessionReader
+
+def fake_jpeg(frame, quality: int) -> bytes:
+    # cv2 в тестах не нужен: читатель отдаёт байты JPEG как есть
+    return b"\xff\xd8" + bytes([int(frame[0, 0, 0]), quality]) + b"\xff\xd9"
+
+@pytest.fixture
+def logger_factory(tmp_path, monkeypatch, make_state_manager):
+    monkeypatch.setattr(dataset_logger, "encode_jpeg", fake_jpeg)
+    created = []
+
+    def create(**overrides) -> DatasetLogger:
+        config = {"output_dir": str(tmp_path), "rate": 0.0, "quality": 80, "depth_step": 2, "chunk_bytes": 4096,
+                  "batch_bytes": 1024, "sync_interval": 0.05, "max_pending": 64}
+        config.update(overrides)
+        command_slot = SharedSlot(APPLIED_FIELDS)
+        logger = DatasetLogger(config, make_state_manager(), command_slot, {"camera_id": 0, "fps": 30})
+        created.append(logger)
+        return logger
+
+    yield create
+    for logger in created:
+        logger.close()
+
+def frame(value: int):
+    image = np.full((8, 12, 4), value, dtype=np.uint8)
+    depth = np.full((8, 12), 1.5, dtype=np.float32)
+    depth[0, 0] = np.nan
+    depth[0, 2] = np.inf
+    return image, depth
+
+def test_round_trip_through_session_reader(logger_factory):
+    logger = logger_factory()
+    logger.command_slot.write(100.0, 99.5, 0.5, 0.0, -0.25, 120, 60)
+    logger.sync(True)
+    session_dir = logger.session.session_dir
+    for number in range(20):
+        image, depth = frame(number)
+        logger.log(image, depth, 100.0 + number / 10, {"mode": "zed"})
+    logger.sync(False)
+    logger.close()
+
+    with open(os.path.join(session_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    assert manifest["complete"] and manifest["records"] == 20 and manifest["dropped"] == 0
+    assert manifest["chunks"] > 1
+    assert manifest["image"]["size"] == [12, 8] and manifest["depth"]["size"] == [6, 4]
+
+    with SessionReader(session_dir) as reader:
+        assert reader.kind == "dataset"
+        assert len(reader) == 20
+        assert list(reader.frame_numbers) == list(range(20))
+        record = reader.record_at(100.72)
+        assert record.frame == 7
+        assert bytes(record.jpeg) == fake_jpeg(frame(7)[0], 80)
+        assert record.depth.shape == (4, 6)
+        assert record.depth[0, 0] == 0 and record.depth[0, 1] == DEPTH_FAR and record.depth[1, 1] == 1500
+        assert record.meta["state"] == {"mode": "zed"}
+        assert record.meta["motor_value"] == 120
+        assert reader.command(7)["steering"] == -0.25
+        assert [record.frame for record in reader.iter_records(0, 20, 5)] == [0, 5, 10, 15]
+
+def test_rate_limits_records(logger_factory):
+    logger = logger_factory(rate=2.0)
+    logger.sync(True)
+    session_dir = logger.session.session_dir
+    for number in range(20):
+        image, depth = frame(number)
+        logger.log(image, depth, 100.0 + number * 0.25, {})
+    logger.sync(False)
+    logger.close()
+    with SessionReader(session_dir) as reader:
+        assert list(reader.timestamps) == [100.0 + second * 0.5 for second in range(10)]
+
+def test_stop_does_not_wait_for_writer_and_sessions_do_not_collide(logger_factory):
+    logger = logger_factory()
+    logger.sync(True)
+    first = logger.session.session_dir
+    image, depth = frame(1)
+    logger.log(image, depth, 1.0, {})
+    logger.sync(False)
+    logger.sync(True)
+    second = logger.session.session_dir
+    logger.log(image, depth, 2.0, {})
+    logger.sync(False)
+    logger.close()
+    assert first != second
+    for session_dir in (first, second):
+        with SessionReader(session_dir) as reader:
+            assert len(reader) == 1
+            assert reader.manifest["complete"]
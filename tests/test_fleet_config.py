@@ -0,0 +1,56 @@
+import copy
+import os
+import pytest
+from infrastructure.config_manager import FileConfigManager, fleet_conflicts, load_fleet_config
+
+FLEET_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "fleet.yaml")
+
+def car_config(index: int) -> dict:
+    config = copy.deepcopy(FileConfigManager("missing.yaml").get_config())
+    config["arduino"]["port"] = f"/dev/ttyUSB{index}"
+    config["gamepad"]["joystick_index"] = index
+    config["zed"]["camera_id"] = index
+    config["zed"]["output_dir"] = f"logs/car{index}"
+    config.setdefault("dataset", {"enabled": False})["output_dir"] = f"datasets/car{index}"
+    config["tuning"] = {"file": f"config/tuned_car{index}.yaml"}
+    return config
+
+def test_distinct_cars_have_no_conflicts():
+    assert fleet_conflicts({"car1": car_config(1), "car2": car_config(2)}) == []
+
+def test_shared_resources_reported():
+    first, second, third = car_config(1), car_config(2), car_config(3)
+    second["arduino"]["port"] = first["arduino"]["port"]
+    third["arduino"]["port"] = first["arduino"]["port"]
+    second["zed"]["camera_id"] = first["zed"]["camera_id"]
+    assert fleet_conflicts({"car1": first, "car2": second, "car3": third}) == [
+        "arduino.port=/dev/ttyUSB1 is shared by car1, car2, car3",
+        "zed.camera_id=1 is shared by car1, car2",
+    ]
+
+def test_unused_devices_do_not_conflict():
+    first, second = car_config(1), car_config(2)
+    second["gamepad"]["joystick_index"] = first["gamepad"]["joystick_index"]
+    second["input"]["devices"] = ["zed"]
+    second["arduino"]["port"] = first["arduino"]["port"]
+    second["arduino"]["backend"] = "log"
+    assert fleet_conflicts({"car1": first, "car2": second}) == []
+
+def test_serial_number_replaces_port():
+    first, second = car_config(1), car_config(2)
+    first["arduino"]["port"] = second["arduino"]["port"] = "/dev/ttyUSB*"
+    first["arduino"]["serial_number"] = "A1"
+    second["arduino"]["serial_number"] = "A2"
+    assert fleet_conflicts({"car1": first, "car2": second}) == []
+    second["arduino"]["serial_number"] = "A1"
+    assert fleet_conflicts({"car1": first, "car2": second}) == ["arduino.serial_number=A1 is shared by car1, car2"]
+
+def test_shipped_fleet_config_loads():
+    fleet = load_fleet_config(FLEET_PATH)
+    assert [car["name"] for car in fleet["cars"]] == ["car1", "car2"]
+
+def test_duplicate_car_names_rejected(tmp_path):
+    path = tmp_path / "fleet.yaml"
+    path.write_text("cars:\n  - {name: car1, config: a.yaml}\n  - {name: car1, config: b.yaml}\n")
+    with pytest.raises(ValueError, match="duplicated"):
+        load_fleet_config(str(path))
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from application.free_space import FreeSpaceSteering
+from infrastructure.config_manager import FREE_SPACE_DEFAULTS
+
+THRESHOLD = 0.5
+
+def make_steering(**overrides) -> FreeSpaceSteering:
+    return FreeSpaceSteering({**FREE_SPACE_DEFAULTS, "smoothing": 0.0, **overrides})
+
+def open_field(height: int = 64, width: int = 96, distance: float = 3.0) -> np.ndarray:
+    return np.full((height, width), distance, dtype=np.float32)
+
+def test_open_field_drives_straight():
+    steering = make_steering()
+    speed, steer = steering.steer(open_field(), THRESHOLD)
+    assert steer == 0.0
+    span = FREE_SPACE_DEFAULTS["max_range"] - THRESHOLD
+    expected = FREE_SPACE_DEFAULTS["min_speed"] + (FREE_SPACE_DEFAULTS["max_speed"] -
+                                                   FREE_SPACE_DEFAULTS["min_speed"]) * (3.0 - THRESHOLD) / span
+    assert speed == pytest.approx(expected)
+    assert steering.sector_clearance.shape == (FREE_SPACE_DEFAULTS["sectors"],)
+
+def test_steers_away_from_obstacle():
+    steering = make_steering()
+    depth = open_field()
+    depth[:, :60] = 0.3
+    speed, steer = steering.steer(depth, THRESHOLD)
+    assert steer > 0.5
+    # На повороте скорость ниже, чем на прямой
+    assert 0.0 < speed < steering.steer(open_field(), THRESHOLD)[0]
+
+def test_blocked_everywhere_stops():
+    speed, _ = make_steering().steer(open_field(distance=0.2), THRESHOLD)
+    assert speed == 0.0
+
+def test_single_outliers_ignored():
+    depth = open_field()
+    # Ближние выбросы стерео в двух строках полосы
+    depth[22, :] = 0.1
+    depth[26, :] = 0.1
+    speed, steer = make_steering().steer(depth, THRESHOLD)
+    assert speed > 0.0 and steer == 0.0
+
+def test_invalid_and_far_pixels():
+    steering = make_steering(sectors=3)
+    depth = open_field()
+    depth[:, :32] = np.nan
+    depth[:, 64:] = np.inf
+    clearance = steering.sector_clearances(depth)
+    # Без данных — занято, +inf — дальше max_range
+    assert clearance.tolist() == [0.0, 3.0, FREE_SPACE_DEFAULTS["max_range"]]
+
+def test_smoothing_moves_steering_gradually():
+    steering = make_steering(smoothing=0.5)
+    depth = open_field()
+    depth[:, :60] = 0.3
+    _, first = steering.steer(depth, THRESHOLD)
+    _, second = steering.steer(depth, THRESHOLD)
+    assert 0.0 < first < second
+
+def test_band_narrower_than_sectors():
+    steering = make_steering(sectors=9, col_step=1)
+    depth = open_field(width=3)
+    depth[:, :2] = 0.2
+    clearance = steering.sector_clearances(depth)
+    assert clearance.tolist() == pytest.approx([0.2] * 6 + [3.0] * 3)
+    speed, steer = steering.steer(depth, THRESHOLD)
+    assert speed > 0.0 and steer > 0.0
+
+@pytest.mark.parametrize("shape", [(1, 96), (64, 0)])
+def test_empty_band_stops(shape):
+    steering = make_steering()
+    speed, _ = steering.steer(np.full(shape, 3.0, dtype=np.float32), THRESHOLD)
+    assert speed == 0.0
+    assert steering.sector_clearance.tolist() == [0.0] * FREE_SPACE_DEFAULTS["sectors"]
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from application.metrics import Counter
+from infrastructure import jpeg_recorder
+from infrastructure.jpeg_recorder import CHUNK_NAME, INDEX_FILE, INDEX_RECORD, META_FILE, JpegSequenceRecorder
+
+class FakeStateManager:
+    def __init__(self):
+        self.state = {}
+
+    def update_state(self, **kwargs) -> None:
+        self.state.update(kwargs)
+
+    def get_state(self):
+        return dict(self.state)
+
+def fake_jpeg(frame, quality: int) -> bytes:
+    return b"\xff\xd8" + bytes([int(frame[0, 0, 0]), quality]) + b"\xff\xd9"
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    monkeypatch.setattr(jpeg_recorder, "encode_jpeg", fake_jpeg)
+    recorder = JpegSequenceRecorder(str(tmp_path), FakeStateManager(), {"quality": 75, "workers": 2, "pool": "thread",
+                                                                        "chunk_frames": 10, "max_pending": 64})
+    recorder.frames_written = Counter([0.0], 0)
+    recorder.frames_dropped = Counter([0.0], 0)
+    yield recorder
+    recorder.close()
+
+def frame(value: int):
+    return np.full((6, 8, 4), value, dtype=np.uint8)
+
+def read_meta(session_dir: str):
+    with open(os.path.join(session_dir, META_FILE)) as f:
+        return json.load(f)
+
+def read_index(session_dir: str):
+    with open(os.path.join(session_dir, INDEX_FILE), "rb") as f:
+        data = f.read()
+    return [INDEX_RECORD.unpack_from(data, offset) for offset in range(0, len(data), INDEX_RECORD.size)]
+
+def test_frames_written_in_chunks_with_index(recorder):
+    recorder.sync_recording(True)
+    session_dir = recorder.output_path
+    for number in range(25):
+        recorder.record_frame(frame(number), 100.0 + number)
+    recorder.sync_recording(False)
+    recorder.close()
+
+    index = read_index(session_dir)
+    assert [entry[0] for entry in index] == list(range(25))
+    assert [entry[2] for entry in index] == [number // 10 for number in range(25)]
+    for number, timestamp, chunk, offset, length in index:
+        assert timestamp == 100.0 + number
+        with open(os.path.join(session_dir, CHUNK_NAME.format(chunk)), "rb") as f:
+            f.seek(offset)
+            assert f.read(length) == fake_jpeg(frame(number), 75)
+    meta = read_meta(session_dir)
+    assert (meta["frames"], meta["width"], meta["height"], meta["quality"]) == (25, 8, 6, 75)
+    assert meta["complete"] and meta["frames_failed"] == 0
+    assert recorder.frames_written.values[0] == 25 and recorder.frames_dropped.values[0] == 0
+    assert recorder.state_manager.state["recording"] is False
+
+def test_full_queue_drops_frames_instead_of_waiting(recorder, monkeypatch):
+    release = threading.Event()
+
+    def slow_jpeg(frame, quality: int) -> bytes:
+        release.wait(5)
+        return fake_jpeg(frame, quality)
+
+    monkeypatch.setattr(jpeg_recorder, "encode_jpeg", slow_jpeg)
+    recorder.max_pending = 2
+    recorder.sync_recording(True)
+    session_dir = recorder.output_path
+    for number in range(5):
+        recorder.record_frame(frame(number), float(number))
+    release.set()
+    recorder.sync_recording(False)
+    recorder.close()
+    assert [entry[0] for entry in read_index(session_dir)] == [0, 1]
+    assert recorder.frames_dropped.values[0] == 3
+
+def test_unfinished_session_readable_while_recording(recorder):
+    recorder.sync_recording(True)
+    session_dir = recorder.output_path
+    assert not read_meta(session_dir)["complete"]
+    for number in range(3):
+        recorder.record_frame(frame(number), float(number))
+    deadline = time.monotonic() + 5
+    while recorder.frames_written.values[0] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Очередь опустела: индекс уже на диске, хотя запись идёт
+    assert [entry[0] for entry in read_index(session_dir)] == [0, 1, 2]
+
+def test_encoding_failure_counted_in_meta(recorder, monkeypatch):
+    def broken_jpeg(frame, quality: int) -> bytes:
+        if frame[0, 0, 0] == 1:
+            raise RuntimeError("JPEG encoding failed")
+        return fake_jpeg(frame, quality)
+
+    monkeypatch.setattr(jpeg_recorder, "encode_jpeg", broken_jpeg)
+    recorder.sync_recording(True)
+    session_dir = recorder.output_path
+    for number in range(3):
+        recorder.record_frame(frame(number), float(number))
+    recorder.sync_recording(False)
+    recorder.close()
+    assert [entry[0] for entry in read_index(session_dir)] == [0, 2]
+    assert read_meta(session_dir)["frames_failed"] == 1
+    assert recorder.frames_dropped.values[0] == 0
@@ -0,0 +1,79 @@
+import os
+from multiprocessing import Event, Process
+import pytest
+from application.memory_monitor import MemoryMonitor
+from infrastructure.config_manager import MEMORY_DEFAULTS
+from processes.process_manager import ProcessManager
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = MemoryMonitor()
+    monitor.configure({**MEMORY_DEFAULTS, "enabled": True, "interval": 0.0, "warmup": 0.0,
+                       "output_dir": str(tmp_path)})
+    yield monitor
+    monitor.stop()
+
+class MonitoredProcess(Process):
+    def __init__(self, monitor: MemoryMonitor, stop_event):
+        super().__init__()
+        self.monitor = monitor
+        self.stop_event = stop_event
+
+    def run(self) -> None:
+        self.monitor.begin("zed")
+        try:
+            while True:
+                self.monitor.poll()
+                if self.stop_event.wait(0.01):
+                    break
+        finally:
+            self.monitor.stop()
+
+def read_report(monitor: MemoryMonitor) -> str:
+    with open(monitor.report_path()) as f:
+        return f.read()
+
+def test_report_names_growing_site(monitor):
+    monitor.begin("ui")
+    monitor.poll()
+    assert monitor.baseline is not None and not os.path.exists(monitor.report_path())
+    leak = [bytearray(1024) for _ in range(2000)]
+    monitor.poll()
+    monitor.analysis.join()
+    report = read_report(monitor)
+    assert report.startswith(f"ui (pid {os.getpid()})")
+    assert "test_memory_monitor.py" in report.split("RSS history")[0]
+    assert len(leak) == 2000
+
+def test_alert_written_to_state(monitor, make_state_manager):
+    monitor.config["alert_mb"] = 1.0
+    state_manager = make_state_manager()
+    monitor.begin("ui", state_manager)
+    monitor.poll()
+    leak = [bytearray(4096) for _ in range(2048)]
+    monitor.poll()
+    monitor.analysis.join()
+    alert = state_manager.get_state().get("memory_alert")
+    assert alert and alert.startswith("ui: RSS +")
+    assert len(leak) == 2048
+
+def test_disabled_monitor_does_nothing(tmp_path):
+    monitor = MemoryMonitor()
+    monitor.configure({**MEMORY_DEFAULTS, "output_dir": str(tmp_path)})
+    monitor.begin("ui")
+    monitor.poll()
+    monitor.stop()
+    assert not monitor.active and monitor.baseline is None
+    assert os.listdir(tmp_path) == []
+
+def test_process_writes_final_report_on_stop(monitor):
+    # Снимок раз в час: отчёт появится только из итогового замера в stop()
+    monitor.config["interval"] = 3600.0
+    stop_event = Event()
+    process_manager = ProcessManager(None, None, None, None)
+    process_manager.add_process("zed", MonitoredProcess(monitor, stop_event))
+    process_manager.start()
+    stop_event.set()
+    process_manager.stop()
+    with open(os.path.join(monitor.config["output_dir"], "zed.txt")) as f:
+        assert f.read().startswith(f"zed (pid {process_manager.processes['zed'].pid})")
@@ -0,0 +1,73 @@
+import os
+from multiprocessing import Process
+import pytest
+from application.metrics import LATENCY_BUCKETS, MetricsRegistry, build_schema, loop_sections
+
+SCHEMA = {
+    "zed": {"counters": ["grab_failures_total"], "gauges": ["fps"], "histograms": {"grab_seconds": [0.01, 0.1]}},
+    "processes": {"gauges": ["zed"]},
+}
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry.create(f"test_metrics_{os.getpid()}", SCHEMA)
+    yield registry
+    registry.close()
+
+def test_histogram_buckets(registry):
+    histogram = registry.section("zed").histogram("grab_seconds")
+    for value in (0.005, 0.01, 0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    bounds, buckets, total = registry.snapshot()["zed"]["grab_seconds"]
+    assert bounds == (0.01, 0.1)
+    # Граница входит в свою корзину (le), последняя корзина — +Inf
+    assert buckets == [2.0, 2.0, 2.0]
+    assert total == pytest.approx(2.665)
+    count, total = registry.histogram_totals("zed", "grab_seconds")
+    assert count == 6 and total == pytest.approx(2.665)
+
+def test_counters_and_gauges(registry):
+    section = registry.section("zed")
+    section.counter("grab_failures_total").inc()
+    section.counter("grab_failures_total").inc(2)
+    section.gauge("fps").set(15.0)
+    section.gauge("fps").set(30.0)
+    snapshot = registry.snapshot()
+    assert snapshot["zed"]["grab_failures_total"] == 3.0
+    assert snapshot["zed"]["fps"] == 30.0
+    assert registry.kind("zed", "fps") == "gauge"
+
+def test_wrong_kind_or_section_rejected(registry):
+    with pytest.raises(KeyError):
+        registry.section("zed").gauge("grab_failures_total")
+    with pytest.raises(KeyError):
+        registry.section("lidar")
+    assert not registry.section("zed").has("missing")
+
+def _observe_in_child(name: str) -> None:
+    registry = MetricsRegistry.attach(name)
+    registry.section("zed").histogram("grab_seconds").observe(0.05)
+    registry.close()
+
+def test_attach_sees_writes_from_another_process(registry):
+    child = Process(target=_observe_in_child, args=(registry.name,))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+    reader = MetricsRegistry.attach(registry.name)
+    try:
+        assert reader.schema == SCHEMA
+        assert reader.histogram_totals("zed", "grab_seconds") == (1.0, 0.05)
+    finally:
+        reader.close()
+
+def test_build_schema_loop_sections():
+    schema = build_schema(["zed", "gamepad"], ["zed", "gamepad", "input", "command", "arduino", "ui"])
+    assert schema["zed"]["histograms"]["grab_seconds"] == LATENCY_BUCKETS
+    assert "recorder" in schema and "stream" not in schema
+    assert schema["processes"]["gauges"] == ["zed", "gamepad", "input", "command", "arduino", "ui"]
+    registry = MetricsRegistry.create(f"test_schema_{os.getpid()}", schema)
+    try:
+        assert loop_sections(registry) == ["zed", "gamepad", "input", "command", "arduino"]
+    finally:
+        registry.close()
@@ -0,0 +1,77 @@
+import os
+import queue
+from multiprocessing import Event, Value
+import pytest
+from application.metrics import MetricsRegistry
+from processes.metrics_process import MetricsProcess, MetricsSource
+
+SCHEMA = {
+    "zed": {"counters": ["grab_failures_total"], "histograms": {"grab_seconds": [0.01, 0.1]}},
+    "processes": {"gauges": ["zed", "gone"]},
+}
+
+class FakeStateManager:
+    def __init__(self):
+        self.error_count = Value('L', 3)
+
+@pytest.fixture
+def registries():
+    created = []
+
+    def create(car: str) -> MetricsRegistry:
+        registry = MetricsRegistry.create(f"test_exporter_{car}_{os.getpid()}", SCHEMA)
+        created.append(registry)
+        return registry
+
+    yield create
+    for registry in created:
+        registry.close()
+
+def samples(text: str, name: str):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+def test_render_prometheus_text(registries):
+    metrics = registries("car1")
+    histogram = metrics.section("zed").histogram("grab_seconds")
+    for value in (0.005, 0.05, 0.5):
+        histogram.observe(value)
+    metrics.section("zed").counter("grab_failures_total").inc()
+    metrics.section("processes").gauge("zed").set(os.getpid())
+    commands = queue.Queue()
+    commands.put("command")
+    exporter = MetricsProcess(Event(), "127.0.0.1", 0, [MetricsSource(metrics, {"command": commands})],
+                              FakeStateManager())
+    text = exporter.render()
+    assert text.endswith("\n")
+    assert samples(text, "car_zed_grab_seconds") == [
+        'car_zed_grab_seconds_bucket{le="0.01"} 1.0',
+        'car_zed_grab_seconds_bucket{le="0.1"} 2.0',
+        'car_zed_grab_seconds_bucket{le="+Inf"} 3.0',
+        "car_zed_grab_seconds_sum 0.555",
+        "car_zed_grab_seconds_count 3.0",
+    ]
+    assert "# TYPE car_zed_grab_seconds histogram" in text
+    assert samples(text, "car_zed_grab_failures_total") == ["car_zed_grab_failures_total 1.0"]
+    assert samples(text, "car_queue_depth") == ['car_queue_depth{queue="command"} 1']
+    assert samples(text, "car_process_cpu_seconds_total")[0].startswith('car_process_cpu_seconds_total{process="zed"}')
+    # Процесс без PID не экспортируется
+    assert 'process="gone"' not in text
+    # Без state_manager у источника счётчика ошибок нет
+    assert "car_errors_total" not in text
+
+def test_fleet_sources_share_families(registries):
+    first, second = registries("car1"), registries("car2")
+    first.section("zed").counter("grab_failures_total").inc()
+    state_manager = FakeStateManager()
+    exporter = MetricsProcess(Event(), "127.0.0.1", 0, [
+        MetricsSource(first, state_manager=state_manager, car="car1"),
+        MetricsSource(second, state_manager=state_manager, car="car2"),
+    ], state_manager)
+    text = exporter.render()
+    lines = text.splitlines()
+    # Строки семейства идут подряд после единственных HELP и TYPE
+    assert lines.count("# TYPE car_zed_grab_failures_total counter") == 1
+    start = lines.index("# TYPE car_zed_grab_failures_total counter")
+    assert lines[start + 1:start + 3] == ['car_zed_grab_failures_total{car="car1"} 1.0',
+                                          'car_zed_grab_failures_total{car="car2"} 0.0']
+    assert samples(text, "car_errors_total") == ['car_errors_total{car="car1"} 3', 'car_errors_total{car="car2"} 3']
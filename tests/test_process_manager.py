@@ -0,0 +1,54 @@
+import signal
+import time
+from multiprocessing import Event, Process
+import pytest
+from processes.process_manager import ProcessManager
+
+class FinallyWorker(Process):
+    """Как процессы машины: цикл до stop_event, уборка в finally."""
+
+    def __init__(self, stop_event, path: str, ignore_stop: bool = False):
+        super().__init__()
+        self.stop_event = stop_event
+        self.path = path
+        self.ignore_stop = ignore_stop
+
+    def run(self) -> None:
+        try:
+            while self.ignore_stop or not self.stop_event.is_set():
+                time.sleep(0.01)
+        finally:
+            with open(self.path, "w") as f:
+                f.write("closed")
+
+def make_manager(**processes) -> ProcessManager:
+    manager = ProcessManager(None, None, None, None)
+    for name, process in processes.items():
+        manager.add_process(name, process)
+    return manager
+
+@pytest.fixture
+def stop_event():
+    return Event()
+
+def test_stop_lets_processes_run_finally(tmp_path, stop_event):
+    paths = [tmp_path / "zed", tmp_path / "arduino"]
+    manager = make_manager(zed=FinallyWorker(stop_event, str(paths[0])),
+                           arduino=FinallyWorker(stop_event, str(paths[1])))
+    manager.start()
+    stop_event.set()
+    manager.stop()
+    assert [path.read_text() for path in paths] == ["closed", "closed"]
+    assert [process.exitcode for process in manager.processes.values() if process] == [0, 0]
+
+def test_hung_process_terminated_after_join_timeout(tmp_path, stop_event):
+    path = tmp_path / "hung"
+    manager = make_manager(hung=FinallyWorker(stop_event, str(path), ignore_stop=True))
+    manager.join_timeout = 0.2
+    manager.start()
+    stop_event.set()
+    started = time.monotonic()
+    manager.stop()
+    assert time.monotonic() - started < 2.0
+    assert manager.processes["hung"].exitcode == -signal.SIGTERM
+    assert not path.exists()
@@ -0,0 +1,74 @@
+import queue
+import pytest
+from application.readiness import FAILED, PENDING, READY, TIMEOUT, ReadinessBarrier, report_connection
+from infrastructure.arduino import ARDUINO_QUEUE_SIZE, QueuedArduinoAdapter
+
+@pytest.fixture
+def make_barrier(make_state_manager):
+    def make() -> ReadinessBarrier:
+        return ReadinessBarrier({"zed": True, "arduino": True, "gamepad": False}, make_state_manager())
+
+    return make
+
+def test_ready_when_required_devices_ready(make_barrier):
+    barrier = make_barrier()
+    barrier.report("zed", READY)
+    assert not barrier.is_ready()
+    barrier.report("arduino", READY)
+    assert barrier.is_ready()
+    assert barrier.state_manager.get_state()["degraded_devices"] == ["gamepad"]
+
+def test_optional_device_failure_keeps_ready(make_barrier):
+    barrier = make_barrier()
+    barrier.report("zed", READY)
+    barrier.report("arduino", READY)
+    barrier.report("gamepad", TIMEOUT, "no joystick")
+    assert barrier.is_ready()
+
+def test_required_device_failure_clears_ready(make_barrier):
+    barrier = make_barrier()
+    barrier.report("zed", READY)
+    barrier.report("arduino", READY)
+    time_to_ready = barrier.time_to_ready.value
+    barrier.report("arduino", FAILED, "port lost")
+    assert not barrier.is_ready()
+    assert "arduino" in barrier.state_manager.get_state()["degraded_devices"]
+    # Перезапущенный процесс сначала сообщает pending, затем ready
+    barrier.report("arduino", PENDING)
+    assert not barrier.is_ready()
+    barrier.report("arduino", READY)
+    assert barrier.is_ready()
+    assert barrier.time_to_ready.value == time_to_ready
+
+class Port:
+    def __init__(self):
+        self.connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+def test_readiness_follows_serial_port(make_barrier):
+    barrier = make_barrier()
+    barrier.report("zed", READY)
+    port = Port()
+    connected = report_connection(barrier, "arduino", port, None)
+    assert not connected and barrier.snapshot()["arduino"] == "failed"
+    port.connected = True
+    assert report_connection(barrier, "arduino", port, connected)
+    assert barrier.is_ready()
+    port.connected = False
+    assert not report_connection(barrier, "arduino", port, True)
+    assert not barrier.is_ready()
+
+def test_queued_adapter_keeps_latest_commands():
+    commands = queue.Queue(ARDUINO_QUEUE_SIZE)
+    adapter = QueuedArduinoAdapter(commands)
+    for motor in range(100):
+        adapter.send_command(motor, 90)
+    assert commands.qsize() == ARDUINO_QUEUE_SIZE
+    assert commands.get_nowait() == (100 - ARDUINO_QUEUE_SIZE, 90)
+
+def test_queued_adapter_rejects_out_of_range():
+    commands = queue.Queue(ARDUINO_QUEUE_SIZE)
+    QueuedArduinoAdapter(commands).send_command(181, 90)
+    assert commands.empty()
@@ -0,0 +1,130 @@
+import socket
+import time
+import pytest
+from infrastructure.remote_protocol import (FLAG_NEUTRAL, PACKET, SEQ_MODULO, TAG_SIZE, decode, encode, load_key,
+                                            seq_after)
+from infrastructure.udp_remote import UDPRemoteInput
+
+KEY = b"0123456789abcdef"
+SENDER = "192.168.1.20"
+
+@pytest.mark.parametrize("seq, last, expected", [
+    (5, 4, 1),
+    (10, 4, 6),
+    (4, 4, 0),
+    (3, 4, -1),
+    (0, SEQ_MODULO - 1, 1),
+    (2, SEQ_MODULO - 3, 5),
+    (SEQ_MODULO - 1, 0, -1),
+])
+def test_seq_after_wraps(seq, last, expected):
+    assert seq_after(seq, last) == expected
+
+def test_encode_decode_round_trip():
+    data = encode(7, 3, 0.5, 0.0, -0.25, flags=FLAG_NEUTRAL, timestamp_ns=123)
+    assert len(data) == PACKET.size
+    packet = decode(data)
+    assert (packet.flags, packet.session, packet.seq, packet.timestamp_ns) == (FLAG_NEUTRAL, 7, 3, 123)
+    assert (packet.speed, packet.brake, packet.steering) == (0.5, 0.0, -0.25)
+
+def test_signed_packets():
+    data = encode(7, 3, 0.5, 0.0, 0.0, key=KEY)
+    assert len(data) == PACKET.size + TAG_SIZE
+    assert decode(data, KEY) is not None
+    assert decode(data, b"another key") is None
+    assert decode(data[:PACKET.size], KEY) is None
+    tampered = bytearray(data)
+    tampered[PACKET.size - 1] ^= 1
+    assert decode(bytes(tampered), KEY) is None
+
+def test_non_finite_values_rejected():
+    assert decode(encode(7, 3, float("nan"), 0.0, 0.0)) is None
+    assert decode(encode(7, 3, 0.0, float("inf"), 0.0)) is None
+
+def test_load_key(tmp_path):
+    assert load_key("") is None
+    path = tmp_path / "remote.key"
+    path.write_bytes(KEY + b"\n")
+    assert load_key(str(path)) == KEY
+    path.write_bytes(b"\n")
+    with pytest.raises(ValueError):
+        load_key(str(path))
+
+@pytest.fixture
+def make_remote(make_state_manager):
+    def make(**kwargs) -> UDPRemoteInput:
+        return UDPRemoteInput("127.0.0.1", 0, make_state_manager(), timeout=0.25, **kwargs)
+
+    return make
+
+def receive(remote: UDPRemoteInput, data: bytes, now: float, sender: str = SENDER) -> None:
+    remote._receive(data, sender, time.time_ns(), now)
+
+def test_counts_lost_and_reordered_packets(make_remote):
+    remote = make_remote()
+    receive(remote, encode(1, 10, 0.1, 0.0, 0.0), 1.0)
+    receive(remote, encode(1, 13, 0.2, 0.0, 0.0), 1.01)
+    receive(remote, encode(1, 12, 0.3, 0.0, 0.0), 1.02)
+    receive(remote, encode(1, 13, 0.3, 0.0, 0.0), 1.03)
+    assert (remote.received, remote.lost, remote.reordered) == (2, 2, 2)
+    assert remote.latest.speed == pytest.approx(0.2)
+
+def test_sequence_wraps_around(make_remote):
+    remote = make_remote()
+    receive(remote, encode(1, SEQ_MODULO - 1, 0.1, 0.0, 0.0), 1.0)
+    receive(remote, encode(1, 0, 0.2, 0.0, 0.0), 1.01)
+    assert (remote.received, remote.lost, remote.reordered) == (2, 0, 0)
+
+def test_second_sender_waits_for_silence(make_remote):
+    remote = make_remote()
+    receive(remote, encode(1, 0, 0.1, 0.0, 0.0), 1.0)
+    receive(remote, encode(2, 0, 0.9, 0.0, 0.0), 1.1)
+    assert remote.session == 1
+    receive(remote, encode(2, 1, 0.9, 0.0, 0.0), 2.0)
+    assert remote.session == 2
+
+def test_past_session_replay_rejected(make_remote):
+    remote = make_remote()
+    receive(remote, encode(1, 0, 0.1, 0.0, 0.0), 1.0)
+    receive(remote, encode(2, 0, 0.2, 0.0, 0.0), 2.0)
+    # Записанные пакеты первой сессии после паузы второго пульта
+    receive(remote, encode(1, 50, 0.9, 0.0, 0.0), 3.0)
+    assert remote.session == 2
+    assert remote.latest.speed == pytest.approx(0.2)
+
+def test_allowed_senders(make_remote):
+    remote = make_remote(allowed_senders=["10.0.0.5"])
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0), 1.0)
+    assert remote.latest is None
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0), 1.0, sender="10.0.0.5")
+    assert remote.latest is not None
+
+def test_unsigned_packet_rejected_with_key(make_remote):
+    remote = make_remote(key=KEY)
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0), 1.0)
+    assert remote.latest is None and remote.invalid == 1
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0, key=KEY), 1.0)
+    assert remote.latest is not None
+
+def test_late_packets_dropped_only_with_max_age(make_remote):
+    stale = time.time_ns() - 2 * 10 ** 9
+    remote = make_remote(max_age=0.5)
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0, timestamp_ns=stale), 1.0)
+    assert remote.late == 1 and remote.latest is None
+    remote = make_remote()
+    receive(remote, encode(1, 0, 0.5, 0.0, 0.0, timestamp_ns=stale), 1.0)
+    assert remote.latest is not None
+
+def test_get_input_over_loopback(make_remote):
+    remote = make_remote()
+    remote.initialize()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            assert remote.get_input().speed == 0.0
+            sock.sendto(encode(1, 0, 0.7, 0.0, 2.0), ("127.0.0.1", remote.port))
+            command = remote.get_input()
+            assert (command.speed, command.steering) == (pytest.approx(0.7), 1.0)
+            sock.sendto(encode(1, 1, 0.7, 0.0, 0.0, flags=FLAG_NEUTRAL), ("127.0.0.1", remote.port))
+            assert remote.get_input().speed == 0.0
+    finally:
+        remote.close()
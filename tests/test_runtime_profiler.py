@@ -0,0 +1,71 @@
+import os
+import signal
+import time
+import pytest
+from application.runtime_profiler import RuntimeProfiler
+
+@pytest.fixture
+def profiler(tmp_path):
+    previous = signal.getsignal(signal.SIGUSR1)
+    profiler = RuntimeProfiler()
+    profiler.configure(["ui", "command"], str(tmp_path / "profiles"), 0.2, str(tmp_path / "profile.ctl"))
+    profiler.begin("ui")
+    yield profiler
+    profiler.stop()
+    signal.signal(signal.SIGUSR1, previous)
+
+def profiles(profiler: RuntimeProfiler):
+    if not os.path.isdir(profiler.output_dir):
+        return []
+    return sorted(os.listdir(profiler.output_dir))
+
+def test_request_toggles_only_the_named_process(profiler):
+    profiler.request(["command"])
+    profiler.poll()
+    assert profiler.profile is None
+    profiler.request(["ui"])
+    profiler.poll()
+    assert profiler.profile is not None
+    # Повторный запрос останавливает окно раньше времени
+    profiler.request(["ui"])
+    profiler.poll()
+    assert profiler.profile is None
+    assert len(profiles(profiler)) == 1
+    assert profiles(profiler)[0].startswith("ui_") and profiles(profiler)[0].endswith(".pstats")
+
+def test_window_stops_profiling(profiler):
+    profiler.request()
+    profiler.poll()
+    assert profiler.profile is not None
+    profiler.poll()
+    assert profiler.profile is not None
+    time.sleep(0.25)
+    profiler.poll()
+    assert profiler.profile is None
+    assert len(profiles(profiler)) == 1
+
+def test_signal_toggles_profiling(profiler):
+    os.kill(os.getpid(), signal.SIGUSR1)
+    assert profiler.signal_pending
+    profiler.poll()
+    assert profiler.profile is not None and not profiler.signal_pending
+
+def test_control_file_requests_processes(profiler):
+    with open(profiler.control_file, "w") as f:
+        f.write("ui\n")
+    profiler.poll_control_file()
+    assert not os.path.exists(profiler.control_file)
+    profiler.poll()
+    assert profiler.profile is not None
+
+def test_unconfigured_process_is_never_profiled(tmp_path):
+    previous = signal.getsignal(signal.SIGUSR1)
+    profiler = RuntimeProfiler()
+    profiler.configure(["ui"], str(tmp_path), 0.2, None)
+    try:
+        profiler.begin("stream")
+        profiler.request()
+        profiler.poll()
+        assert profiler.index is None and profiler.profile is None
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
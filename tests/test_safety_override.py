@@ -0,0 +1,94 @@
+import pytest
+from application.safety_override import ObstacleBrakeOverride, safety_enabled
+from core.entities.command import CarCommand
+from core.entities.gear import GearDirection
+
+class FakeClock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def make_override(make_state_manager):
+    def make(clock: FakeClock, **kwargs) -> ObstacleBrakeOverride:
+        return ObstacleBrakeOverride(make_state_manager(), brake_duration=0.5, brake_strength=1.0,
+                                     stale_timeout=0.5, clock=clock, wall_clock=clock, **kwargs)
+
+    return make
+
+def forward() -> GearDirection:
+    return GearDirection.FORWARD
+
+def reverse() -> GearDirection:
+    return GearDirection.REVERSE
+
+DRIVE = CarCommand(speed=0.8, brake=0.0, steering=0.3, timestamp=5.0)
+
+def test_clear_road_passes_command(make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now, 3.0, 0.6)
+    assert override.apply(DRIVE, forward) is DRIVE
+
+def test_obstacle_brakes_in_forward_gear_then_holds_neutral(make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now, 0.4, 0.6)
+    braked = override.apply(DRIVE, forward)
+    assert (braked.speed, braked.brake, braked.steering, braked.timestamp) == (0.0, 1.0, 0.3, 5.0)
+    clock.now += 0.6
+    override.publish_obstacle(clock.now, 0.4, 0.6)
+    held = override.apply(DRIVE, forward)
+    assert (held.speed, held.brake) == (0.0, 0.0)
+
+def test_obstacle_in_reverse_gear_holds_neutral_without_brake(make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now, 0.4, 0.6)
+    # Тормоз на задней передаче крутит мотор вперёд, к препятствию
+    command = override.apply(DRIVE, reverse)
+    assert (command.speed, command.brake, command.steering) == (0.0, 0.0, 0.3)
+
+def test_gear_direction_asked_only_when_intervening(make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now, 3.0, 0.6)
+
+    def fail() -> GearDirection:
+        raise AssertionError("gear direction must not be read on a clear road")
+
+    assert override.apply(DRIVE, fail) is DRIVE
+
+@pytest.mark.parametrize("direction", [forward, reverse])
+def test_stale_distance_holds_neutral(direction, make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now, 3.0, 0.6)
+    clock.now += 0.6
+    command = override.apply(DRIVE, direction)
+    assert (command.speed, command.brake) == (0.0, 0.0)
+    assert override.obstacle_detected()
+
+def test_missing_distance_holds_neutral(make_override):
+    override = make_override(FakeClock())
+    command = override.apply(DRIVE, forward)
+    assert (command.speed, command.brake) == (0.0, 0.0)
+
+def test_disabled_override_passes_command(make_override):
+    override = make_override(FakeClock(), enabled=False)
+    assert override.apply(DRIVE, forward) is DRIVE
+
+def test_brake_latency_includes_frame_age(make_override):
+    clock = FakeClock()
+    override = make_override(clock)
+    override.publish_obstacle(clock.now - 0.03, 0.4, 0.6)
+    clock.now += 0.01
+    override.apply(DRIVE, forward)
+    assert override.last_latency == pytest.approx(0.04)
+
+def test_safety_enabled_needs_camera():
+    assert safety_enabled({"safety": {"enabled": True}, "input": {"devices": ["gamepad", "zed"]}})
+    assert not safety_enabled({"safety": {"enabled": True}, "input": {"devices": ["gamepad"]}})
+    assert not safety_enabled({"safety": {"enabled": False}, "input": {"devices": ["zed"]}})
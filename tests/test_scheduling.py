@@ -0,0 +1,52 @@
+import os
+import pytest
+from processes import scheduling
+from processes.scheduling import SchedulingPolicy, apply_scheduling, parse_cpu_list
+
+@pytest.mark.parametrize("text, cpus", [
+    ("0", {0}),
+    ("0-3", {0, 1, 2, 3}),
+    ("0-1,4,6-7\n", {0, 1, 4, 6, 7}),
+    ("", set()),
+])
+def test_parse_cpu_list(text, cpus):
+    assert parse_cpu_list(text) == cpus
+
+@pytest.fixture
+def affinity_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduling, "online_cpus", lambda: {0, 1, 2, 3})
+    monkeypatch.setattr(scheduling, "_tasks", lambda pid: [pid])
+    monkeypatch.setattr(os, "sched_setaffinity", lambda tid, cpus: calls.append((tid, set(cpus))))
+    return calls
+
+def test_cpus_checked_against_host_not_caller(affinity_calls, monkeypatch):
+    # main уже закреплён на CPU 0, дочерний процесс всё равно получает CPU 2-3
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0})
+    apply_scheduling("zed", 4242, SchedulingPolicy(cpus=[2, 3]))
+    assert affinity_calls == [(4242, {2, 3})]
+
+def test_unavailable_cpus_dropped(affinity_calls):
+    apply_scheduling("zed", 4242, SchedulingPolicy(cpus=[3, 8]))
+    assert affinity_calls == [(4242, {3})]
+
+def test_no_available_cpus_keeps_affinity(affinity_calls):
+    apply_scheduling("zed", 4242, SchedulingPolicy(cpus=[8, 9]))
+    assert affinity_calls == []
+
+def test_applies_to_real_process():
+    cpus = sorted(os.sched_getaffinity(0))
+    result = apply_scheduling("test", os.getpid(), SchedulingPolicy(cpus=cpus[:1]))
+    try:
+        assert result["cpus"] == cpus[:1]
+        assert result["policy"] == "other"
+    finally:
+        os.sched_setaffinity(0, cpus)
+
+def test_realtime_without_privileges_falls_back(monkeypatch):
+    def deny(tid, policy, param):
+        raise PermissionError("denied")
+
+    monkeypatch.setattr(os, "sched_setscheduler", deny)
+    result = apply_scheduling("test", os.getpid(), SchedulingPolicy(policy="fifo", priority=10))
+    assert result["policy"] == "other"
@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import List
+import pytest
+from infrastructure.serial_connection import SerialConnection
+
+serial = pytest.importorskip("serial")
+
+class FakeHandle:
+    def __init__(self, failures: List[Exception]):
+        self.failures = failures
+        self.written: List[bytes] = []
+        self.output_resets = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        if self.failures:
+            raise self.failures.pop(0)
+        self.written.append(data)
+        return len(data)
+
+    def reset_output_buffer(self) -> None:
+        self.output_resets += 1
+
+    def close(self) -> None:
+        self.closed = True
+
+def connection_with(handle: FakeHandle) -> SerialConnection:
+    connection = SerialConnection("/dev/ttyFAKE", 9600)
+    connection.handle = handle
+    return connection
+
+def test_write_timeout_keeps_port_open():
+    handle = FakeHandle([serial.SerialTimeoutException("Write timeout")])
+    connection = connection_with(handle)
+    assert not connection.write(b"120,90\n")
+    assert connection.connected and connection.failed_handle is None
+    assert connection.write_timeouts == 1 and handle.output_resets == 1
+    # Недописанная строка не склеивается со следующей командой
+    assert connection.write(b"100,80\n")
+    assert connection.write(b"90,90\n")
+    assert handle.written == [b"\n100,80\n", b"90,90\n"]
+
+def test_serial_error_hands_port_to_reconnect():
+    handle = FakeHandle([serial.SerialException("device disconnected")])
+    connection = connection_with(handle)
+    assert not connection.write(b"120,90\n")
+    assert not connection.connected
+    assert connection.failed_handle is handle
+    assert connection.lost_at is not None
+    assert not connection.write(b"120,90\n")
+
+def test_missing_port_at_start_reconnects_in_background(monkeypatch, make_state_manager):
+    connection = SerialConnection("/dev/ttyFAKE", 9600, make_state_manager(), reconnect_initial=0.01)
+    handle = FakeHandle([])
+    plugged = threading.Event()
+
+    def fake_open() -> None:
+        if not plugged.is_set():
+            raise serial.SerialException("No port for /dev/ttyFAKE")
+        connection.handle, connection.port = handle, "/dev/ttyFAKE"
+
+    monkeypatch.setattr(connection, "_open", fake_open)
+    try:
+        assert not connection.open()
+        assert not connection.write(b"90,90\n")
+        assert not connection.state_manager.get_state()["serial"]["connected"]
+        # Кабель подключили после старта: порт находит фоновый поток
+        plugged.set()
+        deadline = time.monotonic() + 5
+        while not connection.state_manager.get_state()["serial"]["connected"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert connection.state_manager.get_state()["serial"]["reconnects"] == 1
+        assert connection.write(b"90,90\n") and handle.written == [b"90,90\n"]
+    finally:
+        connection.close()
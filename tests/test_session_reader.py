@@ -0,0 +1,61 @@
+import os
+import pytest
+from infrastructure.jpeg_recorder import CHUNK_NAME, INDEX_FILE, INDEX_RECORD, META_FILE
+from infrastructure.atomic_file import atomic_write_json
+from infrastructure.session_reader import SessionReader
+
+def jpeg_of(number: int) -> bytes:
+    return b"\xff\xd8" + bytes([number]) * (number + 1) + b"\xff\xd9"
+
+def write_jpeg_session(session_dir: str, frames: int, chunk_frames: int = 4) -> None:
+    """Сессия в формате JpegSequenceRecorder: куски JPEG подряд и index.bin."""
+    os.makedirs(session_dir)
+    offsets = {}
+    with open(os.path.join(session_dir, INDEX_FILE), "wb") as index:
+        for number in range(frames):
+            chunk = number // chunk_frames
+            jpeg = jpeg_of(number)
+            with open(os.path.join(session_dir, CHUNK_NAME.format(chunk)), "ab") as f:
+                f.write(jpeg)
+            offset = offsets.get(chunk, 0)
+            offsets[chunk] = offset + len(jpeg)
+            index.write(INDEX_RECORD.pack(number, 50.0 + number * 0.1, chunk, offset, len(jpeg)))
+    atomic_write_json(os.path.join(session_dir, META_FILE), {"version": 1, "format": "jpeg", "frames": frames})
+
+def test_jpeg_session_random_access(tmp_path):
+    session_dir = str(tmp_path / "output_1")
+    write_jpeg_session(session_dir, 10)
+    with SessionReader(session_dir) as reader:
+        assert reader.kind == "jpeg" and len(reader) == 10
+        assert reader.manifest["frames"] == 10
+        assert bytes(reader.jpeg(6)) == jpeg_of(6)
+        record = reader.record_at(50.55)
+        assert (record.frame, record.depth, record.meta) == (5, None, None)
+        assert reader.position_at(0.0) == 0 and reader.position_at(99.0) == 9
+        assert reader.position_of(3) == 3 and reader.position_of(42) is None
+        assert reader.depth(0) is None and reader.command(0) is None
+        assert [bytes(record.jpeg) for record in reader.iter_records(1, 9, 3)] == [jpeg_of(1), jpeg_of(4),
+                                                                                   jpeg_of(7)]
+
+def test_truncated_chunk_drops_missing_records(tmp_path):
+    session_dir = str(tmp_path / "output_1")
+    write_jpeg_session(session_dir, 10)
+    # Сбой при записи последнего куска: на диске только его начало
+    last_chunk = os.path.join(session_dir, CHUNK_NAME.format(2))
+    with open(last_chunk, "r+b") as f:
+        f.truncate(len(jpeg_of(8)) + 3)
+    with SessionReader(session_dir) as reader:
+        assert list(reader.frame_numbers) == list(range(9))
+
+def test_jpeg_session_without_meta(tmp_path):
+    session_dir = str(tmp_path / "output_1")
+    write_jpeg_session(session_dir, 6)
+    # Процесс камеры убит до записи meta.json
+    os.remove(os.path.join(session_dir, META_FILE))
+    with SessionReader(session_dir) as reader:
+        assert reader.kind == "jpeg" and reader.manifest == {}
+        assert len(reader) == 6 and bytes(reader.jpeg(5)) == jpeg_of(5)
+
+def test_not_a_session(tmp_path):
+    with pytest.raises(ValueError):
+        SessionReader(str(tmp_path))
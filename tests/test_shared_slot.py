@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import signal
+from application.shared_slot import SharedSlot
+
+def test_empty_slot_reads_none():
+    slot = SharedSlot(("a", "b"))
+    assert slot.read() is None
+    assert slot.sequence == 0
+
+def test_read_returns_last_write():
+    slot = SharedSlot(("a", "b"))
+    slot.write(1.0, 2.0)
+    slot.write(3.0, 4.0)
+    assert slot.read() == (3.0, 4.0)
+    assert slot.sequence == 2
+
+def _die_mid_write(slot: SharedSlot) -> None:
+    # Писатель убит между нечётным счётчиком и последним полем
+    slot.data[0] += 1
+    slot.data[1] = 5.0
+    os.kill(os.getpid(), signal.SIGKILL)
+
+def test_writer_killed_mid_write():
+    slot = SharedSlot(("a", "b"))
+    slot.write(1.0, 2.0)
+    writer = multiprocessing.get_context("fork").Process(target=_die_mid_write, args=(slot,))
+    writer.start()
+    writer.join()
+    assert writer.exitcode == -signal.SIGKILL
+    assert slot.data[0] % 2 == 1
+    # Читатель не зависает и не отдаёт половину записи
+    assert slot.read() is None
+    # Следующий писатель восстанавливает слот
+    slot.write(7.0, 8.0)
+    assert slot.read() == (7.0, 8.0)
+    assert slot.data[0] % 2 == 0
+
+def _write_pairs(slot: SharedSlot, count: int) -> None:
+    for value in range(1, count + 1):
+        slot.write(float(value), float(-value))
+
+def test_reader_never_sees_torn_values():
+    slot = SharedSlot(("a", "b"))
+    count = 20000
+    writer = multiprocessing.get_context("fork").Process(target=_write_pairs, args=(slot, count))
+    writer.start()
+    while writer.is_alive():
+        values = slot.read()
+        if values is not None:
+            assert values[0] == -values[1]
+    writer.join()
+    assert slot.read() == (float(count), float(-count))
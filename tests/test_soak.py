@@ -0,0 +1,66 @@
+import argparse
+import math
+import pytest
+from benchmarks.soak import histogram_quantile, slope, verdict
+
+STARTED = 1000.0
+
+def args(**overrides) -> argparse.Namespace:
+    values = {"warmup": 30.0, "max_latency_growth": 1.5, "latency_slack": 5.0, "max_rss_growth": 10.0,
+              "rss_slack": 4.0, "max_queue": 10.0}
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+def series(minutes: int, rss_per_hour: float = 0.0, queue: float = 0.0):
+    return [{"t": 60.0 * minute, "rss_mb": {"command": 50.0 + rss_per_hour * minute / 60},
+             "queues": {"command": queue}, "loop_rates": {"command": 100.0}, "errors": 2.0}
+            for minute in range(1, minutes + 1)]
+
+def latencies(count: int, first_ms: float, last_ms: float):
+    # Перекладки раз в секунду после прогрева, задержка растёт линейно
+    return [(STARTED + 60.0 + index, (first_ms + (last_ms - first_ms) * index / (count - 1)) / 1000)
+            for index in range(count)]
+
+def test_healthy_run_passes():
+    failures, summary = verdict(args(), series(20), latencies(30, 20.0, 20.0), STARTED, None)
+    assert failures == []
+    assert summary["end_to_end_ms"]["p50"] == pytest.approx(20.0)
+    assert summary["rss"]["command"]["mb_per_hour"] == pytest.approx(0.0)
+    assert summary["loop_rates"] == {"command": 100.0}
+    assert summary["errors"] == 0.0
+
+def test_rss_growth_fails_only_above_slack():
+    failures, _ = verdict(args(), series(60, rss_per_hour=30.0), latencies(30, 20.0, 20.0), STARTED, None)
+    assert len(failures) == 1 and failures[0].startswith("command RSS grows 30.0 MB/h")
+    # Быстрый, но маленький рост за короткий прогон — не утечка
+    failures, _ = verdict(args(), series(5, rss_per_hour=30.0), latencies(30, 20.0, 20.0), STARTED, None)
+    assert failures == []
+
+def test_latency_growth_fails():
+    failures, _ = verdict(args(), series(20), latencies(30, 20.0, 60.0), STARTED, None)
+    assert len(failures) == 1 and failures[0].startswith("end-to-end latency grew")
+    # Рост в пределах latency_slack не считается
+    failures, _ = verdict(args(), series(20), latencies(30, 2.0, 6.0), STARTED, None)
+    assert failures == []
+
+def test_flips_during_warmup_are_not_measured():
+    warmup_only = [(STARTED + index, 0.02) for index in range(20)]
+    failures, _ = verdict(args(), series(20), warmup_only, STARTED, None)
+    assert failures == ["only 0 steering flips reached the sketch"]
+
+def test_queue_and_early_exit_fail():
+    failures, summary = verdict(args(), series(20, queue=50.0), latencies(30, 20.0, 20.0), STARTED, 1)
+    assert failures == ["main.py exited early with code 1", "command queue holds 50 messages at the end"]
+    assert summary["max_queue"] == {"command": 50.0}
+
+def test_histogram_quantile_interpolates_increase():
+    before = [(0.01, 10.0), (0.1, 10.0), (math.inf, 10.0)]
+    after = [(0.01, 10.0), (0.1, 110.0), (math.inf, 110.0)]
+    # Весь прирост — в корзине 0.01..0.1
+    assert histogram_quantile(before, after, 0.5) == pytest.approx(0.055)
+    assert histogram_quantile(None, after, 0.05) == pytest.approx(0.0055)
+    assert math.isnan(histogram_quantile(after, after, 0.5))
+
+def test_slope():
+    assert slope([(0.0, 1.0), (1.0, 3.0), (2.0, 5.0)]) == pytest.approx(2.0)
+    assert slope([(0.0, 1.0)]) == 0.0
@@ -0,0 +1,76 @@
+from multiprocessing import Event
+from processes.stream_process import UPGRADE_INTERVALS, StreamProcess, StreamView
+
+STREAM = {"host": "127.0.0.1", "port": 0, "max_fps": 16.0, "min_fps": 2.0, "quality": 80, "min_quality": 60,
+          "min_scale": 0.5, "workers": 2, "full_rate_clients": 2, "client_timeout": 2.0, "depth_range": 10.0}
+
+def make_stream(**overrides) -> StreamProcess:
+    return StreamProcess(None, Event(), {**STREAM, **overrides})
+
+def levels(stream: StreamProcess):
+    return stream.quality, round(stream.scale, 4), round(stream.fps, 4)
+
+def test_degrades_quality_then_scale_then_fps():
+    stream = make_stream()
+    steps = []
+    for _ in range(7):
+        stream._adapt(sent=10, skipped=10)
+        steps.append(levels(stream))
+    assert steps == [
+        (70, 1.0, 16.0),
+        (60, 1.0, 16.0),
+        (60, 0.75, 16.0),
+        (60, 0.5625, 16.0),
+        (60, 0.5, 16.0),
+        (60, 0.5, 12.0),
+        (60, 0.5, 9.0),
+    ]
+
+def test_fps_never_below_min():
+    stream = make_stream()
+    for _ in range(50):
+        stream._adapt(sent=1, skipped=9)
+    assert stream.fps == STREAM["min_fps"]
+
+def test_moderate_skips_keep_level():
+    stream = make_stream()
+    stream._adapt(sent=10, skipped=10)
+    before = levels(stream)
+    for _ in range(10):
+        stream._adapt(sent=90, skipped=10)
+    assert levels(stream) == before
+
+def test_improves_after_good_intervals_in_reverse_order():
+    stream = make_stream()
+    for _ in range(6):
+        stream._adapt(sent=10, skipped=10)
+    assert levels(stream) == (60, 0.5, 12.0)
+    for _ in range(UPGRADE_INTERVALS - 1):
+        stream._adapt(sent=100, skipped=0)
+    assert levels(stream) == (60, 0.5, 12.0)
+    stream._adapt(sent=100, skipped=0)
+    assert levels(stream) == (60, 0.5, 16.0)
+    for _ in range(UPGRADE_INTERVALS):
+        stream._adapt(sent=100, skipped=0)
+    assert levels(stream) == (60, 0.6667, 16.0)
+
+def test_idle_interval_does_not_count_as_good():
+    stream = make_stream()
+    stream._adapt(sent=10, skipped=10)
+    for _ in range(UPGRADE_INTERVALS * 2):
+        stream._adapt(sent=0, skipped=0)
+    assert stream.quality == 70
+
+def test_fps_shared_between_clients():
+    stream = make_stream()
+    stream.views["rgb"].clients = 2
+    assert stream.fps == 16.0
+    stream.views["depth"].clients = 2
+    assert stream.fps == 8.0
+
+def test_view_keeps_newest_frame():
+    view = StreamView("rgb")
+    view.in_flight = 2
+    view.publish(2, b"second")
+    view.publish(1, b"first")
+    assert (view.number, view.jpeg, view.in_flight) == (2, b"second", 0)
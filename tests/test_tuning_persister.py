@@ -0,0 +1,69 @@
+import os
+import yaml
+import pytest
+from application.tuning_persister import CONFIG_KEY, TuningPersister
+from infrastructure.tuning_store import FileTuningStore
+
+@pytest.fixture
+def make_persister(make_state_manager):
+    def make(path: str, config_threshold: float, **kwargs) -> TuningPersister:
+        state_manager = make_state_manager()
+        state_manager.update_state(depth_threshold=config_threshold)
+        return TuningPersister(FileTuningStore(path), state_manager,
+                               config_values={"depth_threshold": config_threshold}, **kwargs)
+
+    return make
+
+def saved(path: str):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+def test_tuned_values_survive_restart(tmp_path, make_persister):
+    path = str(tmp_path / "tuned.yaml")
+    persister = make_persister(path, 0.6)
+    persister.restore()
+    persister.state_manager.update_state(depth_threshold=0.8, trim=0.1)
+    persister.stop()
+    assert saved(path) == {"depth_threshold": 0.8, "trim": 0.1, CONFIG_KEY: {"depth_threshold": 0.6}}
+
+    restarted = make_persister(path, 0.6)
+    assert restarted.restore() == {"depth_threshold": 0.8, "trim": 0.1}
+    assert restarted.state_manager.get_state()["depth_threshold"] == 0.8
+
+def test_edited_config_wins_over_tuned_value(tmp_path, caplog, make_persister):
+    path = str(tmp_path / "tuned.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"depth_threshold": 0.8, "trim": 0.1, CONFIG_KEY: {"depth_threshold": 0.6}}, f)
+    persister = make_persister(path, 0.5)
+    assert persister.restore() == {"trim": 0.1}
+    assert persister.state_manager.get_state()["depth_threshold"] == 0.5
+    assert "tuned value 0.8 discarded" in caplog.text
+    # Следующее сохранение запоминает новое значение config.yaml
+    persister.stop()
+    assert saved(path) == {"depth_threshold": 0.5, "trim": 0.1, CONFIG_KEY: {"depth_threshold": 0.5}}
+
+def test_override_without_stored_config_is_logged(tmp_path, caplog, make_persister):
+    path = str(tmp_path / "tuned.yaml")
+    with open(path, "w") as f:
+        yaml.safe_dump({"depth_threshold": 0.8}, f)
+    persister = make_persister(path, 0.6)
+    assert persister.restore() == {"depth_threshold": 0.8}
+    assert "overridden by tuned value 0.8" in caplog.text
+
+def test_changes_are_debounced(tmp_path, make_persister):
+    path = str(tmp_path / "tuned.yaml")
+    persister = make_persister(path, 0.6, debounce=1000.0, max_delay=1000.0)
+    persister.restore()
+    persister.state_manager.update_state(trim=0.2)
+    persister._poll()
+    assert not os.path.exists(path)
+    persister._poll(flush=True)
+    assert saved(path)["trim"] == 0.2
+
+def test_max_delay_bounds_a_series_of_changes(tmp_path, make_persister):
+    path = str(tmp_path / "tuned.yaml")
+    persister = make_persister(path, 0.6, debounce=1000.0, max_delay=0.0)
+    persister.restore()
+    persister.state_manager.update_state(trim=0.3)
+    persister._poll()
+    assert saved(path)["trim"] == 0.3
@@ -0,0 +1,78 @@
+from multiprocessing import Event, Value
+from typing import Dict, List, Tuple
+from processes.ui_process import STATE_LINES, UIProcess
+
+class FakeScreen:
+    def __init__(self, height: int = 40, width: int = 80):
+        self.size = (height, width)
+        self.writes: List[Tuple[int, str]] = []
+
+    def getmaxyx(self) -> Tuple[int, int]:
+        return self.size
+
+    def move(self, row: int, column: int) -> None:
+        pass
+
+    def clrtoeol(self) -> None:
+        pass
+
+    def addstr(self, row: int, column: int, text: str, attr: int = 0) -> None:
+        self.writes.append((row, text))
+
+    def erase(self) -> None:
+        pass
+
+class FakeStateManager:
+    def __init__(self, **state):
+        self.version = Value('L', 0)
+        self.state: Dict = {"mode": "manual", "gear": "forward", "trim": 0.0, "depth_threshold": 0.5,
+                            "min_distance": 2.0, "braking": False, "last_error": None}
+        self.state.update(state)
+        self.reads = 0
+
+    def update_state(self, **kwargs) -> None:
+        self.state.update(kwargs)
+        self.version.value += 1
+
+    def get_state(self) -> Dict:
+        self.reads += 1
+        return dict(self.state)
+
+def make_ui(state_manager: FakeStateManager) -> UIProcess:
+    return UIProcess(state_manager, Event())
+
+def test_only_changed_lines_are_redrawn():
+    state_manager = FakeStateManager()
+    ui = make_ui(state_manager)
+    screen = FakeScreen()
+    assert ui._draw_state(screen)
+    assert len(screen.writes) == len(STATE_LINES)
+    screen.writes.clear()
+    state_manager.update_state(gear="reverse")
+    assert ui._draw_state(screen)
+    assert screen.writes == [(ui.state_top + 2, "Gear: reverse")]
+    screen.writes.clear()
+    # Новая версия с тем же содержимым ничего не рисует
+    state_manager.update_state(gear="reverse")
+    assert not ui._draw_state(screen)
+    assert screen.writes == []
+
+def test_state_read_only_when_version_changes():
+    state_manager = FakeStateManager()
+    ui = make_ui(state_manager)
+    screen = FakeScreen()
+    ui._draw_state(screen)
+    ui._draw_state(screen)
+    ui._draw_state(screen)
+    assert state_manager.reads == 1
+    state_manager.update_state(braking=True)
+    ui._draw_state(screen)
+    assert state_manager.reads == 2
+
+def test_lines_clipped_to_screen():
+    state_manager = FakeStateManager(last_error="x" * 200)
+    ui = make_ui(state_manager)
+    screen = FakeScreen(height=ui.state_top + 3, width=20)
+    ui._draw_state(screen)
+    assert [row for row, _ in screen.writes] == [ui.state_top, ui.state_top + 1, ui.state_top + 2]
+    assert all(len(text) <= 19 for _, text in screen.writes)
@@ -0,0 +1,248 @@
+"""Симулятор Arduino со скетчем sketch_may19a.ino на псевдотерминале.
+
+ArduinoAdapter подключается к нему без изменений: arduino.port — путь,
+который печатает симулятор (или --link). Эмулируется то, что влияет на
+задержку и надёжность протокола:
+  - линия: байт занимает 10 бит на --baud, данные из pty забираются не
+    быстрее линии, поэтому отправитель упирается в её пропускную способность;
+  - приёмный буфер HardwareSerial на 64 байта: не успевшие байты теряются;
+  - readStringUntil('\\n') с таймаутом Stream 1 с: строка без перевода строки
+    ждёт секунду и применяется как есть;
+  - разбор скетча: строка без ';' в конце отбрасывается; без запятой — 90,90;
+    toInt как atol, int 16 бит, constrain 0..180;
+  - серво и ESC принимают новое значение со следующего импульса (каждые 20 мс).
+Каждое применённое значение пишется в --log (CSV) со временем, раз в секунду
+печатается сводка.
+
+Запуск из корня репозитория:
+    python -m tools.arduino_simulator --baud 9600 --link /tmp/ttyARDUINO --log logs/sim_applied.csv
+"""
+import argparse
+import csv
+import math
+import os
+import pty
+import re
+import select
+import threading
+import time
+import tty
+from collections import deque
+from typing import Callable, Deque, NamedTuple, Optional, Tuple
+
+SERIAL_RX_BUFFER = 64
+STREAM_TIMEOUT = 1.0
+SERVO_PERIOD = 0.02
+BITS_PER_BYTE = 10
+NEUTRAL = 90
+LEADING_INT = re.compile(rb"^[ \t\n\v\f\r]*([+-]?\d+)")
+TERMINATOR = b";"
+
+class AppliedCommand(NamedTuple):
+    timestamp: float
+    effective: float
+    first_byte: float
+    motor: int
+    steering: int
+    line: bytes
+    timed_out: bool
+
+def _to_int(text: bytes) -> int:
+    # String::toInt — это atol, а результат кладётся в int AVR (16 бит)
+    match = LEADING_INT.match(text)
+    value = int(match.group(1)) if match else 0
+    return (value + 0x8000) % 0x10000 - 0x8000
+
+def parse_line(line: bytes) -> Optional[Tuple[int, int]]:
+    """Значения, которые применит скетч, или None — строку без ';' он отбрасывает."""
+    # String::trim убирает те же пробельные символы, что bytes.strip
+    line = line.strip()
+    if not line.endswith(TERMINATOR):
+        return None
+    motor = steering = NEUTRAL
+    comma = line.find(b",")
+    if comma != -1:
+        motor, steering = _to_int(line[:comma]), _to_int(line[comma + 1:])
+    return max(0, min(180, motor)), max(0, min(180, steering))
+
+class SketchSimulator:
+    """Линия, приёмный буфер и loop() скетча, продвигаемые по монотонным часам."""
+
+    def __init__(self, baud_rate: int = 9600, rx_buffer: int = SERIAL_RX_BUFFER, timeout: float = STREAM_TIMEOUT,
+                 servo_period: float = SERVO_PERIOD, on_apply: Optional[Callable[[AppliedCommand], None]] = None,
+                 link: Optional[str] = None):
+        self.byte_time = BITS_PER_BYTE / baud_rate
+        self.rx_buffer = rx_buffer
+        self.timeout = timeout
+        self.servo_period = servo_period
+        self.on_apply = on_apply
+        self.master, self.slave = pty.openpty()
+        # Сырой режим до подключения адаптера; свой дескриптор slave держим открытым,
+        # иначе между переподключениями чтение master даёт EIO
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            if os.path.islink(link):
+                os.unlink(link)
+            os.symlink(self.port, link)
+        self.clock_offset = time.time() - time.monotonic()
+        self.wire: Deque[Tuple[float, int]] = deque()
+        self.wire_free_at = 0.0
+        self.rx: Deque[Tuple[float, int]] = deque()
+        self.line: Optional[bytearray] = None
+        self.line_start = 0.0
+        self.last_char = 0.0
+        self.motor = self.steering = NEUTRAL
+        self.bytes_received = 0
+        self.lines = 0
+        self.rejected = 0
+        self.stalls = 0
+        self.overflows = 0
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def _fill_wire(self, now: float) -> None:
+        # Из pty берём не больше, чем линия успеет передать за пару миллисекунд вперёд:
+        # остальное ждёт в буфере pty и тормозит отправителя, как настоящий UART
+        lookahead = max(0.002, self.byte_time)
+        start = max(self.wire_free_at, now)
+        if start - now >= lookahead:
+            return
+        try:
+            data = os.read(self.master, int((now + lookahead - start) / self.byte_time) + 1)
+        except (BlockingIOError, OSError):
+            return
+        for byte in data:
+            start += self.byte_time
+            self.wire.append((start, byte))
+        self.wire_free_at = start
+
+    def _receive(self, now: float) -> None:
+        while self.wire and self.wire[0][0] <= now:
+            arrival, byte = self.wire.popleft()
+            self.bytes_received += 1
+            if len(self.rx) >= self.rx_buffer:
+                self.overflows += 1
+            else:
+                self.rx.append((arrival, byte))
+
+    def _apply(self, at: float, timed_out: bool) -> None:
+        line = bytes(self.line)
+        self.line = None
+        self.lines += 1
+        if timed_out:
+            self.stalls += 1
+        parsed = parse_line(line)
+        if parsed is None:
+            self.rejected += 1
+            return
+        self.motor, self.steering = parsed
+        # Импульсы серво идут с периодом 20 мс: новое значение уходит со следующего
+        effective = math.ceil(at / self.servo_period) * self.servo_period
+        if self.on_apply:
+            self.on_apply(AppliedCommand(self.clock_offset + at, self.clock_offset + effective,
+                                         self.clock_offset + self.line_start, self.motor, self.steering, line,
+                                         timed_out))
+
+    def _sketch(self, now: float) -> None:
+        while True:
+            if self.line is None:
+                if not self.rx:
+                    return
+                # if (Serial.available() > 0) readStringUntil('\n')
+                self.line = bytearray()
+                self.line_start = self.last_char = self.rx[0][0]
+            while self.rx:
+                arrival, byte = self.rx.popleft()
+                self.last_char = arrival
+                if byte == 0x0A:
+                    self._apply(arrival, False)
+                    break
+                self.line.append(byte)
+            else:
+                # timedRead ждёт каждый следующий байт не дольше таймаута
+                if now - self.last_char >= self.timeout:
+                    self._apply(self.last_char + self.timeout, True)
+                    continue
+                return
+
+    def step(self, now: float) -> float:
+        """Продвигает симуляцию до now; возвращает, сколько можно ждать до следующего события."""
+        self._fill_wire(now)
+        self._receive(now)
+        self._sketch(now)
+        wait = 0.05
+        if self.wire:
+            wait = min(wait, self.wire[0][0] - now)
+        if self.line is not None:
+            wait = min(wait, self.last_char + self.timeout - now)
+        return max(wait, 0.0)
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            wait = self.step(now)
+            if self.wire_free_at - now >= max(0.002, self.byte_time):
+                time.sleep(wait)
+            else:
+                select.select([self.master], [], [], wait)
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name="arduino-simulator", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--rx-buffer", type=int, default=SERIAL_RX_BUFFER)
+    parser.add_argument("--timeout", type=float, default=STREAM_TIMEOUT, help="Stream::setTimeout, секунды")
+    parser.add_argument("--link", help="симлинк на pty, чтобы не менять arduino.port при каждом запуске")
+    parser.add_argument("--log", help="CSV с применёнными значениями")
+    args = parser.parse_args()
+
+    log_file = open(args.log, "w", newline="") if args.log else None
+    writer = csv.writer(log_file) if log_file else None
+    if writer:
+        writer.writerow(AppliedCommand._fields)
+
+    def on_apply(applied: AppliedCommand) -> None:
+        if writer:
+            writer.writerow([f"{applied.timestamp:.6f}", f"{applied.effective:.6f}", f"{applied.first_byte:.6f}",
+                             applied.motor, applied.steering, applied.line.decode(errors="replace"),
+                             int(applied.timed_out)])
+
+    simulator = SketchSimulator(args.baud, args.rx_buffer, args.timeout, on_apply=on_apply, link=args.link)
+    print(f"Arduino simulator on {simulator.port}" + (f" ({args.link})" if args.link else "") + f", {args.baud} baud")
+    simulator.start()
+    try:
+        last = (0, 0)
+        while True:
+            time.sleep(1.0)
+            lines, received = simulator.lines, simulator.bytes_received
+            print(f"motor {simulator.motor:3d} steering {simulator.steering:3d} | {lines - last[0]} lines/s, "
+                  f"{received - last[1]} B/s, stalls {simulator.stalls}, rejected {simulator.rejected}, "
+                  f"overflow {simulator.overflows} B")
+            last = (lines, received)
+            if log_file:
+                log_file.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        if log_file:
+            log_file.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
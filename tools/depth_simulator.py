@@ -0,0 +1,397 @@
+"""Замкнутый контур управления в синтетическом мире глубины, быстрее реального времени.
+
+Три части:
+  - CarModel — кинематическая модель «велосипеда»: motor_value и
+    steering_value, которые CarController отправляет в Arduino, задают
+    разгон, торможение (ESC без блокировки заднего хода) и поворот колёс
+    с ограниченной скоростью серво;
+  - ObstacleMap — стены и коробки как отрезки на плоскости с высотой;
+  - DepthRenderer — карта глубины ZED-разрешения для позы камеры: луч на
+    столбец пересекается со всеми отрезками разом, строки кадра — пол,
+    ближайшее препятствие или +inf; только векторные операции NumPy.
+ClosedLoop гоняет настоящую логику — ZEDCameraInput.process_frame (с
+FreeSpaceSteering, если включён автопилот), InputManager,
+ObstacleBrakeOverride, CommandProcessor и CarController — по
+симулированным часам: прогон идёт так быстро, как успевает рендер.
+Задержки камеры (от экспозиции до публикации) и исполнения (порт, скетч,
+импульс серво) задаются параметрами.
+
+Запуск из корня репозитория:
+    python -m tools.depth_simulator --scenario wall --gear fast --duration 10
+    python -m tools.depth_simulator --scenario slalom --autopilot --save-depth logs/sim_depth.npz
+"""
+import argparse
+import logging
+import math
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from application.car_controller import CarController
+from application.command_processor import CommandProcessor
+from application.free_space import FreeSpaceSteering
+from application.input_manager import InputManager
+from application.safety_override import ObstacleBrakeOverride
+from application.state_manager import LocalStateManager
+from core.entities.command import CarCommand
+from core.interfaces.arduino_interface import ArduinoInterface
+from infrastructure.config_manager import FileConfigManager
+from infrastructure.zed_camera import ZEDCameraInput
+
+RESOLUTIONS = {"HD2K": (1242, 2208), "HD1080": (1080, 1920), "HD720": (720, 1280), "VGA": (376, 672)}
+NEUTRAL = 90
+
+# Стены — (x1, y1, x2, y2, высота), коробки — (x центра, y центра, длина, ширина, высота); x вперёд, y влево, м
+SCENARIOS: Dict[str, Dict[str, list]] = {
+    "wall": {"walls": [[12.0, -4.0, 12.0, 4.0, 1.0]], "boxes": []},
+    "box": {"walls": [], "boxes": [[8.0, 0.0, 0.3, 0.3, 0.3]]},
+    "corridor": {"walls": [[-1.0, 1.2, 20.0, 1.2, 1.0], [-1.0, -1.2, 20.0, -1.2, 1.0],
+                           [20.0, -1.2, 20.0, 1.2, 1.0]], "boxes": []},
+    "slalom": {"walls": [[-1.0, 1.8, 24.0, 1.8, 1.0], [-1.0, -1.8, 24.0, -1.8, 1.0],
+                         [24.0, -1.8, 24.0, 1.8, 1.0]],
+               "boxes": [[5.0, 0.7, 0.4, 1.6, 0.5], [10.0, -0.7, 0.4, 1.6, 0.5],
+                         [15.0, 0.7, 0.4, 1.6, 0.5], [20.0, -0.7, 0.4, 1.6, 0.5]]},
+}
+
+@dataclass
+class CarParams:
+    wheelbase: float = 0.26
+    max_speed: float = 5.0  # м/с при motor_value 180
+    accel: float = 3.0
+    brake_decel: float = 6.0  # при motor_value 0 на ходу вперёд
+    coast_decel: float = 0.5
+    max_steer: float = 0.45  # рад при steering_value 0 или 180
+    steer_rate: float = 6.0  # рад/с, скорость серво
+    radius: float = 0.2  # круг, которым машина задевает препятствия
+    camera_offset: float = 0.15
+    camera_height: float = 0.2
+    hfov: float = 90.0
+
+class CarModel:
+    """Кинематическая модель «велосипеда»; угол колёс положительный — вправо, как steering у FreeSpaceSteering."""
+
+    def __init__(self, params: CarParams, x: float = 0.0, y: float = 0.0, heading: float = 0.0):
+        self.params = params
+        self.x, self.y, self.heading = x, y, heading
+        self.speed = 0.0
+        self.steer = 0.0
+
+    def step(self, motor_value: int, steering_value: int, dt: float) -> None:
+        p = self.params
+        throttle = (motor_value - NEUTRAL) / NEUTRAL
+        target = throttle * p.max_speed
+        if throttle < 0 and self.speed > 0:
+            # Задний ход ESC — это тормоз, пока машина не остановилась
+            self.speed = max(0.0, self.speed + throttle * p.brake_decel * dt)
+        elif target > self.speed:
+            self.speed = min(target, self.speed + (p.accel if self.speed >= 0 else p.coast_decel) * dt)
+        else:
+            self.speed = max(target, self.speed - (p.coast_decel if self.speed > 0 else p.accel) * dt)
+        steer_target = (NEUTRAL - steering_value) / NEUTRAL * p.max_steer
+        self.steer += max(-p.steer_rate * dt, min(p.steer_rate * dt, steer_target - self.steer))
+        self.heading -= self.speed / p.wheelbase * math.tan(self.steer) * dt
+        self.x += self.speed * math.cos(self.heading) * dt
+        self.y += self.speed * math.sin(self.heading) * dt
+
+    def camera_pose(self) -> Tuple[float, float, float]:
+        offset = self.params.camera_offset
+        return self.x + offset * math.cos(self.heading), self.y + offset * math.sin(self.heading), self.heading
+
+class ObstacleMap:
+    """Препятствия как отрезки: у коробки четыре стороны, у каждой своя высота."""
+
+    def __init__(self, segments: np.ndarray, heights: np.ndarray):
+        self.starts = segments[:, :2]
+        self.edges = segments[:, 2:] - segments[:, :2]
+        self.heights = heights
+        self.lengths2 = np.maximum((self.edges ** 2).sum(axis=1), 1e-12)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, list]) -> "ObstacleMap":
+        segments, heights = [], []
+        for x1, y1, x2, y2, height in config.get("walls", []):
+            segments.append((x1, y1, x2, y2))
+            heights.append(height)
+        for x, y, length, width, height in config.get("boxes", []):
+            corners = [(x - length / 2, y - width / 2), (x + length / 2, y - width / 2),
+                       (x + length / 2, y + width / 2), (x - length / 2, y + width / 2)]
+            for start, end in zip(corners, corners[1:] + corners[:1]):
+                segments.append(start + end)
+                heights.append(height)
+        return cls(np.array(segments, dtype=np.float64).reshape(-1, 4), np.array(heights, dtype=np.float64))
+
+    def clearance(self, x: float, y: float) -> float:
+        """Расстояние от точки до ближайшего препятствия."""
+        if not len(self.heights):
+            return math.inf
+        offset = np.array([x, y]) - self.starts
+        along = np.clip((offset * self.edges).sum(axis=1) / self.lengths2, 0.0, 1.0)
+        return float(np.sqrt(((offset - along[:, None] * self.edges) ** 2).sum(axis=1)).min())
+
+class DepthRenderer:
+    """Карта глубины как у ZED в метрах: глубина вдоль оптической оси, +inf дальше depth_max, -inf ближе depth_min.
+
+    Камера горизонтальная на высоте camera_height. Для каждого столбца
+    находится ближайшее препятствие по лучу; в столбце выше его верха —
+    +inf, ниже основания — пол (глубина пола зависит только от строки и
+    считается один раз), между ними — глубина препятствия. Препятствие за
+    более низким ближним в столбце не видно.
+    """
+
+    def __init__(self, width: int, height: int, hfov: float = 90.0, camera_height: float = 0.2,
+                 depth_min: float = 0.3, depth_max: float = 10.0, noise: float = 0.0, dropout: float = 0.0,
+                 seed: int = 1):
+        self.width, self.height = width, height
+        self.focal = width / 2 / math.tan(math.radians(hfov) / 2)
+        self.cx, self.cy = (width - 1) / 2, (height - 1) / 2
+        self.camera_height = camera_height
+        self.depth_min, self.depth_max = depth_min, depth_max
+        self.noise, self.dropout = noise, dropout
+        self.rng = np.random.default_rng(seed)
+        # Угол столбца от оптической оси, положительный — влево
+        self.column_angles = np.arctan((self.cx - np.arange(width)) / self.focal)
+        self.column_cos = np.cos(self.column_angles)
+        self.rows = np.arange(height, dtype=np.float32)[:, None]
+        below = np.arange(height) - self.cy
+        with np.errstate(divide="ignore"):
+            floor = np.where(below > 0, camera_height * self.focal / below, np.inf)
+        self.floor = self._clip(floor).astype(np.float32)[:, None]
+
+    def _clip(self, depth: np.ndarray) -> np.ndarray:
+        return np.where(depth > self.depth_max, np.inf, np.where(depth < self.depth_min, -np.inf, depth))
+
+    def column_hits(self, x: float, y: float, heading: float, world: ObstacleMap) -> Tuple[np.ndarray, np.ndarray]:
+        """Глубина ближайшего препятствия по каждому столбцу (+inf — луч никуда не попал) и его высота."""
+        if not len(world.heights):
+            return np.full(self.width, np.inf), np.zeros(self.width)
+        angles = heading + self.column_angles
+        dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+        ex, ey = world.edges[:, 0], world.edges[:, 1]
+        ax, ay = world.starts[:, 0] - x, world.starts[:, 1] - y
+        # p + t·d = a + u·e: t и u через векторные произведения, по всем столбцам и отрезкам сразу
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denominator = dx * ey - dy * ex
+            t = (ax * ey - ay * ex) / denominator
+            u = (ax * dy - ay * dx) / denominator
+        t[~((t > 0) & (u >= 0) & (u <= 1))] = np.inf
+        nearest = t.argmin(axis=1)
+        distance = t[np.arange(self.width), nearest]
+        return distance * self.column_cos, world.heights[nearest]
+
+    def render(self, x: float, y: float, heading: float, world: ObstacleMap) -> np.ndarray:
+        depth, obstacle_height = self.column_hits(x, y, heading, world)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            top = self.cy - self.focal * (obstacle_height - self.camera_height) / depth
+            bottom = self.cy + self.focal * self.camera_height / depth
+        top[~np.isfinite(top)] = self.cy
+        bottom[~np.isfinite(bottom)] = self.cy
+        if self.noise:
+            depth = depth * (1.0 + self.rng.normal(0.0, self.noise, depth.shape))
+        # copyto по маске вдвое быстрее пары np.where: кадр не копируется лишний раз
+        image = np.empty((self.height, self.width), dtype=np.float32)
+        image[:] = self._clip(depth).astype(np.float32)
+        np.copyto(image, np.float32(np.inf), where=self.rows < top.astype(np.float32))
+        np.copyto(image, self.floor, where=self.rows > bottom.astype(np.float32))
+        if self.dropout:
+            image[self.rng.random(image.shape, dtype=np.float32) < self.dropout] = np.nan
+        return image
+
+class SimClock:
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+class SimulatedArduino(ArduinoInterface):
+    """Команды CarController доходят до модели через actuation_delay: порт, скетч и следующий импульс серво."""
+
+    def __init__(self, clock: SimClock, delay: float):
+        self.clock = clock
+        self.delay = delay
+        self.pending: Deque[Tuple[float, int, int]] = deque()
+        self.motor_value = self.steering_value = NEUTRAL
+        self.commands = 0
+
+    def initialize(self) -> None:
+        pass
+
+    def send_command(self, motor_value: int, steering_value: int) -> None:
+        self.pending.append((self.clock() + self.delay, motor_value, steering_value))
+        self.commands += 1
+
+    def applied(self, now: float) -> Tuple[int, int]:
+        while self.pending and self.pending[0][0] <= now:
+            _, self.motor_value, self.steering_value = self.pending.popleft()
+        return self.motor_value, self.steering_value
+
+    def close(self) -> None:
+        pass
+
+class SimResult(NamedTuple):
+    sim_seconds: float
+    wall_seconds: float
+    frames: int
+    collided: bool
+    stopped: bool
+    distance: float
+    max_speed: float
+    brake_speed: float  # скорость в момент первого тормоза, м/с
+    brake_distance: float  # путь от первого тормоза до остановки или удара, м
+    clearance: float  # наименьший зазор до препятствия за прогон, м
+    detection_latency: float  # от экспозиции кадра до решения тормозить, с
+
+    @property
+    def outcome(self) -> str:
+        if self.collided:
+            return "COLLISION"
+        if self.stopped:
+            return "stopped"
+        # Машина не тронулась: порог выше глубины пола в центральном окне камеры
+        return "held" if self.max_speed == 0 else "running"
+
+    @property
+    def speedup(self) -> float:
+        return self.sim_seconds / self.wall_seconds if self.wall_seconds else math.inf
+
+class ClosedLoop:
+    """Модель, мир и рендер вокруг настоящих ZEDCameraInput, InputManager, safety, CommandProcessor и CarController."""
+
+    def __init__(self, config: Dict, world: ObstacleMap, params: Optional[CarParams] = None,
+                 resolution: Optional[str] = None, fps: Optional[float] = None, control_rate: Optional[float] = None,
+                 physics_rate: float = 200.0, camera_latency: float = 0.03, actuation_delay: float = 0.02,
+                 gear: str = "turtle", autopilot: bool = False, noise: float = 0.0, dropout: float = 0.0,
+                 start: Tuple[float, float, float] = (0.0, 0.0, 0.0)):
+        zed_config = config["zed"]
+        self.world = world
+        self.params = params or CarParams()
+        self.car = CarModel(self.params, *start)
+        height, width = RESOLUTIONS[resolution or zed_config["resolution"]]
+        self.renderer = DepthRenderer(width, height, self.params.hfov, self.params.camera_height,
+                                      zed_config["depth_min"], zed_config["depth_max"], noise, dropout)
+        self.frame_period = 1.0 / (fps or zed_config["fps"])
+        self.control_period = 1.0 / (control_rate or config["control"]["input_rate"])
+        self.dt = 1.0 / physics_rate
+        self.camera_latency = camera_latency
+        self.clock = SimClock(time.time())
+
+        self.state_manager = LocalStateManager()
+        self.depth_threshold = zed_config["depth_threshold"]
+        self.state_manager.update_state(gear=gear, mode="zed", depth_threshold=self.depth_threshold)
+        self.arduino = SimulatedArduino(self.clock, actuation_delay)
+        car_controller = CarController(self.arduino, self.state_manager)
+        safety_config = config["safety"]
+        self.safety = ObstacleBrakeOverride(self.state_manager, safety_config["brake_duration"],
+                                            safety_config["brake_strength"], safety_config["stale_timeout"],
+                                            safety_config["enabled"], clock=self.clock, wall_clock=self.clock)
+        self.input_manager = InputManager(self.state_manager, config["input"]["stale_timeout"], clock=self.clock)
+        # Камера без SDK: process_frame получает кадр рендера, автопилот создаётся как в initialize()
+        self.camera = ZEDCameraInput(None, self.state_manager, {key: value for key, value in zed_config.items()
+                                                                 if key not in ("governor", "free_space")})
+        if autopilot:
+            self.camera.free_space = FreeSpaceSteering(zed_config["free_space"])
+        self.input_manager.register_device("zed", self.camera)
+        self.command_processor = CommandProcessor(self.input_manager, car_controller, queue.Queue(), self.safety,
+                                                  safety_config["tick"])
+        self.frames: List[np.ndarray] = []
+
+    def _capture(self, now: float, keep_frames: bool) -> Tuple[float, float, float, float, float, float]:
+        depth = self.renderer.render(*self.car.camera_pose(), self.world)
+        if keep_frames:
+            self.frames.append(depth)
+        speed, brake, steering = self.camera.process_frame(None, depth, self.depth_threshold)
+        return now + self.camera_latency, now, float(self.camera.min_distance), speed, brake, steering
+
+    def run(self, duration: float, stop_on_halt: bool = True, keep_frames: bool = False) -> SimResult:
+        started_wall = time.perf_counter()
+        start = self.clock.now
+        next_frame = next_control = start
+        in_flight: Deque[Tuple[float, float, float, float, float, float]] = deque()
+        frames = 0
+        distance = max_speed = brake_speed = brake_distance = 0.0
+        braked_at: Optional[float] = None
+        detection_latency = math.nan
+        clearance = math.inf
+        collided = stopped = False
+        while self.clock.now - start < duration:
+            now = self.clock.now
+            if now >= next_frame:
+                in_flight.append(self._capture(now, keep_frames))
+                frames += 1
+                next_frame += self.frame_period
+            # Кадр публикуется через camera_latency после экспозиции, с меткой времени экспозиции
+            while in_flight and in_flight[0][0] <= now:
+                _, captured, min_distance, speed, brake, steering = in_flight.popleft()
+                self.safety.publish_obstacle(captured, min_distance, self.depth_threshold)
+                self.input_manager.publish("zed", CarCommand(speed=speed, brake=brake, steering=steering))
+            if now >= next_control:
+                self.command_processor.command_queue.put(self.input_manager.get_command())
+                self.command_processor.process()
+                if self.safety.braking and math.isnan(detection_latency):
+                    detection_latency = self.safety.last_latency
+                next_control += self.control_period
+            motor_value, steering_value = self.arduino.applied(now)
+            if braked_at is None and motor_value < NEUTRAL and self.car.speed > 0:
+                braked_at, brake_speed = distance, self.car.speed
+            x, y = self.car.x, self.car.y
+            self.car.step(motor_value, steering_value, self.dt)
+            distance += math.hypot(self.car.x - x, self.car.y - y)
+            max_speed = max(max_speed, self.car.speed)
+            self.clock.now += self.dt
+            clearance = min(clearance, self.world.clearance(self.car.x, self.car.y) - self.params.radius)
+            if clearance <= 0:
+                collided = True
+                break
+            if braked_at is not None and self.car.speed <= 0:
+                stopped = True
+                if stop_on_halt:
+                    break
+        if braked_at is not None:
+            brake_distance = distance - braked_at
+        return SimResult(self.clock.now - start, time.perf_counter() - started_wall, frames, collided, stopped,
+                         distance, max_speed, brake_speed, brake_distance, clearance, detection_latency)
+
+def world_from_scenario(name: str) -> ObstacleMap:
+    return ObstacleMap.from_config(SCENARIOS[name])
+
+def format_result(result: SimResult) -> str:
+    return (f"{result.outcome:<9} travelled {result.distance:6.2f} m, top {result.max_speed:4.2f} m/s, "
+            f"brake at {result.brake_speed:4.2f} m/s over {result.brake_distance:5.2f} m, "
+            f"min clearance {result.clearance:5.2f} m, detect {result.detection_latency * 1000:5.1f} ms | "
+            f"{result.frames} frames, {result.sim_seconds:.1f} s simulated in {result.wall_seconds:.2f} s "
+            f"({result.speedup:.1f}x)")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="wall")
+    parser.add_argument("--gear", default="turtle", choices=("turtle", "slow", "medium", "fast"))
+    parser.add_argument("--autopilot", action="store_true", help="steer with FreeSpaceSteering (zed.free_space)")
+    parser.add_argument("--resolution", choices=RESOLUTIONS, help="default: zed.resolution")
+    parser.add_argument("--fps", type=float, help="default: zed.fps")
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds")
+    parser.add_argument("--camera-latency", type=float, default=0.03)
+    parser.add_argument("--actuation-delay", type=float, default=0.02)
+    parser.add_argument("--noise", type=float, default=0.0, help="relative depth noise per column")
+    parser.add_argument("--dropout", type=float, default=0.0, help="fraction of NaN pixels")
+    parser.add_argument("--keep-driving", action="store_true", help="do not stop the run when the car halts")
+    parser.add_argument("--save-depth", help="write rendered depth frames to this .npz")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    config = FileConfigManager(args.config).get_config()
+    loop = ClosedLoop(config, world_from_scenario(args.scenario), resolution=args.resolution, fps=args.fps,
+                      camera_latency=args.camera_latency, actuation_delay=args.actuation_delay, gear=args.gear,
+                      autopilot=args.autopilot, noise=args.noise, dropout=args.dropout)
+    result = loop.run(args.duration, stop_on_halt=not args.keep_driving, keep_frames=bool(args.save_depth))
+    print(f"{args.scenario} ({args.gear}{', autopilot' if args.autopilot else ''}): {format_result(result)}")
+    print(f"final pose x {loop.car.x:.2f} y {loop.car.y:.2f} heading {math.degrees(loop.car.heading):.1f} deg")
+    if args.save_depth:
+        np.savez_compressed(args.save_depth, depth=np.stack(loop.frames))
+        print(f"{len(loop.frames)} depth frames written to {args.save_depth}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+"""Пульт для UDPRemoteInput: читает локальный геймпад и шлёт команды на машину.
+
+Оси как у GamepadInput на машине: левый стик X — руль, RT — газ, LT —
+тормоз. Пока зажата кнопка Back или геймпад недоступен, отправляется
+флаг нейтрали. --synthetic шлёт синусоиду руля без геймпада — для
+проверки по loopback.
+
+Запуск из корня репозитория:
+    python -m tools.remote_sender --host 192.168.1.50 --port 5005 --rate 100 --key-file config/remote.key
+    python -m tools.remote_sender --host 127.0.0.1 --synthetic --duration 10
+"""
+import argparse
+import math
+import random
+import socket
+import time
+from infrastructure.remote_protocol import FLAG_NEUTRAL, encode, load_key
+
+BACK_BUTTON = 6
+
+class GamepadReader:
+    def __init__(self, index: int):
+        import pygame
+        self.pygame = pygame
+        pygame.init()
+        pygame.joystick.init()
+        if index >= pygame.joystick.get_count():
+            raise RuntimeError(f"Joystick {index} not found")
+        self.joystick = pygame.joystick.Joystick(index)
+        self.joystick.init()
+        print(f"Joystick: {self.joystick.get_name()}")
+
+    def read(self):
+        try:
+            self.pygame.event.pump()
+            axes = self.joystick.get_numaxes()
+            steering = self.joystick.get_axis(0)
+            speed = (self.joystick.get_axis(5) + 1) / 2 if axes > 5 else 0.0
+            brake = (self.joystick.get_axis(2) + 1) / 2 if axes > 2 else 0.0
+            stop = self.joystick.get_numbuttons() > BACK_BUTTON and self.joystick.get_button(BACK_BUTTON)
+            return speed, brake, steering, FLAG_NEUTRAL if stop else 0
+        except self.pygame.error:
+            return 0.0, 0.0, 0.0, FLAG_NEUTRAL
+
+def synthetic(elapsed: float):
+    return 0.3, 0.0, math.sin(elapsed), 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--rate", type=float, default=100.0, help="packets per second")
+    parser.add_argument("--joystick", type=int, default=0)
+    parser.add_argument("--synthetic", action="store_true", help="send a steering sine wave instead of a gamepad")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds, 0 — never")
+    parser.add_argument("--key-file", default="", help="shared key of remote.key_file on the car")
+    args = parser.parse_args()
+
+    key = load_key(args.key_file)
+    read = synthetic if args.synthetic else (lambda elapsed, reader=GamepadReader(args.joystick): reader.read())
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # Новая сессия при каждом запуске: машина сбрасывает учёт номеров пакетов
+    session = random.getrandbits(32)
+    period = 1.0 / args.rate
+    started = next_tick = time.monotonic()
+    seq = 0
+    try:
+        while not args.duration or time.monotonic() - started < args.duration:
+            speed, brake, steering, flags = read(time.monotonic() - started)
+            sock.sendto(encode(session, seq, speed, brake, steering, flags, key=key), (args.host, args.port))
+            seq += 1
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Пакет нейтрали, чтобы машина не ждала timeout
+        sock.sendto(encode(session, seq, 0.0, 0.0, 0.0, FLAG_NEUTRAL, key=key), (args.host, args.port))
+        sock.close()
+    print(f"Sent {seq + 1} packets to {args.host}:{args.port}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,48 @@
+"""Индекс и миниатюры записанных сессий для SessionReader.
+
+Принимает каталоги датасета (manifest.json), JPEG-записи (meta.json) и
+файлы AVI. Для AVI строит индекс рядом с файлом, для всех — миниатюры
+каждого --every-го кадра, и печатает сводку: кадры, длительность,
+частоту, пропуски номеров. Без --thumbnails только индексирует и
+печатает сводку (OpenCV не нужен).
+
+Запуск из корня репозитория:
+    python -m tools.session_index logs/output_1718000000.avi datasets/session_1718000100
+    python -m tools.session_index --thumbnails --every 15 datasets/session_*
+"""
+import argparse
+from infrastructure.session_reader import SessionReader
+
+def describe(reader: SessionReader) -> str:
+    if not len(reader):
+        return f"{reader.kind}, empty"
+    timestamps = reader.timestamps
+    duration = float(timestamps[-1] - timestamps[0])
+    frames = reader.frame_numbers
+    missing = int(frames[-1] - frames[0]) + 1 - len(reader)
+    rate = (len(reader) - 1) / duration if duration > 0 else 0.0
+    return f"{reader.kind}, {len(reader)} frames, {duration:.1f} s, {rate:.1f} fps, {missing} missing"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sessions", nargs="+")
+    parser.add_argument("--thumbnails", action="store_true")
+    parser.add_argument("--every", type=int, default=30)
+    parser.add_argument("--width", type=int, default=160)
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.sessions:
+        try:
+            with SessionReader(path) as reader:
+                summary = describe(reader)
+                if args.thumbnails:
+                    summary += f", {reader.build_thumbnails(args.every, args.width)} thumbnails"
+            print(f"{path}: {summary}")
+        except Exception as e:
+            failed += 1
+            print(f"{path}: {e}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())